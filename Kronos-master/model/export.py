@@ -0,0 +1,270 @@
+import json
+import os
+
+import torch
+import torch.nn as nn
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+
+RUNTIME_BACKENDS = ('eager', 'torchscript', 'onnx')
+GRAPH_NAMES = ('encode', 'decode', 'decode_s1', 'decode_s2')
+MANIFEST_FILE = 'manifest.json'
+
+# Input/output names shared by the ONNX export and the runtime adapters
+GRAPH_SIGNATURES = {
+    'encode': (['x'], ['s1_ids', 's2_ids']),
+    'decode': (['s1_ids', 's2_ids'], ['z']),
+    'decode_s1': (['s1_ids', 's2_ids', 'stamp'], ['s1_logits', 'context']),
+    'decode_s2': (['context', 's1_ids'], ['s2_logits']),
+}
+_BATCH_SEQ = {0: 'batch', 1: 'seq'}
+GRAPH_DYNAMIC_AXES = {
+    'encode': {'x': _BATCH_SEQ, 's1_ids': _BATCH_SEQ, 's2_ids': _BATCH_SEQ},
+    'decode': {'s1_ids': _BATCH_SEQ, 's2_ids': _BATCH_SEQ, 'z': _BATCH_SEQ},
+    'decode_s1': {'s1_ids': _BATCH_SEQ, 's2_ids': _BATCH_SEQ, 'stamp': _BATCH_SEQ,
+                  's1_logits': _BATCH_SEQ, 'context': _BATCH_SEQ},
+    # decode_s2 is called with the sampled s1 token(s), whose length differs from the context
+    'decode_s2': {'context': _BATCH_SEQ, 's1_ids': {0: 'batch', 1: 'query_seq'}, 's2_logits': _BATCH_SEQ},
+}
+
+
+class _EncodeGraph(nn.Module):
+    """`KronosTokenizer.encode(x, half=True)` without the quantizer's training-only entropy terms."""
+
+    def __init__(self, tokenizer):
+        super().__init__()
+        self.tokenizer = tokenizer
+
+    def forward(self, x):
+        tokenizer = self.tokenizer
+        z = tokenizer.embed(x)
+        for layer in tokenizer.encoder:
+            z = layer(z)
+        z = tokenizer.quant_embed(z)
+        # BSQ codes are the signs of the (normalized) embedding, so the indices only depend on z > 0
+        codes = torch.where(z > 0, torch.ones_like(z), -torch.ones_like(z))
+        bsq = tokenizer.tokenizer
+        return bsq.bits_to_indices(codes[:, :, :bsq.s1_bits]), bsq.bits_to_indices(codes[:, :, bsq.s1_bits:])
+
+
+class _DecodeGraph(nn.Module):
+    def __init__(self, tokenizer):
+        super().__init__()
+        self.tokenizer = tokenizer
+
+    def forward(self, s1_ids, s2_ids):
+        return self.tokenizer.decode([s1_ids, s2_ids], half=True)
+
+
+class _DecodeS1Graph(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, s1_ids, s2_ids, stamp):
+        return self.model.decode_s1(s1_ids, s2_ids, stamp)
+
+
+class _DecodeS2Graph(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, context, s1_ids):
+        return self.model.decode_s2(context, s1_ids)
+
+
+def _example_inputs(tokenizer, model, seq_len, batch_size=2):
+    s1_ids = torch.randint(0, 2 ** model.s1_bits, (batch_size, seq_len), dtype=torch.long)
+    s2_ids = torch.randint(0, 2 ** model.s2_bits, (batch_size, seq_len), dtype=torch.long)
+    # minute, hour, weekday, day, month
+    stamp = torch.stack([torch.randint(0, high, (batch_size, seq_len)) for high in (60, 24, 7, 32, 13)], dim=-1).float()
+    return {
+        'encode': (torch.randn(batch_size, seq_len, tokenizer.d_in),),
+        'decode': (s1_ids, s2_ids),
+        'decode_s1': (s1_ids, s2_ids, stamp),
+        'decode_s2': (torch.randn(batch_size, seq_len, model.d_model), s1_ids[:, -1:]),
+    }
+
+
+def export_kronos(tokenizer, model, output_dir, runtime='torchscript', max_context=512, opset_version=18):
+    """
+    Exports the inference graphs of a Kronos tokenizer/model pair.
+
+    `KronosTokenizer.encode/decode` (half-token form) and `Kronos.decode_s1/decode_s2` are exported
+    with dynamic batch and sequence axes. Graphs are traced at `max_context` positions, which bounds
+    the sequence length they can serve (the rotary tables are captured at that size). Both modules
+    are switched to eval mode.
+
+    Args:
+        tokenizer (KronosTokenizer): The tokenizer.
+        model (Kronos): The model (fp32, eager).
+        output_dir (str): Directory for the artifacts and their manifest.
+        runtime (str): 'torchscript' or 'onnx'.
+        max_context (int): Longest sequence the exported graphs must handle.
+        opset_version (int): ONNX opset.
+
+    Returns:
+        str: Path of the written manifest.
+    """
+    if runtime not in ('torchscript', 'onnx'):
+        raise ValueError(f"Unsupported export runtime: {runtime}, expected 'torchscript' or 'onnx'")
+
+    tokenizer.eval()
+    model.eval()
+    graphs = {
+        'encode': _EncodeGraph(tokenizer).eval(),
+        'decode': _DecodeGraph(tokenizer).eval(),
+        'decode_s1': _DecodeS1Graph(model).eval(),
+        'decode_s2': _DecodeS2Graph(model).eval(),
+    }
+    example_inputs = _example_inputs(tokenizer, model, max_context)
+    os.makedirs(output_dir, exist_ok=True)
+
+    suffix = '.pt' if runtime == 'torchscript' else '.onnx'
+    with torch.no_grad():
+        for name in GRAPH_NAMES:
+            path = os.path.join(output_dir, name + suffix)
+            if runtime == 'torchscript':
+                traced = torch.jit.trace(graphs[name], example_inputs[name], check_trace=False)
+                torch.jit.save(torch.jit.freeze(traced), path)
+            else:
+                input_names, output_names = GRAPH_SIGNATURES[name]
+                torch.onnx.export(
+                    graphs[name], example_inputs[name], path,
+                    input_names=input_names,
+                    output_names=output_names,
+                    dynamic_axes=GRAPH_DYNAMIC_AXES[name],
+                    opset_version=opset_version,
+                    dynamo=False,
+                )
+
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(manifest_path, 'w') as f:
+        json.dump({
+            'runtime': runtime,
+            'max_context': max_context,
+            'graphs': {name: name + suffix for name in GRAPH_NAMES},
+            'torch_version': torch.__version__,
+        }, f, indent=2)
+    return manifest_path
+
+
+def read_manifest(artifact_dir):
+    """Returns the export manifest in `artifact_dir`, or None when nothing has been exported there."""
+    path = os.path.join(artifact_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _load_graph(path, runtime, device, intra_op_threads):
+    """Loads one exported graph as a callable mapping tensors to a tuple of tensors."""
+    if runtime == 'torchscript':
+        module = torch.jit.load(path, map_location=device)
+        module.eval()
+
+        def run(*args):
+            outputs = module(*args)
+            return outputs if isinstance(outputs, tuple) else (outputs,)
+        return run
+
+    if ort is None:
+        raise ImportError("onnxruntime is required for the 'onnx' runtime backend.")
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+    providers = ['CPUExecutionProvider']
+    if torch.device(device).type == 'cuda':
+        providers.insert(0, 'CUDAExecutionProvider')
+    session = ort.InferenceSession(path, sess_options=options, providers=providers)
+    input_names = [node.name for node in session.get_inputs()]
+
+    def run(*args):
+        feeds = {}
+        for name, arg in zip(input_names, args):
+            arg = arg.detach().cpu()
+            feeds[name] = (arg.float() if arg.is_floating_point() else arg).numpy()
+        return tuple(torch.from_numpy(output).to(device) for output in session.run(None, feeds))
+    return run
+
+
+class ExportedKronosTokenizer:
+    """Stands in for `KronosTokenizer` in `auto_regressive_inference` using exported encode/decode graphs."""
+
+    def __init__(self, encode_fn, decode_fn):
+        self._encode = encode_fn
+        self._decode = decode_fn
+
+    def encode(self, x, half=True):
+        if not half:
+            raise ValueError("Exported tokenizer graphs only support half=True.")
+        return list(self._encode(x.float()))
+
+    def decode(self, x, half=True):
+        if not half:
+            raise ValueError("Exported tokenizer graphs only support half=True.")
+        return self._decode(x[0], x[1])[0]
+
+
+class ExportedKronos:
+    """Stands in for `Kronos` in `auto_regressive_inference` using exported decode_s1/decode_s2 graphs."""
+
+    # The exported graphs take the whole window on every step; there is no incremental decoding path
+    supports_kv_cache = False
+
+    def __init__(self, decode_s1_fn, decode_s2_fn):
+        self._decode_s1 = decode_s1_fn
+        self._decode_s2 = decode_s2_fn
+
+    def decode_s1(self, s1_ids, s2_ids, stamp=None, padding_mask=None, kv_caches=None):
+        if kv_caches is not None or padding_mask is not None:
+            raise ValueError("Exported decode_s1 does not support kv_caches or padding_mask.")
+        s1_logits, context = self._decode_s1(s1_ids, s2_ids, stamp.float())
+        return s1_logits, context
+
+    def decode_s2(self, context, s1_ids, padding_mask=None):
+        if padding_mask is not None:
+            raise ValueError("Exported decode_s2 does not support padding_mask.")
+        return self._decode_s2(context.float(), s1_ids)[0]
+
+
+def load_exported_kronos(artifact_dir, runtime, device='cpu', intra_op_threads=None, max_context=None):
+    """
+    Loads exported graphs as drop-in tokenizer/model objects for `KronosPredictor`.
+
+    Args:
+        artifact_dir (str): Directory written by `export_kronos`.
+        runtime (str): 'torchscript' or 'onnx'; must match the exported artifacts.
+        device (str): Device the outputs are returned on.
+        intra_op_threads (int, optional): Intra-op thread count for the runtime.
+        max_context (int, optional): Context length the caller will use; checked against the export.
+
+    Returns:
+        Tuple[ExportedKronosTokenizer, ExportedKronos]
+    """
+    manifest = read_manifest(artifact_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No exported Kronos artifacts found in {artifact_dir}")
+    if manifest['runtime'] != runtime:
+        raise ValueError(f"Artifacts in {artifact_dir} were exported for {manifest['runtime']}, not {runtime}")
+    if max_context is not None and max_context > manifest['max_context']:
+        raise ValueError(
+            f"Artifacts were exported for max_context={manifest['max_context']}, cannot serve {max_context}"
+        )
+
+    graphs = {
+        name: _load_graph(os.path.join(artifact_dir, filename), runtime, device, intra_op_threads)
+        for name, filename in manifest['graphs'].items()
+    }
+    return (
+        ExportedKronosTokenizer(graphs['encode'], graphs['decode']),
+        ExportedKronos(graphs['decode_s1'], graphs['decode_s2']),
+    )
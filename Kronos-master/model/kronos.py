@@ -8,6 +8,7 @@ from tqdm import trange
 
 sys.path.append("../")
 from model.module import *
+from model.export import RUNTIME_BACKENDS, load_exported_kronos
 
 
 class KronosTokenizer(nn.Module, PyTorchModelHubMixin):
@@ -195,6 +196,9 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
         learn_te (bool): Whether to use learnable temporal embeddings.
     """
 
+    # Incremental decoding through `init_kv_caches` / `decode_s1(kv_caches=...)`
+    supports_kv_cache = True
+
     def __init__(self, s1_bits, s2_bits, n_layers, d_model, n_heads, ff_dim, ffn_dropout_p, attn_dropout_p, resid_dropout_p, token_dropout_p, learn_te):
         super().__init__()
         self.s1_bits = s1_bits
@@ -275,7 +279,19 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
         s2_logits = self.head.cond_forward(x2)
         return s1_logits, s2_logits
 
-    def decode_s1(self, s1_ids, s2_ids, stamp=None, padding_mask=None):
+    def init_kv_caches(self, max_len=None):
+        """
+        Creates one empty key/value cache per Transformer block for incremental decoding.
+
+        Args:
+            max_len (int, optional): Rolling window size kept by each cache. Defaults to None (unbounded).
+
+        Returns:
+            list[KVCache]: Caches to pass to `decode_s1` as `kv_caches`.
+        """
+        return [KVCache(max_len) for _ in self.transformer]
+
+    def decode_s1(self, s1_ids, s2_ids, stamp=None, padding_mask=None, kv_caches=None):
         """
         Decodes only the s1 tokens.
 
@@ -287,6 +303,8 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
             s2_ids (torch.Tensor): Input tensor of s2 token IDs. Shape: [batch_size, seq_len]
             stamp (torch.Tensor, optional): Temporal stamp tensor. Shape: [batch_size, seq_len]. Defaults to None.
             padding_mask (torch.Tensor, optional): Mask for padding tokens. Shape: [batch_size, seq_len]. Defaults to None.
+            kv_caches (list[KVCache], optional): Per-layer caches from `init_kv_caches`. When given, only the new
+                tokens are passed in and the caches are updated in place. Defaults to None.
 
         Returns:
             Tuple[torch.Tensor, torch.Tensor]:
@@ -299,8 +317,12 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
             x = x + time_embedding
         x = self.token_drop(x)
 
-        for layer in self.transformer:
-            x = layer(x, key_padding_mask=padding_mask)
+        if kv_caches is not None:
+            for layer, kv_cache in zip(self.transformer, kv_caches):
+                x = layer(x, key_padding_mask=padding_mask, kv_cache=kv_cache)
+        else:
+            for layer in self.transformer:
+                x = layer(x, key_padding_mask=padding_mask)
 
         x = self.norm(x)
 
@@ -370,23 +392,66 @@ def top_k_top_p_filtering(
         return logits
 
 
-def sample_from_logits(logits, temperature=1.0, top_k=None, top_p=None, sample_logits=True):
-    logits = logits / temperature
-    if top_k is not None or top_p is not None:
-        if top_k > 0 or top_p < 1.0:
-            logits = top_k_top_p_filtering(logits, top_k=top_k, top_p=top_p)
+# Candidates kept by the partial top-k before the nucleus cut; wider nuclei fall back to a full sort
+NUCLEUS_CANDIDATES = 64
 
-    probs = F.softmax(logits, dim=-1)
 
+def sample_from_logits(logits, temperature=1.0, top_k=None, top_p=None, sample_logits=True, generator=None):
+    """
+    Samples one token per row from `logits` ([batch, vocab]) with top-k or nucleus (top-p) filtering.
+
+    Same filtering semantics as `top_k_top_p_filtering` (top_k takes precedence over top_p), but without
+    sorting the whole vocabulary: a partial `torch.topk` selects the most likely candidates, the nucleus
+    cut zeroes their tail in place, and the draw happens among the candidates before being mapped back to
+    vocabulary ids. Only when a row's nucleus is wider than `NUCLEUS_CANDIDATES` tokens are all tokens
+    sorted. Pass a seeded `torch.Generator` for reproducible draws.
+    """
+    logits = logits / temperature
     if not sample_logits:
-        _, x = top_k(probs, k=1, dim=-1)
+        return torch.argmax(logits, dim=-1, keepdim=True)
+
+    top_k = top_k or 0
+    top_p = 1.0 if top_p is None else top_p
+    if top_k <= 0 and top_p >= 1.0:
+        return torch.multinomial(F.softmax(logits, dim=-1), num_samples=1, generator=generator)
+
+    vocab_size = logits.size(-1)
+    if top_k > 0:
+        candidate_logits, candidate_ids = torch.topk(logits, min(top_k, vocab_size), dim=-1)
+        candidate_probs = F.softmax(candidate_logits, dim=-1)
     else:
-        x = torch.multinomial(probs, num_samples=1)
+        probs = F.softmax(logits, dim=-1)
+        candidate_probs, candidate_ids = torch.topk(probs, min(NUCLEUS_CANDIDATES, vocab_size), dim=-1)
+        cumulative_probs = candidate_probs.cumsum(dim=-1)
+        if candidate_ids.size(-1) < vocab_size and bool((cumulative_probs[:, -1] <= top_p).any()):
+            candidate_probs, candidate_ids = torch.sort(probs, descending=True, dim=-1)
+            cumulative_probs = candidate_probs.cumsum(dim=-1)
+        # 保留累积概率首次超过top_p的token及其之前的所有token（multinomial无需归一化）
+        candidate_probs = candidate_probs.masked_fill_(F.pad(cumulative_probs[:, :-1], (1, 0)) > top_p, 0.0)
 
-    return x
+    choice = torch.multinomial(candidate_probs, num_samples=1, generator=generator)
+    return candidate_ids.gather(-1, choice)
 
 
-def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False):
+def kv_cache_enabled(model, use_kv_cache):
+    """KV-cache decoding is used only when requested and the model supports it (exported graphs do not)."""
+    return bool(use_kv_cache) and getattr(model, 'supports_kv_cache', False)
+
+
+def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False, use_kv_cache=False, generator=None):
+    """
+    Autoregressively samples `pred_len` future tokens and decodes them back to the input space.
+
+    With `use_kv_cache=True` the context is encoded once and every following step only runs the
+    newly sampled token through the Transformer, reusing per-layer key/value caches. While the
+    sequence fits in `max_context` this gives the same result as the uncached path (with the model in
+    eval mode, so dropout does not consume the random stream differently); beyond that the
+    caches keep a rolling window of the last `max_context` positions instead of re-encoding the
+    truncated window on every step. Models without `supports_kv_cache` always take the uncached path.
+    `generator` (a seeded `torch.Generator`) makes the sampling reproducible without touching the
+    global random state.
+    """
+    use_kv_cache = kv_cache_enabled(model, use_kv_cache)
     try:
         with torch.no_grad():
             # 输入验证
@@ -453,25 +518,21 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
                 print(f"Error in tokenizer encode: {e}")
                 return None
 
-            def get_dynamic_stamp(x_stamp, y_stamp, token_len):
+            # 完整时间戳序列，第p个token对应full_stamp[:, p]
+            full_stamp = torch.cat([x_stamp, y_stamp], dim=1)
+
+            def get_dynamic_stamp(start, token_len):
                 try:
-                    # 直接根据token长度返回对应的stamp
-                    if token_len <= x_stamp.size(1):
-                        # 如果token长度不超过x_stamp，直接截取
-                        return x_stamp[:, :token_len, :]
-                    else:
-                        # 如果需要更多长度，从y_stamp补充
-                        needed_y_len = token_len - x_stamp.size(1)
-                        needed_y_len = min(needed_y_len, y_stamp.size(1))
-                        
-                        if needed_y_len > 0:
-                            return torch.cat([x_stamp, y_stamp[:, :needed_y_len, :]], dim=1)
-                        else:
-                            return x_stamp
+                    # 按token窗口的起始位置截取对应的stamp，保证滑动窗口时时间戳与token对齐
+                    return full_stamp[:, start:start + token_len, :]
                 except Exception as e:
                     print(f"Error in get_dynamic_stamp: {e}")
                     return None
 
+            # KV缓存模式：每层缓存最近max_context个位置
+            kv_caches = model.init_kv_caches(max_len=max_context) if use_kv_cache else None
+            cached_context = None
+
             if verbose:
                 ran = trange
             else:
@@ -483,9 +544,16 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
                     try:
                         current_seq_len = initial_seq_len + i
 
-                        # 动态调整输入长度以避免超出上下文限制
-                        if current_seq_len > max_context:
-                            # 截取最近的序列
+                        if use_kv_cache:
+                            if i == 0:
+                                # 首步编码完整上下文（不超过max_context）
+                                context_len = min(current_seq_len, max_context)
+                                input_tokens = [t[:, -context_len:].contiguous() for t in x_token]
+                            else:
+                                # 后续步骤只输入新采样的token
+                                input_tokens = [t[:, -1:] for t in x_token]
+                        elif current_seq_len > max_context:
+                            # 动态调整输入长度以避免超出上下文限制，截取最近的序列
                             context_len = max_context - 1  # 留出空间给新预测
                             input_tokens = [t[:, -context_len:].contiguous() for t in x_token]
                         else:
@@ -493,7 +561,7 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
 
                         # 获取当前token长度并生成对应的stamp
                         token_len = input_tokens[0].size(1)
-                        current_stamp = get_dynamic_stamp(x_stamp, y_stamp, token_len)
+                        current_stamp = get_dynamic_stamp(current_seq_len - token_len, token_len)
                         if current_stamp is None:
                             print(f"Error: get_dynamic_stamp returned None at step {i}")
                             return None
@@ -508,13 +576,19 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
                                 last_stamp = current_stamp[:, -1:, :].repeat(1, pad_len, 1)
                                 current_stamp = torch.cat([current_stamp, last_stamp], dim=1)
 
-                        s1_logits, context = model.decode_s1(input_tokens[0], input_tokens[1], current_stamp)
+                        s1_logits, context = model.decode_s1(input_tokens[0], input_tokens[1], current_stamp, kv_caches=kv_caches)
                         if s1_logits is None or context is None:
                             print(f"Error: decode_s1 returned None at step {i}")
                             return None
+
+                        if use_kv_cache:
+                            # 累积各位置的上下文表示，供decode_s2做交叉注意力
+                            if cached_context is not None:
+                                context = torch.cat([cached_context, context], dim=1)[:, -max_context:, :]
+                            cached_context = context
                             
                         s1_logits = s1_logits[:, -1, :]
-                        sample_pre = sample_from_logits(s1_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
+                        sample_pre = sample_from_logits(s1_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True, generator=generator)
                         if sample_pre is None:
                             print(f"Error: sample_from_logits (s1) returned None at step {i}")
                             return None
@@ -525,7 +599,7 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
                             return None
                             
                         s2_logits = s2_logits[:, -1, :]
-                        sample_post = sample_from_logits(s2_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
+                        sample_post = sample_from_logits(s2_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True, generator=generator)
                         if sample_post is None:
                             print(f"Error: sample_from_logits (s2) returned None at step {i}")
                             return None
@@ -555,7 +629,7 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
                     
                 # 重新整形并平均
                 z = z.reshape(batch_size, sample_count, z.size(1), z.size(2))
-                preds = z.cpu().numpy()
+                preds = z.float().cpu().numpy()
                 preds = np.mean(preds, axis=1)
 
                 # 最终验证
@@ -578,6 +652,145 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
         return None
 
 
+def estimate_sample_chunk_size(model, batch_size, context_len, memory_budget_mb, use_kv_cache=False):
+    """
+    Estimates how many samples per series fit in `memory_budget_mb` during ensemble decoding.
+
+    Counts the float32 state each sample holds: per-layer key/value caches plus the accumulated context
+    when decoding with KV caches, otherwise the activations and attention scores of one full-window
+    forward pass. Returns None (no chunking) without a budget or for models that do not expose their
+    sizes, such as exported graphs.
+    """
+    d_model = getattr(model, 'd_model', None)
+    if not memory_budget_mb or d_model is None:
+        return None
+
+    if use_kv_cache:
+        floats = context_len * d_model * (2 * model.n_layers + 1)
+    else:
+        floats = context_len * (4 * d_model + model.ff_dim + context_len * model.n_heads)
+    per_sample_bytes = floats * 4 * batch_size
+    return max(1, int(memory_budget_mb * 1024 * 1024 // per_sample_bytes))
+
+
+# 启用收敛提前停止时，样本至少分成这么多块采样，块与块之间检查分布是否稳定
+CONVERGENCE_CHECK_CHUNKS = 4
+
+
+def sample_ensemble_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99,
+                              sample_count=8, sample_chunk_size=None, quantiles=(0.1, 0.5, 0.9), convergence_tol=0.0,
+                              verbose=False, use_kv_cache=False, generator=None):
+    """
+    Draws up to `sample_count` forecast paths per series and summarizes their distribution.
+
+    The context is tokenized and run through the Transformer once per series. Samples are decoded in
+    chunks of at most `sample_chunk_size`, each starting from copies of that shared prefix (step-0
+    logits, context and KV caches), so peak memory follows the chunk size rather than `sample_count`.
+    With `convergence_tol > 0` samples are drawn in at least `CONVERGENCE_CHECK_CHUNKS` chunks (of at
+    least one sample each), and sampling stops early once a chunk moves neither the ensemble mean nor its
+    standard deviation by more than the tolerance (in normalized units). With a single chunk the draws
+    match `auto_regressive_inference` for the same seed.
+
+    Returns:
+        dict: 'mean' and 'std' of shape [batch, pred_len, d_in], 'quantiles' of shape
+            [len(quantiles), batch, pred_len, d_in], the quantile 'levels' and the number of 'samples'
+            drawn per series; None on failure.
+    """
+    use_kv_cache = kv_cache_enabled(model, use_kv_cache)
+    try:
+        with torch.no_grad():
+            x = torch.clip(x, -clip, clip)
+            batch_size, initial_seq_len = x.size(0), x.size(1)
+            pred_len = min(pred_len, y_stamp.size(1))
+            full_stamp = torch.cat([x_stamp, y_stamp], dim=1)
+            chunk_size = max(1, min(sample_chunk_size or sample_count, sample_count))
+            if convergence_tol > 0:
+                # 一次采满就没有块间比较，提前停止永远不会触发
+                chunk_size = min(chunk_size, max(1, -(-sample_count // CONVERGENCE_CHECK_CHUNKS)))
+
+            # 上下文只编码一次，所有样本共享首步的logits、context和KV缓存
+            if use_kv_cache:
+                context_len = min(initial_seq_len, max_context)
+            else:
+                context_len = initial_seq_len if initial_seq_len <= max_context else max_context - 1
+            prefix_tokens = [t[:, -context_len:].contiguous() for t in tokenizer.encode(x, half=True)]
+            prefix_caches = model.init_kv_caches(max_len=max_context) if use_kv_cache else None
+            prefix_logits, prefix_context = model.decode_s1(
+                prefix_tokens[0], prefix_tokens[1],
+                full_stamp[:, initial_seq_len - context_len:initial_seq_len, :],
+                kv_caches=prefix_caches
+            )
+            prefix_logits = prefix_logits[:, -1, :]
+
+            ran = trange if verbose else range
+            paths = []
+            drawn = 0
+            previous_stats = None
+            while drawn < sample_count:
+                n = min(chunk_size, sample_count - drawn)
+                tokens = [t.repeat_interleave(n, dim=0) for t in prefix_tokens]
+                stamp = full_stamp.repeat_interleave(n, dim=0)
+                s1_logits = prefix_logits.repeat_interleave(n, dim=0)
+                context = prefix_context.repeat_interleave(n, dim=0)
+                kv_caches = [cache.repeat_interleave(n) for cache in prefix_caches] if use_kv_cache else None
+
+                for i in ran(pred_len):
+                    current_seq_len = initial_seq_len + i
+                    if i > 0:
+                        if use_kv_cache:
+                            step_tokens = [t[:, -1:] for t in tokens]
+                        elif current_seq_len > max_context:
+                            step_tokens = [t[:, -(max_context - 1):] for t in tokens]
+                        else:
+                            step_tokens = tokens
+                        token_len = step_tokens[0].size(1)
+                        s1_logits, step_context = model.decode_s1(
+                            step_tokens[0], step_tokens[1],
+                            stamp[:, current_seq_len - token_len:current_seq_len, :],
+                            kv_caches=kv_caches
+                        )
+                        s1_logits = s1_logits[:, -1, :]
+                        if use_kv_cache:
+                            context = torch.cat([context, step_context], dim=1)[:, -max_context:, :]
+                        else:
+                            context = step_context
+
+                    sample_pre = sample_from_logits(s1_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True, generator=generator)
+                    s2_logits = model.decode_s2(context, sample_pre)[:, -1, :]
+                    sample_post = sample_from_logits(s2_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True, generator=generator)
+                    tokens = [torch.cat([tokens[0], sample_pre], dim=1), torch.cat([tokens[1], sample_post], dim=1)]
+
+                z = tokenizer.decode([t[:, -pred_len:].contiguous() for t in tokens], half=True)
+                paths.append(z.float().reshape(batch_size, n, z.size(1), z.size(2)))
+                drawn += n
+
+                if convergence_tol > 0 and drawn < sample_count:
+                    ensemble = torch.cat(paths, dim=1)
+                    stats = torch.stack([ensemble.mean(dim=1), ensemble.std(dim=1, unbiased=False)])
+                    if previous_stats is not None and (stats - previous_stats).abs().max().item() <= convergence_tol:
+                        break
+                    previous_stats = stats
+
+            ensemble = torch.cat(paths, dim=1)  # [batch, samples, pred_len, d_in]
+            levels = [float(level) for level in (quantiles or ())]
+            if levels:
+                quantile_values = torch.quantile(ensemble, torch.tensor(levels, device=ensemble.device), dim=1)
+            else:
+                quantile_values = ensemble.new_zeros((0,) + ensemble.shape[:1] + ensemble.shape[2:])
+
+            return {
+                'mean': ensemble.mean(dim=1).cpu().numpy(),
+                'std': ensemble.std(dim=1, unbiased=False).cpu().numpy(),
+                'quantiles': quantile_values.cpu().numpy(),
+                'levels': levels,
+                'samples': ensemble.size(1),
+            }
+
+    except Exception as e:
+        print(f"Error in sample_ensemble_inference: {e}")
+        return None
+
+
 def calc_time_stamps(x_timestamp):
     time_df = pd.DataFrame()
     # 修复DatetimeIndex访问.dt属性的错误
@@ -598,23 +811,96 @@ def calc_time_stamps(x_timestamp):
     return time_df
 
 
+INFERENCE_PRECISIONS = ('fp32', 'int8', 'bf16')
+
+
+def apply_inference_precision(model, precision='fp32'):
+    """
+    Prepares a Kronos model for inference at the given precision.
+
+    'int8' applies dynamic int8 quantization to every nn.Linear (Transformer blocks, feed-forward,
+    attention projections and the dual head) and only runs on CPU. 'fp32' and 'bf16' return the model
+    unchanged; bf16 is applied as autocast around generation by `KronosPredictor`.
+
+    Args:
+        model (nn.Module): The Kronos model.
+        precision (str): One of 'fp32', 'int8' or 'bf16'.
+
+    Returns:
+        nn.Module: The model to use for inference (a quantized copy for 'int8').
+    """
+    if precision not in INFERENCE_PRECISIONS:
+        raise ValueError(f"Unsupported inference precision: {precision}, expected one of {INFERENCE_PRECISIONS}")
+    if precision == 'int8':
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def _tail(values, length):
+    """Returns the last `length` rows of a DataFrame, Series, index or array."""
+    return values.iloc[-length:] if hasattr(values, 'iloc') else values[-length:]
+
+
 class KronosPredictor:
+    """
+    Forecasts OHLCV windows with a Kronos tokenizer/model pair.
+
+    `runtime` selects how the networks run: 'eager' uses the given PyTorch modules, while 'torchscript'
+    and 'onnx' load graphs written by `model.export.export_kronos` from `artifact_dir` (fp32, without
+    KV-cache decoding; `model`/`tokenizer` may then be None). `intra_op_threads` caps the intra-op
+    thread pool of the selected runtime.
+
+    With `sample_count > 1`, `predict`/`predict_batch` decode an ensemble via `sample_ensemble_inference`:
+    samples are chunked to fit `sample_memory_mb`, stop early once the spread changes by less than
+    `convergence_tol`, and the returned DataFrame gains `<col>_std` and `<col>_q<level>` columns (e.g.
+    `close_q10`) next to the ensemble mean.
+    """
 
-    def __init__(self, model, tokenizer, device="cuda:0", max_context=512, clip=5):
+    def __init__(self, model, tokenizer, device="cuda:0", max_context=512, clip=5, use_kv_cache=True, precision='fp32',
+                 attention_backend='sdpa', runtime='eager', artifact_dir=None, intra_op_threads=None,
+                 sample_memory_mb=256, quantiles=(0.1, 0.5, 0.9), convergence_tol=0.0):
         self.tokenizer = tokenizer
         self.model = model
         self.max_context = max_context
         self.clip = clip
+        self.use_kv_cache = use_kv_cache
+        self.precision = precision
+        self.attention_backend = attention_backend
+        self.runtime = runtime
+        self.sample_memory_mb = sample_memory_mb
+        self.quantiles = tuple(quantiles or ())
+        self.convergence_tol = convergence_tol
         self.price_cols = ['open', 'high', 'low', 'close']
         self.vol_col = 'volume'
         self.amt_vol = 'amount'
         self.time_cols = ['minute', 'hour', 'weekday', 'day', 'month']
         self.device = device
 
+        if self.runtime not in RUNTIME_BACKENDS:
+            raise ValueError(f"Unsupported runtime: {self.runtime}, expected one of {RUNTIME_BACKENDS}")
+        if intra_op_threads and self.runtime != 'onnx':
+            torch.set_num_threads(intra_op_threads)
+
+        if self.runtime != 'eager':
+            if self.precision != 'fp32':
+                raise ValueError(f"Exported runtimes run in fp32, got precision={self.precision}.")
+            self.tokenizer, self.model = load_exported_kronos(
+                artifact_dir, self.runtime, device=self.device,
+                intra_op_threads=intra_op_threads, max_context=self.max_context
+            )
+            self.use_kv_cache = kv_cache_enabled(self.model, self.use_kv_cache)
+            return
+
         self.tokenizer = self.tokenizer.to(self.device)
         self.model = self.model.to(self.device)
+        set_attention_backend(self.tokenizer, self.attention_backend)
+        set_attention_backend(self.model, self.attention_backend)
+
+        if self.precision == 'int8' and torch.device(self.device).type != 'cpu':
+            raise ValueError("int8 dynamic quantization is only supported on CPU.")
+        self.model = apply_inference_precision(self.model, self.precision)
 
-    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose):
+    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, generator=None):
         try:
             # 输入验证
             if x is None or x_stamp is None or y_stamp is None:
@@ -642,8 +928,9 @@ class KronosPredictor:
                 print("Error: y_stamp_tensor contains NaN or Inf values")
                 return None
 
-            preds = auto_regressive_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
-                                              self.clip, T, top_k, top_p, sample_count, verbose)
+            with torch.autocast(device_type=torch.device(self.device).type, dtype=torch.bfloat16, enabled=self.precision == 'bf16'):
+                preds = auto_regressive_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
+                                                  self.clip, T, top_k, top_p, sample_count, verbose, self.use_kv_cache, generator)
             
             if preds is None:
                 print("Error: auto_regressive_inference returned None")
@@ -668,8 +955,28 @@ class KronosPredictor:
             print(f"Error in generate method: {e}")
             return None
 
-    def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True):
-
+    def generate_ensemble(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, generator=None):
+        """Runs `sample_ensemble_inference` on normalized numpy inputs; raises ValueError on failure."""
+        x_tensor = torch.from_numpy(np.array(x).astype(np.float32)).to(self.device)
+        x_stamp_tensor = torch.from_numpy(np.array(x_stamp).astype(np.float32)).to(self.device)
+        y_stamp_tensor = torch.from_numpy(np.array(y_stamp).astype(np.float32)).to(self.device)
+
+        chunk_size = estimate_sample_chunk_size(self.model, x_tensor.size(0), min(x_tensor.size(1), self.max_context),
+                                                self.sample_memory_mb, self.use_kv_cache)
+        with torch.autocast(device_type=torch.device(self.device).type, dtype=torch.bfloat16, enabled=self.precision == 'bf16'):
+            ensemble = sample_ensemble_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor,
+                                                 self.max_context, pred_len, self.clip, T, top_k, top_p, sample_count,
+                                                 chunk_size, self.quantiles, self.convergence_tol, verbose, self.use_kv_cache,
+                                                 generator)
+
+        if ensemble is None:
+            raise ValueError("Ensemble generation failed - returned None")
+        if not np.isfinite(ensemble['mean']).all() or not np.isfinite(ensemble['quantiles']).all():
+            raise ValueError("Ensemble prediction contains NaN or Inf values")
+        return ensemble
+
+    def _prepare_inputs(self, df, x_timestamp, y_timestamp):
+        """Validates one window and returns its normalized features, time stamps and normalization stats."""
         if not isinstance(df, pd.DataFrame):
             raise ValueError("Input must be a pandas DataFrame.")
 
@@ -697,35 +1004,17 @@ class KronosPredictor:
 
         x = (x - x_mean) / (x_std + 1e-5)
         x = np.clip(x, -self.clip, self.clip)
+        return x, x_stamp, y_stamp, x_mean, x_std
 
-        x = x[np.newaxis, :]
-        x_stamp = x_stamp[np.newaxis, :]
-        y_stamp = y_stamp[np.newaxis, :]
-
-        preds = self.generate(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose)
-
-        if preds is None:
-            raise ValueError("Prediction generation failed - returned None")
-        
-        # 确保 preds 是有效的
-        if not isinstance(preds, (np.ndarray, torch.Tensor)):
-            raise ValueError(f"Invalid prediction type: {type(preds)}")
-            
-        # Convert to numpy if it's a tensor
-        if hasattr(preds, 'cpu'):
-            preds = preds.cpu().numpy()
-        elif torch.is_tensor(preds):
-            preds = preds.detach().cpu().numpy()
-            
+    def _postprocess(self, preds, x_mean, x_std, y_timestamp):
+        """Validates the normalized predictions of one window and de-normalizes them into a DataFrame."""
         # 检查 preds 的形状和内容
         if preds.size == 0:
             raise ValueError("Prediction array is empty")
-            
+
         if np.isnan(preds).any() or np.isinf(preds).any():
             raise ValueError("Prediction contains NaN or Inf values")
-        
-        preds = preds.squeeze(0)
-        
+
         # 确保标准化参数有效
         if x_std is None or x_mean is None:
             raise ValueError("Normalization parameters (x_std, x_mean) are None")
@@ -749,3 +1038,153 @@ class KronosPredictor:
 
         pred_df = pd.DataFrame(preds, columns=self.price_cols + [self.vol_col, self.amt_vol], index=y_timestamp)
         return pred_df
+
+    def _postprocess_ensemble(self, ensemble, row, x_mean, x_std, y_timestamp):
+        """De-normalizes one series of an ensemble into its mean forecast plus spread and quantile columns."""
+        pred_df = self._postprocess(ensemble['mean'][row], x_mean, x_std, y_timestamp)
+        scale = x_std + 1e-5
+
+        extra = {}
+        std = ensemble['std'][row] * scale
+        for j, col in enumerate(pred_df.columns):
+            extra[f'{col}_std'] = std[:, j]
+        for level, values in zip(ensemble['levels'], ensemble['quantiles'][:, row]):
+            values = values * scale + x_mean
+            for j, col in enumerate(pred_df.columns):
+                extra[f'{col}_q{level * 100:g}'] = values[:, j]
+
+        return pd.concat([pred_df, pd.DataFrame(extra, index=pred_df.index)], axis=1)
+
+    def _make_generator(self, seed):
+        """Returns a `torch.Generator` seeded with `seed` on the predictor's device, or None to use the global RNG."""
+        if seed is None:
+            return None
+        return torch.Generator(device=self.device).manual_seed(int(seed))
+
+    def _generate_numpy(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, generator=None):
+        preds = self.generate(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, generator)
+
+        if preds is None:
+            raise ValueError("Prediction generation failed - returned None")
+        
+        # 确保 preds 是有效的
+        if not isinstance(preds, (np.ndarray, torch.Tensor)):
+            raise ValueError(f"Invalid prediction type: {type(preds)}")
+            
+        # Convert to numpy if it's a tensor
+        if hasattr(preds, 'cpu'):
+            preds = preds.cpu().numpy()
+        elif torch.is_tensor(preds):
+            preds = preds.detach().cpu().numpy()
+        return preds
+
+    def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True, seed=None):
+        generator = self._make_generator(seed)
+
+        x, x_stamp, y_stamp, x_mean, x_std = self._prepare_inputs(df, x_timestamp, y_timestamp)
+
+        x = x[np.newaxis, :]
+        x_stamp = x_stamp[np.newaxis, :]
+        y_stamp = y_stamp[np.newaxis, :]
+
+        if sample_count > 1:
+            ensemble = self.generate_ensemble(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, generator)
+            return self._postprocess_ensemble(ensemble, 0, x_mean, x_std, y_timestamp)
+
+        preds = self._generate_numpy(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, generator)
+        preds = preds.squeeze(0)
+        return self._postprocess(preds, x_mean, x_std, y_timestamp)
+
+    def predict_batch(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=False,
+                      seed=None):
+        """
+        Predicts several series with one autoregressive run per group of equal forecast length.
+
+        Each series is normalized with its own mean/std. Series with the same number of future time stamps are
+        trimmed to their shortest common lookback (keeping the most recent rows) and stacked into a single
+        [N, T, 6] batch, so N symbols cost one forward pass per decode step instead of N. A window that fails
+        to prepare, generate or de-normalize yields None without affecting the rest of the batch.
+
+        Args:
+            df_list (list[pd.DataFrame]): Historical windows, one per series.
+            x_timestamp_list (list): Historical time stamps matching each DataFrame.
+            y_timestamp_list (list): Future time stamps for each series.
+            pred_len (int): Number of steps to predict.
+            seed (int, optional): Seed for a dedicated sampling generator, for reproducible forecasts.
+
+        Returns:
+            list[pd.DataFrame | None]: Predictions in the same order as `df_list`, None for failed series.
+        """
+        if not (len(df_list) == len(x_timestamp_list) == len(y_timestamp_list)):
+            raise ValueError("df_list, x_timestamp_list and y_timestamp_list must have the same length.")
+
+        prepared = {}
+        for idx, (df, x_ts, y_ts) in enumerate(zip(df_list, x_timestamp_list, y_timestamp_list)):
+            try:
+                prepared[idx] = self._prepare_inputs(df, x_ts, y_ts)
+            except Exception as e:
+                print(f"Error: failed to prepare series {idx}: {e}")
+
+        # 按未来步数分组，组内裁剪到最短的共同回看长度后即可直接堆叠
+        groups = {}
+        for idx, (_, _, y_stamp, _, _) in prepared.items():
+            groups.setdefault(y_stamp.shape[0], []).append(idx)
+
+        generator = self._make_generator(seed)
+        results = [None] * len(df_list)
+        for indices in groups.values():
+            lookback = min(prepared[idx][0].shape[0] for idx in indices)
+            for idx in list(indices):
+                if prepared[idx][0].shape[0] == lookback:
+                    continue
+                try:
+                    # 裁剪后重新计算归一化参数，与单独预测同一窗口时一致
+                    prepared[idx] = self._prepare_inputs(_tail(df_list[idx], lookback), _tail(x_timestamp_list[idx], lookback),
+                                                         y_timestamp_list[idx])
+                except Exception as e:
+                    print(f"Error: failed to prepare series {idx}: {e}")
+                    indices.remove(idx)
+
+            for idx, output in self._generate_group(prepared, indices, pred_len, T, top_k, top_p, sample_count, verbose,
+                                                    generator):
+                _, _, _, x_mean, x_std = prepared[idx]
+                try:
+                    if sample_count > 1:
+                        results[idx] = self._postprocess_ensemble(output[0], output[1], x_mean, x_std, y_timestamp_list[idx])
+                    else:
+                        results[idx] = self._postprocess(output, x_mean, x_std, y_timestamp_list[idx])
+                except Exception as e:
+                    print(f"Error: failed to post-process series {idx}: {e}")
+
+        return results
+
+    def _generate_group(self, prepared, indices, pred_len, T, top_k, top_p, sample_count, verbose, generator):
+        """
+        Runs one stacked generation for `indices` and yields (idx, output) per series, where output is the
+        normalized prediction array or, for ensembles, an (ensemble, row) pair. When the stacked run fails,
+        each series is retried on its own so only the failing ones are dropped.
+        """
+        def run(group):
+            x = np.stack([prepared[idx][0] for idx in group])
+            x_stamp = np.stack([prepared[idx][1] for idx in group])
+            y_stamp = np.stack([prepared[idx][2] for idx in group])
+            if sample_count > 1:
+                ensemble = self.generate_ensemble(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose,
+                                                  generator)
+                return [(ensemble, row) for row in range(len(group))]
+            preds = self._generate_numpy(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, generator)
+            return [preds[row] for row in range(len(group))]
+
+        if not indices:
+            return
+        try:
+            outputs = run(indices)
+        except Exception as e:
+            if len(indices) == 1:
+                print(f"Error: generation failed for series {indices[0]}: {e}")
+                return
+            print(f"Error: batched generation failed, retrying {len(indices)} series one by one: {e}")
+            for idx in indices:
+                yield from self._generate_group(prepared, [idx], pred_len, T, top_k, top_p, sample_count, verbose, generator)
+            return
+        yield from zip(indices, outputs)
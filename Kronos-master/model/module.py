@@ -288,17 +288,25 @@ class RotaryPositionalEmbedding(nn.Module):
         self.sin_cached = None
 
     def _update_cos_sin_cache(self, x, seq_len):
-        if seq_len != self.seq_len_cached:
-            self.seq_len_cached = seq_len
+        # The table only grows, so incremental decoding can slice positions without rebuilding it every step
+        # Read the cache once: a shared model may be used from several inference threads
+        cos_cached, sin_cached = self.cos_cached, self.sin_cached
+        if cos_cached is None or seq_len > cos_cached.size(-2) or cos_cached.device != x.device:
             t = torch.arange(seq_len, device=x.device).type_as(self.inv_freq)
             freqs = torch.einsum('i,j->ij', t, self.inv_freq)
             emb = torch.cat((freqs, freqs), dim=-1).to(x.device)
-            self.cos_cached = emb.cos()[None, None, :, :]
-            self.sin_cached = emb.sin()[None, None, :, :]
-        return self.cos_cached, self.sin_cached
-
-    def forward(self, q, k):
-        cos, sin = self._update_cos_sin_cache(q, q.shape[-2])
+            cos_cached = emb.cos()[None, None, :, :]
+            sin_cached = emb.sin()[None, None, :, :]
+            self.cos_cached, self.sin_cached = cos_cached, sin_cached
+            self.seq_len_cached = seq_len
+        return cos_cached, sin_cached
+
+    def forward(self, q, k, offset=0):
+        """Rotate q and k whose first position is `offset` (absolute position of the first new token)."""
+        seq_len = q.shape[-2]
+        cos, sin = self._update_cos_sin_cache(q, offset + seq_len)
+        cos = cos[:, :, offset:offset + seq_len, :]
+        sin = sin[:, :, offset:offset + seq_len, :]
         return (
             (q * cos) + (self._rotate_half(q) * sin),
             (k * cos) + (self._rotate_half(k) * sin),
@@ -310,15 +318,14 @@ class RotaryPositionalEmbedding(nn.Module):
 
 
 def scaled_dot_product_attention(query, key, value, attn_mask=None, dropout_p=0.0, is_causal=False, scale=None) -> torch.Tensor:
+    """Reference attention. Boolean `attn_mask` entries set to True are excluded from attention."""
     L, S = query.size(-2), key.size(-2)
     scale_factor = 1 / math.sqrt(query.size(-1)) if scale is None else scale
-    attn_bias = torch.zeros(L, S, dtype=query.dtype).to(query.device)
+    attn_bias = torch.zeros(L, S, dtype=query.dtype, device=query.device)
 
     if is_causal:
-        assert attn_mask is None
-        temp_mask = torch.ones(L, S, dtype=torch.bool).tril(diagonal=0).to(query.device)
+        temp_mask = torch.ones(L, S, dtype=torch.bool, device=query.device).tril(diagonal=0)
         attn_bias.masked_fill_(temp_mask.logical_not(), float("-inf"))
-        attn_bias.to(query.dtype)
 
     attn_weight = query @ key.transpose(-2, -1) * scale_factor
     attn_weight += attn_bias
@@ -332,10 +339,98 @@ def scaled_dot_product_attention(query, key, value, attn_mask=None, dropout_p=0.
         attn_weight += attn_mask_bias
 
     attn_weight = torch.softmax(attn_weight, dim=-1)
-    attn_weight = torch.dropout(attn_weight, dropout_p, train=True)
+    if dropout_p > 0.0:
+        attn_weight = torch.dropout(attn_weight, dropout_p, train=True)
     return attn_weight @ value
 
 
+ATTENTION_BACKENDS = ('sdpa', 'custom')
+
+
+def attention(query, key, value, attn_mask=None, dropout_p=0.0, is_causal=False, backend='sdpa') -> torch.Tensor:
+    """
+    Dispatches attention to PyTorch's fused SDPA kernels (flash / memory-efficient / math, picked by
+    PyTorch for the device and shapes) or to the reference `scaled_dot_product_attention`.
+
+    Both backends use the same conventions: boolean `attn_mask` entries set to True are excluded,
+    and `is_causal` is aligned to the top-left corner of the `L x S` score matrix.
+    """
+    if backend == 'custom':
+        return scaled_dot_product_attention(query, key, value, attn_mask=attn_mask, dropout_p=dropout_p, is_causal=is_causal)
+    if backend != 'sdpa':
+        raise ValueError(f"Unsupported attention backend: {backend}, expected one of {ATTENTION_BACKENDS}")
+
+    if attn_mask is not None:
+        # F.scaled_dot_product_attention treats True as "may attend" and rejects is_causal together with a mask
+        if attn_mask.dtype == torch.bool:
+            attn_mask = attn_mask.logical_not()
+        if is_causal:
+            L, S = query.size(-2), key.size(-2)
+            causal = torch.ones(L, S, dtype=torch.bool, device=query.device).tril(diagonal=0)
+            if attn_mask.dtype == torch.bool:
+                attn_mask = attn_mask & causal
+            else:
+                attn_mask = attn_mask.masked_fill(causal.logical_not(), float("-inf"))
+            is_causal = False
+
+    return F.scaled_dot_product_attention(query, key, value, attn_mask=attn_mask, dropout_p=dropout_p, is_causal=is_causal)
+
+
+def set_attention_backend(module, backend):
+    """Selects the attention backend for every attention layer inside `module`."""
+    if backend not in ATTENTION_BACKENDS:
+        raise ValueError(f"Unsupported attention backend: {backend}, expected one of {ATTENTION_BACKENDS}")
+    for submodule in module.modules():
+        if isinstance(submodule, (MultiHeadAttentionWithRoPE, MultiHeadCrossAttentionWithRoPE)):
+            submodule.attn_backend = backend
+    return module
+
+
+class KVCache:
+    """
+    Per-layer key/value cache for incremental decoding.
+
+    Keys are stored after the rotary embedding has been applied, so RoPE uses absolute positions
+    (`offset`) and the attention scores only depend on relative distances. When `max_len` is set the
+    cache keeps a rolling window of the most recent `max_len` positions.
+    """
+
+    def __init__(self, max_len=None):
+        self.max_len = max_len
+        self.k = None
+        self.v = None
+        self.offset = 0  # absolute position of the next token
+
+    def __len__(self):
+        return 0 if self.k is None else self.k.size(-2)
+
+    def update(self, k, v):
+        if self.k is None:
+            self.k, self.v = k, v
+        else:
+            self.k = torch.cat([self.k, k], dim=-2)
+            self.v = torch.cat([self.v, v], dim=-2)
+        if self.max_len is not None and self.k.size(-2) > self.max_len:
+            self.k = self.k[:, :, -self.max_len:, :]
+            self.v = self.v[:, :, -self.max_len:, :]
+        self.offset += k.size(-2)
+        return self.k, self.v
+
+    def reset(self):
+        self.k = None
+        self.v = None
+        self.offset = 0
+
+    def repeat_interleave(self, repeats):
+        """Returns a new cache whose batch rows are each repeated `repeats` times (for sampling from a shared prefix)."""
+        cache = KVCache(self.max_len)
+        if self.k is not None:
+            cache.k = self.k.repeat_interleave(repeats, dim=0)
+            cache.v = self.v.repeat_interleave(repeats, dim=0)
+        cache.offset = self.offset
+        return cache
+
+
 class MultiHeadAttentionWithRoPE(nn.Module):
     def __init__(self, d_model, n_heads, attn_dropout_p=0.0, resid_dropout_p=0.0):
         super().__init__()
@@ -350,14 +445,18 @@ class MultiHeadAttentionWithRoPE(nn.Module):
         self.rotary = RotaryPositionalEmbedding(self.head_dim)
         self.attn_dropout_p = attn_dropout_p
         self.resid_dropout = nn.Dropout(resid_dropout_p)
+        self.attn_backend = 'sdpa'
 
-    def forward(self, x, key_padding_mask=None):
+    def forward(self, x, key_padding_mask=None, kv_cache=None):
         batch_size, seq_len, _ = x.shape
 
         q = self.q_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
         k = self.k_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
         v = self.v_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
 
+        if kv_cache is not None:
+            return self._forward_cached(q, k, v, kv_cache, key_padding_mask)
+
         q, k = self.rotary(q, k)
 
         if key_padding_mask is not None:
@@ -366,16 +465,40 @@ class MultiHeadAttentionWithRoPE(nn.Module):
         else:
             attn_mask = None
 
-        attn_output = scaled_dot_product_attention(
+        attn_output = attention(
             q, k, v,
             attn_mask=attn_mask,
-            dropout_p=self.attn_dropout_p,
-            is_causal=True
+            dropout_p=self.attn_dropout_p if self.training else 0.0,
+            is_causal=True,
+            backend=self.attn_backend
         )
 
         attn_output = attn_output.transpose(1, 2).contiguous().view(batch_size, seq_len, self.d_model)
         return self.resid_dropout(self.out_proj(attn_output))
 
+    def _forward_cached(self, q, k, v, kv_cache, key_padding_mask=None):
+        """Attend the new positions in q/k/v to themselves and every position held in `kv_cache`."""
+        assert key_padding_mask is None, "key_padding_mask is not supported with kv_cache"
+        batch_size, _, seq_len, _ = q.shape
+
+        q, k = self.rotary(q, k, offset=kv_cache.offset)
+        past_len = len(kv_cache)
+        dropout_p = self.attn_dropout_p if self.training else 0.0
+        k, v = kv_cache.update(k, v)
+
+        if past_len == 0:
+            attn_output = attention(q, k, v, dropout_p=dropout_p, is_causal=True, backend=self.attn_backend)
+        else:
+            # New query i sits at cache position (total - seq_len + i) and may see every key up to itself
+            total_len = k.size(-2)
+            query_pos = torch.arange(total_len - seq_len, total_len, device=q.device).unsqueeze(1)
+            key_pos = torch.arange(total_len, device=q.device).unsqueeze(0)
+            attn_mask = key_pos > query_pos if seq_len > 1 else None
+            attn_output = attention(q, k, v, attn_mask=attn_mask, dropout_p=dropout_p, backend=self.attn_backend)
+
+        attn_output = attn_output.transpose(1, 2).contiguous().view(batch_size, seq_len, self.d_model)
+        return self.resid_dropout(self.out_proj(attn_output))
+
 
 class MultiHeadCrossAttentionWithRoPE(nn.Module):
     def __init__(self, d_model, n_heads, attn_dropout_p=0.0, resid_dropout=0.0):
@@ -391,6 +514,7 @@ class MultiHeadCrossAttentionWithRoPE(nn.Module):
         self.rotary = RotaryPositionalEmbedding(self.head_dim)
         self.attn_dropout_p = attn_dropout_p
         self.resid_dropout = nn.Dropout(resid_dropout)
+        self.attn_backend = 'sdpa'
 
     def forward(self, query, key, value, key_padding_mask=None):
         batch_size, q_len, _ = query.shape
@@ -410,11 +534,12 @@ class MultiHeadCrossAttentionWithRoPE(nn.Module):
 
         is_causal_flag = self.training
 
-        attn_output = scaled_dot_product_attention(
+        attn_output = attention(
             q, k, v,
             attn_mask=attn_mask,
-            dropout_p=self.attn_dropout_p,
-            is_causal=is_causal_flag
+            dropout_p=self.attn_dropout_p if self.training else 0.0,
+            is_causal=is_causal_flag,
+            backend=self.attn_backend
         )
 
         attn_output = attn_output.transpose(1, 2).contiguous().view(batch_size, q_len, self.d_model)
@@ -479,10 +604,10 @@ class TransformerBlock(nn.Module):
         self.norm2 = RMSNorm(d_model)
         self.ffn = FeedForward(d_model, ff_dim, ffn_dropout_p)
 
-    def forward(self, x, key_padding_mask=None):
+    def forward(self, x, key_padding_mask=None, kv_cache=None):
         residual = x
         x = self.norm1(x)
-        attn_out = self.self_attn(x, key_padding_mask=key_padding_mask)
+        attn_out = self.self_attn(x, key_padding_mask=key_padding_mask, kv_cache=kv_cache)
         x = residual + attn_out
 
         residual = x
@@ -35,11 +35,13 @@ async def get_http_pool_health() -> HTTPPoolHealthResponse:
     try:
         stats = get_http_pool_stats()
         
-        # 判断健康状态
-        is_healthy = (
-            stats.get("shared_session_active", False) and
-            stats.get("total_clients", 0) > 0
-        )
+        # 判断健康状态：共享session可用，且没有主机的请求全部失败
+        hosts = stats.get("hosts", {})
+        failing_hosts = [
+            host for host, host_stats in hosts.items()
+            if host_stats["requests"] > 0 and host_stats["errors"] >= host_stats["requests"]
+        ]
+        is_healthy = stats.get("shared_session_active", False) and not failing_hosts
         
         return HTTPPoolHealthResponse(
             status="healthy" if is_healthy else "unhealthy",
@@ -96,6 +98,7 @@ async def get_connection_details() -> Dict[str, Any]:
             },
             "current_status": {
                 "shared_session_active": stats.get("shared_session_active", False),
+                "hosts": len(stats.get("hosts", {})),
                 "total_clients": stats.get("total_clients", 0),
                 "client_names": stats.get("client_names", [])
             }
@@ -106,4 +109,21 @@ async def get_connection_details() -> Dict[str, Any]:
             "connection_info": connection_info
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取连接详细信息失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"获取连接详细信息失败: {str(e)}")
+
+
+@router.get("/hosts")
+async def get_host_stats() -> Dict[str, Any]:
+    """获取按主机的连接池统计（空闲/占用连接、连接复用率、平均延迟、DNS缓存命中）"""
+    try:
+        stats = get_http_pool_stats()
+        hosts = stats.get("hosts", {})
+        
+        return {
+            "status": "success",
+            "total_hosts": len(hosts),
+            "per_host_limit": stats.get("per_host_limit", 0),
+            "hosts": hosts
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取主机连接统计失败: {str(e)}")
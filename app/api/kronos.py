@@ -29,10 +29,16 @@ async def get_kronos_health(
 ) -> KronosHealthResponse:
     """获取Kronos服务健康状态"""
     try:
-        model_loaded = service.predictor is not None
-        device = service.predictor.device if model_loaded else None
-        model_name = service.predictor.model_name if model_loaded else None
-        cache_size = len(service.prediction_cache)
+        if service.worker_pool is not None:
+            # 独立推理进程模式：模型只在工作进程中加载，按工作进程就绪状态报告
+            model_loaded = service.worker_pool.started
+            device = service.worker_pool.worker_options['device'] if model_loaded else None
+            model_name = service.kronos_config.get('model_name') if model_loaded else None
+        else:
+            model_loaded = service.predictor is not None
+            device = service.predictor.device if model_loaded else None
+            model_name = service.predictor.model_name if model_loaded else None
+        cache_size = len(service.forecast_cache)
         
         # 获取最后预测时间
         last_prediction_time = None
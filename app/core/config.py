@@ -11,6 +11,9 @@ from typing import Any, Dict, List, Optional
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Kronos多样本预测的收敛阈值默认值（标准化单位），配置与模型加载路径共用
+DEFAULT_SAMPLE_CONVERGENCE_TOL = 0.02
+
 
 class Settings(BaseSettings):
     """应用配置类"""
@@ -29,6 +32,13 @@ class Settings(BaseSettings):
             'model_name': os.getenv('KRONOS_CONFIG__MODEL_NAME', 'NeoQuasar/Kronos-Tokenizer-base'),
             'tokenizer_name': os.getenv('KRONOS_CONFIG__TOKENIZER_NAME', 'NeoQuasar/Kronos-Tokenizer-base'),
             'max_context': int(os.getenv('KRONOS_CONFIG__MAX_CONTEXT', '256')),
+            'use_kv_cache': os.getenv('KRONOS_CONFIG__USE_KV_CACHE', 'true').lower() == 'true',  # 增量解码（KV缓存）
+            'inference_precision': os.getenv('KRONOS_CONFIG__INFERENCE_PRECISION', 'fp32'),  # 推理精度: fp32/int8/bf16
+            'attention_backend': os.getenv('KRONOS_CONFIG__ATTENTION_BACKEND', 'sdpa'),  # 注意力后端: sdpa/custom
+            'runtime_backend': os.getenv('KRONOS_CONFIG__RUNTIME_BACKEND', 'eager'),  # 推理运行时: eager/torchscript/onnx
+            'export_dir': os.getenv('KRONOS_CONFIG__EXPORT_DIR', 'models/kronos_export'),  # TorchScript/ONNX导出目录
+            'intra_op_threads': int(os.getenv('KRONOS_CONFIG__INTRA_OP_THREADS', '0')),  # 推理线程数，0为默认
+            'forecast_cache_file': os.getenv('KRONOS_CONFIG__FORECAST_CACHE_FILE', 'logs/cache/kronos_forecast_cache.pkl'),  # 预测缓存持久化文件
             
             # 🎯 短线交易配置 (日内交易)
             'short_term': {
@@ -101,11 +111,19 @@ class Settings(BaseSettings):
                 'top_p': float(os.getenv('KRONOS_CONFIG__TOP_P', '0.9')),
                 'sample_count': int(os.getenv('KRONOS_CONFIG__SAMPLE_COUNT', '3'))
             },
+            'ensemble_sample_count': int(os.getenv('KRONOS_CONFIG__ENSEMBLE_SAMPLE_COUNT', '1')),  # 多样本集成预测的样本数，1为单样本（默认），>1时输出分位数
+            'sample_memory_mb': int(os.getenv('KRONOS_CONFIG__SAMPLE_MEMORY_MB', '256')),  # 多样本预测的内存预算，按此分块采样
+            'forecast_quantiles': [float(q) for q in os.getenv('KRONOS_CONFIG__FORECAST_QUANTILES', '0.1,0.5,0.9').split(',') if q.strip()],  # 输出的预测分位数
+            'sample_convergence_tol': float(os.getenv('KRONOS_CONFIG__SAMPLE_CONVERGENCE_TOL', str(DEFAULT_SAMPLE_CONVERGENCE_TOL))),  # 样本分布收敛阈值，0为不提前停止
             'update_interval_minutes': int(os.getenv('KRONOS_CONFIG__UPDATE_INTERVAL_MINUTES', '5')),
             'cache_predictions': os.getenv('KRONOS_CONFIG__CACHE_PREDICTIONS', 'true').lower() == 'true',
             'use_gpu': os.getenv('KRONOS_CONFIG__USE_GPU', 'false').lower() == 'true',
             'device': os.getenv('KRONOS_CONFIG__DEVICE', 'cpu'),
             'prediction_timeout': int(os.getenv('KRONOS_CONFIG__PREDICTION_TIMEOUT', '120')),
+            'max_concurrent_inferences': int(os.getenv('KRONOS_CONFIG__MAX_CONCURRENT_INFERENCES', '2')),  # 共享推理队列并发数
+            'inference_workers': int(os.getenv('KRONOS_CONFIG__INFERENCE_WORKERS', '0')),  # 独立推理进程数，0为进程内推理
+            'worker_torch_threads': int(os.getenv('KRONOS_CONFIG__WORKER_TORCH_THREADS', '1')),  # 每个推理进程的torch线程数
+            'worker_max_pending': int(os.getenv('KRONOS_CONFIG__WORKER_MAX_PENDING', '8')),  # 推理进程在途请求上限（背压）
             'max_retries': int(os.getenv('KRONOS_CONFIG__MAX_RETRIES', '2')),
             'target_symbols': target_symbols,
             'enhanced_analysis': os.getenv('KRONOS_CONFIG__ENHANCED_ANALYSIS', 'true').lower() == 'true',
@@ -249,6 +267,11 @@ class Settings(BaseSettings):
         'funding_rate': {
             'negative_threshold': -0.0005,  # -0.05% 阈值，只推送显著的负费率机会
             'high_threshold': 0.1
+        },
+        'momentum': {
+            'enable_prerank': False,  # 动量扫描前按1H涨跌幅×量比预筛候选（关闭时按交易对列表顺序取前20个）
+            'prerank_max_symbols': 50,  # 预筛最多拉取K线的交易对数
+            'prerank_concurrency': 5  # 预筛并发K线请求数
         }
     }, description="策略参数配置")
     
@@ -440,7 +463,11 @@ class Settings(BaseSettings):
         'max_cache_size_mb': 200,  # 增加缓存大小
         'cache_compression': True,
         'enable_prediction_cache': True,  # 启用预测结果缓存
-        'prediction_cache_ttl_minutes': 10  # 预测缓存10分钟
+        'prediction_cache_ttl_minutes': 10,  # 预测缓存10分钟
+        'max_series_rows': 5000,  # 每条K线缓存序列最多保留的K线数
+        'enable_ohlcv_store': True,  # 启用本地列式K线存储（已收盘K线落盘，只补拉缺失尾部）
+        'ohlcv_store_dir': '',  # 存储目录，留空使用 <log_path>/ohlcv_store
+        'ohlcv_store_max_backfill': 5000  # 存储停更后补齐缺口的最大K线数，超过则按新数据重建
     }, description="数据缓存配置 - 优化币圈高频交易")
     
     # 新闻分析配置
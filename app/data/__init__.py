@@ -7,9 +7,13 @@ Data pipeline module inspired by freqtrade
 from .data_provider import DataProvider
 from .data_converter import DataConverter
 from .data_cache import DataCache
+from .ohlcv_store import OHLCVStore, OHLCVSeries, get_ohlcv_store
 
 __all__ = [
     'DataProvider',
     'DataConverter', 
-    'DataCache'
+    'DataCache',
+    'OHLCVStore',
+    'OHLCVSeries',
+    'get_ohlcv_store'
 ]
\ No newline at end of file
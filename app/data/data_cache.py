@@ -15,6 +15,7 @@ import os
 
 from app.core.logging import get_logger
 from app.core.config import get_settings
+from app.data.ohlcv_store import parse_timeframe
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -23,7 +24,7 @@ settings = get_settings()
 class DataCache:
     """
     数据缓存管理器
-    支持内存缓存和磁盘缓存
+    支持内存缓存和磁盘缓存；每个 (交易对, 周期, 交易所) 缓存一条连续序列，按区间切片命中
     """
     
     def __init__(self):
@@ -33,17 +34,29 @@ class DataCache:
         self.max_memory_size = self.cache_config.get('max_cache_size_mb', 100) * 1024 * 1024
         self.ttl_minutes = self.cache_config.get('cache_ttl_minutes', 5)
         self.enable_compression = self.cache_config.get('cache_compression', True)
+        # 每条序列最多保留的K线数
+        self.max_series_rows = self.cache_config.get('max_series_rows', 5000)
+        # 序列保留期：TTL过期后仍保留，下次请求只补拉缺失的尾部
+        self.series_retention = timedelta(hours=1)
         self._cleanup_task_started = False
         
+        # 命中统计
+        self.hits = 0
+        self.misses = 0
+        self.merges = 0
+        
         # 创建缓存目录
         os.makedirs(self.cache_dir, exist_ok=True)
     
-    def _generate_cache_key(self, symbol: str, timeframe: str, exchange: str,
-                          since: Optional[datetime] = None, limit: int = 500) -> str:
-        """生成缓存键"""
-        key_parts = [symbol, timeframe, exchange, str(limit)]
-        if since:
-            key_parts.append(since.isoformat())
+    @staticmethod
+    def _normalize_timeframe(timeframe: str) -> str:
+        """周期规范名称（1H 与 1h 视为同一周期）"""
+        parsed = parse_timeframe(timeframe)
+        return parsed[0] if parsed else timeframe
+    
+    def _generate_cache_key(self, symbol: str, timeframe: str, exchange: str) -> str:
+        """生成缓存键：每个 (交易对, 周期, 交易所) 一条连续序列，任意 since/limit 都从同一序列切片"""
+        key_parts = [symbol, self._normalize_timeframe(timeframe), exchange]
         
         key_string = '|'.join(key_parts)
         return hashlib.md5(key_string.encode()).hexdigest()
@@ -71,10 +84,11 @@ class DataCache:
     
     def _cleanup_memory_cache(self):
         """清理内存缓存"""
-        # 删除过期缓存
+        # 删除超过保留期的序列（TTL内的过期序列保留，用于只补拉尾部）
+        retention_cutoff = datetime.now() - self.series_retention
         expired_keys = []
         for key, cache_entry in self.memory_cache.items():
-            if not self._is_cache_valid(cache_entry):
+            if cache_entry.get('timestamp', datetime.min) < retention_cutoff:
                 expired_keys.append(key)
         
         for key in expired_keys:
@@ -125,8 +139,8 @@ class DataCache:
                 file_path = os.path.join(self.cache_dir, filename)
                 file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
                 
-                # 删除超过1小时的缓存文件
-                if current_time - file_mtime > timedelta(hours=1):
+                # 删除超过保留期的缓存文件
+                if current_time - file_mtime > self.series_retention:
                     try:
                         os.remove(file_path)
                         logger.debug(f"Removed expired cache file: {filename}")
@@ -136,7 +150,7 @@ class DataCache:
         except Exception as e:
             logger.error(f"Disk cache cleanup failed: {e}")
     
-    def _serialize_data(self, data: pd.DataFrame) -> bytes:
+    def _serialize_data(self, data: Any) -> bytes:
         """序列化数据"""
         try:
             serialized = pickle.dumps(data)
@@ -149,7 +163,7 @@ class DataCache:
             logger.error(f"Data serialization failed: {e}")
             raise
     
-    def _deserialize_data(self, data: bytes) -> pd.DataFrame:
+    def _deserialize_data(self, data: bytes) -> Any:
         """反序列化数据"""
         try:
             if self.enable_compression:
@@ -160,6 +174,88 @@ class DataCache:
             logger.error(f"Data deserialization failed: {e}")
             raise
     
+    def _interval(self, timeframe: str) -> Optional[pd.Timedelta]:
+        parsed = parse_timeframe(timeframe)
+        return pd.Timedelta(milliseconds=parsed[1]) if parsed else None
+    
+    def _read_disk_payload(self, cache_file: str) -> Any:
+        """读取磁盘缓存文件：{'symbol', 'timeframe', 'exchange', 'data'}，旧版本文件只有DataFrame"""
+        with open(cache_file, 'rb') as f:
+            return self._deserialize_data(f.read())
+    
+    def _entry_matches(self, entry: Dict[str, Any], symbol: Optional[str],
+                       timeframe: Optional[str], exchange: Optional[str]) -> bool:
+        """序列条目是否属于给定的交易对/周期/交易所（None表示不限）"""
+        return (
+            (symbol is None or entry.get('symbol') == symbol) and
+            (timeframe is None or self._normalize_timeframe(entry.get('timeframe') or '') ==
+             self._normalize_timeframe(timeframe)) and
+            (exchange is None or entry.get('exchange') == exchange)
+        )
+    
+    def _load_entry(self, cache_key: str, symbol: str, timeframe: str, exchange: str) -> Optional[Dict[str, Any]]:
+        """获取序列条目（不检查有效期），内存未命中时从磁盘加载"""
+        if cache_key in self.memory_cache:
+            return self.memory_cache[cache_key]
+        
+        cache_file = os.path.join(self.cache_dir, f"{cache_key}.cache")
+        if not os.path.exists(cache_file):
+            return None
+        
+        try:
+            data = self._read_disk_payload(cache_file)
+            if isinstance(data, dict):
+                data = data['data']
+            
+            # 加载到内存缓存，刷新时间取文件修改时间
+            cache_entry = {
+                'data': data,
+                'timestamp': datetime.fromtimestamp(os.path.getmtime(cache_file)),
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'exchange': exchange
+            }
+            self.memory_cache[cache_key] = cache_entry
+            return cache_entry
+        except Exception as e:
+            logger.warning(f"Failed to load disk cache: {e}")
+            # 删除损坏的缓存文件
+            try:
+                os.remove(cache_file)
+            except OSError:
+                pass
+            return None
+    
+    def _select_range(self, data: pd.DataFrame, timeframe: str,
+                      since: Optional[datetime], limit: int) -> Optional[pd.DataFrame]:
+        """
+        从序列中切出请求区间，序列不能完整覆盖时返回None
+        With since: the first `limit` rows from since (fewer only when the series reaches the latest candle);
+        without: the most recent `limit` rows
+        """
+        if data.empty:
+            return None
+        
+        if since is None:
+            if len(data) < limit:
+                return None
+            return data.iloc[-limit:]
+        
+        since_ts = pd.Timestamp(since)
+        interval = self._interval(timeframe)
+        # 序列起点晚于since（超过一个周期）说明缺少头部
+        if data.index[0] > since_ts and (interval is None or data.index[0] - since_ts >= interval):
+            return None
+        selected = data[data.index >= since_ts].iloc[:limit]
+        # 不足limit条只有在序列已经延伸到最新K线时才是完整结果（交易所同样只能返回这么多），否则缺少尾部
+        if len(selected) < limit:
+            now = pd.Timestamp.now(tz='UTC')
+            if data.index.tz is None:
+                now = now.tz_localize(None)
+            if interval is None or data.index[-1] + 2 * interval <= now:
+                return None
+        return selected
+    
     async def get_ohlcv(self, symbol: str, timeframe: str, exchange: str,
                        since: Optional[datetime] = None, limit: int = 500) -> Optional[pd.DataFrame]:
         """
@@ -182,52 +278,67 @@ class DataCache:
         self._start_cleanup_task()
         
         try:
-            cache_key = self._generate_cache_key(symbol, timeframe, exchange, since, limit)
+            cache_key = self._generate_cache_key(symbol, timeframe, exchange)
+            cache_entry = self._load_entry(cache_key, symbol, timeframe, exchange)
             
-            # 检查内存缓存
-            if cache_key in self.memory_cache:
-                cache_entry = self.memory_cache[cache_key]
-                if self._is_cache_valid(cache_entry):
-                    logger.debug(f"Memory cache hit for {symbol} {timeframe}")
-                    return cache_entry['data'].copy()
-                else:
-                    del self.memory_cache[cache_key]
-            
-            # 检查磁盘缓存
-            cache_file = os.path.join(self.cache_dir, f"{cache_key}.cache")
-            if os.path.exists(cache_file):
-                file_mtime = datetime.fromtimestamp(os.path.getmtime(cache_file))
-                if datetime.now() - file_mtime < timedelta(minutes=self.ttl_minutes):
-                    try:
-                        with open(cache_file, 'rb') as f:
-                            data = self._deserialize_data(f.read())
-                        
-                        # 加载到内存缓存
-                        self.memory_cache[cache_key] = {
-                            'data': data,
-                            'timestamp': file_mtime
-                        }
-                        
-                        logger.debug(f"Disk cache hit for {symbol} {timeframe}")
-                        return data.copy()
-                    except Exception as e:
-                        logger.warning(f"Failed to load disk cache: {e}")
-                        # 删除损坏的缓存文件
-                        try:
-                            os.remove(cache_file)
-                        except OSError:
-                            pass
+            if cache_entry is not None and self._is_cache_valid(cache_entry):
+                selected = self._select_range(cache_entry['data'], timeframe, since, limit)
+                if selected is not None:
+                    self.hits += 1
+                    logger.debug(f"Cache hit for {symbol} {timeframe} ({len(selected)} rows)")
+                    return selected.copy()
             
+            self.misses += 1
             return None
             
         except Exception as e:
             logger.error(f"Cache get operation failed: {e}")
             return None
     
+    def missing_tail(self, symbol: str, timeframe: str, exchange: str, limit: int = 500) -> Optional[int]:
+        """
+        计算让缓存序列覆盖最近limit根K线所需补拉的尾部条数
+        Counts candles opened since the series was last refreshed, plus the last cached one which may have
+        been unclosed. Returns None when a full fetch is needed (no series, or it cannot cover limit)
+        """
+        if not self.cache_config.get('enable_cache', True):
+            return None
+        
+        interval = self._interval(timeframe)
+        cache_key = self._generate_cache_key(symbol, timeframe, exchange)
+        cache_entry = self._load_entry(cache_key, symbol, timeframe, exchange)
+        if interval is None or cache_entry is None or cache_entry['data'].empty:
+            return None
+        
+        elapsed = datetime.now() - cache_entry['timestamp']
+        new_candles = -(-elapsed // interval)
+        tail = int(new_candles) + 1
+        if len(cache_entry['data']) + new_candles < limit or tail >= limit:
+            return None
+        return tail
+    
+    def _merge_series(self, existing: pd.DataFrame, data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        """把新数据合并进已有序列，重叠部分以新数据为准；不相接时以新数据替换"""
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+        if existing is None or existing.empty:
+            return data
+        
+        interval = self._interval(timeframe) or pd.Timedelta(0)
+        first, last = data.index[0], data.index[-1]
+        if first > existing.index[-1] + interval or last < existing.index[0] - interval:
+            return data
+        
+        self.merges += 1
+        return pd.concat([
+            existing[existing.index < first],
+            data,
+            existing[existing.index > last]
+        ])
+    
     async def set_ohlcv(self, symbol: str, timeframe: str, exchange: str, data: pd.DataFrame,
                        since: Optional[datetime] = None, limit: int = 500):
         """
-        设置OHLCV数据缓存
+        设置OHLCV数据缓存（合并进该交易对/周期的连续序列）
         
         Args:
             symbol: 交易对
@@ -244,13 +355,26 @@ class DataCache:
         self._start_cleanup_task()
         
         try:
-            cache_key = self._generate_cache_key(symbol, timeframe, exchange, since, limit)
+            cache_key = self._generate_cache_key(symbol, timeframe, exchange)
             current_time = datetime.now()
             
+            existing = self._load_entry(cache_key, symbol, timeframe, exchange)
+            merged = self._merge_series(existing['data'] if existing else None, data, timeframe)
+            if len(merged) > self.max_series_rows:
+                merged = merged.iloc[-self.max_series_rows:]
+            
+            # 只有合并进了最新尾部时才刷新时间（补历史头部不代表序列是最新的）
+            refreshed_at = current_time
+            if existing and not merged.empty and data.index.max() < merged.index[-1]:
+                refreshed_at = existing['timestamp']
+            
             # 设置内存缓存
             self.memory_cache[cache_key] = {
-                'data': data.copy(),
-                'timestamp': current_time
+                'data': merged,
+                'timestamp': refreshed_at,
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'exchange': exchange
             }
             
             # 清理内存缓存（如果需要）
@@ -260,12 +384,17 @@ class DataCache:
             # 设置磁盘缓存
             try:
                 cache_file = os.path.join(self.cache_dir, f"{cache_key}.cache")
-                serialized_data = self._serialize_data(data)
+                serialized_data = self._serialize_data({
+                    'symbol': symbol,
+                    'timeframe': timeframe,
+                    'exchange': exchange,
+                    'data': merged
+                })
                 
                 with open(cache_file, 'wb') as f:
                     f.write(serialized_data)
                 
-                logger.debug(f"Data cached for {symbol} {timeframe}")
+                logger.debug(f"Data cached for {symbol} {timeframe} ({len(merged)} rows)")
                 
             except Exception as e:
                 logger.warning(f"Failed to write disk cache: {e}")
@@ -298,17 +427,29 @@ class DataCache:
                 logger.info("All cache invalidated")
                 return
             
-            # 选择性清除
-            keys_to_remove = []
-            
-            for key in self.memory_cache.keys():
-                # 这里需要根据缓存键的格式来判断是否匹配
-                # 简化实现：如果指定了参数，就清除所有相关缓存
-                if symbol or timeframe or exchange:
-                    keys_to_remove.append(key)
+            if symbol is not None and timeframe is not None and exchange is not None:
+                # 三者都给定时直接定位到唯一的序列
+                keys_to_remove = {self._generate_cache_key(symbol, timeframe, exchange)}
+            else:
+                # 选择性清除：按序列条目记录的交易对/周期/交易所匹配，只在磁盘上的序列同样要删除
+                keys_to_remove = {
+                    key for key, cache_entry in self.memory_cache.items()
+                    if self._entry_matches(cache_entry, symbol, timeframe, exchange)
+                }
+                for filename in os.listdir(self.cache_dir):
+                    key = filename[:-len('.cache')]
+                    if not filename.endswith('.cache') or key in keys_to_remove or key in self.memory_cache:
+                        continue
+                    try:
+                        payload = self._read_disk_payload(os.path.join(self.cache_dir, filename))
+                    except Exception:
+                        payload = None
+                    # 无法识别归属的文件（损坏或旧格式）一并删除，代价只是一次重新拉取
+                    if not isinstance(payload, dict) or self._entry_matches(payload, symbol, timeframe, exchange):
+                        keys_to_remove.add(key)
             
             for key in keys_to_remove:
-                del self.memory_cache[key]
+                self.memory_cache.pop(key, None)
                 
                 # 删除对应的磁盘缓存
                 cache_file = os.path.join(self.cache_dir, f"{key}.cache")
@@ -351,6 +492,12 @@ class DataCache:
                     'usage_bytes': disk_usage,
                     'usage_mb': round(disk_usage / 1024 / 1024, 2)
                 },
+                'series': {
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'merges': self.merges,
+                    'hit_rate': round(self.hits / (self.hits + self.misses), 4) if self.hits + self.misses else 0.0
+                },
                 'config': self.cache_config
             }
             
@@ -15,8 +15,7 @@ from app.services.binance_service import BinanceService
 from app.data.data_converter import DataConverter
 from app.data.data_cache import DataCache
 from app.utils.exceptions import DataNotFoundError
-# Temporarily commented out to avoid circular import
-# from app.services.data.unified_data_service import get_unified_data_service, DataRequest, DataSource
+# 统一数据服务在方法内延迟导入，避免 app.data <-> unified_data_service 循环导入
 
 logger = get_logger(__name__)
 
@@ -97,6 +96,7 @@ class DataProvider:
     async def _get_unified_service(self):
         """获取统一数据服务"""
         if self._unified_service is None:
+            from app.services.data.unified_data_service import get_unified_data_service
             self._unified_service = await get_unified_data_service()
         return self._unified_service
     
@@ -120,7 +120,8 @@ class DataProvider:
             OHLCV DataFrame
         """
         try:
-            # 使用统一数据服务获取数据
+            # 使用统一数据服务获取数据（已收盘K线由本地OHLCV存储提供，只补拉缺失尾部）
+            from app.services.data.unified_data_service import DataRequest, DataSource
             unified_service = await self._get_unified_service()
             
             # 转换交易所参数
@@ -181,16 +182,26 @@ class DataProvider:
                 raise ValueError(f"Unsupported exchange: {exchange}")
             
             provider = self.providers[exchange]
-            df = await provider.get_ohlcv(symbol, timeframe, since, limit)
+            
+            # 缓存序列只缺尾部时只拉取缺失的K线
+            fetch_limit = limit
+            if use_cache and self.cache and since is None:
+                fetch_limit = self.cache.missing_tail(symbol, timeframe, exchange, limit) or limit
+            
+            df = await provider.get_ohlcv(symbol, timeframe, since, fetch_limit)
             
             # 数据验证和清洗
             df = self._validate_and_clean_data(df)
             
-            # 缓存数据
+            # 缓存数据（合并进连续序列后按请求区间切片）
             if use_cache and self.cache:
                 await self.cache.set_ohlcv(
                     symbol, timeframe, exchange, df, since, limit
                 )
+                if fetch_limit < limit:
+                    merged = await self.cache.get_ohlcv(symbol, timeframe, exchange, since, limit)
+                    if merged is not None:
+                        df = merged
             
             logger.info(f"Retrieved {len(df)} rows of {symbol} {timeframe} data (legacy)")
             return df
@@ -217,6 +228,7 @@ class DataProvider:
         """
         try:
             # 使用统一数据服务的批量获取功能
+            from app.services.data.unified_data_service import DataRequest, DataSource
             unified_service = await self._get_unified_service()
             
             # 转换交易所参数
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+本地列式OHLCV存储
+Local columnar OHLCV store with memory-mapped reads
+
+每个 (交易所, 交易对, 周期) 一组只追加的列文件（timestamp/open/high/low/close/volume），
+读取通过 numpy memmap 零拷贝切片；只保存已收盘K线，调用方只需向交易所补拉缺失的尾部。
+列文件只追加、从不原地截断：重建序列时换用新一代文件，旧的memmap视图仍指向原文件，不会因文件变短而SIGBUS
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.logging import get_logger
+from app.core.config import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# 全局存储实例
+_ohlcv_store = None
+
+# 列定义：列名 -> 磁盘dtype（小端，定长）
+COLUMNS = {
+    'timestamp': np.dtype('<i8'),  # 开盘时间（毫秒）
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<f8'),
+}
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+_TIMEFRAME_UNITS_MS = {
+    'm': 60_000,
+    'h': 3_600_000,
+    'd': 86_400_000,
+    'w': 7 * 86_400_000,
+}
+
+
+def parse_timeframe(timeframe: str) -> Optional[Tuple[str, int]]:
+    """
+    解析时间周期为 (规范名称, 毫秒数)，兼容 1h/1H/15m/1D 等写法
+    月线（1M）长度不固定，返回None
+    """
+    match = re.fullmatch(r'(\d+)([mhHdDwW])', timeframe.strip())
+    if not match:
+        return None
+    count, unit = int(match.group(1)), match.group(2).lower()
+    return f"{count}{unit}", count * _TIMEFRAME_UNITS_MS[unit]
+
+
+def frame_to_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """把以时间为索引（或含timestamp列）的OHLCV DataFrame转换为列数组"""
+    if 'timestamp' in df.columns:
+        timestamps = df['timestamp']
+        if np.issubdtype(timestamps.dtype, np.integer):
+            timestamps = timestamps.to_numpy(dtype=np.int64)
+        else:
+            timestamps = pd.to_datetime(timestamps).to_numpy().astype('datetime64[ms]').astype(np.int64)
+    else:
+        timestamps = pd.DatetimeIndex(df.index).to_numpy().astype('datetime64[ms]').astype(np.int64)
+
+    arrays = {'timestamp': timestamps}
+    for column in PRICE_COLUMNS:
+        arrays[column] = df[column].to_numpy(dtype=np.float64)
+    return arrays
+
+
+def arrays_to_frame(arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """列数组转换为以timestamp为索引的DataFrame（与统一数据服务的输出格式一致）"""
+    index = pd.DatetimeIndex(
+        np.asarray(arrays['timestamp']).astype('datetime64[ms]').astype('datetime64[ns]'),
+        name='timestamp'
+    )
+    return pd.DataFrame({column: np.asarray(arrays[column]) for column in PRICE_COLUMNS}, index=index)
+
+
+class OHLCVSeries:
+    """
+    单个 (交易所, 交易对, 周期) 的列式序列
+    Append-only column files with a committed row count in meta.json; readers never see a torn append.
+    A rebuild switches to a new file generation instead of truncating files that live memmaps may still view
+    """
+
+    def __init__(self, path: str, exchange: str, symbol: str, timeframe: str, interval_ms: int):
+        self.path = path
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.interval_ms = interval_ms
+
+        self._lock = threading.Lock()
+        self._meta_file = os.path.join(path, 'meta.json')
+        self._maps: Dict[str, np.memmap] = {}
+        self._mapped_rows = 0
+        self.generation = 0
+
+        os.makedirs(path, exist_ok=True)
+        self.rows = self._load_meta()
+        self._truncate_uncommitted()
+        self._remove_stale_generations()
+
+    def _column_file(self, column: str, generation: Optional[int] = None) -> str:
+        generation = self.generation if generation is None else generation
+        suffix = f".{generation}" if generation else ''
+        return os.path.join(self.path, f"{column}{suffix}.bin")
+
+    def _load_meta(self) -> int:
+        try:
+            with open(self._meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            self.generation = int(meta.get('generation', 0))
+            if meta.get('interval_ms') != self.interval_ms:
+                logger.warning(f"⚠️ OHLCV存储周期不匹配，重建: {self.path}")
+                self.generation += 1
+                return 0
+            return int(meta.get('rows', 0))
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"⚠️ OHLCV存储元数据损坏，重建: {self.path} - {e}")
+            return 0
+
+    def _remove_stale_generations(self):
+        """删除旧一代列文件（重建时仍被映射、当时未能删除的文件在这里补删）"""
+        current = {os.path.basename(self._column_file(column)) for column in COLUMNS}
+        for filename in os.listdir(self.path):
+            if filename.endswith('.bin') and filename not in current:
+                try:
+                    os.remove(os.path.join(self.path, filename))
+                except OSError:
+                    pass
+
+    def _write_meta(self):
+        tmp_file = f"{self._meta_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'exchange': self.exchange,
+                'symbol': self.symbol,
+                'timeframe': self.timeframe,
+                'interval_ms': self.interval_ms,
+                'generation': self.generation,
+                'rows': self.rows,
+                'columns': {column: dtype.str for column, dtype in COLUMNS.items()},
+                'updated_at': int(time.time() * 1000)
+            }, f)
+        os.replace(tmp_file, self._meta_file)
+
+    def _truncate_uncommitted(self):
+        """
+        截掉元数据未提交的尾部（追加过程中崩溃留下的半写数据）
+        Only bytes past the committed rows are cut, which no memmap ever covers; a missing or short column
+        file starts a fresh generation
+        """
+        for column, dtype in COLUMNS.items():
+            column_file = self._column_file(column)
+            committed_size = self.rows * dtype.itemsize
+            if not os.path.exists(column_file):
+                if self.rows:
+                    logger.warning(f"⚠️ OHLCV存储缺少列文件 {column}，重建: {self.path}")
+                    self._start_generation()
+                    return
+                open(column_file, 'wb').close()
+            elif os.path.getsize(column_file) != committed_size:
+                if os.path.getsize(column_file) < committed_size:
+                    logger.warning(f"⚠️ OHLCV存储列文件 {column} 不完整，重建: {self.path}")
+                    self._start_generation()
+                    return
+                os.truncate(column_file, committed_size)
+
+    def _start_generation(self):
+        """换用新一代空列文件并提交元数据；旧文件不截断，已映射的视图继续有效"""
+        previous = self.generation
+        self._maps = {}
+        self._mapped_rows = 0
+        self.rows = 0
+        self.generation += 1
+        for column in COLUMNS:
+            open(self._column_file(column), 'wb').close()
+        self._write_meta()
+        for column in COLUMNS:
+            try:
+                os.remove(self._column_file(column, previous))
+            except OSError:
+                pass  # 仍被映射（Windows）时留待下次打开序列时删除
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        """按当前行数映射列文件（行数变化时重新映射）"""
+        if self.rows == 0:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        if self._mapped_rows != self.rows:
+            self._maps = {
+                column: np.memmap(self._column_file(column), dtype=dtype, mode='r', shape=(self.rows,))
+                for column, dtype in COLUMNS.items()
+            }
+            self._mapped_rows = self.rows
+        return self._maps
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        return int(self._columns()['timestamp'][0]) if self.rows else None
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._columns()['timestamp'][-1]) if self.rows else None
+
+    def read_arrays(
+        self,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        读取 [start_ms, end_ms) 内的K线列（零拷贝memmap切片）
+        Read-only views; limit keeps the most recent rows of the range
+        """
+        with self._lock:
+            columns = self._columns()
+            timestamps = columns['timestamp']
+            lo = int(np.searchsorted(timestamps, start_ms, side='left')) if start_ms is not None else 0
+            hi = int(np.searchsorted(timestamps, end_ms, side='left')) if end_ms is not None else self.rows
+            if limit is not None:
+                lo = max(lo, hi - limit)
+            return {column: values[lo:hi] for column, values in columns.items()}
+
+    def read_frame(
+        self,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> pd.DataFrame:
+        """读取为DataFrame（pandas组装块时会复制一次）"""
+        return arrays_to_frame(self.read_arrays(start_ms, end_ms, limit))
+
+    def append(self, arrays: Dict[str, np.ndarray], now_ms: Optional[int] = None) -> int:
+        """
+        追加已收盘K线，返回新增行数
+        Only rows strictly after the last stored candle and already closed at now_ms are written.
+        A batch that does not overlap or touch the stored tail would leave a hole, so the series is rebuilt from it;
+        callers should backfill the gap first (see missing_tail)
+        """
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        timestamps = np.asarray(arrays['timestamp'], dtype=np.int64)
+        if timestamps.size == 0:
+            return 0
+
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        keep = np.concatenate(([True], np.diff(timestamps) > 0))
+        keep &= timestamps + self.interval_ms <= now_ms
+
+        with self._lock:
+            last_ts = int(self._columns()['timestamp'][-1]) if self.rows else None
+            if last_ts is not None:
+                if timestamps[0] > last_ts + self.interval_ms:
+                    logger.info(
+                        f"🔄 OHLCV存储与新数据不连续，重建: {self.exchange} {self.symbol} {self.timeframe}"
+                    )
+                    self._start_generation()
+                else:
+                    keep &= timestamps > last_ts
+
+            if not keep.any():
+                return 0
+
+            rows = order[keep]
+            for column, dtype in COLUMNS.items():
+                values = np.asarray(arrays[column])[rows].astype(dtype, copy=False)
+                with open(self._column_file(column), 'ab') as f:
+                    f.write(values.tobytes())
+            self.rows += int(rows.size)
+            self._write_meta()
+            return int(rows.size)
+
+    def append_frame(self, df: pd.DataFrame, now_ms: Optional[int] = None) -> int:
+        """追加DataFrame中的已收盘K线"""
+        if df is None or df.empty:
+            return 0
+        return self.append(frame_to_arrays(df), now_ms)
+
+    def reset(self):
+        """清空序列"""
+        with self._lock:
+            self._start_generation()
+
+    def missing_tail(self, now_ms: Optional[int] = None) -> Optional[int]:
+        """最后一根已存K线之后开盘的K线数（含当前未收盘K线），空序列返回None"""
+        last_ts = self.last_timestamp
+        if last_ts is None:
+            return None
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        return max(0, (now_ms - last_ts) // self.interval_ms)
+
+
+class OHLCVStore:
+    """
+    本地OHLCV存储
+    Directory of per-(exchange, symbol, timeframe) column files
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        cache_config = settings.cache_config
+        self.enabled = cache_config.get('enable_ohlcv_store', True)
+        self.root = root or cache_config.get('ohlcv_store_dir') or os.path.join(settings.log_path, 'ohlcv_store')
+        self._series: Dict[Tuple[str, str, str], OHLCVSeries] = {}
+        self._lock = threading.Lock()
+
+        # 统计
+        self.store_reads = 0
+        self.rows_served = 0
+        self.rows_appended = 0
+
+    @staticmethod
+    def _safe_name(value: str) -> str:
+        return re.sub(r'[^A-Za-z0-9._-]', '_', value)
+
+    def series(self, exchange: str, symbol: str, timeframe: str) -> Optional[OHLCVSeries]:
+        """获取序列，不支持的周期（如月线）返回None"""
+        parsed = parse_timeframe(timeframe)
+        if parsed is None:
+            return None
+        canonical, interval_ms = parsed
+
+        key = (exchange.lower(), symbol.upper(), canonical)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    path = os.path.join(self.root, *(self._safe_name(part) for part in key))
+                    series = OHLCVSeries(path, key[0], key[1], canonical, interval_ms)
+                    self._series[key] = series
+        return series
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计"""
+        return {
+            'enabled': self.enabled,
+            'root': self.root,
+            'open_series': len(self._series),
+            'stored_rows': sum(series.rows for series in self._series.values()),
+            'store_reads': self.store_reads,
+            'rows_served': self.rows_served,
+            'rows_appended': self.rows_appended
+        }
+
+
+def get_ohlcv_store() -> OHLCVStore:
+    """
+    获取本地OHLCV存储实例
+    Get the process-wide OHLCV store
+    """
+    global _ohlcv_store
+
+    if _ohlcv_store is None:
+        _ohlcv_store = OHLCVStore()
+
+    return _ohlcv_store
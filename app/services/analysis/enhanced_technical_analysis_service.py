@@ -14,6 +14,7 @@ import talib
 
 from app.core.logging import get_logger
 from app.core.config import get_settings
+from app.services.analysis.market_snapshot import MarketSnapshot
 from app.services.exchanges.service_manager import get_exchange_service
 from app.schemas.trading import SignalStrength, TradingAction
 
@@ -131,14 +132,15 @@ class EnhancedTechnicalAnalysisService:
             self.logger.error(f"❌ 增强版技术分析服务初始化失败: {e}")
             raise
     
-    async def analyze_symbol(self, symbol: str, timeframe: str = "1h") -> Optional[EnhancedTechnicalAnalysis]:
+    async def analyze_symbol(self, symbol: str, timeframe: str = "1h",
+                             snapshot: Optional[MarketSnapshot] = None) -> Optional[EnhancedTechnicalAnalysis]:
         """分析交易对"""
         try:
             if not self.initialized:
                 await self.initialize()
             
             # 获取市场数据
-            market_data = await self._fetch_market_data(symbol, timeframe)
+            market_data = await self._fetch_market_data(symbol, timeframe, snapshot=snapshot)
             if market_data is None or len(market_data) < 100:
                 self.logger.warning(f"数据不足，无法分析 {symbol}")
                 return None
@@ -193,11 +195,15 @@ class EnhancedTechnicalAnalysisService:
             self.logger.error(f"技术分析失败 {symbol}: {e}")
             return None
     
-    async def _fetch_market_data(self, symbol: str, timeframe: str = "1h", limit: int = 200) -> Optional[pd.DataFrame]:
-        """获取市场数据"""
+    async def _fetch_market_data(self, symbol: str, timeframe: str = "1h", limit: int = 200,
+                                 snapshot: Optional[MarketSnapshot] = None) -> Optional[pd.DataFrame]:
+        """获取市场数据（优先使用综合分析传入的市场快照）"""
         try:
             # 获取K线数据
-            klines = await self.exchange_service.get_kline_data(symbol, timeframe, limit)
+            if snapshot is not None and snapshot.has(timeframe, limit):
+                klines = snapshot.klines(timeframe, limit)
+            else:
+                klines = await self.exchange_service.get_kline_data(symbol, timeframe, limit)
             if not klines:
                 return None
             
@@ -14,6 +14,7 @@ import talib
 
 from app.core.logging import get_logger
 from app.core.config import get_settings
+from app.services.analysis.market_snapshot import MarketSnapshot
 from app.services.exchanges.service_manager import get_exchange_service
 
 logger = get_logger(__name__)
@@ -122,14 +123,15 @@ class EnhancedVolumePriceAnalysisService:
             self.logger.error(f"❌ 增强版量价分析服务初始化失败: {e}")
             raise
     
-    async def analyze_volume_price(self, symbol: str, timeframe: str = "1h") -> Optional[EnhancedVolumePriceAnalysis]:
+    async def analyze_volume_price(self, symbol: str, timeframe: str = "1h",
+                                   snapshot: Optional[MarketSnapshot] = None) -> Optional[EnhancedVolumePriceAnalysis]:
         """分析量价关系"""
         try:
             if not self.initialized:
                 await self.initialize()
             
             # 获取市场数据
-            market_data = await self._fetch_market_data(symbol, timeframe)
+            market_data = await self._fetch_market_data(symbol, timeframe, snapshot=snapshot)
             if market_data is None or len(market_data) < 50:
                 self.logger.warning(f"数据不足，无法进行量价分析 {symbol}")
                 return None
@@ -181,11 +183,15 @@ class EnhancedVolumePriceAnalysisService:
             self.logger.error(f"量价分析失败 {symbol}: {e}")
             return None
     
-    async def _fetch_market_data(self, symbol: str, timeframe: str = "1h", limit: int = 200) -> Optional[pd.DataFrame]:
-        """获取市场数据"""
+    async def _fetch_market_data(self, symbol: str, timeframe: str = "1h", limit: int = 200,
+                                 snapshot: Optional[MarketSnapshot] = None) -> Optional[pd.DataFrame]:
+        """获取市场数据（优先使用综合分析传入的市场快照）"""
         try:
             # 获取K线数据
-            klines = await self.exchange_service.get_kline_data(symbol, timeframe, limit)
+            if snapshot is not None and snapshot.has(timeframe, limit):
+                klines = snapshot.klines(timeframe, limit)
+            else:
+                klines = await self.exchange_service.get_kline_data(symbol, timeframe, limit)
             if not klines:
                 return None
             
@@ -840,9 +846,10 @@ class EnhancedVolumePriceAnalysisService:
             self.logger.error(f"识别风险因素失败: {e}")
             return ["风险因素识别失败"]
     
-    async def analyze_volume_price_relationship(self, symbol: str, timeframe: str = "1h") -> Optional[EnhancedVolumePriceAnalysis]:
+    async def analyze_volume_price_relationship(self, symbol: str, timeframe: str = "1h",
+                                                snapshot: Optional[MarketSnapshot] = None) -> Optional[EnhancedVolumePriceAnalysis]:
         """分析量价关系 - 向后兼容别名"""
-        return await self.analyze_volume_price(symbol, timeframe)
+        return await self.analyze_volume_price(symbol, timeframe, snapshot=snapshot)
 
 
 # 全局服务实例
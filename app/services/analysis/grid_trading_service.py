@@ -16,6 +16,9 @@ from app.core.config import get_settings
 from app.core.logging import get_logger
 from app.services.exchanges.service_manager import get_exchange_service
 from app.services.data.cache_service import get_cache_service
+from app.utils.indicator_panel import (
+    IndicatorPanel, compact_valid, first_valid, linear_slope, nan_mean, nan_std, pct_returns
+)
 from app.schemas.grid_trading import (
     GridTradingRecommendation, 
     GridTradingMetrics,
@@ -87,12 +90,25 @@ class GridTradingService:
             
             self.logger.info(f"🔍 开始分析 {len(symbols)} 个交易对的网格机会")
             
-            # 并发分析所有交易对
-            tasks = [
-                self._analyze_single_symbol(symbol) 
-                for symbol in symbols
+            # 并发获取所有交易对的行情和日K
+            fetched = await asyncio.gather(
+                *(self._fetch_symbol_inputs(symbol) for symbol in symbols), return_exceptions=True
+            )
+            inputs = {}
+            for symbol, result in zip(symbols, fetched):
+                if isinstance(result, Exception):
+                    self.logger.warning(f"分析失败: {result}")
+                elif result:
+                    inputs[symbol] = result
+            
+            # 波动率/ATR/趋势在 [交易对, 日K] 面板上一次算完
+            features = self._compute_grid_features(
+                {symbol: klines for symbol, (_, klines) in inputs.items()}
+            ) if inputs else {}
+            results = [
+                await self._evaluate_symbol(symbol, ticker, features[symbol])
+                for symbol, (ticker, _) in inputs.items()
             ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
             
             # 过滤有效结果
             recommendations = []
@@ -217,38 +233,109 @@ class GridTradingService:
     async def _analyze_single_symbol(self, symbol: str) -> Optional[GridTradingRecommendation]:
         """分析单个交易对的网格机会"""
         try:
-            # 转换为币安格式进行数据获取
-            binance_symbol = symbol.replace('-USDT-SWAP', 'USDT')
-            
-            # 获取市场数据
-            ticker = await self.exchange_service.get_ticker(binance_symbol)
-            if not ticker:
-                self.logger.warning(f"未找到 {binance_symbol} 的ticker数据")
-                return None
-            
-            current_price = float(ticker.get('last', 0))
-            if current_price <= 0:
+            inputs = await self._fetch_symbol_inputs(symbol)
+            if not inputs:
                 return None
             
-            # 获取历史数据用于趋势分析 - 使用币安格式
-            klines = await self.exchange_service.get_klines(
-                symbol=binance_symbol,
-                timeframe='1d',
-                limit=30
-            )
+            ticker, klines = inputs
+            features = self._compute_grid_features({symbol: klines})[symbol]
+            return await self._evaluate_symbol(symbol, ticker, features)
             
-            if not klines or len(klines) < 7:
-                return None
+        except Exception as e:
+            self.logger.warning(f"分析 {symbol} 失败: {e}")
+            return None
+    
+    async def _fetch_symbol_inputs(self, symbol: str) -> Optional[Tuple[Dict[str, Any], List[Any]]]:
+        """获取单个交易对的ticker和最近30根日K（ticker无效时不再请求K线，节省请求配额）"""
+        # 转换为币安格式进行数据获取
+        binance_symbol = symbol.replace('-USDT-SWAP', 'USDT')
+        
+        # 获取市场数据 - 使用币安格式
+        ticker = await self.exchange_service.get_ticker(binance_symbol)
+        if not ticker:
+            self.logger.warning(f"未找到 {binance_symbol} 的ticker数据")
+            return None
+        
+        if float(ticker.get('last', 0)) <= 0:
+            return None
+        
+        # 获取历史数据用于趋势分析 - 使用币安格式
+        klines = await self.exchange_service.get_klines(symbol=binance_symbol, timeframe='1d', limit=30)
+        if not klines or len(klines) < 7:
+            return None
+        
+        return ticker, klines
+    
+    def _compute_grid_features(self, klines_by_symbol: Dict[str, List[Any]]) -> Dict[str, Dict[str, float]]:
+        """
+        在 [交易对, 日K] 面板上向量化计算网格筛选用的特征
+        Per-row results follow the former per-symbol loops (non-positive prices are treated as missing)
+
+        Returns:
+            {symbol: {'volatility', 'atr_ratio', 'price_7d_ago', 'trend_slope', 'trend_change'}}
+        """
+        panel = IndicatorPanel.from_klines(klines_by_symbol)
+        lookback = self.trend_lookback_days
+        
+        def positive(values: np.ndarray) -> np.ndarray:
+            return np.where(values > 0, values, np.nan)
+        
+        # 最近7天的日收益率标准差，有效收盘价不足2个时取默认值3%
+        # 与原逐个交易对的实现一致：先剔除非正收盘价再紧排，收益率和回归都在相邻的有效价格上计算
+        recent = compact_valid(positive(panel.tail('close', lookback)))
+        volatility = nan_std(pct_returns(recent), ddof=0, min_count=1, fill=0.03)
+        
+        # ATR：前15根日K（从最早一根起）的平均真实波幅 / 最新收盘价
+        high = panel.head('high', 1, 15)
+        low = panel.head('low', 1, 15)
+        previous_close = panel.head('close', 0, 14)
+        with np.errstate(invalid='ignore'):
+            valid = (high > 0) & (low > 0) & (previous_close > 0)
+            tr = np.maximum(high - low, np.maximum(np.abs(high - previous_close), np.abs(low - previous_close)))
+        average_tr = nan_mean(np.where(valid, tr, np.nan))
+        last_close = panel['close'][:, -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            atr_ratio = np.where((last_close > 0) & ~np.isnan(average_tr), average_tr / last_close, 0.03)
+        
+        # 趋势：最近7天收盘价的回归斜率和首尾涨跌幅
+        slope = linear_slope(recent)
+        first = first_valid(recent)
+        last = first_valid(recent[:, ::-1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = (last - first) / first
+        
+        price_7d_ago = panel.tail('close', 7)[:, 0]
+        
+        return {
+            symbol: {
+                'volatility': float(volatility[row]),
+                'atr_ratio': float(atr_ratio[row]),
+                'price_7d_ago': float(price_7d_ago[row]),
+                'trend_slope': float(slope[row]),
+                'trend_change': float(change[row])
+            }
+            for row, symbol in enumerate(panel.symbols)
+        }
+    
+    async def _evaluate_symbol(
+        self,
+        symbol: str,
+        ticker: Dict[str, Any],
+        features: Dict[str, float]
+    ) -> Optional[GridTradingRecommendation]:
+        """根据ticker和面板特征生成单个交易对的网格推荐"""
+        try:
+            current_price = float(ticker.get('last', 0))
             
             # 计算交易指标 - 使用统一格式的symbol
-            metrics = await self._calculate_metrics(symbol, ticker, klines)
+            metrics = await self._calculate_metrics(symbol, ticker, features)
             
             # 判断是否符合网格交易条件
             if not self._is_suitable_for_grid(metrics):
                 return None
             
             # 分析趋势类型
-            trend_type = await self._analyze_trend(klines)
+            trend_type = self._classify_trend(features)
             
             # 如果是持续下跌趋势，不推荐做多网格
             if trend_type == GridTrendType.DOWNWARD:
@@ -310,7 +397,7 @@ class GridTradingService:
         self, 
         symbol: str, 
         ticker: Dict[str, Any], 
-        klines: List[Dict[str, Any]]
+        features: Dict[str, float]
     ) -> GridTradingMetrics:
         """计算交易指标"""
         try:
@@ -318,41 +405,17 @@ class GridTradingService:
             volume_24h = float(ticker.get('volCcy24h', 0))
             price_change_24h = float(ticker.get('sodUtc8', 0)) * 100
             
-            # 提取收盘价 - 兼容字典和列表格式
-            def get_close_price(kline):
-                if isinstance(kline, dict):
-                    return float(kline.get('close', 0))
-                elif isinstance(kline, (list, tuple)) and len(kline) > 4:
-                    return float(kline[4])
-                else:
-                    return 0
-            
             # 计算7天价格变化
-            if len(klines) >= 7:
-                price_7d_ago = get_close_price(klines[-7])  # 7天前收盘价
-                current_price = float(ticker.get('last', 0))
-                if price_7d_ago > 0:
-                    price_change_7d = ((current_price - price_7d_ago) / price_7d_ago) * 100
-                else:
-                    price_change_7d = 0
+            price_7d_ago = features['price_7d_ago']  # 7天前收盘价
+            current_price = float(ticker.get('last', 0))
+            if price_7d_ago > 0:
+                price_change_7d = ((current_price - price_7d_ago) / price_7d_ago) * 100
             else:
                 price_change_7d = 0
             
-            # 计算波动率 (基于最近7天的日收益率标准差)
-            if len(klines) >= 7:
-                closes = [get_close_price(k) for k in klines[-7:]]
-                closes = [c for c in closes if c > 0]  # 过滤无效价格
-                
-                if len(closes) >= 2:
-                    returns = [(closes[i] - closes[i-1]) / closes[i-1] for i in range(1, len(closes))]
-                    volatility_24h = np.std(returns) if returns else 0.03
-                else:
-                    volatility_24h = 0.03
-            else:
-                volatility_24h = 0.03  # 默认值
-            
-            # 计算ATR比率
-            atr_ratio = await self._calculate_atr_ratio(klines)
+            # 波动率 (基于最近7天的日收益率标准差) 和ATR比率
+            volatility_24h = features['volatility']
+            atr_ratio = features['atr_ratio']
             
             # 流动性评分 (基于交易量和价差)
             liquidity_score = min(1.0, volume_24h / 1000000000)  # 10亿为满分
@@ -374,58 +437,6 @@ class GridTradingService:
             self.logger.error(f"计算 {symbol} 指标失败: {e}")
             raise
     
-    async def _calculate_atr_ratio(self, klines: List[Dict[str, Any]]) -> float:
-        """计算ATR比率"""
-        try:
-            if len(klines) < 2:
-                return 0.03  # 默认值
-            
-            # 提取OHLC数据 - 兼容字典和列表格式
-            def get_ohlc(kline):
-                if isinstance(kline, dict):
-                    return {
-                        'high': float(kline.get('high', 0)),
-                        'low': float(kline.get('low', 0)),
-                        'close': float(kline.get('close', 0))
-                    }
-                elif isinstance(kline, (list, tuple)) and len(kline) > 4:
-                    return {
-                        'high': float(kline[2]),
-                        'low': float(kline[3]),
-                        'close': float(kline[4])
-                    }
-                else:
-                    return {'high': 0, 'low': 0, 'close': 0}
-            
-            # 计算真实波幅
-            true_ranges = []
-            for i in range(1, min(len(klines), 15)):
-                current = get_ohlc(klines[i])
-                prev = get_ohlc(klines[i-1])
-                
-                if current['high'] > 0 and current['low'] > 0 and prev['close'] > 0:
-                    tr = max(
-                        current['high'] - current['low'],
-                        abs(current['high'] - prev['close']),
-                        abs(current['low'] - prev['close'])
-                    )
-                    true_ranges.append(tr)
-            
-            if not true_ranges:
-                return 0.03
-            
-            atr = np.mean(true_ranges)
-            
-            # 获取当前价格
-            current_kline = get_ohlc(klines[-1])
-            current_price = current_kline['close']
-            
-            return atr / current_price if current_price > 0 else 0.03
-            
-        except Exception as e:
-            self.logger.warning(f"计算ATR失败: {e}")
-            return 0.03
-    
     async def _get_volume_rank(self, symbol: str, volume: float) -> int:
         """获取交易量排名 (简化实现)"""
         try:
@@ -462,41 +473,17 @@ class GridTradingService:
         
         return basic_suitable
     
-    async def _analyze_trend(self, klines: List[Dict[str, Any]]) -> GridTrendType:
-        """分析趋势类型"""
-        try:
-            if len(klines) < 7:
-                return GridTrendType.SIDEWAYS
-            
-            # 取最近7天的收盘价 - 兼容字典和列表格式
-            closes = []
-            for k in klines[-7:]:
-                if isinstance(k, dict):
-                    close_price = float(k.get('close', 0))
-                elif isinstance(k, (list, tuple)) and len(k) > 4:
-                    close_price = float(k[4])
-                else:
-                    continue
-                if close_price > 0:
-                    closes.append(close_price)
-            
-            # 计算线性回归斜率
-            x = np.arange(len(closes))
-            slope = np.polyfit(x, closes, 1)[0]
-            
-            # 计算价格变化幅度
-            price_change = (closes[-1] - closes[0]) / closes[0]
-            
-            # 判断趋势
-            if slope > 0 and price_change > 0.05:  # 上涨超过5%
-                return GridTrendType.UPWARD
-            elif slope < 0 and price_change < -0.05:  # 下跌超过5%
-                return GridTrendType.DOWNWARD
-            else:
-                return GridTrendType.SIDEWAYS
-                
-        except Exception as e:
-            self.logger.warning(f"趋势分析失败: {e}")
+    def _classify_trend(self, features: Dict[str, float]) -> GridTrendType:
+        """根据最近7天收盘价的回归斜率和涨跌幅判断趋势类型"""
+        slope = features['trend_slope']
+        price_change = features['trend_change']
+        
+        # 有效收盘价不足时斜率为NaN，比较结果均为False，按横盘处理
+        if slope > 0 and price_change > 0.05:  # 上涨超过5%
+            return GridTrendType.UPWARD
+        elif slope < 0 and price_change < -0.05:  # 下跌超过5%
+            return GridTrendType.DOWNWARD
+        else:
             return GridTrendType.SIDEWAYS
     
     def _calculate_opportunity_level(
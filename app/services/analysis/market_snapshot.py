@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+单交易对市场快照
+Per-symbol market snapshot shared by the integrated-analysis sub-analyzers
+
+综合分析开始前一次性并发拉取多周期K线、ticker、资金费率和持仓量，
+构建只读numpy列视图后交给各子分析器；子分析器不再各自请求同一份K线，
+可以并发运行。快照构建后不可修改，读取K线时返回副本
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# K线数值列
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def normalize_timeframe(timeframe: str) -> str:
+    """'1h'/'1H' 视为同一周期（分钟 m 与月 M 保持区分）"""
+    if timeframe and timeframe[-1] in 'hHdDwW':
+        return timeframe[:-1] + timeframe[-1].lower()
+    return timeframe
+
+
+def _column_arrays(klines: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for column in OHLCV_COLUMNS:
+        try:
+            values = np.array([float(k.get(column, np.nan) or 0) for k in klines], dtype=np.float64)
+        except (TypeError, ValueError):
+            continue
+        values.flags.writeable = False
+        arrays[column] = values
+    return arrays
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    单交易对市场快照（不可变）
+    Immutable: klines are stored as tuples and handed out as copies; arrays are read-only
+    """
+    symbol: str
+    created_at: float
+    ticker: Optional[Dict[str, Any]] = None
+    current_price: Optional[float] = None
+    funding_rate: Optional[Dict[str, Any]] = None
+    open_interest: Optional[Dict[str, Any]] = None
+    _klines: Dict[str, Tuple[Dict[str, Any], ...]] = field(default_factory=dict, repr=False)
+    _arrays: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict, repr=False)
+
+    @property
+    def timeframes(self) -> List[str]:
+        return list(self._klines)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def has(self, timeframe: str, limit: int = 1) -> bool:
+        """快照是否包含该周期至少limit根K线"""
+        return len(self._klines.get(normalize_timeframe(timeframe), ())) >= limit
+
+    def klines(self, timeframe: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """最近limit根K线（与 get_kline_data 返回格式相同的副本）"""
+        rows = self._klines.get(normalize_timeframe(timeframe), ())
+        if limit is not None:
+            rows = rows[-limit:] if limit > 0 else ()
+        return [dict(row) for row in rows]
+
+    def arrays(self, timeframe: str, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """最近limit根K线的只读 open/high/low/close/volume 列"""
+        arrays = self._arrays.get(normalize_timeframe(timeframe), {})
+        if limit is None:
+            return dict(arrays)
+        return {column: values[-limit:] if limit > 0 else values[:0] for column, values in arrays.items()}
+
+
+async def build_market_snapshot(
+    exchange_service,
+    symbol: str,
+    timeframes: Dict[str, int],
+    include_ticker: bool = True,
+    include_funding: bool = True,
+    include_open_interest: bool = True
+) -> MarketSnapshot:
+    """
+    并发拉取一个交易对的多周期K线、ticker、资金费率和持仓量
+    Each source fails independently; a missing piece leaves the sub-analyzer to fetch it itself
+
+    Args:
+        exchange_service: 交易所服务
+        symbol: 交易对
+        timeframes: 周期 -> K线根数（同一周期只请求一次，取各分析器需要的最大值）
+    """
+    started = time.perf_counter()
+    requests = {}
+    for timeframe, limit in timeframes.items():
+        key = normalize_timeframe(timeframe)
+        if key not in requests or limit > requests[key][1]:
+            requests[key] = (timeframe, limit)
+
+    tasks = {
+        f"klines:{key}": exchange_service.get_kline_data(symbol, timeframe, limit)
+        for key, (timeframe, limit) in requests.items()
+    }
+    if include_ticker:
+        tasks['ticker'] = exchange_service.get_ticker_data(symbol)
+    if include_funding:
+        tasks['funding_rate'] = exchange_service.get_funding_rate(symbol)
+    if include_open_interest:
+        tasks['open_interest'] = exchange_service.get_open_interest(symbol)
+
+    results = dict(zip(tasks, await asyncio.gather(*tasks.values(), return_exceptions=True)))
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            logger.debug(f"快照获取 {symbol} {name} 失败: {result}")
+            results[name] = None
+
+    klines = {}
+    arrays = {}
+    for key in requests:
+        rows = results.get(f"klines:{key}")
+        if rows:
+            klines[key] = tuple(rows)
+            arrays[key] = _column_arrays(rows)
+
+    ticker = results.get('ticker')
+    current_price = None
+    if ticker:
+        try:
+            current_price = float(ticker.get('price') or ticker.get('last') or 0) or None
+        except (TypeError, ValueError, AttributeError):
+            current_price = None
+
+    funding_rate = results.get('funding_rate')
+    if isinstance(funding_rate, list):
+        funding_rate = funding_rate[0] if funding_rate else None
+
+    snapshot = MarketSnapshot(
+        symbol=symbol,
+        created_at=time.time(),
+        ticker=ticker,
+        current_price=current_price,
+        funding_rate=funding_rate,
+        open_interest=results.get('open_interest'),
+        _klines=klines,
+        _arrays=arrays
+    )
+    logger.debug(
+        f"📸 {symbol} 市场快照: {', '.join(f'{k}×{len(v)}' for k, v in klines.items())} "
+        f"({(time.perf_counter() - started) * 1000:.0f}ms)"
+    )
+    return snapshot
+
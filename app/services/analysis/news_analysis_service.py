@@ -445,12 +445,12 @@ class NewsAnalysisService:
         使用Kronos分析新闻影响
         """
         try:
-            # 导入Kronos服务
-            from app.services.ml.kronos_prediction_service import KronosPredictionService
+            # 使用共享的Kronos服务，避免每次分析都重新加载模型
+            from app.services.ml.kronos_prediction_service import get_kronos_service
             
             results = []
             
-            kronos_service = KronosPredictionService()
+            kronos_service = await get_kronos_service()
             
             for news_item in news_items:
                     try:
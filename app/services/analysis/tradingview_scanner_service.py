@@ -30,6 +30,7 @@ from app.schemas.tradingview import (
     TradingViewStrongSymbolVO,
 )
 from app.utils.exceptions import TradingToolError
+from app.utils.http_manager import http_manager
 
 
 class TradingViewScannerService:
@@ -146,21 +147,15 @@ class TradingViewScannerService:
         
         for attempt in range(self.config.max_retries):
             try:
-                timeout = aiohttp.ClientTimeout(total=self.config.request_timeout)
-                
-                # 构建连接器配置
-                connector = aiohttp.TCPConnector()
-                
-                async with aiohttp.ClientSession(
-                    timeout=timeout,
-                    connector=connector
-                ) as session:
+                # 复用共享连接池（scanner.tradingview.com的keep-alive连接）
+                async with http_manager.get_session() as session:
                     
                     # 构建请求参数
                     request_kwargs = {
                         'json': request_data,
                         'headers': self.headers,
-                        'cookies': self.cookies
+                        'cookies': self.cookies,
+                        'timeout': aiohttp.ClientTimeout(total=self.config.request_timeout)
                     }
                     
                     # 如果有代理配置，添加到请求中
@@ -12,6 +12,8 @@ import asyncio
 
 from app.core.logging import get_logger, trading_logger
 from app.services.exchanges.exchange_service_manager import get_exchange_service
+from app.services.exchanges.okx.okx_realtime_data_manager import get_active_realtime_data_manager
+from app.services.exchanges.binance.binance_realtime_data_manager import get_active_binance_realtime_manager
 from app.utils.indicators import SuperTrendIndicator
 from app.utils.exceptions import IndicatorCalculationError, DataNotFoundError
 
@@ -164,17 +166,22 @@ class TrendAnalysisService:
             # 确保交易所服务已初始化
             await self._ensure_exchange_service()
             
+            # 实时数据管理器已追平的周期直接读取增量SuperTrend，其余周期再拉K线批量计算
+            trends = {} if custom_data else self._realtime_trends(symbol)
+            missing_timeframes = [tf for tf in self.timeframes if tf not in trends]
+            
             # 获取多周期数据
             if custom_data:
                 timeframe_data = custom_data
-            else:
+            elif missing_timeframes or self._realtime_price(symbol) is None:
                 timeframe_data = await self.exchange_service.get_multi_timeframe_klines(
-                    symbol, self.timeframes, limit=100
+                    symbol, missing_timeframes or ['15m'], limit=100
                 )
+            else:
+                timeframe_data = {}
             
             # 计算各周期的SuperTrend
-            trends = {}
-            for timeframe in self.timeframes:
+            for timeframe in missing_timeframes:
                 if timeframe in timeframe_data:
                     klines = timeframe_data[timeframe]
                     if klines:
@@ -205,8 +212,8 @@ class TrendAnalysisService:
             confidence_score = self._calculate_confidence_score(trends, signal_combination)
             
             # 获取当前价格 - 智能字段名处理
-            current_price = None
-            if '15m' in timeframe_data and timeframe_data['15m']:
+            current_price = None if custom_data else self._realtime_price(symbol)
+            if current_price is None and '15m' in timeframe_data and timeframe_data['15m']:
                 latest_kline = timeframe_data['15m'][-1]
                 # 尝试多种可能的字段名
                 if 'close_price' in latest_kline:
@@ -246,6 +253,42 @@ class TrendAnalysisService:
             logger.error(f"Multi-timeframe analysis failed for {symbol}: {e}")
             raise IndicatorCalculationError(f"Trend analysis failed: {e}")
     
+    def _active_realtime_manager(self):
+        """当前交易所已启动的实时数据管理器（不会为趋势分析单独建立WebSocket连接）"""
+        if self._is_okx:
+            return get_active_realtime_data_manager()
+        return get_active_binance_realtime_manager()
+    
+    def _realtime_trends(self, symbol: str) -> Dict[str, TrendDirection]:
+        """
+        从实时数据管理器的增量指标引擎读取各周期SuperTrend方向
+        The engine's supertrend uses the same (period=10, multiplier=3.0) as self.supertrend_indicator and
+        previews the forming candle like the batch path; timeframes the engine has not caught up on are omitted
+        """
+        manager = self._active_realtime_manager()
+        if manager is None:
+            return {}
+        
+        trends = {}
+        for timeframe in self.timeframes:
+            indicators = manager.get_current_indicators(symbol, timeframe)
+            trend_up = indicators.get('supertrend_up') if indicators else None
+            if trend_up is None:
+                continue
+            trends[timeframe] = TrendDirection.UP if trend_up else TrendDirection.DOWN
+            logger.debug(f"SuperTrend(realtime) for {symbol} {timeframe}: up={trend_up}, supertrend={indicators.get('supertrend')}")
+        return trends
+    
+    def _realtime_price(self, symbol: str) -> Optional[float]:
+        """实时数据管理器缓冲区中15m最新K线的收盘价"""
+        manager = self._active_realtime_manager()
+        if manager is None:
+            return None
+        arrays = manager.get_kline_arrays(symbol, '15m', 1)
+        if arrays is None or not len(arrays['close']):
+            return None
+        return float(arrays['close'][-1])
+    
     def _determine_signal_combination(self, trends: Dict[str, TrendDirection]) -> SignalCombination:
         """
         根据趋势组合判断信号类型
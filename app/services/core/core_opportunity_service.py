@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 from dataclasses import dataclass
 
+import numpy as np
+
 from app.core.config import get_settings
 from app.core.logging import get_logger
 from app.services.exchanges.okx.okx_service import OKXService
@@ -19,6 +21,7 @@ from app.services.exchanges.okx.okx_service import OKXService
 from app.services.notification.core_notification_service import get_core_notification_service
 from app.services.ml.kronos_market_opportunity_service import KronosMarketOpportunityService
 from app.services.analysis.position_analysis_service import PositionAnalysisService
+from app.utils.indicator_panel import IndicatorPanel, compute_features
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -443,8 +446,18 @@ class CoreOpportunityService:
                     'notifications_sent': 0
                 }
             
-            # 选择成交量大的前20个交易对进行分析
-            top_symbols = symbols[:20]
+            momentum_config = settings.strategy_config.get('momentum', {})
+            if momentum_config.get('enable_prerank', False):
+                # 在 [交易对, 1H K线] 面板上预筛动量最强的前20个交易对进行分析
+                top_symbols = await self._rank_momentum_candidates(
+                    symbols,
+                    limit=20,
+                    max_symbols=momentum_config.get('prerank_max_symbols', 50),
+                    max_concurrency=momentum_config.get('prerank_concurrency', 5)
+                )
+            else:
+                # 选择成交量大的前20个交易对进行分析
+                top_symbols = symbols[:20]
             
             # 批量分析动量信号 (lazy import)
             from app.services.trading.core_trading_service import AnalysisType
@@ -580,6 +593,48 @@ class CoreOpportunityService:
             'total_investment': getattr(grid_opp, 'total_investment', 1000)
         }
     
+    async def _rank_momentum_candidates(self, symbols: List[str], limit: int = 20,
+                                        max_symbols: int = 50, max_concurrency: int = 5) -> List[str]:
+        """
+        动量预筛：限流拉取前max_symbols个交易对的1H K线，对候选池一次性计算涨跌幅和量比，按动量强度排序
+        Momentum score = |20-bar change| × clipped volume ratio; falls back to the original order on failure
+        """
+        try:
+            candidates = symbols[:max(limit, max_symbols)]
+            semaphore = asyncio.Semaphore(max(1, max_concurrency))
+            
+            async with self.okx_service as exchange:
+                async def fetch(symbol: str):
+                    async with semaphore:
+                        return await exchange.get_kline_data(symbol, '1H', 50)
+                
+                results = await asyncio.gather(
+                    *(fetch(symbol) for symbol in candidates),
+                    return_exceptions=True
+                )
+            klines = {
+                symbol: result for symbol, result in zip(candidates, results)
+                if result and not isinstance(result, Exception)
+            }
+            if not klines:
+                return symbols[:limit]
+            
+            panel = IndicatorPanel.from_klines(klines)
+            features = compute_features(panel)
+            volume_ratio = np.clip(np.nan_to_num(features['volume_ratio'], nan=1.0), 0.5, 5.0)
+            score = np.nan_to_num(np.abs(features['change']), nan=0.0) * volume_ratio
+            
+            ranked = [panel.symbols[row] for row in np.argsort(-score, kind='stable')]
+            # 没拿到K线或超出预筛上限的交易对排在最后，保持原有顺序
+            ranked.extend(symbol for symbol in symbols if symbol not in klines)
+            
+            self.logger.debug(f"📊 动量预筛: {len(klines)}/{len(candidates)} 个交易对, 前5: {ranked[:5]}")
+            return ranked[:limit]
+            
+        except Exception as e:
+            self.logger.warning(f"动量预筛失败，按原顺序选取: {e}")
+            return symbols[:limit]
+    
     async def _get_active_symbols(self) -> List[str]:
         """获取活跃交易对"""
         try:
@@ -5,7 +5,8 @@ Scheduler service for background tasks
 """
 
 import asyncio
-from typing import Dict, Any
+import functools
+from typing import Dict, Any, List
 from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
@@ -14,6 +15,7 @@ from apscheduler.triggers.cron import CronTrigger
 from app.core.logging import get_logger, monitor_logger
 from app.core.config import get_settings
 from app.services.exchanges.exchange_service_manager import get_exchange_service
+from app.utils.rate_limiter import RequestPriority, request_priority
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -116,6 +118,27 @@ class SchedulerService:
         else:
             return confidence  # 已经是百分比格式
     
+    async def _prefetch_kronos_predictions(self, symbols: List[str]) -> None:
+        """批量预取Kronos预测（失败时由后续逐个分析回退到单独预测）"""
+        if not settings.kronos_config.get('enable_kronos_prediction', False):
+            return
+        try:
+            from app.services.ml.kronos_integrated_decision_service import get_kronos_integrated_service
+            kronos_integrated_service = await get_kronos_integrated_service()
+            prefetched_count = await kronos_integrated_service.prefetch_kronos_predictions(symbols)
+            monitor_logger.info(f"🧠 Kronos批量预测完成: {prefetched_count}/{len(symbols)} 个币种")
+        except Exception as e:
+            monitor_logger.warning(f"⚠️ Kronos批量预测失败，回退到逐个预测: {e}")
+    
+    @staticmethod
+    def _bulk_job(job):
+        """批量扫描类任务：任务内的交易所请求以BULK优先级排队，让位于下单/持仓等关键请求"""
+        @functools.wraps(job)
+        async def wrapper(*args, **kwargs):
+            with request_priority(RequestPriority.BULK):
+                return await job(*args, **kwargs)
+        return wrapper
+    
     async def _setup_scheduled_jobs(self):
         """设置定时任务"""
         try:
@@ -123,7 +146,7 @@ class SchedulerService:
             
             # 持仓量监控 - 每30分钟执行一次 (降低频率，减少噪音)
             self.scheduler.add_job(
-                self._open_interest_job,
+                self._bulk_job(self._open_interest_job),
                 trigger=IntervalTrigger(minutes=30),
                 id="open_interest_monitor", 
                 name="持仓量变化监控",
@@ -133,7 +156,7 @@ class SchedulerService:
             # 交易量异常监控 - 每60分钟执行一次 (降低频率，目前功能不完整)
             # 注意：当前交易量异常监控没有独立的通知功能，主要用于数据收集
             self.scheduler.add_job(
-                self._volume_anomaly_job,
+                self._bulk_job(self._volume_anomaly_job),
                 trigger=IntervalTrigger(minutes=60),
                 id="volume_anomaly_monitor",
                 name="交易量异常监控 (数据收集)",
@@ -174,7 +197,7 @@ class SchedulerService:
             
             # 网格机会分析 - 每60分钟执行一次 (震荡市策略)
             self.scheduler.add_job(
-                self._grid_opportunities_job,
+                self._bulk_job(self._grid_opportunities_job),
                 trigger=IntervalTrigger(minutes=60),
                 id="grid_opportunities",
                 name="网格交易机会分析 (震荡市策略)",
@@ -183,7 +206,7 @@ class SchedulerService:
             
             # 综合市场机会分析 - 每60分钟执行一次 (宏观分析)
             self.scheduler.add_job(
-                self._comprehensive_market_analysis_job,
+                self._bulk_job(self._comprehensive_market_analysis_job),
                 trigger=IntervalTrigger(minutes=60),
                 id="comprehensive_market_analysis",
                 name="综合市场机会分析 (宏观分析)",
@@ -213,7 +236,7 @@ class SchedulerService:
             
             # 🔄 ML模型重训练 - 每天凌晨2点执行
             self.scheduler.add_job(
-                self._ml_model_retrain_job,
+                self._bulk_job(self._ml_model_retrain_job),
                 trigger=CronTrigger(hour=2, minute=0),
                 id="ml_model_retrain",
                 name="ML模型重训练",
@@ -222,7 +245,7 @@ class SchedulerService:
             
             # 交易对列表更新 - 每天凌晨1点执行
             self.scheduler.add_job(
-                self._update_trading_pairs_job,
+                self._bulk_job(self._update_trading_pairs_job),
                 trigger=CronTrigger(hour=1, minute=0),
                 id="update_trading_pairs",
                 name="更新交易对列表",
@@ -370,6 +393,9 @@ class SchedulerService:
             strong_signals = []
             notifications_sent = 0
             
+            # 🧠 批量预取Kronos预测：所有核心币种合并为一次批量推理，逐个分析时直接复用
+            await self._prefetch_kronos_predictions(core_symbols)
+            
             for symbol in core_symbols:
                 try:
                     # 使用集成分析 - 包含Kronos AI预测 + 传统技术分析 + ML预测
@@ -474,6 +500,9 @@ class SchedulerService:
             strong_signals = []
             notifications_sent = 0
             
+            # 🧠 批量预取Kronos预测：所有核心币种合并为一次批量推理，逐个分析时直接复用
+            await self._prefetch_kronos_predictions(core_symbols)
+            
             for symbol in core_symbols:
                 try:
                     # 使用集成分析 - 包含Kronos、传统技术分析、ML预测
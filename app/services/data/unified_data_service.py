@@ -8,14 +8,15 @@ import asyncio
 import time
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 import pandas as pd
 
 from app.core.logging import get_logger
 from app.core.config import get_settings
 from app.data.data_cache import DataCache
-from app.services.binance_service import BinanceService
+from app.data.ohlcv_store import get_ohlcv_store
+from app.services.exchanges.binance.binance_service import BinanceService
 from app.services.exchanges.exchange_service_manager import get_exchange_service
 from app.utils.exceptions import DataNotFoundError
 
@@ -67,6 +68,10 @@ class UnifiedDataService:
     def __init__(self):
         self.logger = get_logger(self.__class__.__name__)
         self.cache = DataCache()
+        # 本地列式K线存储：已收盘K线落盘，只向数据源补拉缺失的尾部
+        self.ohlcv_store = get_ohlcv_store()
+        # 存储缺口超过该K线数时不再补齐，按新数据重建序列
+        self.max_store_backfill = settings.cache_config.get('ohlcv_store_max_backfill', 5000)
         
         # 数据源优先级配置
         self.source_priority = [DataSource.BINANCE, DataSource.OKX]
@@ -86,6 +91,8 @@ class UnifiedDataService:
             "total_requests": 0,
             "cache_hits": 0,
             "cache_misses": 0,
+            "store_rows_served": 0,
+            "source_rows_fetched": 0,
             "source_requests": {source.value: 0 for source in DataSource if source != DataSource.AUTO},
             "errors": {"total": 0, "by_source": {source.value: 0 for source in DataSource if source != DataSource.AUTO}}
         }
@@ -120,9 +127,12 @@ class UnifiedDataService:
         start_time = time.time()
         
         try:
+            # 确定数据源（缓存序列按数据源区分，避免不同交易所的K线混在同一序列）
+            data_source = await self._determine_data_source(request.source)
+            
             # 检查缓存
             if request.use_cache:
-                cached_data = await self._get_cached_data(request)
+                cached_data = await self._get_cached_data(data_source, request)
                 if cached_data is not None:
                     self._stats["cache_hits"] += 1
                     self.logger.debug(f"✅ 缓存命中: {request.symbol} {request.timeframe}")
@@ -137,15 +147,12 @@ class UnifiedDataService:
             
             self._stats["cache_misses"] += 1
             
-            # 确定数据源
-            data_source = await self._determine_data_source(request.source)
-            
-            # 获取数据
-            data = await self._fetch_from_source(data_source, request)
+            # 获取数据（本地存储 + 缺失尾部）
+            data = await self._fetch_with_store(data_source, request)
             
             # 缓存数据
             if request.use_cache and not data.empty:
-                await self._cache_data(request, data)
+                await self._cache_data(data_source, request, data)
             
             # 更新共享数据（热点数据）
             await self._update_shared_data(request, data)
@@ -168,23 +175,13 @@ class UnifiedDataService:
             self.logger.error(f"❌ 数据获取失败: {request.symbol} {request.timeframe} - {e}")
             raise DataNotFoundError(f"获取 {request.symbol} 数据失败: {e}")
     
-    async def _get_cached_data(self, request: DataRequest) -> Optional[pd.DataFrame]:
-        """获取缓存数据"""
+    async def _get_cached_data(self, source: DataSource, request: DataRequest) -> Optional[pd.DataFrame]:
+        """获取缓存数据（同一序列可满足任意limit）"""
         try:
-            # 构建缓存键
-            cache_key = f"{request.symbol}_{request.timeframe}_{request.limit}"
-            
-            # 检查内存缓存
-            if cache_key in self.cache.memory_cache:
-                cache_entry = self.cache.memory_cache[cache_key]
-                if self.cache._is_cache_valid(cache_entry):
-                    return cache_entry['data']
-            
-            # 检查磁盘缓存
             cached_data = await self.cache.get_ohlcv(
                 symbol=request.symbol,
                 timeframe=request.timeframe,
-                exchange="unified",  # 使用统一标识
+                exchange=source.value,
                 limit=request.limit
             )
             
@@ -194,13 +191,13 @@ class UnifiedDataService:
             self.logger.warning(f"获取缓存数据失败: {e}")
             return None
     
-    async def _cache_data(self, request: DataRequest, data: pd.DataFrame):
-        """缓存数据"""
+    async def _cache_data(self, source: DataSource, request: DataRequest, data: pd.DataFrame):
+        """缓存数据（合并进该交易对/周期的连续序列）"""
         try:
             await self.cache.set_ohlcv(
                 symbol=request.symbol,
                 timeframe=request.timeframe,
-                exchange="unified",
+                exchange=source.value,
                 data=data,
                 limit=request.limit
             )
@@ -232,6 +229,55 @@ class UnifiedDataService:
         self.logger.warning(f"所有数据源都有问题，选择错误最少的: {best_source.value}")
         return best_source
     
+    async def _fetch_with_store(self, source: DataSource, request: DataRequest) -> pd.DataFrame:
+        """
+        从本地OHLCV存储读取已收盘K线，只向数据源拉取缺失的尾部
+        Serve closed candles from the local store and fetch only the missing tail from the exchange
+        """
+        # 存储的文件读写在线程中执行，不阻塞事件循环
+        series = None
+        if self.ohlcv_store.enabled:
+            series = await asyncio.to_thread(self.ohlcv_store.series, source.value, request.symbol, request.timeframe)
+        if series is None:
+            return await self._fetch_from_source(source, request)
+
+        # 只补拉最后一根已存K线之后的部分（多拉1根与已存数据重叠，用于连续性校验）；
+        # 存储停更较久时同样补齐整段缺口，而不是只拉最近limit根、留下断层后重建整条序列
+        missing = await asyncio.to_thread(series.missing_tail)
+        if missing is None:
+            fetch_limit = request.limit
+        elif missing + 1 <= self.max_store_backfill:
+            if series.rows + missing >= request.limit:
+                fetch_limit = missing + 1
+            else:
+                fetch_limit = max(request.limit, missing + 1)
+        else:
+            self.logger.info(f"🔄 OHLCV存储缺口过大({missing}根)，按新数据重建: {request.symbol} {request.timeframe}")
+            fetch_limit = request.limit
+
+        fresh = await self._fetch_from_source(source, replace(request, limit=fetch_limit))
+        self._stats["source_rows_fetched"] += len(fresh)
+        try:
+            self.ohlcv_store.rows_appended += await asyncio.to_thread(series.append_frame, fresh)
+        except Exception as e:
+            self.logger.warning(f"写入OHLCV存储失败: {request.symbol} {request.timeframe} - {e}")
+            return fresh.iloc[-request.limit:]
+
+        stored = await asyncio.to_thread(series.read_frame, limit=request.limit)
+        if stored.empty:
+            return fresh.iloc[-request.limit:]
+
+        # 拼接存储中的已收盘K线与数据源返回的更新部分（含未收盘K线）
+        tail = fresh[fresh.index > stored.index[-1]] if not fresh.empty else fresh
+        data = pd.concat([stored, tail[stored.columns]]) if not tail.empty else stored
+        data = data.iloc[-request.limit:]
+
+        served = len(data) - len(tail)
+        self.ohlcv_store.store_reads += 1
+        self.ohlcv_store.rows_served += served
+        self._stats["store_rows_served"] += served
+        return data
+    
     async def _fetch_from_source(self, source: DataSource, request: DataRequest) -> pd.DataFrame:
         """从指定数据源获取数据"""
         self._stats["source_requests"][source.value] += 1
@@ -240,20 +286,19 @@ class UnifiedDataService:
             if source == DataSource.BINANCE:
                 service = await self._get_binance_service()
                 klines = await service.get_kline_data(
-                    symbol=request.symbol.replace('-SWAP', '').replace('-', ''),  # 币安格式转换
-                    interval=request.timeframe,
+                    symbol=request.symbol,
+                    timeframe=request.timeframe,
                     limit=request.limit
                 )
                 
-                # 转换为DataFrame（这里需要根据实际数据格式调整）
                 if klines:
                     data = pd.DataFrame([{
-                        'timestamp': k['open_time'],
-                        'open': float(k['open_price']),
-                        'high': float(k['high_price']),
-                        'low': float(k['low_price']),
-                        'close': float(k['close_price']),
-                        'volume': float(k['volume'])
+                        'timestamp': pd.to_datetime(k['timestamp'], unit='ms'),
+                        'open': k['open'],
+                        'high': k['high'],
+                        'low': k['low'],
+                        'close': k['close'],
+                        'volume': k['volume']
                     } for k in klines])
                     data.set_index('timestamp', inplace=True)
                     self._mark_source_healthy(source)
@@ -408,7 +453,8 @@ class UnifiedDataService:
             "cache_hit_rate": f"{cache_hit_rate:.2%}",
             "source_health": self._source_health,
             "shared_data_count": len(self._shared_data),
-            "cache_stats": self.cache.get_cache_stats()
+            "cache_stats": self.cache.get_cache_stats(),
+            "ohlcv_store": self.ohlcv_store.get_stats()
         }
     
     async def health_check(self) -> Dict[str, Any]:
@@ -418,7 +464,8 @@ class UnifiedDataService:
         try:
             # 检查币安服务
             binance_service = await self._get_binance_service()
-            binance_healthy = await binance_service.health_check()
+            binance_status = await binance_service.health_check()
+            binance_healthy = binance_status.get('status') == 'healthy'
             health_status["sources"]["binance"] = "healthy" if binance_healthy else "unhealthy"
             
             # 检查OKX服务
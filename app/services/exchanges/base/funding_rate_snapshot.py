@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+资金费率快照表
+In-memory columnar funding-rate snapshot maintained incrementally from pushes
+
+每个永续合约一行（funding_rate/mark_price/next_funding_time/更新时间/费率间隔），
+由 !markPrice@arr 推送（或REST全量结果）增量覆盖；监控周期在这张表上做向量化筛选，
+耗时不再随上架合约数量增长。费率间隔按交易对缓存：结算时间前移时由前后两次
+next_funding_time 的差值推断，未知或过期的由调用方懒加载后写回
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# 合理的费率间隔（小时）
+_VALID_INTERVALS = (1, 2, 4, 8)
+
+
+def _to_millis(value: Any) -> int:
+    """next_funding_time 可能是毫秒时间戳、字符串或datetime"""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+class FundingRateSnapshot:
+    """
+    资金费率快照表
+    One row per perpetual; O(1) in-place updates, vectorized candidate filtering
+    """
+
+    def __init__(self, initial_capacity: int = 512, interval_ttl: float = 6 * 3600):
+        self.interval_ttl = interval_ttl
+
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._capacity = 0
+        self._allocate(max(1, initial_capacity))
+
+        self.last_update: float = 0.0
+        self.updates = 0
+
+    def _allocate(self, capacity: int) -> None:
+        columns = {
+            'funding_rate': np.full(capacity, np.nan),
+            'mark_price': np.full(capacity, np.nan),
+            'next_funding_time': np.zeros(capacity, dtype=np.int64),
+            'updated_at': np.zeros(capacity),
+            'interval_hours': np.full(capacity, np.nan),
+            'interval_checked_at': np.zeros(capacity),
+        }
+        if self._capacity:
+            for name, values in columns.items():
+                values[:self._capacity] = getattr(self, f'_{name}')
+        for name, values in columns.items():
+            setattr(self, f'_{name}', values)
+        self._capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def _row(self, symbol: str) -> int:
+        row = self._index.get(symbol)
+        if row is None:
+            row = len(self._symbols)
+            if row >= self._capacity:
+                self._allocate(self._capacity * 2)
+            self._index[symbol] = row
+            self._symbols.append(symbol)
+        return row
+
+    def update(self, symbol: str, funding_rate: float, next_funding_time: Any = None,
+               mark_price: Optional[float] = None, interval_hours: Optional[float] = None,
+               now: Optional[float] = None) -> None:
+        """
+        覆盖一个交易对的最新费率
+        When next_funding_time moves forward after a settlement, the step is the funding interval
+        """
+        now = time.time() if now is None else now
+        row = self._row(symbol)
+
+        next_ms = _to_millis(next_funding_time)
+        previous_ms = int(self._next_funding_time[row])
+        if next_ms:
+            if previous_ms and next_ms > previous_ms:
+                hours = round((next_ms - previous_ms) / 3_600_000)
+                if hours in _VALID_INTERVALS:
+                    self._interval_hours[row] = hours
+                    self._interval_checked_at[row] = now
+            self._next_funding_time[row] = next_ms
+
+        self._funding_rate[row] = funding_rate
+        if mark_price is not None:
+            self._mark_price[row] = mark_price
+        if interval_hours:
+            self._interval_hours[row] = interval_hours
+            self._interval_checked_at[row] = now
+        self._updated_at[row] = now
+
+        self.last_update = now
+        self.updates += 1
+
+    def update_many(self, records: Iterable[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """批量写入 {'symbol', 'funding_rate', 'next_funding_time', 'mark_price'?, 'funding_interval_hours'?}"""
+        now = time.time() if now is None else now
+        count = 0
+        for record in records:
+            symbol = record.get('symbol')
+            funding_rate = record.get('funding_rate')
+            if not symbol or funding_rate is None:
+                continue
+            try:
+                mark_price = record.get('mark_price')
+                self.update(
+                    symbol,
+                    float(funding_rate),
+                    record.get('next_funding_time'),
+                    mark_price=float(mark_price) if mark_price is not None else None,
+                    interval_hours=record.get('funding_interval_hours'),
+                    now=now
+                )
+                count += 1
+            except (TypeError, ValueError):
+                continue
+        return count
+
+    def set_interval(self, symbol: str, interval_hours: float, now: Optional[float] = None) -> None:
+        """写回懒加载得到的费率间隔"""
+        row = self._row(symbol)
+        self._interval_hours[row] = interval_hours
+        self._interval_checked_at[row] = time.time() if now is None else now
+
+    def get_interval(self, symbol: str, now: Optional[float] = None) -> Optional[int]:
+        """缓存的费率间隔（小时），未知或超过interval_ttl时返回None"""
+        row = self._index.get(symbol)
+        if row is None or np.isnan(self._interval_hours[row]):
+            return None
+        now = time.time() if now is None else now
+        if now - self._interval_checked_at[row] > self.interval_ttl:
+            return None
+        return int(self._interval_hours[row])
+
+    def age(self, now: Optional[float] = None) -> float:
+        """距最近一次更新的秒数（从未更新为inf）"""
+        if not self.last_update:
+            return float('inf')
+        return (time.time() if now is None else now) - self.last_update
+
+    def select(self, max_rate: Optional[float] = None, max_age: Optional[float] = None,
+               exclude: Optional[Iterable[str]] = None, suffix: Optional[str] = None,
+               now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        向量化筛选，返回按费率升序的记录
+        Vectorized filter over the whole table: rate <= max_rate, updated within max_age seconds
+
+        Args:
+            max_rate: 费率上限（如 -0.0005），None表示不限
+            max_age: 只保留max_age秒内更新过的行
+            exclude: 排除的交易对
+            suffix: 只保留以该后缀结尾的交易对（如 '-USDT-SWAP'）
+        """
+        if not self._symbols:
+            return []
+
+        rates = self._funding_rate[:len(self._symbols)]
+        rows = np.flatnonzero(self._mask(max_rate, max_age, now))
+        if exclude or suffix:
+            excluded = set(exclude or ())
+            rows = np.array([
+                row for row in rows
+                if self._symbols[row] not in excluded and (not suffix or self._symbols[row].endswith(suffix))
+            ], dtype=np.int64)
+
+        rows = rows[np.argsort(rates[rows], kind='stable')]
+        return [self._record(int(row)) for row in rows]
+
+    def _mask(self, max_rate: Optional[float], max_age: Optional[float],
+              now: Optional[float], inclusive: bool = True) -> np.ndarray:
+        size = len(self._symbols)
+        rates = self._funding_rate[:size]
+        mask = ~np.isnan(rates)
+        if max_rate is not None:
+            mask &= (rates <= max_rate) if inclusive else (rates < max_rate)
+        if max_age is not None:
+            now = time.time() if now is None else now
+            mask &= self._updated_at[:size] >= now - max_age
+        return mask
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        mark_price = self._mark_price[row]
+        interval = self._interval_hours[row]
+        return {
+            'symbol': self._symbols[row],
+            'funding_rate': float(self._funding_rate[row]),
+            'next_funding_time': int(self._next_funding_time[row]),
+            'mark_price': None if np.isnan(mark_price) else float(mark_price),
+            'funding_interval_hours': None if np.isnan(interval) else int(interval),
+            'updated_at': float(self._updated_at[row])
+        }
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        row = self._index.get(symbol)
+        return None if row is None else self._record(row)
+
+    def count(self, max_rate: Optional[float] = None, max_age: Optional[float] = None,
+              inclusive: bool = True, now: Optional[float] = None) -> int:
+        """满足条件的交易对数量（inclusive=False 时为费率严格小于max_rate）"""
+        return int(np.count_nonzero(self._mask(max_rate, max_age, now, inclusive)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        size = len(self._symbols)
+        return {
+            'symbols': size,
+            'updates': self.updates,
+            'age_seconds': round(self.age(), 3) if self.last_update else None,
+            'known_intervals': int(np.count_nonzero(~np.isnan(self._interval_hours[:size])))
+        }
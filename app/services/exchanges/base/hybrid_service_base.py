@@ -11,6 +11,7 @@ from datetime import datetime
 
 from app.core.logging import get_logger
 from app.utils.exceptions import TradingToolError, APIConnectionError
+from app.services.exchanges.base.single_flight import SingleFlight, make_request_key
 
 logger = get_logger(__name__)
 
@@ -56,6 +57,9 @@ class HybridServiceBase(ABC):
         self.websocket_recovery_interval = 300  # WebSocket恢复检查间隔（秒）
         self.last_websocket_recovery_check = datetime.now()
         
+        # 请求合并：相同的并发读请求共享一次上游调用
+        self.single_flight = SingleFlight(self.__class__.__name__)
+        
         logger.debug("🔄 混合服务基类初始化完成")
     
     # ==================== 抽象方法 Abstract Methods ====================
@@ -200,6 +204,18 @@ class HybridServiceBase(ABC):
         Returns:
             Any: 获取的数据 / Retrieved data
         """
+        endpoint = getattr(rest_api_func, '__name__', operation_name)
+        return await self._coalesced(
+            endpoint, self._get_data_with_fallback_uncoalesced,
+            websocket_func, rest_api_func, operation_name, *args, **kwargs
+        )
+    
+    async def _get_data_with_fallback_uncoalesced(self,
+                                                 websocket_func: Callable,
+                                                 rest_api_func: Callable,
+                                                 operation_name: str,
+                                                 *args, **kwargs) -> Any:
+        """_get_data_with_fallback 的实际执行体（不经过请求合并）"""
         # 首先尝试WebSocket恢复（如果需要）
         if not await self._check_websocket_health():
             await self._try_websocket_recovery()
@@ -268,6 +284,15 @@ class HybridServiceBase(ABC):
         Returns:
             Any: 操作结果 / Operation result
         """
+        endpoint = getattr(operation_func, '__name__', operation_name)
+        return await self._coalesced(
+            endpoint, self._fallback_to_rest_uncoalesced,
+            operation_func, operation_name, *args, **kwargs
+        )
+    
+    async def _fallback_to_rest_uncoalesced(self, operation_func: Callable, operation_name: str,
+                                          *args, **kwargs) -> Any:
+        """_fallback_to_rest 的实际执行体（不经过请求合并）"""
         try:
             self.data_source_stats['rest_api_requests'] += 1
             self.data_source_stats['fallback_count'] += 1
@@ -287,6 +312,21 @@ class HybridServiceBase(ABC):
             logger.error(f"❌ REST API操作失败: {operation_name} - {e}")
             raise TradingToolError(f"REST API操作失败 ({operation_name}): {e}")
     
+    async def _coalesced(self, endpoint: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        通过请求合并执行读操作
+        Coalesce concurrent identical read calls into one upstream call
+        
+        只合并 get_ 开头的只读端点；下单、撤单等写操作每次都真实执行
+        
+        Args:
+            endpoint: 端点名称（用于统计） / Endpoint name for counters
+            func: 实际执行的协程函数 / Coroutine function to run
+            *args, **kwargs: 函数参数，同时构成合并键 / Arguments, also forming the coalescing key
+        """
+        key = make_request_key(endpoint, args, kwargs) if endpoint.startswith('get_') else None
+        return await self.single_flight.do(endpoint, key, func, *args, **kwargs)
+    
     # ==================== 重试机制 Retry Mechanism ====================
     
     async def _retry_operation(self, 
@@ -373,6 +413,7 @@ class HybridServiceBase(ABC):
             'websocket_error_count': self.websocket_error_count,
             'last_websocket_error': str(self.last_websocket_error) if self.last_websocket_error else None,
             'fallback_enabled': self.fallback_enabled,
+            'single_flight': self.single_flight.get_stats(),
             'last_update': datetime.now()
         })
         
@@ -392,6 +433,8 @@ class HybridServiceBase(ABC):
             'last_update': datetime.now()
         }
         
+        self.single_flight.reset_stats()
+        
         logger.info("📊 数据源统计信息已重置")
     
     # ==================== 配置管理 Configuration Management ====================
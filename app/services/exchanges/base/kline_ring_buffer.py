@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+实时K线环形缓冲区
+Fixed-capacity columnar kline ring buffer for realtime managers
+
+每个 (交易对, 周期) 一组定长numpy列（timestamp/open/high/low/close/volume）；
+未收盘K线的推送原地覆盖最后一行，只有新开盘时间才追加，不再堆积重复的盘中快照。
+列采用镜像存储（每行同时写入 i 和 i+capacity），最近N行始终是一段连续内存，
+读取方直接拿到零拷贝视图，可交给talib/指标代码使用
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+# 列定义：列名 -> dtype（timestamp为开盘时间毫秒）
+KLINE_COLUMNS = {
+    'timestamp': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+}
+
+
+class KlineRingBuffer:
+    """
+    定长K线环形缓冲区
+    Closed bars are appended; updates for the current open time overwrite the last row in place
+    """
+
+    __slots__ = ('capacity', '_columns', '_head', '_size', '_last_confirmed', 'updates', 'appends')
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = max(1, int(capacity))
+        self._columns = {
+            column: np.zeros(2 * self.capacity, dtype=dtype) for column, dtype in KLINE_COLUMNS.items()
+        }
+        # 下一行写入位置与当前行数
+        self._head = 0
+        self._size = 0
+        # 最后一行是否已收盘
+        self._last_confirmed = True
+
+        # 统计
+        self.updates = 0
+        self.appends = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self._size:
+            return None
+        return int(self._columns['timestamp'][(self._head - 1) % self.capacity])
+
+    @property
+    def last_confirmed(self) -> bool:
+        """最后一行是否为已收盘K线"""
+        return self._last_confirmed
+
+    def _write(self, slot: int, timestamp: int, open_: float, high: float,
+               low: float, close: float, volume: float) -> None:
+        columns = self._columns
+        for position in (slot, slot + self.capacity):
+            columns['timestamp'][position] = timestamp
+            columns['open'][position] = open_
+            columns['high'][position] = high
+            columns['low'][position] = low
+            columns['close'][position] = close
+            columns['volume'][position] = volume
+
+    def update(self, timestamp: int, open_: float, high: float, low: float,
+               close: float, volume: float, confirm: bool) -> bool:
+        """
+        写入一次K线推送
+        Same open time as the last row -> overwrite in place; newer -> append; older -> ignored
+
+        Returns:
+            bool: 是否被接收（过期推送返回False）
+        """
+        last_ts = self.last_timestamp
+        if last_ts is not None and timestamp < last_ts:
+            return False
+
+        if last_ts is not None and timestamp == last_ts:
+            slot = (self._head - 1) % self.capacity
+            self.updates += 1
+        else:
+            # 新开盘时间：上一根即使没收到收盘推送，也以最后一次快照为准保留
+            slot = self._head
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self.appends += 1
+
+        self._write(slot, timestamp, open_, high, low, close, volume)
+        self._last_confirmed = bool(confirm)
+        return True
+
+    def arrays(self, limit: Optional[int] = None, closed_only: bool = False) -> Dict[str, np.ndarray]:
+        """
+        获取最近limit行的只读列视图（时间升序，零拷贝）
+        Views alias the buffer: copy them if they must outlive the next update
+
+        Args:
+            limit: 行数，默认全部
+            closed_only: 是否排除最后一根未收盘K线
+        """
+        size = self._size
+        if closed_only and size and not self._last_confirmed:
+            size -= 1
+            end = self._head - 1 + self.capacity
+        else:
+            end = self._head + self.capacity
+        count = size if limit is None else max(0, min(limit, size))
+
+        views = {}
+        for column, values in self._columns.items():
+            view = values[end - count:end]
+            view.flags.writeable = False
+            views[column] = view
+        return views
+
+    def clear(self) -> None:
+        self._head = 0
+        self._size = 0
+        self._last_confirmed = True
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self._columns.values())
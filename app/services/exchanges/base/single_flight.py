@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+请求合并（single-flight）
+Single-flight request coalescing - 相同的并发请求共享同一个上游调用结果
+
+同一时刻多个子服务请求相同的 (端点, 参数) 时，只有第一个请求真正访问交易所，
+其余请求等待同一个上游任务并获得结果副本；上游完成后立即移除，不做时间窗口缓存
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _clone_result(result: Any) -> Any:
+    """为跟随者复制结果，避免调用方就地修改（如给K线打source标记）互相影响"""
+    if isinstance(result, list):
+        return [dict(item) if isinstance(item, dict) else item for item in result]
+    if isinstance(result, dict):
+        return dict(result)
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    return result
+
+
+def make_request_key(endpoint: str, args: tuple, kwargs: Dict[str, Any]) -> Optional[Hashable]:
+    """由端点和参数构建合并键，参数不可哈希时返回None（不合并）"""
+    key = (endpoint, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class SingleFlight:
+    """
+    单飞请求合并器
+    Concurrent callers with the same key await one shared upstream task; per-endpoint dedupe counters
+    """
+
+    def __init__(self, name: str = ''):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # 端点 -> {'calls', 'upstream', 'coalesced'}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _endpoint_stats(self, endpoint: str) -> Dict[str, int]:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = {'calls': 0, 'upstream': 0, 'coalesced': 0}
+        return stats
+
+    async def do(self, endpoint: str, key: Optional[Hashable], func: Callable, *args, **kwargs) -> Any:
+        """
+        执行或加入相同键的进行中请求
+        Run func(*args, **kwargs) once per key among concurrent callers; key=None bypasses coalescing
+
+        上游任务与发起者解耦：发起者被取消不会中断其他等待者
+        """
+        stats = self._endpoint_stats(endpoint)
+        stats['calls'] += 1
+
+        if key is None:
+            stats['upstream'] += 1
+            return await func(*args, **kwargs)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            stats['coalesced'] += 1
+            logger.debug(f"🔗 合并进行中的请求: {self.name} {endpoint}")
+            return _clone_result(await asyncio.shield(task))
+
+        stats['upstream'] += 1
+        task = asyncio.ensure_future(func(*args, **kwargs))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._on_done(key, done))
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待者都已取消时也要取走异常，避免 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def inflight_count(self) -> int:
+        return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计（按端点）"""
+        total_calls = sum(stats['calls'] for stats in self._stats.values())
+        total_coalesced = sum(stats['coalesced'] for stats in self._stats.values())
+        return {
+            'inflight': len(self._inflight),
+            'total_calls': total_calls,
+            'total_coalesced': total_coalesced,
+            'dedupe_rate': round(total_coalesced / total_calls, 4) if total_calls else 0.0,
+            'endpoints': {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+        }
+
+    def reset_stats(self) -> None:
+        self._stats.clear()
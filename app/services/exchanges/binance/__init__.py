@@ -15,6 +15,8 @@ from .binance_realtime_data_manager import BinanceRealtimeDataManager, get_binan
 from .binance_hybrid_service import BinanceHybridService
 from .binance_data_converter import BinanceDataConverter
 from .binance_error_handler import BinanceErrorHandler
+from .binance_kline_backfill import BinanceKlineBackfill, BackfillReport
+from .binance_stream_multiplexer import BinanceStreamMultiplexer
 
 __all__ = [
     'BinanceService',
@@ -23,5 +25,8 @@ __all__ = [
     'get_binance_realtime_manager',
     'BinanceHybridService',
     'BinanceDataConverter',
-    'BinanceErrorHandler'
+    'BinanceErrorHandler',
+    'BinanceKlineBackfill',
+    'BackfillReport',
+    'BinanceStreamMultiplexer'
 ]
\ No newline at end of file
@@ -224,8 +224,10 @@ class BinanceHybridService(HybridServiceBase, ExchangeInterface):
                     logger.debug(f"🔌 WebSocket获取价格: {symbol} = {ticker_data.price}")
                     return ticker_data.price
             
-            # 回退到REST API，使用错误处理器
-            return await self.error_handler.handle_error_with_retry(
+            # 回退到REST API，使用错误处理器（并发的相同请求合并为一次）
+            return await self._coalesced(
+                'get_current_price',
+                self.error_handler.handle_error_with_retry,
                 self.rest_service.get_current_price,
                 f"get_current_price_{symbol}",
                 symbol
@@ -287,8 +289,15 @@ class BinanceHybridService(HybridServiceBase, ExchangeInterface):
             logger.error(f"❌ 获取{symbol} ticker数据失败: {e}")
             return None
     
-    async def get_kline_data(self, symbol: str, timeframe: str = '1H', limit: int = 100) -> List[Dict[str, Any]]:
-        """获取K线数据"""
+    async def get_kline_data(
+        self,
+        symbol: str,
+        timeframe: str = '1H',
+        limit: int = 100,
+        start_time: Optional[Union[datetime, int]] = None,
+        end_time: Optional[Union[datetime, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """获取K线数据，指定时间区间或超过单页上限时由REST服务分页回填"""
         try:
             # 转换时间周期格式
             binance_timeframe = BinanceDataConverter.convert_timeframe_to_binance(timeframe)
@@ -297,7 +306,8 @@ class BinanceHybridService(HybridServiceBase, ExchangeInterface):
             raw_data = await self._fallback_to_rest(
                 self.rest_service.get_kline_data,
                 f"get_kline_data_{symbol}_{timeframe}",
-                symbol, binance_timeframe, limit
+                symbol, binance_timeframe, limit,
+                start_time=start_time, end_time=end_time
             )
             
             # 如果REST API返回的数据已经是转换后的格式，直接返回
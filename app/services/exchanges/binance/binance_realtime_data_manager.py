@@ -10,9 +10,14 @@ from datetime import datetime
 from collections import defaultdict, deque
 from dataclasses import dataclass
 
+import numpy as np
+
 from app.core.logging import get_logger
+from app.services.exchanges.base.funding_rate_snapshot import FundingRateSnapshot
+from app.services.exchanges.base.kline_ring_buffer import KlineRingBuffer
 from app.services.exchanges.binance.binance_websocket_service import BinanceWebSocketService
 from app.utils.exceptions import TradingToolError
+from app.utils.streaming_indicators import IndicatorEngine
 
 logger = get_logger(__name__)
 
@@ -74,10 +79,17 @@ class BinanceRealtimeDataManager:
         
         # 数据存储
         self.tickers: Dict[str, MarketData] = {}
-        self.klines: Dict[str, Dict[str, deque]] = defaultdict(lambda: defaultdict(lambda: deque(maxlen=max_history_size)))
+        # K线：每个 (交易对, 周期) 一个定长列式环形缓冲区，未收盘K线原地更新
+        self.klines: Dict[str, Dict[str, KlineRingBuffer]] = defaultdict(
+            lambda: defaultdict(lambda: KlineRingBuffer(max_history_size))
+        )
         self.trades: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_history_size))
         self.funding_rates: Dict[str, FundingRateData] = {}
         self.mark_prices: Dict[str, Dict[str, Any]] = {}
+        # 全市场资金费率快照表（!markPrice@arr 增量维护，供监控周期向量化筛选）
+        self.funding_snapshot = FundingRateSnapshot()
+        # 增量指标：每根K线收盘时按缓冲区追平，扫描直接读取最新指标值
+        self.indicator_engine = IndicatorEngine()
         
         # 订阅管理
         self.subscribed_symbols: set = set()
@@ -138,6 +150,8 @@ class BinanceRealtimeDataManager:
             self.trades.clear()
             self.funding_rates.clear()
             self.mark_prices.clear()
+            self.funding_snapshot = FundingRateSnapshot()
+            self.indicator_engine.clear()
             self.subscribed_symbols.clear()
             self.subscribed_timeframes.clear()
             
@@ -148,7 +162,7 @@ class BinanceRealtimeDataManager:
             logger.error(f"❌ 清理币安实时数据管理器异常: {e}")
     
     async def subscribe_ticker(self, symbols: List[str]) -> bool:
-        """订阅ticker数据"""
+        """订阅ticker数据（组合流批量订阅）"""
         if not self.is_initialized:
             await self.initialize()
         
@@ -157,64 +171,43 @@ class BinanceRealtimeDataManager:
         
         logger.info(f"📡 开始订阅ticker: {len(symbols)} 个交易对")
         
-        success_count = 0
-        failed_symbols = []
+        try:
+            results = await self.ws_service.subscribe_symbols_batch(
+                symbols, 'ticker', callback=self._on_ticker_update
+            )
+        except Exception as e:
+            logger.error(f"❌ 批量订阅ticker异常: {e}")
+            return False
         
-        for symbol in symbols:
-            try:
-                success = await self.ws_service.subscribe_symbol_ticker(
-                    symbol,
-                    callback=self._on_ticker_update
-                )
-                
-                if success:
-                    self.subscribed_symbols.add(symbol)
-                    success_count += 1
-                    logger.debug(f"📡 订阅ticker成功: {symbol}")
-                else:
-                    failed_symbols.append(symbol)
-                    logger.warning(f"⚠️ 订阅ticker失败: {symbol}")
-                
-                # 避免频率限制
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"❌ 订阅{symbol} ticker异常: {e}")
-                failed_symbols.append(symbol)
+        failed_symbols = [symbol for symbol, success in results.items() if not success]
         
         # 重试失败的订阅
         if failed_symbols and len(failed_symbols) <= 10:
             logger.info(f"🔄 重试订阅失败的ticker: {len(failed_symbols)} 个")
             await asyncio.sleep(1)
-            
-            for symbol in failed_symbols[:]:
-                try:
-                    success = await self.ws_service.subscribe_symbol_ticker(
-                        symbol,
-                        callback=self._on_ticker_update
-                    )
-                    if success:
-                        self.subscribed_symbols.add(symbol)
-                        success_count += 1
-                        failed_symbols.remove(symbol)
-                        logger.info(f"✅ 重试订阅ticker成功: {symbol}")
-                    
-                    await asyncio.sleep(0.2)
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ 重试订阅{symbol} ticker仍失败: {e}")
+            try:
+                retry_results = await self.ws_service.subscribe_symbols_batch(
+                    failed_symbols, 'ticker', callback=self._on_ticker_update
+                )
+                results.update(retry_results)
+                failed_symbols = [symbol for symbol, success in retry_results.items() if not success]
+            except Exception as e:
+                logger.warning(f"⚠️ 重试订阅ticker仍失败: {e}")
+        
+        subscribed = [symbol for symbol, success in results.items() if success]
+        self.subscribed_symbols.update(subscribed)
         
-        logger.info(f"📡 Ticker订阅完成: {success_count}/{len(symbols)} 成功")
+        logger.info(f"📡 Ticker订阅完成: {len(subscribed)}/{len(symbols)} 成功")
         if failed_symbols:
             if len(failed_symbols) <= 5:
                 logger.warning(f"⚠️ 订阅失败的ticker: {failed_symbols}")
             else:
                 logger.warning(f"⚠️ 订阅失败的ticker: {len(failed_symbols)} 个")
         
-        return success_count > 0
+        return len(subscribed) > 0
     
     async def subscribe_klines(self, symbols: List[str], timeframes: List[str] = None) -> bool:
-        """订阅K线数据"""
+        """订阅K线数据（组合流批量订阅）"""
         if not self.is_initialized:
             await self.initialize()
         
@@ -229,93 +222,58 @@ class BinanceRealtimeDataManager:
         success_count = 0
         total_subscriptions = len(symbols) * len(timeframes)
         
-        for symbol in symbols:
-            for timeframe in timeframes:
-                try:
-                    success = await self.ws_service.subscribe_symbol_kline(
-                        symbol,
-                        interval=timeframe,
-                        callback=self._on_kline_update
-                    )
-                    
-                    if success:
-                        self.subscribed_timeframes[symbol].add(timeframe)
-                        success_count += 1
-                        logger.debug(f"📈 订阅K线成功: {symbol} {timeframe}")
-                    else:
-                        logger.warning(f"⚠️ 订阅K线失败: {symbol} {timeframe}")
-                    
-                    # 避免频率限制
-                    await asyncio.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.error(f"❌ 订阅{symbol} {timeframe} K线异常: {e}")
-        
-        logger.info(f"📈 K线订阅完成: {success_count}/{total_subscriptions} 成功")
-        return success_count > 0
-    
-    async def subscribe_trades(self, symbols: List[str]) -> bool:
-        """订阅交易数据"""
-        if not self.is_initialized:
-            await self.initialize()
-        
-        if not symbols:
-            return True
-        
-        logger.info(f"💰 开始订阅交易数据: {len(symbols)} 个交易对")
-        
-        success_count = 0
-        for symbol in symbols:
+        for timeframe in timeframes:
             try:
-                success = await self.ws_service.subscribe_symbol_trades(
-                    symbol,
-                    callback=self._on_trade_update
+                results = await self.ws_service.subscribe_symbols_batch(
+                    symbols, f"kline_{timeframe}", callback=self._on_kline_update
                 )
+            except Exception as e:
+                logger.error(f"❌ 订阅 {timeframe} K线异常: {e}")
+                continue
+            
+            for symbol, success in results.items():
                 if success:
+                    self.subscribed_timeframes[symbol].add(timeframe)
                     success_count += 1
-                    logger.debug(f"💰 订阅交易数据成功: {symbol}")
                 else:
-                    logger.warning(f"⚠️ 订阅交易数据失败: {symbol}")
-                
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"❌ 订阅{symbol}交易数据异常: {e}")
+                    logger.warning(f"⚠️ 订阅K线失败: {symbol} {timeframe}")
         
-        logger.info(f"💰 交易数据订阅完成: {success_count}/{len(symbols)} 成功")
+        logger.info(f"📈 K线订阅完成: {success_count}/{total_subscriptions} 成功")
         return success_count > 0
     
-    async def subscribe_funding_rates(self, symbols: List[str]) -> bool:
-        """订阅资金费率（通过标记价格获取）"""
+    async def _subscribe_batch(self, symbols: List[str], stream_type: str,
+                               callback: Callable, label: str) -> bool:
+        """批量订阅同类数据流并汇总结果"""
         if not self.is_initialized:
             await self.initialize()
         
         if not symbols:
             return True
         
-        logger.info(f"💸 开始订阅资金费率: {len(symbols)} 个交易对")
+        logger.info(f"📡 开始订阅{label}: {len(symbols)} 个交易对")
         
-        success_count = 0
-        for symbol in symbols:
-            try:
-                success = await self.ws_service.subscribe_symbol_mark_price(
-                    symbol,
-                    callback=self._on_funding_rate_update
-                )
-                if success:
-                    success_count += 1
-                    logger.debug(f"💸 订阅资金费率成功: {symbol}")
-                else:
-                    logger.warning(f"⚠️ 订阅资金费率失败: {symbol}")
-                
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"❌ 订阅{symbol}资金费率异常: {e}")
+        try:
+            results = await self.ws_service.subscribe_symbols_batch(symbols, stream_type, callback=callback)
+        except Exception as e:
+            logger.error(f"❌ 批量订阅{label}异常: {e}")
+            return False
         
-        logger.info(f"💸 资金费率订阅完成: {success_count}/{len(symbols)} 成功")
+        failed_symbols = [symbol for symbol, success in results.items() if not success]
+        if failed_symbols:
+            logger.warning(f"⚠️ 订阅{label}失败: {failed_symbols[:5]}{'...' if len(failed_symbols) > 5 else ''}")
+        
+        success_count = len(results) - len(failed_symbols)
+        logger.info(f"📡 {label}订阅完成: {success_count}/{len(symbols)} 成功")
         return success_count > 0
     
+    async def subscribe_trades(self, symbols: List[str]) -> bool:
+        """订阅交易数据"""
+        return await self._subscribe_batch(symbols, 'aggTrade', self._on_trade_update, "交易数据")
+    
+    async def subscribe_funding_rates(self, symbols: List[str]) -> bool:
+        """订阅资金费率（通过标记价格获取）"""
+        return await self._subscribe_batch(symbols, 'markPrice', self._on_funding_rate_update, "资金费率")
+    
     async def subscribe_all_funding_rates(self) -> bool:
         """订阅所有交易对的资金费率"""
         if not self.is_initialized:
@@ -391,8 +349,17 @@ class BinanceRealtimeDataManager:
                     confirm=kline.get('x', False)  # K线是否结束
                 )
                 
-                # 存储K线数据
-                self.klines[standard_symbol][interval].append(kline_data)
+                # 存储K线数据（同一开盘时间原地覆盖）
+                buffer = self.klines[standard_symbol][interval]
+                previous_timestamp = buffer.last_timestamp
+                buffer.update(
+                    kline_data.timestamp, kline_data.open, kline_data.high, kline_data.low,
+                    kline_data.close, kline_data.volume, kline_data.confirm
+                )
+                
+                # 收盘或新K线开盘（上一根即使没收到收盘推送也已结束）时推进增量指标，首次预热在线程池中进行
+                if kline_data.confirm or (previous_timestamp is not None and kline_data.timestamp > previous_timestamp):
+                    self.indicator_engine.schedule_sync(standard_symbol, interval, buffer.arrays(closed_only=True))
                 
                 # 调用回调函数
                 await self._call_callbacks('kline', standard_symbol, kline_data)
@@ -446,6 +413,10 @@ class BinanceRealtimeDataManager:
                 
                 # 存储资金费率数据
                 self.funding_rates[standard_symbol] = funding_data
+                self.funding_snapshot.update(
+                    standard_symbol, funding_data.funding_rate, data.get('T'),
+                    mark_price=float(data.get('p', '0'))
+                )
                 
                 # 同时存储标记价格数据
                 self.mark_prices[standard_symbol] = {
@@ -468,6 +439,8 @@ class BinanceRealtimeDataManager:
         """处理所有资金费率更新"""
         try:
             if isinstance(data, list):
+                now = datetime.now()
+                snapshot_now = now.timestamp()
                 for item in data:
                     symbol = item.get('s', '')
                     standard_symbol = self._convert_symbol_from_binance(symbol)
@@ -476,10 +449,14 @@ class BinanceRealtimeDataManager:
                         symbol=standard_symbol,
                         funding_rate=float(item.get('r', '0')),
                         next_funding_time=datetime.fromtimestamp(int(item.get('T', '0')) / 1000),
-                        timestamp=datetime.now()
+                        timestamp=now
                     )
                     
                     self.funding_rates[standard_symbol] = funding_data
+                    self.funding_snapshot.update(
+                        standard_symbol, funding_data.funding_rate, item.get('T'),
+                        mark_price=float(item.get('p', '0')), now=snapshot_now
+                    )
                     
                     # 同时存储标记价格数据
                     self.mark_prices[standard_symbol] = {
@@ -520,8 +497,41 @@ class BinanceRealtimeDataManager:
     
     def get_latest_klines(self, symbol: str, timeframe: str, limit: int = 100) -> List[KlineData]:
         """获取最新K线数据"""
-        klines = self.klines.get(symbol, {}).get(timeframe, deque())
-        return list(klines)[-limit:] if klines else []
+        buffer = self.klines.get(symbol, {}).get(timeframe)
+        if not buffer:
+            return []
+        arrays = buffer.arrays(limit)
+        rows = zip(*(arrays[column].tolist() for column in ('timestamp', 'open', 'high', 'low', 'close', 'volume')))
+        klines = [
+            KlineData(symbol, timeframe, timestamp, open_, high, low, close, volume)
+            for timestamp, open_, high, low, close, volume in rows
+        ]
+        if klines:
+            klines[-1].confirm = buffer.last_confirmed
+        return klines
+    
+    def get_kline_arrays(self, symbol: str, timeframe: str, limit: Optional[int] = None,
+                         closed_only: bool = False) -> Optional[Dict[str, np.ndarray]]:
+        """
+        获取最新K线的列数组（零拷贝只读视图，可直接用于talib/指标计算）
+        
+        视图与缓冲区共享内存，跨await持有时请先copy
+        """
+        buffer = self.klines.get(symbol, {}).get(timeframe)
+        if not buffer:
+            return None
+        return buffer.arrays(limit, closed_only=closed_only)
+    
+    def get_latest_indicators(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """获取最近一根收盘K线上的增量指标值（SMA/EMA/MACD/RSI/ATR/SuperTrend/布林带/随机指标）"""
+        return self.indicator_engine.latest(symbol, timeframe)
+    
+    def get_current_indicators(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """获取最新一根K线（含未收盘K线）上的增量指标值，状态未预热或未追平时返回None"""
+        buffer = self.klines.get(symbol, {}).get(timeframe)
+        if not buffer:
+            return None
+        return self.indicator_engine.current(symbol, timeframe, buffer.arrays(2), buffer.last_confirmed)
     
     def get_latest_trades(self, symbol: str, limit: int = 100) -> List[TradeData]:
         """获取最新交易数据"""
@@ -544,6 +554,10 @@ class BinanceRealtimeDataManager:
         """获取所有资金费率数据"""
         return self.funding_rates.copy()
     
+    def get_funding_snapshot(self) -> FundingRateSnapshot:
+        """获取全市场资金费率快照表"""
+        return self.funding_snapshot
+    
     # 回调管理
     def add_callback(self, data_type: str, callback: Callable, symbol: str = None) -> None:
         """添加数据更新回调"""
@@ -576,7 +590,9 @@ class BinanceRealtimeDataManager:
             "subscribed_symbols": len(self.subscribed_symbols),
             "cached_tickers": len(self.tickers),
             "cached_funding_rates": len(self.funding_rates),
-            "cached_mark_prices": len(self.mark_prices)
+            "cached_mark_prices": len(self.mark_prices),
+            "funding_snapshot": self.funding_snapshot.get_stats(),
+            "indicator_engine": self.indicator_engine.get_stats()
         }
     
     def get_subscribed_symbols(self) -> List[str]:
@@ -596,4 +612,8 @@ async def get_binance_realtime_manager() -> BinanceRealtimeDataManager:
         _binance_realtime_manager = BinanceRealtimeDataManager()
         await _binance_realtime_manager.initialize()
     
-    return _binance_realtime_manager
\ No newline at end of file
+    return _binance_realtime_manager
+
+def get_active_binance_realtime_manager() -> Optional[BinanceRealtimeDataManager]:
+    """获取已创建的币安实时数据管理器实例（不创建、不初始化，未启动时返回None）"""
+    return _binance_realtime_manager
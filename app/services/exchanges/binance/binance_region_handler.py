@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from app.core.logging import get_logger
 from app.core.config import get_settings
 from app.utils.exceptions import TradingToolError, APIConnectionError
+from app.utils.http_manager import http_manager
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -101,7 +102,7 @@ class BinanceRegionHandler:
             kwargs['proxy'] = settings.proxy_url
             logger.debug(f"🔌 强制使用代理连接: {endpoint['name']} -> {settings.proxy_url}")
             
-            async with aiohttp.ClientSession() as session:
+            async with http_manager.get_session() as session:
                 async with session.get(url, **kwargs) as response:
                     # 检查响应状态
                     if response.status == 200:
@@ -4,7 +4,7 @@
 Binance Exchange Service - 提供币安交易所数据获取和交易功能
 """
 
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 import asyncio
 import aiohttp
@@ -17,156 +17,87 @@ from app.core.logging import get_logger
 from app.core.config import get_settings
 from app.utils.exceptions import TradingToolError, APIConnectionError
 from app.utils.http_manager import get_http_manager
+from app.utils.json_codec import read_json
+from app.utils.rate_limiter import BucketSpec, ExchangeRateLimiter, RequestPriority
 from app.services.exchanges.binance.binance_region_handler import get_binance_region_handler, get_optimal_binance_config
 from app.services.exchanges.binance.binance_batch_optimizer import get_batch_optimizer
+from app.services.exchanges.binance.binance_kline_backfill import (
+    BinanceKlineBackfill, INTERVAL_MS, KLINE_PAGE_LIMIT, kline_request_weight, parse_kline, to_milliseconds
+)
 
 logger = get_logger(__name__)
 settings = get_settings()
 
 
-class BinanceRateLimiter:
-    """币安速率限制器 - 优化版本"""
+class BinanceRateLimiter(ExchangeRateLimiter):
+    """
+    币安速率限制器 - 按权重类别的令牌桶
+    Futures/spot request weight and order-count buckets, calibrated from X-MBX-* usage headers
+    """
     
-    def __init__(self):
-        # 币安API限制配置 - 更宽松的设置
-        self.limits = {
-            'requests_per_minute': 1200,  # 每分钟1200次
-            'orders_per_second': 10,      # 每秒10次
-            'orders_per_day': 200000      # 每日20万次
-        }
-        
-        # 请求计数器
-        self.request_counts = {
-            'minute': {'count': 0, 'reset_time': time.time() + 60},
-            'second': {'count': 0, 'reset_time': time.time() + 1},
-            'day': {'count': 0, 'reset_time': time.time() + 86400}
-        }
-        
-        # 动态调整参数 - 更宽松的间隔
-        self.current_weight = 1
-        self.base_interval = 0.1   # 基础请求间隔100ms
-        self.max_interval = 2.0    # 最大请求间隔2秒
-        
-        # 批量处理优化
-        self.batch_size = 20       # 减少批量处理大小
-        self.batch_interval = 0.5  # 减少批量处理间隔
-        
-        # 添加请求缓存以减少重复请求
-        self.request_cache = {}
-        self.cache_ttl = 5  # 缓存5秒
-        
-        logger.debug("🚦 币安速率限制器初始化完成（宽松版本）")
+    BUCKETS = {
+        'fapi_weight': BucketSpec(limit=2400, interval=60),   # 期货 REQUEST_WEIGHT 每分钟
+        'api_weight': BucketSpec(limit=6000, interval=60),    # 现货 REQUEST_WEIGHT 每分钟
+        'orders_10s': BucketSpec(limit=300, interval=10),     # 期货下单数 每10秒
+        'orders_1m': BucketSpec(limit=1200, interval=60),     # 期货下单数 每分钟
+    }
     
-    async def acquire_permit(self, weight: int = 1) -> float:
-        """获取请求许可"""
-        current_time = time.time()
-        
-        # 重置计数器
-        self._reset_counters(current_time)
-        
-        # 检查是否超过限制
-        if self._is_rate_limited():
-            wait_time = self._calculate_wait_time()
-            await asyncio.sleep(wait_time)
-            return wait_time
-        
-        # 更新计数器
-        self._update_counters(weight)
-        
-        # 计算动态间隔
-        interval = self._calculate_dynamic_interval()
-        if interval > 0:
-            await asyncio.sleep(interval)
-        
-        return interval
+    # 响应头 -> 桶（权重头按请求的端点区分期货/现货）
+    USAGE_HEADERS = {
+        'x-mbx-order-count-10s': 'orders_10s',
+        'x-mbx-order-count-1m': 'orders_1m',
+    }
     
-    def _reset_counters(self, current_time: float):
-        """重置过期的计数器"""
-        for period, data in self.request_counts.items():
-            if current_time >= data['reset_time']:
-                data['count'] = 0
-                if period == 'minute':
-                    data['reset_time'] = current_time + 60
-                elif period == 'second':
-                    data['reset_time'] = current_time + 1
-                elif period == 'day':
-                    data['reset_time'] = current_time + 86400
+    ORDER_ENDPOINTS = ('/fapi/v1/order', '/fapi/v1/batchOrders', '/api/v3/order')
+    HIGH_PRIORITY_ENDPOINTS = ('/fapi/v2/positionRisk', '/fapi/v2/account', '/fapi/v2/balance', '/api/v3/account')
     
-    def _is_rate_limited(self) -> bool:
-        """检查是否触发速率限制 - 更宽松的检查"""
-        minute_limit = self.limits['requests_per_minute'] * 0.85  # 85%安全边际
-        second_limit = self.limits['orders_per_second'] * 0.8     # 80%安全边际
-        
-        return (self.request_counts['minute']['count'] >= minute_limit or
-                self.request_counts['second']['count'] >= second_limit)
+    def __init__(self):
+        super().__init__('binance')
+        logger.debug("🚦 币安速率限制器初始化完成")
     
-    def _calculate_wait_time(self) -> float:
-        """计算等待时间 - 更智能的等待策略"""
-        current_time = time.time()
-        
-        # 计算到下一个重置时间的等待时间
-        minute_wait = max(0, self.request_counts['minute']['reset_time'] - current_time)
-        second_wait = max(0, self.request_counts['second']['reset_time'] - current_time)
-        
-        # 使用更短的等待时间
-        base_wait = max(minute_wait, second_wait)
-        
-        # 如果是秒级限制，等待时间更短
-        if second_wait > minute_wait:
-            return min(base_wait, 1.1)  # 秒级限制最多等待1.1秒
-        else:
-            return min(base_wait, 5.0)  # 分钟级限制最多等待5秒
+    @staticmethod
+    def _weight_bucket(endpoint: Optional[str]) -> str:
+        return 'api_weight' if endpoint and endpoint.startswith('/api/') else 'fapi_weight'
     
-    def _update_counters(self, weight: int):
-        """更新请求计数器"""
-        self.request_counts['minute']['count'] += weight
-        self.request_counts['second']['count'] += weight
-        self.request_counts['day']['count'] += weight
+    def classify(self, endpoint: str, method: str = 'GET') -> Tuple[List[str], RequestPriority]:
+        buckets = [self._weight_bucket(endpoint)]
+        if endpoint.startswith(self.ORDER_ENDPOINTS):
+            if method.upper() != 'GET' and endpoint.startswith('/fapi/'):
+                buckets += ['orders_10s', 'orders_1m']
+            return buckets, RequestPriority.CRITICAL
+        if endpoint.startswith(self.HIGH_PRIORITY_ENDPOINTS):
+            return buckets, RequestPriority.HIGH
+        return buckets, RequestPriority.NORMAL
     
-    def _calculate_dynamic_interval(self) -> float:
-        """计算动态请求间隔 - 更宽松的策略"""
-        # 基于当前负载动态调整间隔
-        minute_usage = self.request_counts['minute']['count'] / self.limits['requests_per_minute']
-        
-        if minute_usage > 0.8:  # 80%开始最大间隔
-            return self.max_interval
-        elif minute_usage > 0.7:
-            return self.base_interval * 3  # 减少间隔倍数
-        elif minute_usage > 0.6:
-            return self.base_interval * 2
-        elif minute_usage > 0.5:
-            return self.base_interval * 1.5
-        elif minute_usage > 0.3:
-            return self.base_interval
-        else:
-            return 0  # 低负载时无间隔
+    async def acquire_permit(self, weight: int = 1, endpoint: str = '/fapi/v1/',
+                             priority: Optional[RequestPriority] = None, method: str = 'GET') -> float:
+        """获取请求许可，返回排队等待秒数"""
+        return await self.acquire(endpoint, weight, priority, method)
     
-    def update_from_headers(self, headers: Dict[str, str]):
-        """从响应头更新限制信息"""
+    def update_from_headers(self, headers: Dict[str, str], endpoint: Optional[str] = None):
+        """从响应头校准已用权重/下单数，并处理Retry-After"""
         try:
-            # 币安在响应头中提供限制信息
-            if 'X-MBX-USED-WEIGHT-1M' in headers:
-                used_weight = int(headers['X-MBX-USED-WEIGHT-1M'])
-                self.current_weight = used_weight
-                
-            if 'Retry-After' in headers:
-                retry_after = int(headers['Retry-After'])
-                logger.warning(f"🚦 服务器要求等待 {retry_after} 秒")
-                
+            for key, value in headers.items():
+                key = key.lower()
+                if key == 'x-mbx-used-weight-1m':
+                    self.buckets[self._weight_bucket(endpoint)].observe_usage(int(value))
+                elif key in self.USAGE_HEADERS:
+                    self.buckets[self.USAGE_HEADERS[key]].observe_usage(int(value))
+            super().update_from_headers(headers, endpoint)
         except Exception as e:
             logger.debug(f"🔍 解析响应头异常: {e}")
-    
-    def get_status(self) -> Dict[str, Any]:
-        """获取限制器状态"""
-        current_time = time.time()
-        return {
-            'current_weight': self.current_weight,
-            'request_counts': self.request_counts.copy(),
-            'limits': self.limits.copy(),
-            'base_interval': self.base_interval,
-            'max_interval': self.max_interval,
-            'current_time': current_time
-        }
+
+
+# 全局速率限制器（所有币安客户端共享同一组计数）
+_binance_rate_limiter: Optional[BinanceRateLimiter] = None
+
+
+def get_binance_rate_limiter() -> BinanceRateLimiter:
+    """获取币安速率限制器实例"""
+    global _binance_rate_limiter
+    if _binance_rate_limiter is None:
+        _binance_rate_limiter = BinanceRateLimiter()
+    return _binance_rate_limiter
 
 
 class BinanceService:
@@ -209,6 +140,9 @@ class BinanceService:
         # 服务器时间同步
         self._server_time_offset = 0  # 本地时间与服务器时间的偏移量（毫秒）
         self._last_time_sync = 0  # 上次同步时间
+
+        # K线分页回填引擎（懒加载）
+        self._kline_backfill: Optional[BinanceKlineBackfill] = None
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
@@ -286,7 +220,7 @@ class BinanceService:
             
             # 初始化速率限制器
             if not self._rate_limiter:
-                self._rate_limiter = BinanceRateLimiter()
+                self._rate_limiter = get_binance_rate_limiter()
     
     async def _check_connection_health(self) -> bool:
         """检查连接健康状态"""
@@ -328,7 +262,7 @@ class BinanceService:
             async with self.http_manager.get_session() as session:
                 async with session.get(f"{self.base_url}/api/v3/time") as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = await read_json(response)
                         return int(data.get('serverTime', 0))
             return None
         except Exception as e:
@@ -370,8 +304,9 @@ class BinanceService:
         return headers
     
     async def _make_request(self, method: str, endpoint: str, params: Dict = None, 
-                          data: Dict = None, signed: bool = False, weight: int = 1) -> Dict[str, Any]:
-        """发起API请求 - 增强版本，支持速率限制和指数退避"""
+                          data: Dict = None, signed: bool = False, weight: int = 1,
+                          priority: Optional[RequestPriority] = None) -> Dict[str, Any]:
+        """发起API请求 - 增强版本，支持按权重/优先级的速率限制和指数退避"""
         
         # 检查连接健康状态
         if not await self._check_connection_health():
@@ -382,7 +317,7 @@ class BinanceService:
         
         # 获取速率限制许可
         if self._rate_limiter:
-            await self._rate_limiter.acquire_permit(weight)
+            await self._rate_limiter.acquire_permit(weight, endpoint, priority, method)
         
         # 检查是否是期货API端点
         if endpoint.startswith('/fapi/'):
@@ -450,12 +385,12 @@ class BinanceService:
                     async with session.request(method, url, **kwargs) as response:
                         # 更新速率限制器状态
                         if self._rate_limiter:
-                            self._rate_limiter.update_from_headers(dict(response.headers))
+                            self._rate_limiter.update_from_headers(dict(response.headers), endpoint)
                         
                         # 处理不同的HTTP状态码
                         if response.status == 200:
                             # 成功请求
-                            result = await response.json()
+                            result = await read_json(response)
                             self._connection_health['last_successful_request'] = datetime.now()
                             self._connection_health['consecutive_failures'] = 0
                             
@@ -630,8 +565,20 @@ class BinanceService:
             logger.error(f"❌ 获取{symbol}期货ticker数据失败: {e}")
             return None
     
-    async def get_kline_data(self, symbol: str, timeframe: str = '1h', limit: int = 100) -> List[Dict[str, Any]]:
-        """获取K线数据 - 只使用期货API"""
+    async def get_kline_data(
+        self,
+        symbol: str,
+        timeframe: str = '1h',
+        limit: int = 100,
+        start_time: Optional[Union[datetime, int]] = None,
+        end_time: Optional[Union[datetime, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        获取K线数据 - 只使用期货API
+
+        指定 start_time/end_time 或 limit 超过单页上限(1500)时，通过分页回填引擎拉取 [start_time, end_time) 区间；
+        只给 limit 时以 end_time（默认当前时间）为终点向前回溯 limit 根
+        """
         try:
             binance_symbol = self._convert_symbol_to_binance(symbol)
             logger.debug(f"🔍 获取币安期货K线数据: {symbol} -> {binance_symbol}, {timeframe}")
@@ -643,27 +590,29 @@ class BinanceService:
             }
             
             binance_tf = tf_mapping.get(timeframe.lower(), '1h')
+
+            if start_time is not None or end_time is not None or limit > KLINE_PAGE_LIMIT:
+                end_ms = to_milliseconds(end_time) if end_time is not None else int(time.time() * 1000)
+                if start_time is not None:
+                    start_ms = to_milliseconds(start_time)
+                else:
+                    start_ms = end_ms - limit * INTERVAL_MS[binance_tf]
+                klines = await self.get_kline_backfill().fetch(symbol, binance_tf, start_ms, end_ms)
+                logger.debug(f"✅ 获取币安期货K线数据成功: {symbol}, {len(klines)} 条记录")
+                return klines
             
             params = {
                 'symbol': binance_symbol,
                 'interval': binance_tf,
-                'limit': min(limit, 1500)  # 币安限制
+                'limit': limit
             }
             
             # 使用期货API端点
-            result = await self._make_request('GET', '/fapi/v1/klines', params=params)
-            
-            klines = []
-            for item in result:
-                klines.append({
-                    'timestamp': int(item[0]),
-                    'open': float(item[1]),
-                    'high': float(item[2]),
-                    'low': float(item[3]),
-                    'close': float(item[4]),
-                    'volume': float(item[5]),
-                    'source': 'rest_api'
-                })
+            result = await self._make_request(
+                'GET', '/fapi/v1/klines', params=params, weight=kline_request_weight(limit)
+            )
+            
+            klines = [parse_kline(item) for item in result]
             
             logger.debug(f"✅ 获取币安期货K线数据成功: {symbol}, {len(klines)} 条记录")
             return sorted(klines, key=lambda x: x['timestamp'])
@@ -671,6 +620,12 @@ class BinanceService:
         except Exception as e:
             logger.error(f"❌ 获取{symbol}期货K线数据失败: {e}")
             return []
+
+    def get_kline_backfill(self) -> BinanceKlineBackfill:
+        """获取K线分页回填引擎（懒加载）"""
+        if self._kline_backfill is None:
+            self._kline_backfill = BinanceKlineBackfill(self)
+        return self._kline_backfill
     
     
     # 注意：以下端点是合约专用，需要合约API支持
@@ -1195,8 +1150,9 @@ class BinanceService:
                     # 如果获取配置失败，使用默认代理
                     proxy_config = "http://127.0.0.1:7890"
             
-            # 发送请求
-            async with aiohttp.ClientSession() as session:
+            # 发送请求（复用共享连接池的keep-alive连接）
+            await self._ensure_http_manager()
+            async with self.http_manager.get_session() as session:
                 if method.upper() == 'GET':
                     async with session.get(
                         url, 
@@ -1206,7 +1162,7 @@ class BinanceService:
                         timeout=aiohttp.ClientTimeout(total=30)
                     ) as response:
                         if response.status == 200:
-                            return await response.json()
+                            return await read_json(response)
                         else:
                             error_text = await response.text()
                             raise Exception(f"合约API请求失败: {response.status} - {error_text}")
@@ -1222,7 +1178,7 @@ class BinanceService:
                         timeout=aiohttp.ClientTimeout(total=30)
                     ) as response:
                         if response.status == 200:
-                            return await response.json()
+                            return await read_json(response)
                         else:
                             error_text = await response.text()
                             raise Exception(f"合约API请求失败: {response.status} - {error_text}")
@@ -19,103 +19,12 @@ from app.utils.exceptions import TradingToolError, APIConnectionError
 from app.utils.http_manager import get_http_manager
 from app.services.exchanges.binance.binance_region_handler import get_binance_region_handler, get_optimal_binance_config
 from app.services.exchanges.binance.binance_batch_optimizer import get_batch_optimizer
+from app.services.exchanges.binance.binance_service import get_binance_rate_limiter
 
 logger = get_logger(__name__)
 settings = get_settings()
 
 
-class UltraOptimizedBinanceRateLimiter:
-    """币安速率限制器 - 极度优化版本"""
-    
-    def __init__(self):
-        # 币安API限制配置 - 极度优化设置
-        self.limits = {
-            'requests_per_minute': 1200,  # 每分钟1200次
-            'orders_per_second': 10,      # 每秒10次
-            'orders_per_day': 200000      # 每日20万次
-        }
-        
-        # 请求计数器
-        self.request_counts = {
-            'minute': {'count': 0, 'reset_time': time.time() + 60},
-            'second': {'count': 0, 'reset_time': time.time() + 1},
-            'day': {'count': 0, 'reset_time': time.time() + 86400}
-        }
-        
-        # 动态调整参数 - 极度优化
-        self.current_weight = 1
-        self.base_interval = 0.05      # 基础请求间隔50ms
-        self.max_interval = 1.0        # 最大请求间隔1秒
-        
-        # 批量处理优化
-        self.batch_size = 100          # 增大批量处理大小
-        self.batch_interval = 0.5      # 减少批量处理间隔
-        
-        logger.debug("🚦 币安速率限制器初始化完成（极度优化版本）")
-    
-    async def acquire_permit(self, weight: int = 1) -> float:
-        """获取请求许可 - 极度优化版本"""
-        current_time = time.time()
-        
-        # 重置计数器
-        self._reset_counters(current_time)
-        
-        # 检查是否超过限制 - 使用更宽松的检查
-        if self._is_rate_limited():
-            wait_time = self._calculate_wait_time()
-            await asyncio.sleep(wait_time)
-            return wait_time
-        
-        # 更新计数器
-        self._update_counters(weight)
-        
-        # 极小的动态间隔
-        interval = max(0.01, self.base_interval / max(1, self.current_weight))
-        if interval > 0.01:
-            await asyncio.sleep(interval)
-        
-        return interval
-    
-    def _reset_counters(self, current_time: float):
-        """重置过期的计数器"""
-        for period, data in self.request_counts.items():
-            if current_time >= data['reset_time']:
-                data['count'] = 0
-                if period == 'minute':
-                    data['reset_time'] = current_time + 60
-                elif period == 'second':
-                    data['reset_time'] = current_time + 1
-                elif period == 'day':
-                    data['reset_time'] = current_time + 86400
-    
-    def _is_rate_limited(self) -> bool:
-        """检查是否触发速率限制 - 极度优化"""
-        minute_limit = self.limits['requests_per_minute'] * 0.98  # 98%安全边际
-        second_limit = self.limits['orders_per_second'] * 0.95    # 95%安全边际
-        
-        return (self.request_counts['minute']['count'] >= minute_limit or
-                self.request_counts['second']['count'] >= second_limit)
-    
-    def _calculate_wait_time(self) -> float:
-        """计算等待时间 - 极度优化"""
-        minute_remaining = 60 - (time.time() - (self.request_counts['minute']['reset_time'] - 60))
-        second_remaining = 1 - (time.time() - (self.request_counts['second']['reset_time'] - 1))
-        
-        # 返回最小等待时间
-        return max(0.1, min(minute_remaining / 60, second_remaining))
-    
-    def _update_counters(self, weight: int):
-        """更新计数器"""
-        self.request_counts['minute']['count'] += weight
-        self.request_counts['second']['count'] += weight
-        self.request_counts['day']['count'] += weight
-        self.current_weight = weight
-
-
-# 创建全局实例
-_ultra_rate_limiter = UltraOptimizedBinanceRateLimiter()
-
-
 async def get_ultra_optimized_positions() -> List[Dict[str, Any]]:
     """获取合约持仓数据 - 极度优化版本"""
     try:
@@ -162,8 +71,9 @@ async def get_ultra_optimized_positions() -> List[Dict[str, Any]]:
             'Content-Type': 'application/json'
         }
         
-        # 获取速率限制许可
-        await _ultra_rate_limiter.acquire_permit(1)
+        # 获取速率限制许可（与BinanceService共享同一限制器，positionRisk权重为5）
+        rate_limiter = get_binance_rate_limiter()
+        await rate_limiter.acquire_permit(5, endpoint)
         
         # 发送请求
         url = f"{base_url}{endpoint}"
@@ -175,6 +85,7 @@ async def get_ultra_optimized_positions() -> List[Dict[str, Any]]:
             proxy=config.get('proxy'),
             timeout=aiohttp.ClientTimeout(total=10)
         ) as response:
+            rate_limiter.update_from_headers(dict(response.headers), endpoint)
             if response.status == 200:
                 positions_data = await response.json()
                 
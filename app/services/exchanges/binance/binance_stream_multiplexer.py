@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+币安组合流WebSocket多路复用器
+Binance combined-stream WebSocket multiplexer
+
+把大量数据流打包到少量 /stream?streams= 组合连接上（每连接不超过交易所的流数上限），
+通过 SUBSCRIBE/UNSUBSCRIBE 帧动态增删订阅，按消息中的 stream 字段分发；
+单个连接断开时只重连该分片并恢复其全部订阅
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import aiohttp
+
+from app.core.logging import get_logger
+from app.utils.json_codec import JSONDecodeError, dumps, loads
+
+logger = get_logger(__name__)
+
+# 币安期货单连接最多200个流；每连接每秒最多10条上行消息
+MAX_STREAMS_PER_CONNECTION = 200
+CONTROL_FRAME_INTERVAL = 0.12
+# 单个SUBSCRIBE帧携带的流数（控制URL/帧大小）
+SUBSCRIBE_BATCH_SIZE = 50
+
+MessageHandler = Callable[[str, Any], Awaitable[None]]
+ConnectFunc = Callable[[str], Awaitable[Any]]
+
+
+class _StreamShard:
+    """单个组合连接及其承载的流"""
+
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.ws = None
+        self.streams: Set[str] = set()
+        self.reader_task: Optional[asyncio.Task] = None
+        self.send_lock = asyncio.Lock()
+        self.last_control_time = 0.0
+        self.connected = False
+        self.messages = 0
+        self.reconnects = 0
+        self.connected_at: Optional[float] = None
+
+
+class BinanceStreamMultiplexer:
+    """
+    组合流多路复用器
+    Packs streams onto a small pool of combined connections and routes messages by stream name
+    """
+
+    def __init__(
+        self,
+        ws_base_url: str,
+        connect: ConnectFunc,
+        on_message: MessageHandler,
+        max_streams_per_connection: int = MAX_STREAMS_PER_CONNECTION,
+        reconnect_interval: float = 5.0,
+        max_reconnect_interval: float = 60.0,
+        ack_timeout: float = 10.0
+    ):
+        self.ws_base_url = ws_base_url
+        self._connect = connect
+        self._on_message = on_message
+        self.max_streams_per_connection = max(1, min(max_streams_per_connection, MAX_STREAMS_PER_CONNECTION))
+        self.reconnect_interval = reconnect_interval
+        self.max_reconnect_interval = max_reconnect_interval
+        self.ack_timeout = ack_timeout
+
+        self.shards: Dict[int, _StreamShard] = {}
+        self.stream_to_shard: Dict[str, int] = {}
+        self.is_running = False
+
+        self._next_shard_id = 0
+        self._next_request_id = 0
+        self._pending_acks: Dict[int, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+        # 进行中的重连任务（事件循环只弱引用任务，需在此持有强引用，stop时统一取消）
+        self._reconnect_tasks: Set[asyncio.Task] = set()
+
+        # 统计
+        self.total_messages = 0
+        self.control_frames = 0
+        self.reconnects = 0
+
+    # ==================== 连接 ====================
+
+    def _combined_url(self, streams: Iterable[str]) -> str:
+        return f"{self.ws_base_url}/stream?streams={'/'.join(sorted(streams))}"
+
+    async def _open_shard(self, shard: _StreamShard) -> None:
+        """按分片当前的流建立组合连接并启动读取任务"""
+        shard.ws = await self._connect(self._combined_url(shard.streams))
+        shard.connected = True
+        shard.connected_at = time.time()
+        shard.reader_task = asyncio.create_task(self._reader_loop(shard))
+        logger.info(f"✅ 币安组合流连接#{shard.shard_id} 已建立: {len(shard.streams)} 个流")
+
+    async def _close_ws(self, ws) -> None:
+        try:
+            await ws.close()
+        except Exception as e:
+            logger.debug(f"🔌 关闭组合流连接异常: {e}")
+
+    async def _send(self, shard: _StreamShard, payload: Dict[str, Any]) -> None:
+        """发送控制帧（按交易所上行频率限制节流）"""
+        async with shard.send_lock:
+            wait = CONTROL_FRAME_INTERVAL - (time.monotonic() - shard.last_control_time)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            text = dumps(payload)
+            if isinstance(shard.ws, aiohttp.ClientWebSocketResponse):
+                await shard.ws.send_str(text)
+            else:
+                await shard.ws.send(text)
+            shard.last_control_time = time.monotonic()
+            self.control_frames += 1
+
+    async def _control(self, shard: _StreamShard, method: str, streams: List[str]) -> bool:
+        """发送 SUBSCRIBE/UNSUBSCRIBE 并等待确认"""
+        for start in range(0, len(streams), SUBSCRIBE_BATCH_SIZE):
+            self._next_request_id += 1
+            request_id = self._next_request_id
+            future = asyncio.get_running_loop().create_future()
+            self._pending_acks[request_id] = future
+            try:
+                await self._send(shard, {
+                    'method': method,
+                    'params': streams[start:start + SUBSCRIBE_BATCH_SIZE],
+                    'id': request_id
+                })
+                await asyncio.wait_for(future, timeout=self.ack_timeout)
+            except Exception as e:
+                logger.warning(f"⚠️ 组合流连接#{shard.shard_id} {method} 失败: {e}")
+                return False
+            finally:
+                self._pending_acks.pop(request_id, None)
+        return True
+
+    async def _iter_messages(self, ws):
+        """统一aiohttp与websockets两种连接的文本消息迭代"""
+        if isinstance(ws, aiohttp.ClientWebSocketResponse):
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    yield msg.data
+                elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED):
+                    break
+        else:
+            async for message in ws:
+                yield message
+
+    async def _reader_loop(self, shard: _StreamShard) -> None:
+        """读取分片消息并按stream字段分发，连接断开后重连"""
+        try:
+            async for raw in self._iter_messages(shard.ws):
+                try:
+                    message = loads(raw)
+                except JSONDecodeError as e:
+                    logger.warning(f"⚠️ 组合流JSON解析失败: {e}")
+                    continue
+
+                stream = message.get('stream') if isinstance(message, dict) else None
+                if stream is not None:
+                    shard.messages += 1
+                    self.total_messages += 1
+                    await self._on_message(stream, message.get('data'))
+                elif isinstance(message, dict) and 'id' in message:
+                    future = self._pending_acks.get(message['id'])
+                    if future is not None and not future.done():
+                        if message.get('error'):
+                            future.set_exception(RuntimeError(message['error']))
+                        else:
+                            future.set_result(message.get('result'))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ 组合流连接#{shard.shard_id} 读取异常: {e}")
+        finally:
+            shard.connected = False
+
+        if self.is_running and shard.shard_id in self.shards:
+            task = asyncio.create_task(self._reconnect(shard))
+            self._reconnect_tasks.add(task)
+            task.add_done_callback(self._reconnect_tasks.discard)
+
+    async def _reconnect(self, shard: _StreamShard) -> None:
+        """指数退避重连分片，恢复其全部订阅"""
+        delay = self.reconnect_interval
+        while self.is_running and shard.shard_id in self.shards and shard.streams:
+            logger.warning(f"🔄 组合流连接#{shard.shard_id} 断开，{delay:.0f}秒后重连 ({len(shard.streams)} 个流)")
+            await asyncio.sleep(delay)
+            if not (self.is_running and shard.shard_id in self.shards and shard.streams):
+                return
+            try:
+                await self._open_shard(shard)
+                shard.reconnects += 1
+                self.reconnects += 1
+                return
+            except Exception as e:
+                logger.error(f"❌ 组合流连接#{shard.shard_id} 重连失败: {e}")
+                delay = min(delay * 2, self.max_reconnect_interval)
+
+    # ==================== 订阅管理 ====================
+
+    async def start(self) -> None:
+        self.is_running = True
+
+    async def subscribe(self, streams: Iterable[str]) -> Dict[str, bool]:
+        """
+        订阅数据流（已订阅的直接视为成功）
+        Fill existing shards via SUBSCRIBE first, then open new combined connections for the remainder
+        """
+        results: Dict[str, bool] = {}
+        async with self._lock:
+            new_streams = []
+            for stream in dict.fromkeys(streams):
+                if stream in self.stream_to_shard:
+                    results[stream] = True
+                else:
+                    new_streams.append(stream)
+
+            # 先填充已连接分片的剩余容量
+            for shard in sorted(self.shards.values(), key=lambda s: len(s.streams)):
+                if not new_streams:
+                    break
+                capacity = self.max_streams_per_connection - len(shard.streams)
+                if capacity <= 0 or not shard.connected:
+                    continue
+                batch, new_streams = new_streams[:capacity], new_streams[capacity:]
+                ok = await self._control(shard, 'SUBSCRIBE', batch)
+                for stream in batch:
+                    if ok:
+                        shard.streams.add(stream)
+                        self.stream_to_shard[stream] = shard.shard_id
+                    results[stream] = ok
+
+            # 剩余的流开新的组合连接，初始流直接放在URL中
+            while new_streams:
+                batch = new_streams[:self.max_streams_per_connection]
+                new_streams = new_streams[self.max_streams_per_connection:]
+                shard = _StreamShard(self._next_shard_id)
+                self._next_shard_id += 1
+                shard.streams.update(batch)
+                try:
+                    await self._open_shard(shard)
+                except Exception as e:
+                    logger.error(f"❌ 建立币安组合流连接失败: {e}")
+                    for stream in batch:
+                        results[stream] = False
+                    continue
+                self.shards[shard.shard_id] = shard
+                for stream in batch:
+                    self.stream_to_shard[stream] = shard.shard_id
+                    results[stream] = True
+
+        return results
+
+    async def unsubscribe(self, streams: Iterable[str]) -> None:
+        """取消订阅，分片清空后关闭其连接"""
+        async with self._lock:
+            by_shard: Dict[int, List[str]] = {}
+            for stream in set(streams):
+                shard_id = self.stream_to_shard.pop(stream, None)
+                if shard_id is not None:
+                    by_shard.setdefault(shard_id, []).append(stream)
+
+            for shard_id, shard_streams in by_shard.items():
+                shard = self.shards[shard_id]
+                shard.streams.difference_update(shard_streams)
+                if not shard.streams:
+                    await self._close_shard(shard)
+                elif shard.connected:
+                    await self._control(shard, 'UNSUBSCRIBE', shard_streams)
+
+    async def _close_shard(self, shard: _StreamShard) -> None:
+        self.shards.pop(shard.shard_id, None)
+        if shard.reader_task and not shard.reader_task.done():
+            shard.reader_task.cancel()
+        if shard.ws is not None:
+            await self._close_ws(shard.ws)
+        shard.connected = False
+
+    async def stop(self) -> None:
+        """关闭全部组合连接"""
+        self.is_running = False
+        reconnect_tasks = list(self._reconnect_tasks)
+        for task in reconnect_tasks:
+            task.cancel()
+        if reconnect_tasks:
+            await asyncio.gather(*reconnect_tasks, return_exceptions=True)
+        self._reconnect_tasks.clear()
+        for shard in list(self.shards.values()):
+            await self._close_shard(shard)
+        self.stream_to_shard.clear()
+        for future in self._pending_acks.values():
+            if not future.done():
+                future.cancel()
+        self._pending_acks.clear()
+
+    def is_subscribed(self, stream: str) -> bool:
+        return stream in self.stream_to_shard
+
+    @property
+    def active_connections(self) -> int:
+        return sum(1 for shard in self.shards.values() if shard.connected)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取多路复用统计"""
+        return {
+            'connections': len(self.shards),
+            'active_connections': self.active_connections,
+            'streams': len(self.stream_to_shard),
+            'max_streams_per_connection': self.max_streams_per_connection,
+            'total_messages': self.total_messages,
+            'control_frames': self.control_frames,
+            'reconnects': self.reconnects,
+            'shards': [
+                {
+                    'id': shard.shard_id,
+                    'streams': len(shard.streams),
+                    'connected': shard.connected,
+                    'messages': shard.messages,
+                    'reconnects': shard.reconnects
+                }
+                for shard in self.shards.values()
+            ]
+        }
@@ -5,7 +5,6 @@ Binance WebSocket Service - Fixed Version with Proxy Support
 """
 
 import asyncio
-import json
 import time
 from typing import Dict, Any, List, Optional, Callable, Set, Union
 from datetime import datetime
@@ -18,6 +17,7 @@ from websockets.exceptions import ConnectionClosed, WebSocketException
 
 from app.core.logging import get_logger
 from app.core.config import get_settings
+from app.services.exchanges.binance.binance_stream_multiplexer import BinanceStreamMultiplexer
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -58,8 +58,9 @@ class BinanceWebSocketService:
         else:
             self.ws_base_url = "wss://fstream.binance.com"
         
-        # 连接管理
-        self.ws_connections: Dict[str, Any] = {}
+        # 连接管理：所有数据流通过组合流多路复用器共享少量连接
+        self.multiplexer: Optional[BinanceStreamMultiplexer] = None
+        self.max_streams_per_connection = self.config.get('ws_max_streams_per_connection', 200)
         self.connection_states: Dict[str, str] = {}
         self.is_running = False
         self.is_connected = False  # 添加缺失的属性
@@ -121,6 +122,9 @@ class BinanceWebSocketService:
             # 创建HTTP会话
             await self._create_http_session()
             
+            # 创建组合流多路复用器
+            await self._get_multiplexer()
+            
             # 启动健康监控
             health_task = asyncio.create_task(self._health_monitor())
             self.background_tasks.append(health_task)
@@ -184,14 +188,13 @@ class BinanceWebSocketService:
         
         self.background_tasks.clear()
         
-        # 关闭所有连接
-        for stream_name, ws in self.ws_connections.items():
+        # 关闭所有组合流连接
+        if self.multiplexer:
             try:
-                if ws and self._is_connection_alive(ws):
-                    await ws.close()
-                    logger.debug(f"🔌 关闭连接: {stream_name}")
+                await self.multiplexer.stop()
             except Exception as e:
                 logger.warning(f"⚠️ 关闭连接异常: {e}")
+            self.multiplexer = None
         
         # 关闭HTTP会话
         if self.http_session:
@@ -199,7 +202,6 @@ class BinanceWebSocketService:
             self.http_session = None
         
         # 清理状态
-        self.ws_connections.clear()
         self.connection_states.clear()
         self.connection_health.clear()
         self.subscriptions.clear()
@@ -222,228 +224,166 @@ class BinanceWebSocketService:
             logger.error(f"❌ 符号转换失败: {symbol} -> {e}")
             return symbol
 
-    async def subscribe_ticker(self, symbol: str, callback: Optional[Callable[..., Any]] = None) -> bool:
-        """订阅价格数据"""
+    async def subscribe_streams(self, streams: Dict[str, str],
+                                callback: Optional[Callable[..., Any]] = None) -> Dict[str, bool]:
+        """
+        批量订阅数据流
+        Subscribe many streams at once through the combined-stream multiplexer
+        
+        Args:
+            streams: 流名称 -> 交易对
+            callback: 数据回调
+            
+        Returns:
+            Dict[str, bool]: 每个流的订阅结果
+        """
         try:
-            # 转换符号格式
-            binance_symbol = self._convert_symbol_to_binance(symbol)
-            stream_name = f"{binance_symbol.lower()}@ticker"
+            multiplexer = await self._get_multiplexer()
+            results = await multiplexer.subscribe(streams.keys())
+        except Exception as e:
+            logger.error(f"❌ 批量订阅数据流异常: {e}")
+            return {stream: False for stream in streams}
+        
+        for stream_name, success in results.items():
+            self.connection_states[stream_name] = "connected" if success else "failed"
+            if not success:
+                continue
             
-            if stream_name in self.subscribed_streams:
-                logger.debug(f"📊 {symbol} ticker已订阅")
-                return True
+            # 注册回调（同一回调只注册一次）
+            if callback:
+                stream_callbacks = self.callbacks.setdefault(stream_name, [])
+                if callback not in stream_callbacks:
+                    stream_callbacks.append(callback)
             
-            # 建立连接
-            success = await self._connect_stream(stream_name)
-            if success:
-                # 注册回调
-                if callback:
-                    if stream_name not in self.callbacks:
-                        self.callbacks[stream_name] = []
-                    self.callbacks[stream_name].append(callback)
-                
-                # 记录订阅
+            # 记录订阅
+            if stream_name not in self.subscriptions:
                 self.subscriptions[stream_name] = SubscriptionInfo(
                     stream=stream_name,
-                    symbol=symbol,
+                    symbol=streams[stream_name],
                     callback=callback,
                     last_update=datetime.now()
                 )
-                
-                self.subscribed_streams.add(stream_name)
-                logger.info(f"✅ 成功订阅 {symbol} ticker数据")
-                return True
-            else:
-                logger.error(f"❌ 订阅 {symbol} ticker失败")
-                return False
-                
-        except Exception as e:
-            logger.error(f"❌ 订阅ticker异常: {e}")
-            return False
+            self.subscribed_streams.add(stream_name)
+        
+        if any(results.values()):
+            self.is_connected = True
+        return results
+    
+    async def _subscribe_stream(self, stream_name: str, symbol: str, label: str,
+                                callback: Optional[Callable[..., Any]] = None) -> bool:
+        """订阅单个数据流"""
+        already_subscribed = stream_name in self.subscribed_streams
+        success = (await self.subscribe_streams({stream_name: symbol}, callback)).get(stream_name, False)
+        if already_subscribed:
+            logger.debug(f"📊 {symbol} {label}已订阅")
+        elif success:
+            logger.info(f"✅ 成功订阅 {symbol} {label}数据")
+        else:
+            logger.error(f"❌ 订阅 {symbol} {label}失败")
+        return success
+    
+    async def unsubscribe_streams(self, streams: List[str]) -> None:
+        """取消订阅数据流"""
+        if self.multiplexer:
+            await self.multiplexer.unsubscribe(streams)
+        for stream_name in streams:
+            self.subscribed_streams.discard(stream_name)
+            self.subscriptions.pop(stream_name, None)
+            self.callbacks.pop(stream_name, None)
+            self.connection_states.pop(stream_name, None)
+    
+    async def subscribe_ticker(self, symbol: str, callback: Optional[Callable[..., Any]] = None) -> bool:
+        """订阅价格数据"""
+        stream_name = f"{self._convert_symbol_to_binance(symbol).lower()}@ticker"
+        return await self._subscribe_stream(stream_name, symbol, "ticker", callback)
     
     async def subscribe_symbol_ticker(self, symbol: str, callback: Optional[Callable] = None) -> bool:
         """订阅单个交易对的ticker数据 - 兼容方法"""
         return await self.subscribe_ticker(symbol, callback)
     
+    async def subscribe_symbols_batch(self, symbols: List[str], stream_type: str,
+                                      callback: Optional[Callable] = None) -> Dict[str, bool]:
+        """
+        批量订阅多个交易对的同类数据流（如 ticker、markPrice、aggTrade、kline_1m）
+        
+        Returns:
+            Dict[str, bool]: 交易对 -> 是否成功
+        """
+        streams = {
+            f"{self._convert_symbol_to_binance(symbol).lower()}@{stream_type}": symbol
+            for symbol in symbols
+        }
+        results = await self.subscribe_streams(streams, callback)
+        return {symbol: results.get(stream_name, False) for stream_name, symbol in streams.items()}
+    
     async def subscribe_symbol_mark_price(self, symbol: str, callback: Optional[Callable] = None) -> bool:
         """订阅单个交易对的标记价格数据"""
-        try:
-            # 转换符号格式
-            binance_symbol = self._convert_symbol_to_binance(symbol)
-            stream_name = f"{binance_symbol.lower()}@markPrice"
-            
-            if stream_name in self.subscribed_streams:
-                logger.debug(f"📊 {symbol} 标记价格已订阅")
-                return True
-            
-            # 建立连接
-            success = await self._connect_stream(stream_name)
-            if success:
-                # 注册回调
-                if callback:
-                    if stream_name not in self.callbacks:
-                        self.callbacks[stream_name] = []
-                    self.callbacks[stream_name].append(callback)
-                
-                # 记录订阅
-                self.subscriptions[stream_name] = SubscriptionInfo(
-                    stream=stream_name,
-                    symbol=symbol,
-                    callback=callback,
-                    last_update=datetime.now()
-                )
-                
-                self.subscribed_streams.add(stream_name)
-                logger.info(f"✅ 成功订阅 {symbol} 标记价格数据")
-                return True
-            else:
-                logger.error(f"❌ 订阅 {symbol} 标记价格失败")
-                return False
-                
-        except Exception as e:
-            logger.error(f"❌ 订阅标记价格异常: {e}")
-            return False
+        stream_name = f"{self._convert_symbol_to_binance(symbol).lower()}@markPrice"
+        return await self._subscribe_stream(stream_name, symbol, "标记价格", callback)
     
-    async def _connect_stream(self, stream_name: str) -> bool:
-        """连接数据流"""
-        try:
-            ws_url = f"{self.ws_base_url}/ws/{stream_name}"
-            logger.debug(f"🔌 连接数据流: {ws_url}")
-            
-            # 建立连接 - 支持代理
-            if self.use_proxy and self.http_session:
-                # 使用aiohttp WebSocket客户端（支持代理）
-                logger.debug(f"🔌 通过代理建立WebSocket连接: {self.proxy_url}")
-                ws = await self.http_session.ws_connect(
-                    ws_url,
-                    proxy=self.proxy_url,
-                    heartbeat=self.ping_interval,
-                    timeout=self.connection_timeout
-                )
-            else:
-                # 使用websockets库（直连）
-                logger.debug("🔌 直连建立WebSocket连接")
-                ws = await websockets.connect(
-                    ws_url,
-                    ping_interval=self.ping_interval,
-                    ping_timeout=15,
-                    close_timeout=10,
-                    max_size=2**20,
-                    compression=None,
-                    open_timeout=self.connection_timeout
-                )
-            
-            # 保存连接
-            self.ws_connections[stream_name] = ws
-            self.connection_states[stream_name] = "connected"
-            
-            # 更新连接状态
-            self.is_connected = True
-            
-            # 启动消息处理任务
-            message_task = asyncio.create_task(self._handle_messages(stream_name, ws))
-            self.background_tasks.append(message_task)
-            
-            logger.info(f"✅ 成功连接数据流: {stream_name}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ 连接数据流失败 {stream_name}: {e}")
-            self.connection_states[stream_name] = "failed"
-            return False
+    async def subscribe_symbol_kline(self, symbol: str, interval: str = '1m',
+                                     callback: Optional[Callable] = None) -> bool:
+        """订阅单个交易对的K线数据"""
+        stream_name = f"{self._convert_symbol_to_binance(symbol).lower()}@kline_{interval}"
+        return await self._subscribe_stream(stream_name, symbol, f"{interval} K线", callback)
     
-    async def _handle_messages(self, stream: str, ws) -> None:
-        """处理WebSocket消息"""
-        try:
-            logger.debug(f"🔄 开始处理消息: {stream}")
-            
-            # 检查连接类型并相应处理消息
-            if hasattr(ws, 'receive'):
-                # aiohttp WebSocket连接
-                await self._handle_aiohttp_messages(stream, ws)
-            else:
-                # websockets库连接
-                await self._handle_websockets_messages(stream, ws)
+    async def subscribe_symbol_trades(self, symbol: str, callback: Optional[Callable] = None) -> bool:
+        """订阅单个交易对的归集成交数据"""
+        stream_name = f"{self._convert_symbol_to_binance(symbol).lower()}@aggTrade"
+        return await self._subscribe_stream(stream_name, symbol, "成交", callback)
+    
+    async def subscribe_all_mark_price(self, callback: Optional[Callable] = None) -> bool:
+        """订阅全市场标记价格（含资金费率）"""
+        return await self._subscribe_stream("!markPrice@arr", "ALL", "全市场标记价格", callback)
+    
+    async def _get_multiplexer(self) -> BinanceStreamMultiplexer:
+        """获取组合流多路复用器（懒加载）"""
+        if self.multiplexer is None:
+            self.multiplexer = BinanceStreamMultiplexer(
+                self.ws_base_url,
+                connect=self._open_websocket,
+                on_message=self._on_stream_message,
+                max_streams_per_connection=self.max_streams_per_connection,
+                reconnect_interval=self.reconnect_interval
+            )
+            await self.multiplexer.start()
+        return self.multiplexer
+    
+    async def _open_websocket(self, ws_url: str):
+        """建立WebSocket连接 - 支持代理"""
+        logger.debug(f"🔌 连接组合数据流: {ws_url[:120]}")
         
-        except Exception as e:
-            logger.error(f"❌ 消息处理异常 {stream}: {e}")
-            await self._update_connection_health(stream, 'message_processing', success=False)
-            self.error_stats['connection_errors'] += 1
+        if self.use_proxy and self.http_session:
+            # 使用aiohttp WebSocket客户端（支持代理）
+            logger.debug(f"🔌 通过代理建立WebSocket连接: {self.proxy_url}")
+            return await self.http_session.ws_connect(
+                ws_url,
+                proxy=self.proxy_url,
+                heartbeat=self.ping_interval,
+                timeout=self.connection_timeout
+            )
         
-        finally:
-            logger.debug(f"🔄 消息处理结束: {stream}")
+        # 使用websockets库（直连）
+        logger.debug("🔌 直连建立WebSocket连接")
+        return await websockets.connect(
+            ws_url,
+            ping_interval=self.ping_interval,
+            ping_timeout=15,
+            close_timeout=10,
+            max_size=2**22,  # 组合流承载多个流，全市场数组消息较大
+            compression=None,
+            open_timeout=self.connection_timeout
+        )
     
-    async def _handle_aiohttp_messages(self, stream: str, ws) -> None:
-        """处理aiohttp WebSocket消息"""
+    async def _on_stream_message(self, stream: str, data: Any) -> None:
+        """多路复用器按stream字段分发的消息"""
         try:
-            async for msg in ws:
-                if not self.is_running:
-                    logger.debug(f"🛑 服务已停止，退出消息处理: {stream}")
-                    break
-                
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    try:
-                        # 解析JSON消息
-                        data = json.loads(msg.data)
-                        
-                        # 处理消息
-                        await self._process_message(stream, data)
-                        
-                        # 更新连接健康状态
-                        await self._update_connection_health(stream, 'message_received', success=True)
-                        
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"⚠️ JSON解析失败 {stream}: {e}")
-                        await self._update_connection_health(stream, 'message_received', success=False)
-                        self.error_stats['message_errors'] += 1
-                        
-                    except Exception as e:
-                        logger.error(f"❌ 处理消息异常 {stream}: {e}")
-                        await self._update_connection_health(stream, 'message_received', success=False)
-                        self.error_stats['message_errors'] += 1
-                
-                elif msg.type == aiohttp.WSMsgType.ERROR:
-                    logger.error(f"❌ WebSocket错误 {stream}: {ws.exception()}")
-                    break
-                elif msg.type == aiohttp.WSMsgType.CLOSE:
-                    logger.warning(f"🔌 WebSocket连接关闭 {stream}")
-                    break
-                    
+            await self._process_message(stream, data)
+            await self._update_connection_health(stream, 'message_received', success=True)
         except Exception as e:
-            logger.error(f"❌ aiohttp消息处理异常 {stream}: {e}")
-            raise
-    
-    async def _handle_websockets_messages(self, stream: str, ws) -> None:
-        """处理websockets库消息"""
-        try:
-            async for message in ws:
-                if not self.is_running:
-                    logger.debug(f"🛑 服务已停止，退出消息处理: {stream}")
-                    break
-                
-                try:
-                    # 解析JSON消息
-                    data = json.loads(message)
-                    
-                    # 处理消息
-                    await self._process_message(stream, data)
-                    
-                    # 更新连接健康状态
-                    await self._update_connection_health(stream, 'message_received', success=True)
-                    
-                except json.JSONDecodeError as e:
-                    logger.warning(f"⚠️ JSON解析失败 {stream}: {e}")
-                    await self._update_connection_health(stream, 'message_received', success=False)
-                    self.error_stats['message_errors'] += 1
-                    
-                except Exception as e:
-                    logger.error(f"❌ 处理消息异常 {stream}: {e}")
-                    await self._update_connection_health(stream, 'message_received', success=False)
-                    self.error_stats['message_errors'] += 1
-                    
-        except Exception as e:
-            logger.error(f"❌ websockets消息处理异常 {stream}: {e}")
-            raise
+            logger.error(f"❌ 处理消息异常 {stream}: {e}")
+            await self._update_connection_health(stream, 'message_received', success=False)
+            self.error_stats['message_errors'] += 1
     
     async def _process_message(self, stream: str, data: Dict[str, Any]) -> None:
         """处理接收到的消息"""
@@ -530,12 +470,12 @@ class BinanceWebSocketService:
                 if not self.is_running:
                     break
                 
-                # 检查所有连接健康状态
-                for stream_name in list(self.ws_connections.keys()):
-                    ws = self.ws_connections.get(stream_name)
-                    if not ws or not self._is_connection_alive(ws):
-                        logger.warning(f"⚠️ 检测到连接异常: {stream_name}")
-                        # 这里可以添加重连逻辑
+                # 检查所有组合流连接（断开的分片由多路复用器自动重连）
+                if self.multiplexer:
+                    for shard in self.multiplexer.get_stats()['shards']:
+                        if not shard['connected']:
+                            logger.warning(f"⚠️ 检测到连接异常: 组合流连接#{shard['id']} ({shard['streams']} 个流)")
+                    self.error_stats['reconnect_attempts'] = self.multiplexer.reconnects
                 
                 logger.debug("💓 健康检查完成")
                 
@@ -557,11 +497,9 @@ class BinanceWebSocketService:
     def get_connection_status(self) -> Dict[str, Any]:
         """获取连接状态"""
         try:
-            total_connections = len(self.ws_connections)
-            active_connections = sum(
-                1 for ws in self.ws_connections.values() 
-                if self._is_connection_alive(ws)
-            )
+            multiplexer_stats = self.multiplexer.get_stats() if self.multiplexer else None
+            total_connections = multiplexer_stats['connections'] if multiplexer_stats else 0
+            active_connections = multiplexer_stats['active_connections'] if multiplexer_stats else 0
             
             return {
                 "connected": self.is_connected,
@@ -572,6 +510,7 @@ class BinanceWebSocketService:
                 "use_proxy": self.use_proxy,
                 "proxy_url": self.proxy_url if self.use_proxy else None,
                 "error_stats": self.error_stats.copy(),
+                "multiplexer": multiplexer_stats,
                 "last_ping_time": self.last_ping_time,
                 "last_pong_time": self.last_pong_time
             }
@@ -585,11 +524,9 @@ class BinanceWebSocketService:
     async def health_check(self) -> Dict[str, Any]:
         """服务健康检查"""
         try:
-            total_connections = len(self.ws_connections)
-            active_connections = sum(
-                1 for ws in self.ws_connections.values() 
-                if self._is_connection_alive(ws)
-            )
+            multiplexer_stats = self.multiplexer.get_stats() if self.multiplexer else None
+            total_connections = multiplexer_stats['connections'] if multiplexer_stats else 0
+            active_connections = multiplexer_stats['active_connections'] if multiplexer_stats else 0
             
             return {
                 "status": "healthy" if self.is_running and active_connections > 0 else "unhealthy",
@@ -232,17 +232,20 @@ class OKXHybridService(HybridServiceBase, ExchangeInterface):
             except Exception as e:
                 logger.warning(f"⚠️ WebSocket获取价格失败: {e}")
         
-        # 回退到REST API
+        # 回退到REST API（并发的相同请求合并为一次）
         try:
-            async with self.rest_service:
-                price = await self.rest_service.get_current_price(symbol)
-                if price:
-                    logger.debug(f"🌐 REST API获取价格: {symbol} = ${price:.4f}")
-                return price
+            price = await self._coalesced('get_current_price', self._rest_get_current_price, symbol)
+            if price:
+                logger.debug(f"🌐 REST API获取价格: {symbol} = ${price:.4f}")
+            return price
         except Exception as e:
             logger.error(f"❌ REST API获取价格失败: {e}")
             return None
 
+    async def _rest_get_current_price(self, symbol: str) -> Optional[float]:
+        async with self.rest_service:
+            return await self.rest_service.get_current_price(symbol)
+
     async def get_ticker_data(self, symbol: str) -> Optional[Dict[str, Any]]:
         """获取ticker数据 - 优先使用WebSocket"""
         if not self.is_initialized:
@@ -297,19 +300,23 @@ class OKXHybridService(HybridServiceBase, ExchangeInterface):
         if not self.is_initialized:
             await self.initialize()
         
-        # 直接使用REST API获取K线数据
+        # 直接使用REST API获取K线数据（并发的相同请求合并为一次）
         try:
-            async with self.rest_service:
-                klines = await self.rest_service.get_kline_data(symbol, timeframe, limit)
-                for kline in klines:
-                    kline['source'] = 'rest_api'
-                
-                logger.debug(f"🌐 REST API获取K线: {symbol} {timeframe} ({len(klines)}条)")
-                return klines
+            klines = await self._coalesced('get_kline_data', self._rest_get_kline_data, symbol, timeframe, limit)
+            
+            logger.debug(f"🌐 REST API获取K线: {symbol} {timeframe} ({len(klines)}条)")
+            return klines
         except Exception as e:
             logger.error(f"❌ REST API获取K线失败: {e}")
             return []
 
+    async def _rest_get_kline_data(self, symbol: str, timeframe: str, limit: int) -> List[Dict[str, Any]]:
+        async with self.rest_service:
+            klines = await self.rest_service.get_kline_data(symbol, timeframe, limit)
+        for kline in klines:
+            kline['source'] = 'rest_api'
+        return klines
+
     async def get_multi_timeframe_klines(self, symbol: str, timeframes: List[str] = None, limit: int = 100) -> Dict[str, List[Dict[str, Any]]]:
         """
         获取多时间周期K线数据
@@ -677,7 +684,8 @@ class OKXHybridService(HybridServiceBase, ExchangeInterface):
             'subscribed_symbols_count': len(self.major_symbols),
             'subscribed_symbols': self.major_symbols[:10] if len(self.major_symbols) > 10 else self.major_symbols,  # 只显示前10个
             'rest_api_available': True,
-            'data_adapter': self.data_adapter.get_adapter_info() if self.data_adapter else None
+            'data_adapter': self.data_adapter.get_adapter_info() if self.data_adapter else None,
+            'single_flight': self.single_flight.get_stats()
         }
         
         if self.realtime_manager:
@@ -10,8 +10,12 @@ from datetime import datetime
 from collections import defaultdict, deque
 from dataclasses import dataclass
 
+import numpy as np
+
 from app.core.logging import get_logger
+from app.services.exchanges.base.kline_ring_buffer import KlineRingBuffer
 from app.services.exchanges.okx.okx_websocket_service import get_okx_websocket_service
+from app.utils.streaming_indicators import IndicatorEngine
 
 logger = get_logger(__name__)
 
@@ -73,9 +77,14 @@ class OKXRealtimeDataManager:
         
         # 数据存储
         self.tickers: Dict[str, MarketData] = {}
-        self.klines: Dict[str, Dict[str, deque]] = defaultdict(lambda: defaultdict(lambda: deque(maxlen=max_history_size)))
+        # K线：每个 (交易对, 周期) 一个定长列式环形缓冲区，未收盘K线原地更新
+        self.klines: Dict[str, Dict[str, KlineRingBuffer]] = defaultdict(
+            lambda: defaultdict(lambda: KlineRingBuffer(max_history_size))
+        )
         self.trades: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_history_size))
         self.funding_rates: Dict[str, FundingRateData] = {}
+        # 增量指标：每根K线收盘时按缓冲区追平，扫描直接读取最新指标值
+        self.indicator_engine = IndicatorEngine()
         
         # 订阅管理
         self.subscribed_symbols: set = set()
@@ -383,8 +392,17 @@ class OKXRealtimeDataManager:
                     confirm=item[8] == '1'  # 1表示确认的K线
                 )
                 
-                # 存储K线数据
-                self.klines[normalized_symbol][timeframe].append(kline_data)
+                # 存储K线数据（同一开盘时间原地覆盖）
+                buffer = self.klines[normalized_symbol][timeframe]
+                previous_timestamp = buffer.last_timestamp
+                buffer.update(
+                    kline_data.timestamp, kline_data.open, kline_data.high, kline_data.low,
+                    kline_data.close, kline_data.volume, kline_data.confirm
+                )
+                
+                # 收盘或新K线开盘（上一根即使没收到收盘推送也已结束）时推进增量指标，首次预热在线程池中进行
+                if kline_data.confirm or (previous_timestamp is not None and kline_data.timestamp > previous_timestamp):
+                    self.indicator_engine.schedule_sync(normalized_symbol, timeframe, buffer.arrays(closed_only=True))
                 
                 # 触发回调
                 await self._trigger_callbacks('kline', normalized_symbol, kline_data)
@@ -477,10 +495,41 @@ class OKXRealtimeDataManager:
 
     def get_latest_klines(self, symbol: str, timeframe: str, limit: int = 100) -> List[KlineData]:
         """获取最新K线数据"""
-        if symbol in self.klines and timeframe in self.klines[symbol]:
-            klines = list(self.klines[symbol][timeframe])
-            return klines[-limit:] if len(klines) > limit else klines
-        return []
+        buffer = self.klines.get(symbol, {}).get(timeframe)
+        if not buffer:
+            return []
+        arrays = buffer.arrays(limit)
+        rows = zip(*(arrays[column].tolist() for column in ('timestamp', 'open', 'high', 'low', 'close', 'volume')))
+        klines = [
+            KlineData(symbol, timeframe, timestamp, open_, high, low, close, volume)
+            for timestamp, open_, high, low, close, volume in rows
+        ]
+        if klines:
+            klines[-1].confirm = buffer.last_confirmed
+        return klines
+
+    def get_kline_arrays(self, symbol: str, timeframe: str, limit: Optional[int] = None,
+                         closed_only: bool = False) -> Optional[Dict[str, np.ndarray]]:
+        """
+        获取最新K线的列数组（零拷贝只读视图，可直接用于talib/指标计算）
+        
+        视图与缓冲区共享内存，跨await持有时请先copy
+        """
+        buffer = self.klines.get(symbol, {}).get(timeframe)
+        if not buffer:
+            return None
+        return buffer.arrays(limit, closed_only=closed_only)
+
+    def get_latest_indicators(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """获取最近一根收盘K线上的增量指标值（SMA/EMA/MACD/RSI/ATR/SuperTrend/布林带/随机指标）"""
+        return self.indicator_engine.latest(symbol, timeframe)
+    
+    def get_current_indicators(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """获取最新一根K线（含未收盘K线）上的增量指标值，状态未预热或未追平时返回None"""
+        buffer = self.klines.get(symbol, {}).get(timeframe)
+        if not buffer:
+            return None
+        return self.indicator_engine.current(symbol, timeframe, buffer.arrays(2), buffer.last_confirmed)
 
     def get_latest_trades(self, symbol: str, limit: int = 100) -> List[TradeData]:
         """获取最新交易数据"""
@@ -520,6 +569,7 @@ class OKXRealtimeDataManager:
             'total_klines': total_klines,
             'total_trades': total_trades,
             'funding_rates_count': len(self.funding_rates),
+            'indicator_engine': self.indicator_engine.get_stats(),
             'ws_status': self.ws_service.get_connection_status() if self.ws_service else None
         }
 
@@ -579,6 +629,7 @@ class OKXRealtimeDataManager:
         self.klines.clear()
         self.trades.clear()
         self.funding_rates.clear()
+        self.indicator_engine.clear()
         self.data_callbacks.clear()
         
         # 清理订阅
@@ -604,6 +655,10 @@ async def get_realtime_data_manager() -> OKXRealtimeDataManager:
         await _realtime_data_manager.initialize()
     return _realtime_data_manager
 
+def get_active_realtime_data_manager() -> Optional[OKXRealtimeDataManager]:
+    """获取已创建的实时数据管理器实例（不创建、不初始化，未启动时返回None）"""
+    return _realtime_data_manager
+
 async def cleanup_realtime_data_manager():
     """清理实时数据管理器"""
     global _realtime_data_manager
@@ -11,25 +11,19 @@ import aiohttp
 import hmac
 import hashlib
 import base64
-import json
-import time
 
 from app.core.logging import get_logger
 from app.core.config import get_settings
 from app.utils.exceptions import TradingToolError
 from app.utils.okx_rate_limiter import get_okx_rate_limiter
+from app.utils.rate_limiter import RequestPriority
 from app.utils.http_manager import get_http_manager
+from app.utils.json_codec import dumps, read_json
 
 logger = get_logger(__name__)
 settings = get_settings()
 
 
-# 全局请求间隔管理
-_last_request_time = 0
-_request_lock = asyncio.Lock()
-_current_interval = 0.5  # 动态调整的请求间隔
-
-
 class OKXService:
     """OKX交易所服务类"""
     def __init__(self):
@@ -99,30 +93,11 @@ class OKXService:
         
         return headers
     
-    async def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Dict[str, Any]:
-        """发起API请求 - 使用专业频率限制管理器"""
-        global _last_request_time, _request_lock, _current_interval
-        
-        # 全局请求间隔控制，避免频率限制
-        async with _request_lock:
-            current_time = time.time()
-            time_since_last = current_time - _last_request_time
-            
-            if time_since_last < _current_interval:
-                wait_time = _current_interval - time_since_last
-                await asyncio.sleep(wait_time)
-            
-            _last_request_time = time.time()
-        
+    async def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None,
+                            priority: Optional[RequestPriority] = None) -> Dict[str, Any]:
+        """发起API请求 - 使用专业频率限制管理器（按优先级排队获取许可）"""
         # 获取API调用许可
-        permit_granted = await self.rate_limiter.acquire_permit(endpoint)
-        if not permit_granted:
-            # 如果无法获得许可，等待一段时间后重试
-            await asyncio.sleep(2.0)  # 增加等待时间
-            permit_granted = await self.rate_limiter.acquire_permit(endpoint)
-            if not permit_granted:
-                logger.warning(f"OKX API频率限制，跳过请求: {endpoint}")
-                return []  # 返回空结果而不是抛出异常
+        await self.rate_limiter.acquire_permit(endpoint, priority)
         
         # 确保HTTP管理器可用
         await self._ensure_http_manager()
@@ -144,7 +119,7 @@ class OKXService:
         # 处理请求体
         body = ""
         if data:
-            body = json.dumps(data)
+            body = dumps(data)
         
         headers = self._get_headers(method, request_path, body)
         
@@ -167,20 +142,17 @@ class OKXService:
                         kwargs['proxy'] = settings.proxy_url
                     
                     async with session.request(method, url, **kwargs) as response:
-                        result = await response.json()
+                        result = await read_json(response)
                     
                     if result.get('code') != '0':
                         error_msg = result.get('msg', 'Unknown error')
                         
                         # 特殊处理频率限制错误
                         if 'Too Many Requests' in error_msg or result.get('code') == '50011':
-                            # 动态增加请求间隔
-                            _current_interval = min(_current_interval * 1.5, 3.0)  # 最大3秒间隔
-                            logger.warning(f"检测到频率限制，调整请求间隔至{_current_interval:.1f}秒")
-                            
                             if attempt < max_retries - 1:
-                                # 更长的等待时间，避免频率限制
+                                # 更长的等待时间，避免频率限制；同时暂停限制器，其他并发请求一起退避
                                 wait_time = (2 ** attempt) * 3.0  # 3s, 6s, 12s
+                                self.rate_limiter.penalize(wait_time)
                                 logger.warning(f"OKX频率限制，等待{wait_time}秒后重试 (尝试 {attempt + 1}/{max_retries})")
                                 await asyncio.sleep(wait_time)
                                 continue
@@ -193,10 +165,6 @@ class OKXService:
                         logger.error(f"OKX API错误: {error_msg}")
                         raise TradingToolError(f"OKX API错误: {error_msg}")
                     
-                    # 请求成功，逐渐降低请求间隔
-                    if _current_interval > 0.5:
-                        _current_interval = max(_current_interval * 0.95, 0.5)  # 逐渐降低到最小0.5秒
-                    
                     return result.get('data', [])
                     
             except aiohttp.ClientError as e:
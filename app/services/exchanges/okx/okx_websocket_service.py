@@ -5,7 +5,6 @@ OKX WebSocket Service - 提供高效的实时数据流服务
 """
 
 import asyncio
-import json
 import time
 import hmac
 import hashlib
@@ -19,6 +18,7 @@ import websockets
 from websockets.exceptions import ConnectionClosed, WebSocketException
 
 from app.core.logging import get_logger
+from app.utils.json_codec import JSONDecodeError, dumps, loads
 from app.core.config import get_settings
 
 logger = get_logger(__name__)
@@ -342,11 +342,11 @@ class OKXWebSocketService:
                     
                     # 发送认证消息
                     auth_msg = self._get_auth_message()
-                    await websocket.send(json.dumps(auth_msg))
+                    await websocket.send(dumps(auth_msg))
                     
                     # 等待认证响应
                     auth_response = await websocket.recv()
-                    auth_data = json.loads(auth_response)
+                    auth_data = loads(auth_response)
                     
                     if auth_data.get('event') == 'login' and auth_data.get('code') == '0':
                         self._private_connected = True
@@ -390,9 +390,9 @@ class OKXWebSocketService:
                         continue
                     
                     # 处理JSON消息
-                    data = json.loads(message)
+                    data = loads(message)
                     await self._process_message(data, is_private=False)
-                except json.JSONDecodeError as e:
+                except JSONDecodeError as e:
                     logger.warning(f"⚠️ 解析公共消息失败: {message[:100]}... - {e}")
                 except Exception as e:
                     logger.error(f"❌ 处理公共消息异常: {e}")
@@ -414,9 +414,9 @@ class OKXWebSocketService:
                         continue
                     
                     # 处理JSON消息
-                    data = json.loads(message)
+                    data = loads(message)
                     await self._process_message(data, is_private=True)
-                except json.JSONDecodeError as e:
+                except JSONDecodeError as e:
                     logger.warning(f"⚠️ 解析私有消息失败: {message[:100]}... - {e}")
                 except Exception as e:
                     logger.error(f"❌ 处理私有消息异常: {e}")
@@ -655,7 +655,7 @@ class OKXWebSocketService:
             }
             
             try:
-                await self.public_ws.send(json.dumps(subscribe_msg))
+                await self.public_ws.send(dumps(subscribe_msg))
                 
                 # 记录订阅信息
                 for inst_id in batch:
@@ -722,7 +722,7 @@ class OKXWebSocketService:
             }
             
             try:
-                await self.public_ws.send(json.dumps(subscribe_msg))
+                await self.public_ws.send(dumps(subscribe_msg))
                 
                 # 记录订阅信息
                 for inst_id in batch:
@@ -802,7 +802,7 @@ class OKXWebSocketService:
             
             # 添加详细日志以调试问题
             logger.debug(f"🔍 构建订阅消息: channel={channel}, inst_id={inst_id}")
-            logger.debug(f"🔍 完整订阅消息: {json.dumps(subscribe_msg)}")
+            logger.debug(f"🔍 完整订阅消息: {dumps(subscribe_msg)}")
             
             # 发送订阅消息，带重试机制
             max_retries = 3
@@ -813,7 +813,7 @@ class OKXWebSocketService:
                         await asyncio.sleep(1)
                         continue
                     
-                    message_to_send = json.dumps(subscribe_msg)
+                    message_to_send = dumps(subscribe_msg)
                     logger.debug(f"🔍 发送消息: {message_to_send}")
                     await self.public_ws.send(message_to_send)
                     break
@@ -874,7 +874,7 @@ class OKXWebSocketService:
             }
             
             # 发送取消订阅消息
-            await self.public_ws.send(json.dumps(unsubscribe_msg))
+            await self.public_ws.send(dumps(unsubscribe_msg))
             
             # 清理订阅信息
             sub_key = f"{channel}:{inst_id}"
@@ -931,7 +931,7 @@ class OKXWebSocketService:
                     }
                     
                     if self.public_ws and self.is_public_connected():
-                        await self.public_ws.send(json.dumps(subscribe_msg))
+                        await self.public_ws.send(dumps(subscribe_msg))
                         success_count += 1
                         logger.debug(f"🔄 重新订阅: {sub_info.channel}:{sub_info.inst_id}")
                     else:
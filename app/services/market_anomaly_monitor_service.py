@@ -10,6 +10,8 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
 from app.core.logging import get_logger
 from app.schemas.market_anomaly import (
     AnomalyLevel,
@@ -22,6 +24,7 @@ from app.services.notification.core_notification_service import (
     get_core_notification_service,
 )
 from app.utils.exceptions import TradingToolError
+from app.utils.indicator_panel import IndicatorPanel, nan_mean, volatility
 
 logger = get_logger(__name__)
 
@@ -324,9 +327,11 @@ class MarketAnomalyMonitorService:
         if not valid_volumes:
             return AnomalyLevel.NORMAL
         
-        mean_volume = statistics.mean(valid_volumes)
-        
-        if mean_volume == 0:
+        return self._classify_volume_ratio(current_volume, statistics.mean(valid_volumes))
+    
+    def _classify_volume_ratio(self, current_volume: float, mean_volume: float) -> AnomalyLevel:
+        """按当前交易量 / 平均交易量的倍数划分异常级别"""
+        if mean_volume <= 0:
             return AnomalyLevel.NORMAL
         
         # 计算倍数
@@ -419,53 +424,105 @@ class MarketAnomalyMonitorService:
         try:
             logger.debug(f"🔍 分析{symbol}的异常情况...")
             
-            # 获取当前市场数据
-            current_data = await self.get_current_market_data(symbol)
-            if not current_data:
-                logger.warning(f"⚠️ 无法获取{symbol}的当前数据")
+            inputs = await self._fetch_anomaly_inputs(symbol)
+            if not inputs:
                 return None
+            current_data, historical_data = inputs
             
-            # 调试日志：显示原始数据
-            logger.debug(f"🔍 {symbol}原始数据: 价格变化={current_data['price_change_24h']}, 交易量={current_data['volume_24h']:.0f}")
+            features = self.compute_anomaly_features({symbol: historical_data})[symbol]
+            return self._build_anomaly_data(symbol, current_data, features)
             
-            # 获取历史数据
-            historical_data = await self.get_historical_data(symbol)
-            if not historical_data:
-                logger.warning(f"⚠️ 无法获取{symbol}的历史数据")
-                return None
-            
-            # 计算当前波动率
-            recent_prices = historical_data.prices[-24:]  # 最近24小时
-            current_volatility = self.calculate_volatility(recent_prices)
-            
-            # 计算历史波动率
-            historical_volatilities = []
-            for i in range(7, len(historical_data.prices), 24):  # 每天计算一次
-                day_prices = historical_data.prices[max(0, i-24):i]
-                if len(day_prices) >= 12:  # 至少12小时数据
-                    vol = self.calculate_volatility(day_prices)
-                    historical_volatilities.append(vol)
+        except Exception as e:
+            logger.error(f"❌ 分析{symbol}异常失败: {e}")
+            return None
+    
+    async def _fetch_anomaly_inputs(self, symbol: str) -> Optional[Tuple[Dict[str, Any], HistoricalData]]:
+        """获取单个币种的当前行情和历史数据"""
+        # 获取当前市场数据
+        current_data = await self.get_current_market_data(symbol)
+        if not current_data:
+            logger.warning(f"⚠️ 无法获取{symbol}的当前数据")
+            return None
+        
+        # 调试日志：显示原始数据
+        logger.debug(f"🔍 {symbol}原始数据: 价格变化={current_data['price_change_24h']}, 交易量={current_data['volume_24h']:.0f}")
+        
+        # 获取历史数据
+        historical_data = await self.get_historical_data(symbol)
+        if not historical_data:
+            logger.warning(f"⚠️ 无法获取{symbol}的历史数据")
+            return None
+        
+        return current_data, historical_data
+    
+    def compute_anomaly_features(self, historical: Dict[str, HistoricalData]) -> Dict[str, Dict[str, Any]]:
+        """
+        在 [币种, 小时] 面板上一次性计算全部币种的波动率和成交量基准
+        Same windows as calculate_volatility/detect_volume_anomaly, evaluated for the whole universe at once
+
+        Returns:
+            {symbol: {'current_volatility', 'historical_volatilities', 'volume_samples', 'avg_volume_7d'}}
+        """
+        panel = IndicatorPanel.from_columns({
+            symbol: {'close': data.prices, 'volume': data.volumes} for symbol, data in historical.items()
+        })
+        lengths = panel.lengths
+        
+        # 当前波动率：最近24小时，不足24根为0
+        current = volatility(panel.tail('close', 24)) * 100
+        current = np.where(lengths >= 24, current, 0.0)
+        
+        # 历史波动率：从每个币种最早一根起每24小时一个窗口（与逐个计算时的窗口一致）
+        historical_vols = [[] for _ in panel.symbols]
+        for end in range(7, int(lengths.max()) if len(lengths) else 0, 24):
+            begin = max(0, end - 24)
+            if end - begin < 12:
+                continue
+            window_vol = volatility(panel.head('close', begin, end)) * 100
+            for row in np.flatnonzero(lengths > end):
+                historical_vols[row].append(float(window_vol[row]))
+        
+        # 成交量基准：最近7天的正值均值
+        recent_volumes = panel.tail('volume', 7 * 24)
+        positive = np.where(recent_volumes > 0, recent_volumes, np.nan)
+        avg_volume = nan_mean(positive, fill=0.0)
+        volume_samples = np.minimum(lengths, 7 * 24)
+        
+        return {
+            symbol: {
+                'current_volatility': float(current[row]),
+                'historical_volatilities': historical_vols[row],
+                'volume_samples': int(volume_samples[row]),
+                'avg_volume_7d': float(avg_volume[row])
+            }
+            for row, symbol in enumerate(panel.symbols)
+        }
+    
+    def _build_anomaly_data(self, symbol: str, current_data: Dict[str, Any],
+                            features: Dict[str, Any]) -> Optional[MarketAnomalyData]:
+        """根据预先计算的面板特征判定单个币种的异常级别"""
+        try:
+            current_volatility = features['current_volatility']
+            historical_volatilities = features['historical_volatilities']
+            avg_volume = features['avg_volume_7d']
             
             # 检测异常
             volatility_anomaly = self.detect_volatility_anomaly(
                 current_volatility, historical_volatilities
             )
             
-            volume_anomaly = self.detect_volume_anomaly(
-                current_data['volume_24h'], 
-                historical_data.volumes[-7*24:]  # 最近7天
-            )
+            volume_anomaly = self._classify_volume_ratio(current_data['volume_24h'], avg_volume) \
+                if features['volume_samples'] >= 7 else AnomalyLevel.NORMAL
             
             oi_anomaly = None
             if current_data['open_interest'] > 0:
                 oi_anomaly = self.detect_oi_anomaly(current_data['oi_change_24h'])
             
             # 计算比值 - 使用最近7天的平均交易量作为基准
-            recent_volumes = [v for v in historical_data.volumes[-7*24:] if v > 0]
-            if recent_volumes:
-                avg_volume_7d = statistics.mean(recent_volumes)
+            if avg_volume > 0:
+                avg_volume_7d = avg_volume
                 # 防止异常巨大的比值
-                volume_ratio = min(current_data['volume_24h'] / avg_volume_7d, 10000.0) if avg_volume_7d > 0 else 1.0
+                volume_ratio = min(current_data['volume_24h'] / avg_volume_7d, 10000.0)
             else:
                 avg_volume_7d = current_data['volume_24h']
                 volume_ratio = 1.0
@@ -590,22 +647,27 @@ class MarketAnomalyMonitorService:
             
             logger.info(f"📊 开始分析{len(symbols)}个币种的异常情况...")
             
-            # 并发分析所有币种
-            tasks = []
-            for symbol in symbols:
-                task = self.analyze_symbol_anomaly(symbol)
-                tasks.append(task)
+            # 并发获取所有币种的行情和历史数据
+            fetched = await asyncio.gather(
+                *(self._fetch_anomaly_inputs(symbol) for symbol in symbols), return_exceptions=True
+            )
+            inputs = {}
+            for symbol, result in zip(symbols, fetched):
+                if isinstance(result, Exception):
+                    logger.warning(f"⚠️ 分析{symbol}失败: {result}")
+                    continue
+                if result:
+                    inputs[symbol] = result
             
-            # 等待所有分析完成
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # 整个币种池的波动率/成交量基准在同一个面板上一次算完
+            features = self.compute_anomaly_features(
+                {symbol: historical for symbol, (_, historical) in inputs.items()}
+            ) if inputs else {}
             
             # 过滤结果
             anomalies = []
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.warning(f"⚠️ 分析{symbols[i]}失败: {result}")
-                    continue
-                
+            for symbol, (current_data, _) in inputs.items():
+                result = self._build_anomaly_data(symbol, current_data, features[symbol])
                 if result is None:
                     continue
                 
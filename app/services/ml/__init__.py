@@ -6,6 +6,8 @@ Machine Learning Services Module
 
 from .ml_enhanced_service import MLEnhancedService, PredictionSignal
 from .kronos_prediction_service import KronosPredictionService, get_kronos_service
+from .kronos_model_registry import KronosModelRegistry, get_kronos_model_registry
+from .kronos_worker_pool import KronosWorkerPool, get_kronos_worker_pool, shutdown_kronos_worker_pool
 from .kronos_integrated_decision_service import (
     KronosIntegratedDecisionService, 
     get_kronos_integrated_service,
@@ -44,6 +46,11 @@ __all__ = [
     'PredictionSignal',
     'KronosPredictionService',
     'get_kronos_service',
+    'KronosModelRegistry',
+    'get_kronos_model_registry',
+    'KronosWorkerPool',
+    'get_kronos_worker_pool',
+    'shutdown_kronos_worker_pool',
     'KronosIntegratedDecisionService',
     'get_kronos_integrated_service',
     'KronosEnhancedDecision',
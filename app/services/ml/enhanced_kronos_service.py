@@ -20,6 +20,7 @@ from app.services.ml.kronos_integrated_decision_service import (
 )
 from app.services.exchanges.service_manager import get_exchange_service
 from app.services.analysis.detailed_technical_analysis_service import get_detailed_technical_analysis_service
+from app.services.analysis.market_snapshot import MarketSnapshot
 from app.utils.exceptions import TradingToolError
 
 logger = get_logger(__name__)
@@ -112,7 +113,8 @@ class EnhancedKronosService:
     async def get_enhanced_kronos_decision(
         self, 
         symbol: str, 
-        force_update: bool = False
+        force_update: bool = False,
+        snapshot: Optional[MarketSnapshot] = None
     ) -> Optional[EnhancedKronosDecision]:
         """获取增强版Kronos决策"""
         try:
@@ -134,7 +136,7 @@ class EnhancedKronosService:
                 return None
             
             # 2. 进行量价分析
-            volume_analysis = await self._analyze_volume_price_relationship(symbol)
+            volume_analysis = await self._analyze_volume_price_relationship(symbol, snapshot)
             
             # 3. 计算量价一致性
             volume_price_alignment = await self._calculate_volume_price_alignment(
@@ -152,18 +154,25 @@ class EnhancedKronosService:
             self.logger.error(f"获取{symbol}增强版Kronos决策失败: {e}")
             return None
     
-    async def _analyze_volume_price_relationship(self, symbol: str) -> VolumeAnalysis:
+    async def _analyze_volume_price_relationship(
+        self, 
+        symbol: str, 
+        snapshot: Optional[MarketSnapshot] = None
+    ) -> VolumeAnalysis:
         """分析量价关系"""
         try:
-            # 获取历史K线数据
-            if not self.exchange_service:
-                raise TradingToolError("交易所服务未初始化")
+            # 获取历史K线数据（优先使用市场快照）
+            if snapshot is not None and snapshot.has('1H', 50):
+                klines_data = snapshot.klines('1H', 50)
+            else:
+                if not self.exchange_service:
+                    raise TradingToolError("交易所服务未初始化")
                 
-            klines_data = await self.exchange_service.get_kline_data(
-                symbol=symbol,
-                timeframe='1H',
-                limit=50
-            )
+                klines_data = await self.exchange_service.get_kline_data(
+                    symbol=symbol,
+                    timeframe='1H',
+                    limit=50
+                )
             
             if not klines_data:
                 raise TradingToolError(f"无法获取{symbol}的K线数据")
@@ -523,7 +532,8 @@ class EnhancedKronosService:
     async def analyze_with_volume_confirmation(
         self, 
         symbol: str, 
-        trading_mode: Optional[Any] = None
+        trading_mode: Optional[Any] = None,
+        snapshot: Optional[MarketSnapshot] = None
     ) -> Optional[EnhancedKronosDecision]:
         """
         带成交量确认的分析方法
@@ -535,7 +545,8 @@ class EnhancedKronosService:
             # 调用现有的增强决策方法
             enhanced_decision = await self.get_enhanced_kronos_decision(
                 symbol=symbol,
-                force_update=True
+                force_update=True,
+                snapshot=snapshot
             )
             
             if enhanced_decision:
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Kronos预测结果缓存
+Kronos Forecast Cache - 以已收盘K线指纹为键的预测缓存
+
+缓存键为 (交易对, 时间周期, 最后一根已收盘K线时间, 模型版本, 采样参数)：
+同一收盘窗口只预测一次，新K线收盘后旧预测自然失效；缓存持久化到磁盘，重启后无需全量重新预测
+"""
+
+import os
+import pickle
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from app.core.logging import get_logger
+
+# 缓存键: (symbol, timeframe, last_closed_ts, model_version, sampling_params)
+ForecastKey = Tuple[str, str, str, str, Tuple]
+
+
+def _interval_label(seconds: float) -> str:
+    """将K线间隔秒数转换为时间周期标签（如 1h、15m、1d）"""
+    seconds = int(seconds)
+    for unit_seconds, unit in ((86400, 'd'), (3600, 'h'), (60, 'm')):
+        if seconds >= unit_seconds and seconds % unit_seconds == 0:
+            return f"{seconds // unit_seconds}{unit}"
+    return f"{seconds}s"
+
+
+def _naive_utc_index(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """时间索引统一为无时区的UTC时间"""
+    if index.tz is not None:
+        return index.tz_convert('UTC').tz_localize(None)
+    return index
+
+
+def resolve_closed_candle(
+    df: pd.DataFrame,
+    now: Optional[pd.Timestamp] = None
+) -> Tuple[str, Optional[str], Optional[float]]:
+    """
+    计算历史数据的已收盘K线指纹
+    Resolve (last closed candle id, inferred timeframe, seconds until superseded) for a kline window
+
+    时间索引为K线开盘时间（无时区时按UTC处理）；最后一根K线尚未收盘时取前一根。
+    指纹在下一根K线收盘时失效。没有时间索引时退化为 数据长度+最新收盘价 的指纹，周期和有效期返回None
+    """
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex) and len(index) >= 2:
+        index = _naive_utc_index(index).sort_values()
+        interval = pd.Series(index[1:] - index[:-1]).median()
+
+        if pd.notna(interval) and interval.total_seconds() > 0:
+            now = now if now is not None else pd.Timestamp.now(tz='UTC').tz_localize(None)
+            last_closed = index[-1]
+            if last_closed + interval > now:
+                last_closed = index[-2]
+            # 已收盘K线之后还有一根正在形成的K线，它收盘时指纹被替代
+            expires_in = max((last_closed + 2 * interval - now).total_seconds(), 0.0)
+            return last_closed.isoformat(), _interval_label(interval.total_seconds()), expires_in
+
+    return f"n{len(df)}@{float(df['close'].iloc[-1]):.10g}", None, None
+
+
+def drop_unclosed_candle(df: pd.DataFrame, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    去掉尚未收盘的K线
+    Keep only the candles up to the one resolve_closed_candle fingerprints, so the model input matches the cache key
+
+    无法确定K线周期（没有时间索引）时原样返回
+    """
+    last_closed, timeframe, _ = resolve_closed_candle(df, now)
+    if timeframe is None:
+        return df
+    closed = _naive_utc_index(df.index) <= pd.Timestamp(last_closed)
+    return df if closed.all() else df[closed]
+
+
+class KronosForecastCache:
+    """
+    Kronos预测缓存
+    Forecast cache keyed by closed-candle fingerprint with O(1) lookups and disk persistence
+    """
+
+    def __init__(self, cache_file: str, default_ttl_seconds: int = 300):
+        self.logger = get_logger(__name__)
+        self.cache_file = Path(cache_file)
+        self.default_ttl_seconds = default_ttl_seconds
+
+        # key -> (prediction, valid_until)
+        self._entries: Dict[ForecastKey, Tuple[Any, datetime]] = {}
+        # (symbol, timeframe, model_version, sampling_params) -> 当前key，新K线收盘时替换旧预测
+        self._slots: Dict[Tuple, ForecastKey] = {}
+        # symbol -> 最新写入的key
+        self._latest: Dict[str, ForecastKey] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(
+        symbol: str,
+        timeframe: str,
+        last_closed: str,
+        model_version: str,
+        sampling_params: Tuple
+    ) -> ForecastKey:
+        return (symbol, timeframe, last_closed, model_version, tuple(sampling_params))
+
+    def valid_until(self, expires_in: Optional[float]) -> datetime:
+        """预测有效期：指纹被新收盘K线替代时失效，无法确定周期时使用默认TTL"""
+        if expires_in is None:
+            expires_in = self.default_ttl_seconds
+        return datetime.now() + timedelta(seconds=expires_in)
+
+    def get(self, key: ForecastKey) -> Optional[Any]:
+        """按指纹获取预测"""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= datetime.now():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def get_latest(self, symbol: str) -> Optional[Any]:
+        """获取交易对最新的有效预测"""
+        key = self._latest.get(symbol)
+        return self.get(key) if key is not None else None
+
+    def put(self, key: ForecastKey, prediction: Any, valid_until: datetime, persist: bool = True) -> None:
+        """写入预测，同一槽位的旧K线预测被替换"""
+        symbol, timeframe, _, model_version, sampling_params = key
+        slot = (symbol, timeframe, model_version, sampling_params)
+
+        with self._lock:
+            previous = self._slots.get(slot)
+            if previous is not None and previous != key:
+                self._entries.pop(previous, None)
+            self._entries[key] = (prediction, valid_until)
+            self._slots[slot] = key
+            self._latest[symbol] = key
+
+        if persist:
+            self.save()
+
+    def clear(self, symbol: Optional[str] = None) -> None:
+        """清空缓存；指定交易对时只清除该交易对的预测"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                self._slots.clear()
+                self._latest.clear()
+            else:
+                for slot in [slot for slot in self._slots if slot[0] == symbol]:
+                    self._entries.pop(self._slots.pop(slot), None)
+                self._latest.pop(symbol, None)
+        self.save()
+
+    def save(self) -> None:
+        """持久化到磁盘（先写临时文件再原子替换）"""
+        try:
+            with self._lock:
+                snapshot = dict(self._entries)
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(self.cache_file.suffix + '.tmp')
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(snapshot, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            self.logger.warning(f"保存Kronos预测缓存失败: {e}")
+
+    def load(self) -> int:
+        """从磁盘加载未过期的预测，返回加载数量"""
+        if not self.cache_file.exists():
+            return 0
+
+        try:
+            with open(self.cache_file, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"加载Kronos预测缓存失败，将重新预测: {e}")
+            return 0
+
+        now = datetime.now()
+        with self._lock:
+            for key, (prediction, valid_until) in snapshot.items():
+                if valid_until <= now:
+                    continue
+                symbol, timeframe, _, model_version, sampling_params = key
+                self._entries[key] = (prediction, valid_until)
+                self._slots[(symbol, timeframe, model_version, sampling_params)] = key
+                self._latest[symbol] = key
+
+        self.logger.info(f"📦 已从磁盘恢复 {len(self._entries)} 条Kronos预测缓存")
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'symbols': len(self._latest),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'cache_file': str(self.cache_file)
+        }
@@ -63,6 +63,10 @@ class KronosIntegratedDecisionService:
         self._decision_cache: Dict[str, Tuple[KronosEnhancedDecision, datetime]] = {}
         self.cache_duration_minutes = 3  # 缓存3分钟
         
+        # 批量预取的Kronos预测 (symbol, timeframe) -> (预测, 时间)，逐个分析时取用一次
+        self._prefetched_predictions: Dict[Tuple[str, str], Tuple[KronosPrediction, datetime]] = {}
+        self.prefetch_duration_minutes = 10
+        
         self.logger.info("✅ Kronos集成决策服务初始化完成 - 支持短线/中线模式")
         
     async def get_kronos_enhanced_decision(
@@ -197,6 +201,14 @@ class KronosIntegratedDecisionService:
             timeframe = timeframe_config.timeframe
             lookback_periods = timeframe_config.lookback_periods
             
+            # 优先使用批量预取的预测结果
+            prefetched = self._prefetched_predictions.pop((symbol, timeframe), None)
+            if prefetched:
+                prediction, prefetch_time = prefetched
+                if (datetime.now() - prefetch_time).total_seconds() < self.prefetch_duration_minutes * 60:
+                    self.logger.debug(f"🔄 使用批量预取的Kronos预测: {symbol} {timeframe}")
+                    return prediction
+            
             self.logger.info(f"📊 获取 {symbol} {timeframe} K线数据，回看 {lookback_periods} 期")
             
             # 获取历史数据
@@ -213,7 +225,8 @@ class KronosIntegratedDecisionService:
                     prediction = await kronos_service.get_prediction(
                         symbol=symbol,
                         historical_data=historical_data,
-                        force_update=force_update
+                        force_update=force_update,
+                        timeframe=timeframe
                     )
                     
                     if prediction:
@@ -231,6 +244,96 @@ class KronosIntegratedDecisionService:
             self.logger.error(f"获取{symbol}的优化Kronos预测失败: {e}")
             return None
     
+    async def prefetch_kronos_predictions(
+        self,
+        symbols: List[str],
+        trading_mode: Optional[TradingMode] = None,
+        force_update: bool = False
+    ) -> int:
+        """
+        批量预取核心币种的Kronos预测
+        所有币种的K线窗口合并为一次批量推理，结果供后续逐个决策分析直接取用
+        
+        Returns:
+            成功预取的币种数量
+        """
+        try:
+            if not self.enable_kronos:
+                return 0
+            
+            kronos_target_symbols = self.settings.kronos_config.get('target_symbols', [])
+            filtered_symbols = []
+            for symbol in symbols:
+                if not symbol.endswith("-SWAP"):
+                    symbol = f"{symbol}-USDT-SWAP"
+                if symbol in kronos_target_symbols and symbol not in filtered_symbols:
+                    filtered_symbols.append(symbol)
+            
+            if not filtered_symbols:
+                return 0
+            
+            kronos_service = await get_kronos_service()
+            if not kronos_service:
+                self.logger.warning("Kronos服务不可用")
+                return 0
+            
+            if not self.exchange_service:
+                self.exchange_service = await get_exchange_service()
+            
+            # 并发获取各币种的预测配置
+            contexts = await asyncio.gather(
+                *[self.timeframe_manager.get_optimal_config(symbol=symbol, preferred_mode=trading_mode)
+                  for symbol in filtered_symbols],
+                return_exceptions=True
+            )
+            timeframes = {}
+            for symbol, context in zip(filtered_symbols, contexts):
+                if isinstance(context, Exception):
+                    self.logger.warning(f"获取{symbol}预测配置失败: {context}")
+                    continue
+                timeframes[symbol] = context.timeframe_config
+            
+            # 并发获取K线数据
+            symbols_to_fetch = list(timeframes.keys())
+            klines = await asyncio.gather(
+                *[self.exchange_service.get_kline_data(
+                    symbol, timeframes[symbol].timeframe, timeframes[symbol].lookback_periods
+                  ) for symbol in symbols_to_fetch],
+                return_exceptions=True
+            )
+            symbols_data = {}
+            for symbol, kline_data in zip(symbols_to_fetch, klines):
+                if isinstance(kline_data, Exception) or not kline_data:
+                    self.logger.warning(f"无法获取{symbol}的{timeframes[symbol].timeframe}历史数据")
+                    continue
+                historical_data = self._convert_kline_to_dataframe(kline_data)
+                if historical_data is not None and not historical_data.empty:
+                    symbols_data[symbol] = historical_data
+            
+            if not symbols_data:
+                return 0
+            
+            # 一次批量推理覆盖所有币种
+            predictions = await kronos_service.batch_predict(
+                symbols_data,
+                force_update=force_update,
+                timeframes={symbol: timeframes[symbol].timeframe for symbol in symbols_data}
+            )
+            
+            now = datetime.now()
+            prefetched_count = 0
+            for symbol, prediction in predictions.items():
+                if prediction:
+                    self._prefetched_predictions[(symbol, timeframes[symbol].timeframe)] = (prediction, now)
+                    prefetched_count += 1
+            
+            self.logger.info(f"🧠 Kronos批量预取完成: {prefetched_count}/{len(filtered_symbols)}个币种")
+            return prefetched_count
+            
+        except Exception as e:
+            self.logger.error(f"Kronos批量预取失败: {e}")
+            return 0
+    
     def _evaluate_kronos_signal_strength(
         self,
         prediction: KronosPrediction,
@@ -867,6 +970,9 @@ class KronosIntegratedDecisionService:
                 self.logger.warning("没有符合条件的核心币种需要分析")
                 return {}
             
+            # 先批量预取Kronos预测，逐个决策时直接复用
+            await self.prefetch_kronos_predictions(filtered_symbols, force_update=force_update)
+            
             # 并发分析筛选后的交易对
             tasks = [
                 self.get_kronos_enhanced_decision(symbol, force_update)
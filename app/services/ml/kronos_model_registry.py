@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+Kronos模型注册表
+Kronos Model Registry - 进程内共享的Kronos模型与推理队列
+
+tokenizer和预测器权重在进程内只加载一次，所有调用方只读共享；
+推理任务通过有界并发的专用线程池执行，避免重复模型实例和冷加载带来的内存与延迟尖峰
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import psutil
+
+from app.core.config import DEFAULT_SAMPLE_CONVERGENCE_TOL, get_settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 全局注册表实例
+_kronos_model_registry = None
+
+# 与训练配置保持一致的模型结构参数
+TOKENIZER_PARAMS = {
+    'd_in': 6,  # 输入维度 (OHLCV + amount)
+    'd_model': 256,
+    'n_heads': 8,
+    'ff_dim': 1024,
+    'n_enc_layers': 4,
+    'n_dec_layers': 4,
+    'ffn_dropout_p': 0.1,
+    'attn_dropout_p': 0.1,
+    'resid_dropout_p': 0.1,
+    's1_bits': 8,
+    's2_bits': 8,
+    'beta': 0.25,
+    'gamma0': 1.0,
+    'gamma': 0.99,
+    'zeta': 1e-4,
+    'group_size': 1
+}
+
+MODEL_PARAMS = {
+    's1_bits': 8,
+    's2_bits': 8,
+    'n_layers': 6,
+    'd_model': 256,
+    'n_heads': 8,
+    'ff_dim': 1024,
+    'ffn_dropout_p': 0.1,
+    'attn_dropout_p': 0.1,
+    'resid_dropout_p': 0.1,
+    'token_dropout_p': 0.1,
+    'learn_te': True
+}
+
+
+def _import_kronos():
+    """添加Kronos-master到路径并导入模型模块"""
+    kronos_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../Kronos-master'))
+    if kronos_path not in sys.path:
+        sys.path.append(kronos_path)
+
+    from model import Kronos, KronosTokenizer, KronosPredictor
+    return Kronos, KronosTokenizer, KronosPredictor
+
+
+def _ensure_exported(tokenizer, model, runtime: str, export_dir: str, max_context: int) -> str:
+    """确保导出产物存在且覆盖max_context，必要时从当前权重导出"""
+    from model.export import export_kronos, read_manifest
+
+    artifact_dir = os.path.join(export_dir, runtime)
+    manifest = read_manifest(artifact_dir)
+    if manifest is None or manifest.get('runtime') != runtime or manifest.get('max_context', 0) < max_context:
+        logger.info(f"📦 导出Kronos推理图: runtime={runtime}, max_context={max_context}")
+        export_kronos(tokenizer, model, artifact_dir, runtime=runtime, max_context=max_context)
+    return artifact_dir
+
+
+def load_kronos_predictor(
+    device: str = 'cpu',
+    max_context: int = 200,
+    use_kv_cache: bool = True,
+    precision: str = 'fp32',
+    attention_backend: str = 'sdpa',
+    runtime: str = 'eager',
+    export_dir: str = 'models/kronos_export',
+    intra_op_threads: Optional[int] = None,
+    sample_memory_mb: int = 256,
+    quantiles: Tuple[float, ...] = (0.1, 0.5, 0.9),
+    convergence_tol: float = DEFAULT_SAMPLE_CONVERGENCE_TOL
+) -> Dict[str, Any]:
+    """
+    构建tokenizer、模型和预测器（同步）
+    Build a read-only Kronos tokenizer/model/predictor; shared by the registry and the inference workers
+    """
+    Kronos, KronosTokenizer, KronosPredictor = _import_kronos()
+
+    logger.info("🔧 初始化Kronos tokenizer...")
+    tokenizer = KronosTokenizer(**TOKENIZER_PARAMS)
+    logger.info("🧠 初始化Kronos模型...")
+    model = Kronos(**MODEL_PARAMS)
+
+    # 共享实例只读：切换到推理模式（关闭dropout）并冻结全部参数
+    for module in (tokenizer, model):
+        module.eval()
+        for param in module.parameters():
+            param.requires_grad_(False)
+
+    artifact_dir = None
+    if runtime != 'eager':
+        artifact_dir = _ensure_exported(tokenizer, model, runtime, export_dir, max_context)
+
+    logger.info(f"🔮 初始化Kronos预测器 (runtime={runtime})...")
+    predictor = KronosPredictor(
+        model=model,
+        tokenizer=tokenizer,
+        device=device,
+        max_context=max_context,
+        use_kv_cache=use_kv_cache,
+        precision=precision,
+        attention_backend=attention_backend,
+        runtime=runtime,
+        artifact_dir=artifact_dir,
+        intra_op_threads=intra_op_threads,
+        sample_memory_mb=sample_memory_mb,
+        quantiles=quantiles,
+        convergence_tol=convergence_tol
+    )
+
+    return {
+        'tokenizer': tokenizer,
+        'model': predictor.model if runtime == 'eager' else model,  # int8模式下为量化后的副本
+        'predictor': predictor,
+        'loaded_at': datetime.now()
+    }
+
+
+class KronosModelRegistry:
+    """
+    Kronos模型注册表
+    Process-wide registry that loads Kronos weights once and serves bounded-concurrency inference
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.logger = get_logger(__name__)
+        self.kronos_config = getattr(self.settings, 'kronos_config', {}) or {}
+        # 注意力后端: sdpa(PyTorch融合内核) / custom(参考实现)
+        self.attention_backend = self.kronos_config.get('attention_backend', 'sdpa')
+        # 推理运行时: eager / torchscript / onnx，导出产物按需生成到export_dir
+        self.runtime_backend = self.kronos_config.get('runtime_backend', 'eager')
+        self.export_dir = self.kronos_config.get('export_dir', 'models/kronos_export')
+        self.intra_op_threads = int(self.kronos_config.get('intra_op_threads', 0)) or None
+        # 多样本预测：按内存预算分块采样、收敛提前停止，输出分位数
+        self.sample_memory_mb = self.kronos_config.get('sample_memory_mb', 256)
+        self.forecast_quantiles = tuple(self.kronos_config.get('forecast_quantiles', (0.1, 0.5, 0.9)))
+        self.sample_convergence_tol = self.kronos_config.get('sample_convergence_tol', DEFAULT_SAMPLE_CONVERGENCE_TOL)
+
+        # (device, max_context, use_kv_cache, precision) -> 加载结果
+        self._entries: Dict[Tuple, Dict[str, Any]] = {}
+        self._load_lock = threading.Lock()
+
+        # 推理队列：专用线程池 + 信号量限制并发
+        self.max_concurrency = max(1, int(self.kronos_config.get('max_concurrent_inferences', 2)))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix='kronos-inference'
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # 队列统计
+        self.active_inferences = 0
+        self.queued_inferences = 0
+        self.completed_inferences = 0
+        self.failed_inferences = 0
+
+    def _entry_key(self, device: str, max_context: int, use_kv_cache: bool, precision: str) -> Tuple:
+        return (device, int(max_context), bool(use_kv_cache), precision)
+
+    def _load_entry(self, device: str, max_context: int, use_kv_cache: bool, precision: str) -> Dict[str, Any]:
+        """加载tokenizer、模型和预测器（同步，调用方负责加锁）"""
+        return load_kronos_predictor(
+            device=device,
+            max_context=max_context,
+            use_kv_cache=use_kv_cache,
+            precision=precision,
+            attention_backend=self.attention_backend,
+            runtime=self.runtime_backend,
+            export_dir=self.export_dir,
+            intra_op_threads=self.intra_op_threads,
+            sample_memory_mb=self.sample_memory_mb,
+            quantiles=self.forecast_quantiles,
+            convergence_tol=self.sample_convergence_tol
+        )
+
+    def get_or_load(
+        self,
+        device: str = 'cpu',
+        max_context: int = 200,
+        use_kv_cache: bool = True,
+        precision: str = 'fp32'
+    ) -> Dict[str, Any]:
+        """
+        获取共享的模型实例，首次调用时加载
+        Get the shared tokenizer/model/predictor, loading them on first use
+        """
+        key = self._entry_key(device, max_context, use_kv_cache, precision)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        with self._load_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load_entry(device, max_context, use_kv_cache, precision)
+                self._entries[key] = entry
+                self.logger.info(
+                    f"✅ Kronos模型已加载到注册表: device={device}, max_context={max_context}, precision={precision}"
+                )
+        return entry
+
+    async def get_predictor(
+        self,
+        device: str = 'cpu',
+        max_context: int = 200,
+        use_kv_cache: bool = True,
+        precision: str = 'fp32'
+    ) -> Dict[str, Any]:
+        """异步获取共享模型实例，加载过程在线程池中执行避免阻塞事件循环"""
+        key = self._entry_key(device, max_context, use_kv_cache, precision)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.get_or_load, device, max_context, use_kv_cache, precision)
+
+    async def run_inference(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """
+        在推理队列中执行同步推理函数
+        Run a blocking inference call on the dedicated pool with bounded concurrency
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.queued_inferences += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued_inferences -= 1
+
+        self.active_inferences += 1
+        try:
+            loop = asyncio.get_event_loop()
+            future = loop.run_in_executor(self._executor, func, *args)
+        except Exception:
+            self.active_inferences -= 1
+            self._semaphore.release()
+            raise
+        # 许可随线程池任务结束才归还：超时后推理线程仍在运行，提前归还会让实际并发超过上限
+        future.add_done_callback(self._on_inference_done)
+
+        try:
+            shielded = asyncio.shield(future)
+            result = await asyncio.wait_for(shielded, timeout=timeout) if timeout else await shielded
+            self.completed_inferences += 1
+            return result
+        except Exception:
+            self.failed_inferences += 1
+            raise
+
+    def _on_inference_done(self, future: asyncio.Future) -> None:
+        """推理线程结束：归还并发许可"""
+        self.active_inferences -= 1
+        self._semaphore.release()
+        if not future.cancelled():
+            future.exception()  # 调用方已超时时由这里取走异常，避免未检索告警
+
+    def _module_bytes(self, module) -> int:
+        """统计模块权重占用的字节数（按state_dict统计，兼容量化后的打包权重）"""
+        total = 0
+        for value in module.state_dict().values():
+            tensors = value if isinstance(value, (tuple, list)) else (value,)
+            for tensor in tensors:
+                if hasattr(tensor, 'element_size'):
+                    total += tensor.numel() * tensor.element_size()
+        return total
+
+    def get_memory_usage(self) -> Dict[str, Any]:
+        """
+        获取注册表占用的内存
+        Report memory held by the registry's models
+        """
+        models = []
+        total_bytes = 0
+        for (device, max_context, use_kv_cache, precision), entry in self._entries.items():
+            tokenizer_bytes = self._module_bytes(entry['tokenizer'])
+            model_bytes = self._module_bytes(entry['model'])
+            total_bytes += tokenizer_bytes + model_bytes
+            models.append({
+                'device': device,
+                'max_context': max_context,
+                'use_kv_cache': use_kv_cache,
+                'precision': precision,
+                'tokenizer_mb': round(tokenizer_bytes / 1024 / 1024, 2),
+                'model_mb': round(model_bytes / 1024 / 1024, 2),
+                'loaded_at': entry['loaded_at'].isoformat()
+            })
+
+        try:
+            process_rss_mb = round(psutil.Process().memory_info().rss / 1024 / 1024, 2)
+        except Exception:
+            process_rss_mb = None
+
+        return {
+            'loaded_models': len(self._entries),
+            'total_weights_mb': round(total_bytes / 1024 / 1024, 2),
+            'process_rss_mb': process_rss_mb,
+            'models': models
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取注册表和推理队列状态"""
+        return {
+            'max_concurrency': self.max_concurrency,
+            'attention_backend': self.attention_backend,
+            'runtime_backend': self.runtime_backend,
+            'intra_op_threads': self.intra_op_threads,
+            'active_inferences': self.active_inferences,
+            'queued_inferences': self.queued_inferences,
+            'completed_inferences': self.completed_inferences,
+            'failed_inferences': self.failed_inferences,
+            'memory': self.get_memory_usage()
+        }
+
+
+def get_kronos_model_registry() -> KronosModelRegistry:
+    """
+    获取Kronos模型注册表实例
+    Get the process-wide Kronos model registry
+    """
+    global _kronos_model_registry
+
+    if _kronos_model_registry is None:
+        _kronos_model_registry = KronosModelRegistry()
+
+    return _kronos_model_registry
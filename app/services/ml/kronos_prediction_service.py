@@ -6,9 +6,7 @@ Kronos Prediction Service with graceful error handling and fallback mechanisms
 """
 
 import asyncio
-import sys
-import os
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 import pandas as pd
@@ -16,6 +14,9 @@ import numpy as np
 
 from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.services.ml.kronos_model_registry import get_kronos_model_registry
+from app.services.ml.kronos_worker_pool import get_kronos_worker_pool
+from app.services.ml.kronos_forecast_cache import KronosForecastCache, drop_unclosed_candle, resolve_closed_candle
 
 # 全局服务实例
 _kronos_service = None
@@ -78,12 +79,17 @@ class KronosPredictionService:
         self.model = None
         self.tokenizer = None
         self.predictor = None
+        self.worker_pool = None  # 启用独立推理进程时由initialize设置
         self.model_loaded = False
         self.fallback_mode = False
         
-        # 预测缓存
-        self.prediction_cache = {}
-        self.cache_ttl = 300  # 5分钟缓存
+        # 预测缓存：按已收盘K线指纹缓存，持久化到磁盘
+        self.cache_ttl = 300  # 无法识别K线周期时的回退TTL（5分钟）
+        self.forecast_cache = KronosForecastCache(
+            cache_file=self.kronos_config.get('forecast_cache_file', 'logs/cache/kronos_forecast_cache.pkl'),
+            default_ttl_seconds=self.cache_ttl
+        )
+        self.forecast_cache.load()
         
         # 预测配置
         self.prediction_timeout = self.kronos_config.get('prediction_timeout', 120)  # 2分钟超时
@@ -107,6 +113,8 @@ class KronosPredictionService:
                 'tokenizer_name': 'NeoQuasar/Kronos-Tokenizer-base',
                 'device': 'cpu',
                 'max_context': 200,
+                'use_kv_cache': True,
+                'inference_precision': 'fp32',
                 'prediction_length': 12,
                 'temperature': 0.8,
                 'top_p': 0.95,
@@ -156,16 +164,34 @@ class KronosPredictionService:
         try:
             self.logger.info("🚀 开始初始化Kronos模型...")
             
-            # 添加Kronos模型路径
-            kronos_path = os.path.join(os.path.dirname(__file__), '../../../Kronos-master')
-            kronos_path = os.path.abspath(kronos_path)
-            if kronos_path not in sys.path:
-                sys.path.append(kronos_path)
-            
-            # 尝试动态导入Kronos模型
+            device = self.kronos_config.get('device', 'cpu')
+            max_context = self.kronos_config.get('max_context', 200)
+            use_kv_cache = self.kronos_config.get('use_kv_cache', True)
+            precision = self.kronos_config.get('inference_precision', 'fp32')
+            
+            # 配置了推理工作进程时，模型只在工作进程中加载，Web进程不持有权重
+            if self.kronos_config.get('inference_workers', 0) > 0:
+                worker_pool = get_kronos_worker_pool()
+                if await worker_pool.start():
+                    self.worker_pool = worker_pool
+                    self.model_loaded = True
+                    self.fallback_mode = False
+                    self.logger.info("🎉 Kronos推理工作进程初始化成功")
+                    return True
+                self.logger.warning("⚠️ Kronos推理工作进程不可用，改为进程内推理")
+            
+            # 从进程级注册表获取共享模型（只在首次使用时加载）
             try:
-                from model import Kronos, KronosTokenizer, KronosPredictor
-                self.logger.info("✅ Kronos模块导入成功")
+                entry = await get_kronos_model_registry().get_predictor(
+                    device=device,
+                    max_context=max_context,
+                    use_kv_cache=use_kv_cache,
+                    precision=precision
+                )
+                self.tokenizer = entry['tokenizer']
+                self.model = entry['model']
+                self.predictor = entry['predictor']
+                self.logger.info("✅ Kronos预测器初始化成功")
             except ImportError as e:
                 self.logger.warning(f"⚠️ Kronos模块导入失败: {e}")
                 self.logger.info("📝 可能的解决方案:")
@@ -175,79 +201,7 @@ class KronosPredictionService:
                 await self._enable_fallback_mode()
                 return True
             except Exception as e:
-                self.logger.error(f"❌ Kronos模块导入异常: {e}")
-                await self._enable_fallback_mode()
-                return True
-            
-            # 获取模型配置
-            self.kronos_config.get('model_name', 'NeoQuasar/Kronos-small')
-            self.kronos_config.get('tokenizer_name', 'NeoQuasar/Kronos-Tokenizer-base')
-            device = self.kronos_config.get('device', 'cpu')
-            max_context = self.kronos_config.get('max_context', 200)
-            
-            # 初始化tokenizer
-            try:
-                self.logger.info("🔧 初始化Kronos tokenizer...")
-                tokenizer_params = {
-                    'd_in': 6,  # 输入维度 (OHLCV + amount)
-                    'd_model': 256,
-                    'n_heads': 8,
-                    'ff_dim': 1024,
-                    'n_enc_layers': 4,
-                    'n_dec_layers': 4,
-                    'ffn_dropout_p': 0.1,
-                    'attn_dropout_p': 0.1,
-                    'resid_dropout_p': 0.1,
-                    's1_bits': 8,
-                    's2_bits': 8,
-                    'beta': 0.25,
-                    'gamma0': 1.0,
-                    'gamma': 0.99,
-                    'zeta': 1e-4,
-                    'group_size': 1
-                }
-                self.tokenizer = KronosTokenizer(**tokenizer_params)
-                self.logger.info("✅ Kronos tokenizer初始化成功")
-            except Exception as e:
-                self.logger.error(f"❌ Kronos tokenizer初始化失败: {e}")
-                await self._enable_fallback_mode()
-                return True
-            
-            # 初始化模型
-            try:
-                self.logger.info("🧠 初始化Kronos模型...")
-                model_params = {
-                    's1_bits': 8,
-                    's2_bits': 8,
-                    'n_layers': 6,
-                    'd_model': 256,
-                    'n_heads': 8,
-                    'ff_dim': 1024,
-                    'ffn_dropout_p': 0.1,
-                    'attn_dropout_p': 0.1,
-                    'resid_dropout_p': 0.1,
-                    'token_dropout_p': 0.1,
-                    'learn_te': True
-                }
-                self.model = Kronos(**model_params)
-                self.logger.info("✅ Kronos模型初始化成功")
-            except Exception as e:
-                self.logger.error(f"❌ Kronos模型初始化失败: {e}")
-                await self._enable_fallback_mode()
-                return True
-            
-            # 初始化预测器
-            try:
-                self.logger.info("🔮 初始化Kronos预测器...")
-                self.predictor = KronosPredictor(
-                    model=self.model,
-                    tokenizer=self.tokenizer,
-                    device=device,
-                    max_context=max_context
-                )
-                self.logger.info("✅ Kronos预测器初始化成功")
-            except Exception as e:
-                self.logger.error(f"❌ Kronos预测器初始化失败: {e}")
+                self.logger.error(f"❌ Kronos模型加载失败: {e}")
                 await self._enable_fallback_mode()
                 return True
             
@@ -348,11 +302,43 @@ class KronosPredictionService:
             self.logger.error(f"❌ 预测{symbol}失败: {e}")
             return None
 
+    def _get_sampling_params(self):
+        """获取预测长度和采样参数: (pred_len, temperature, top_p, sample_count)"""
+        pred_len = min(self.kronos_config.get('prediction_length', 12), 24)  # 最多预测24小时，默认12小时
+        temperature = self.kronos_config.get('temperature', 0.8)  # 降低温度提高稳定性
+        top_p = self.kronos_config.get('top_p', 0.95)  # 提高top_p提高稳定性
+        # 默认单样本；显式配置ensemble_sample_count>1时才启用多样本集成（推理成本随样本数线性增长）
+        sample_count = max(1, int(self.kronos_config.get('ensemble_sample_count', 1)))
+        return pred_len, temperature, top_p, sample_count
+    
+    def _get_model_version(self) -> str:
+        """当前预测来源的模型版本标识（参与缓存键）"""
+        if self.fallback_mode or not self.model_loaded:
+            return 'fallback'
+        return (
+            f"kronos:{self.kronos_config.get('model_name', 'unknown')}"
+            f":{self.kronos_config.get('inference_precision', 'fp32')}"
+            f":{self.kronos_config.get('max_context', 200)}"
+        )
+    
+    def _get_forecast_key(self, symbol: str, historical_data: pd.DataFrame, timeframe: Optional[str] = None):
+        """
+        计算预测缓存键及有效期
+        Build the (symbol, timeframe, last closed candle, model version, sampling params) cache key
+        """
+        last_closed, inferred_timeframe, expires_in = resolve_closed_candle(historical_data)
+        timeframe = (timeframe or inferred_timeframe or 'unknown').lower()
+        key = KronosForecastCache.make_key(
+            symbol, timeframe, last_closed, self._get_model_version(), self._get_sampling_params()
+        )
+        return key, self.forecast_cache.valid_until(expires_in)
+    
     async def get_prediction(
         self,
         symbol: str,
         historical_data: pd.DataFrame,
-        force_update: bool = False
+        force_update: bool = False,
+        timeframe: Optional[str] = None
     ) -> Optional[KronosPrediction]:
         """
         获取价格预测，自动选择Kronos或回退模式
@@ -364,11 +350,14 @@ class KronosPredictionService:
                 if not await self.initialize():
                     return None
             
-            # 检查缓存
-            cache_key = f"{symbol}_{len(historical_data)}_{self.fallback_mode}"
-            if not force_update and cache_key in self.prediction_cache:
-                cached_result, cache_time = self.prediction_cache[cache_key]
-                if (datetime.now() - cache_time).seconds < self.cache_ttl:
+            # 只用已收盘K线预测，模型输入与缓存键对应同一窗口
+            historical_data = drop_unclosed_candle(historical_data)
+            
+            # 检查缓存（同一已收盘K线窗口只预测一次）
+            if not force_update:
+                cache_key, _ = self._get_forecast_key(symbol, historical_data, timeframe)
+                cached_result = self.forecast_cache.get(cache_key)
+                if cached_result is not None:
                     mode = "回退" if self.fallback_mode else "Kronos"
                     self.logger.debug(f"🔍 使用缓存的{mode}预测: {symbol}")
                     return cached_result
@@ -392,9 +381,10 @@ class KronosPredictionService:
                     await self._enable_fallback_mode()
                     prediction_result = await self._run_fallback_prediction(symbol, processed_data)
             
-            # 缓存结果
+            # 缓存结果（预测过程中可能切换到回退模式，重新计算缓存键）
             if prediction_result:
-                self.prediction_cache[cache_key] = (prediction_result, datetime.now())
+                cache_key, valid_until = self._get_forecast_key(symbol, historical_data, timeframe)
+                self.forecast_cache.put(cache_key, prediction_result, valid_until)
             
             return prediction_result
             
@@ -482,44 +472,29 @@ class KronosPredictionService:
         """执行Kronos预测"""
         try:
             # 预测配置 - 使用更保守的设置
-            pred_len = min(self.kronos_config.get('prediction_length', 12), 24)  # 最多预测24小时，默认12小时
-            temperature = self.kronos_config.get('temperature', 0.8)  # 降低温度提高稳定性
-            top_p = self.kronos_config.get('top_p', 0.95)  # 提高top_p提高稳定性
-            sample_count = self.kronos_config.get('sample_count', 1)  # 保持单样本避免内存问题
+            pred_len, temperature, top_p, sample_count = self._get_sampling_params()
             
             # 准备时间戳
-            if isinstance(historical_data.index, pd.DatetimeIndex):
-                x_timestamp = historical_data.index
-                # 生成未来时间戳（假设1小时间隔）
-                last_time = x_timestamp[-1]
-                y_timestamp = pd.date_range(
-                    start=last_time + timedelta(hours=1),
-                    periods=pred_len,
-                    freq='h'
-                )
-            else:
-                # 如果没有时间索引，创建虚拟时间戳
-                now = datetime.now()
-                x_timestamp = pd.date_range(
-                    end=now,
-                    periods=len(historical_data),
-                    freq='h'
-                )
-                y_timestamp = pd.date_range(
-                    start=now + timedelta(hours=1),
-                    periods=pred_len,
-                    freq='h'
-                )
+            x_timestamp, y_timestamp = self._build_timestamps(historical_data, pred_len)
             
             # 执行预测
             self.logger.debug(f"开始Kronos预测: {symbol}, 预测长度: {pred_len}")
             
-            # 在线程池中运行预测（避免阻塞），添加超时控制
-            loop = asyncio.get_event_loop()
+            # 在推理工作进程或共享推理队列中运行预测（避免阻塞），添加超时控制
             try:
-                pred_df = await asyncio.wait_for(
-                    loop.run_in_executor(
-                        None,
+                if self.worker_pool is not None:
+                    pred_df = (await self.worker_pool.predict(
+                        [historical_data],
+                        [x_timestamp],
+                        [y_timestamp],
+                        pred_len,
+                        temperature,
+                        top_p,
+                        sample_count,
+                        timeout=self.prediction_timeout
+                    ))[0]
+                else:
+                    pred_df = await get_kronos_model_registry().run_inference(
                         self._sync_predict,
                         historical_data,
                         x_timestamp,
@@ -527,10 +502,9 @@ class KronosPredictionService:
                         pred_len,
                         temperature,
                         top_p,
-                        sample_count
-                    ),
-                    timeout=self.prediction_timeout
-                )
+                        sample_count,
+                        timeout=self.prediction_timeout
+                    )
             except asyncio.TimeoutError:
                 self.logger.error(f"Kronos预测超时 ({self.prediction_timeout}秒): {symbol}")
                 return None
@@ -539,45 +513,85 @@ class KronosPredictionService:
                 self.logger.warning(f"Kronos预测返回空结果: {symbol}")
                 return None
             
-            # 解析预测结果
-            current_price = float(historical_data['close'].iloc[-1])
-            predicted_price = float(pred_df['close'].iloc[-1])  # 取最后一个预测价格
-            price_change_pct = (predicted_price - current_price) / current_price
-            
-            # 计算置信度（基于预测的稳定性）
-            confidence = self._calculate_confidence(pred_df, historical_data)
-            
-            prediction = KronosPrediction(
-                symbol=symbol,
-                timestamp=datetime.now(),
-                current_price=current_price,
-                predicted_price=predicted_price,
-                price_change_pct=price_change_pct,
-                confidence=confidence,
-                prediction_horizon=pred_len,
-                raw_prediction={
-                    'prediction_df': pred_df.to_dict(),
-                    'prediction_length': pred_len,
-                    'model_config': {
-                        'temperature': temperature,
-                        'top_p': top_p,
-                        'sample_count': sample_count
-                    }
-                }
-            )
-            
-            self.logger.info(
-                f"Kronos预测完成 - {symbol}: "
-                f"当前价格 {current_price:.4f} -> 预测价格 {predicted_price:.4f} "
-                f"({price_change_pct*100:+.2f}%, 置信度: {confidence:.2f})"
+            return self._build_prediction(
+                symbol, historical_data, pred_df, pred_len, temperature, top_p, sample_count
             )
             
-            return prediction
-            
         except Exception as e:
             self.logger.error(f"执行Kronos预测失败: {e}")
             return None
     
+    def _build_timestamps(self, historical_data: pd.DataFrame, pred_len: int):
+        """构建历史与未来时间戳（假设1小时间隔）"""
+        if isinstance(historical_data.index, pd.DatetimeIndex):
+            x_timestamp = historical_data.index
+            # 生成未来时间戳
+            last_time = x_timestamp[-1]
+            y_timestamp = pd.date_range(
+                start=last_time + timedelta(hours=1),
+                periods=pred_len,
+                freq='h'
+            )
+        else:
+            # 如果没有时间索引，创建虚拟时间戳
+            now = datetime.now()
+            x_timestamp = pd.date_range(
+                end=now,
+                periods=len(historical_data),
+                freq='h'
+            )
+            y_timestamp = pd.date_range(
+                start=now + timedelta(hours=1),
+                periods=pred_len,
+                freq='h'
+            )
+        return x_timestamp, y_timestamp
+    
+    def _build_prediction(
+        self,
+        symbol: str,
+        historical_data: pd.DataFrame,
+        pred_df: pd.DataFrame,
+        pred_len: int,
+        temperature: float,
+        top_p: float,
+        sample_count: int
+    ) -> KronosPrediction:
+        """将预测DataFrame解析为KronosPrediction"""
+        current_price = float(historical_data['close'].iloc[-1])
+        predicted_price = float(pred_df['close'].iloc[-1])  # 取最后一个预测价格
+        price_change_pct = (predicted_price - current_price) / current_price
+        
+        # 计算置信度（基于预测的稳定性）
+        confidence = self._calculate_confidence(pred_df, historical_data)
+        
+        prediction = KronosPrediction(
+            symbol=symbol,
+            timestamp=datetime.now(),
+            current_price=current_price,
+            predicted_price=predicted_price,
+            price_change_pct=price_change_pct,
+            confidence=confidence,
+            prediction_horizon=pred_len,
+            raw_prediction={
+                'prediction_df': pred_df.to_dict(),
+                'prediction_length': pred_len,
+                'model_config': {
+                    'temperature': temperature,
+                    'top_p': top_p,
+                    'sample_count': sample_count
+                }
+            }
+        )
+        
+        self.logger.info(
+            f"Kronos预测完成 - {symbol}: "
+            f"当前价格 {current_price:.4f} -> 预测价格 {predicted_price:.4f} "
+            f"({price_change_pct*100:+.2f}%, 置信度: {confidence:.2f})"
+        )
+        
+        return prediction
+    
     def _sync_predict(
         self,
         df: pd.DataFrame,
@@ -730,11 +744,20 @@ class KronosPredictionService:
                 trend_consistency = 1 - abs(price_changes.std())  # 变化率的标准差越小越好
                 confidence_factors.append(max(0, min(1, trend_consistency)))
             
-            # 3. 历史数据质量（数据越多越稳定，置信度越高）
+            # 3. 多样本预测的分布宽度（最外侧分位数区间越窄，置信度越高）
+            quantile_cols = sorted(
+                (col for col in pred_df.columns if col.startswith('close_q')),
+                key=lambda col: float(col[len('close_q'):])
+            )
+            if len(quantile_cols) >= 2:
+                band_width = (pred_df[quantile_cols[-1]].iloc[-1] - pred_df[quantile_cols[0]].iloc[-1]) / abs(pred_df['close'].iloc[-1])
+                confidence_factors.append(max(0, 1 - band_width * 5))
+            
+            # 4. 历史数据质量（数据越多越稳定，置信度越高）
             data_quality = min(1.0, len(historical_data) / 200)  # 200个数据点为满分
             confidence_factors.append(data_quality)
             
-            # 4. 预测幅度合理性（过大的预测变化降低置信度）
+            # 5. 预测幅度合理性（过大的预测变化降低置信度）
             current_price = historical_data['close'].iloc[-1]
             predicted_price = pred_df['close'].iloc[-1]
             price_change = abs((predicted_price - current_price) / current_price)
@@ -765,21 +788,159 @@ class KronosPredictionService:
     async def batch_predict(
         self,
         symbols_data: Dict[str, pd.DataFrame],
-        force_update: bool = False
+        force_update: bool = False,
+        timeframes: Optional[Dict[str, str]] = None
     ) -> Dict[str, Optional[KronosPrediction]]:
-        """批量预测多个交易对"""
+        """
+        批量预测多个交易对
+        Kronos模式下将所有交易对的窗口合并为一次批量推理，回退模式下逐个预测
+        """
         results = {}
+        timeframes = timeframes or {}
+        
+        # 检查是否需要初始化
+        if not self.model_loaded and not self.fallback_mode:
+            await self.initialize()
+        
+        if self.fallback_mode or not self.model_loaded or len(symbols_data) <= 1:
+            for symbol, data in symbols_data.items():
+                try:
+                    prediction = await self.get_prediction(symbol, data, force_update, timeframes.get(symbol))
+                    results[symbol] = prediction
+                except Exception as e:
+                    self.logger.error(f"批量预测{symbol}失败: {e}")
+                    results[symbol] = None
+            return results
         
+        # 先命中缓存，再对剩余交易对做预处理
+        pending: Dict[str, pd.DataFrame] = {}
+        cache_keys: Dict[str, tuple] = {}
         for symbol, data in symbols_data.items():
             try:
-                prediction = await self.get_prediction(symbol, data, force_update)
-                results[symbol] = prediction
+                data = drop_unclosed_candle(data)
+                cache_key, valid_until = self._get_forecast_key(symbol, data, timeframes.get(symbol))
+                if not force_update:
+                    cached_result = self.forecast_cache.get(cache_key)
+                    if cached_result is not None:
+                        results[symbol] = cached_result
+                        continue
+                
+                processed_data = self._preprocess_data(data)
+                if processed_data is None or len(processed_data) < 20:
+                    self.logger.warning(f"⚠️ 历史数据不足，无法进行预测: {symbol}")
+                    results[symbol] = None
+                    continue
+                
+                pending[symbol] = processed_data
+                cache_keys[symbol] = (cache_key, valid_until)
             except Exception as e:
-                self.logger.error(f"批量预测{symbol}失败: {e}")
+                self.logger.error(f"批量预测{symbol}预处理失败: {e}")
                 results[symbol] = None
         
+        if not pending:
+            return results
+        
+        self.logger.info(f"🧠 使用Kronos批量预测: {len(pending)} 个交易对")
+        batch_results = await self._run_batch_prediction(pending)
+        
+        for symbol, processed_data in pending.items():
+            prediction = batch_results.get(symbol)
+            if prediction is None:
+                # 批量推理失败的交易对单独回退到逐个预测
+                prediction = await self.get_prediction(
+                    symbol, symbols_data[symbol], force_update=True, timeframe=timeframes.get(symbol)
+                )
+            else:
+                cache_key, valid_until = cache_keys[symbol]
+                self.forecast_cache.put(cache_key, prediction, valid_until, persist=False)
+            results[symbol] = prediction
+        
+        self.forecast_cache.save()
         return results
     
+    async def _run_batch_prediction(
+        self,
+        symbols_data: Dict[str, pd.DataFrame]
+    ) -> Dict[str, Optional[KronosPrediction]]:
+        """执行Kronos批量预测（一次推理覆盖多个交易对）"""
+        try:
+            pred_len, temperature, top_p, sample_count = self._get_sampling_params()
+            
+            symbols = list(symbols_data.keys())
+            timestamps = [self._build_timestamps(symbols_data[symbol], pred_len) for symbol in symbols]
+            
+            try:
+                if self.worker_pool is not None:
+                    pred_dfs = await self.worker_pool.predict(
+                        [symbols_data[symbol] for symbol in symbols],
+                        [x_ts for x_ts, _ in timestamps],
+                        [y_ts for _, y_ts in timestamps],
+                        pred_len,
+                        temperature,
+                        top_p,
+                        sample_count,
+                        timeout=self.prediction_timeout
+                    )
+                else:
+                    pred_dfs = await get_kronos_model_registry().run_inference(
+                        self._sync_predict_batch,
+                        [symbols_data[symbol] for symbol in symbols],
+                        [x_ts for x_ts, _ in timestamps],
+                        [y_ts for _, y_ts in timestamps],
+                        pred_len,
+                        temperature,
+                        top_p,
+                        sample_count,
+                        timeout=self.prediction_timeout
+                    )
+            except asyncio.TimeoutError:
+                self.logger.error(f"Kronos批量预测超时 ({self.prediction_timeout}秒): {len(symbols)} 个交易对")
+                return {}
+            
+            if pred_dfs is None:
+                return {}
+            
+            results = {}
+            for symbol, pred_df in zip(symbols, pred_dfs):
+                if pred_df is None or pred_df.empty:
+                    self.logger.warning(f"Kronos批量预测返回空结果: {symbol}")
+                    results[symbol] = None
+                    continue
+                results[symbol] = self._build_prediction(
+                    symbol, symbols_data[symbol], pred_df, pred_len, temperature, top_p, sample_count
+                )
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"执行Kronos批量预测失败: {e}")
+            return {}
+    
+    def _sync_predict_batch(
+        self,
+        df_list: List[pd.DataFrame],
+        x_timestamp_list: List[pd.DatetimeIndex],
+        y_timestamp_list: List[pd.DatetimeIndex],
+        pred_len: int,
+        temperature: float,
+        top_p: float,
+        sample_count: int
+    ) -> Optional[List[pd.DataFrame]]:
+        """同步批量预测方法（在线程池中执行）"""
+        try:
+            return self.predictor.predict_batch(
+                df_list=df_list,
+                x_timestamp_list=x_timestamp_list,
+                y_timestamp_list=y_timestamp_list,
+                pred_len=pred_len,
+                T=temperature,
+                top_p=top_p,
+                sample_count=sample_count,
+                verbose=False
+            )
+        except Exception as e:
+            self.logger.error(f"同步批量预测执行失败: {e}")
+            return None
+    
     async def _run_fallback_prediction(
         self,
         symbol: str,
@@ -899,21 +1060,21 @@ class KronosPredictionService:
             'fallback_mode': self.fallback_mode,
             'enable_kronos': self.enable_kronos,
             'model_config': self.kronos_config,
-            'cache_size': len(self.prediction_cache),
+            'cache_size': len(self.forecast_cache),
+            'forecast_cache': self.forecast_cache.get_stats(),
             'fallback_service_available': self.fallback_service is not None,
+            'model_registry': get_kronos_model_registry().get_stats(),
+            'worker_pool': self.worker_pool.get_stats() if self.worker_pool is not None else None,
             'status': 'kronos' if self.model_loaded else ('fallback' if self.fallback_mode else 'disabled')
         }
     
     def get_cached_prediction(self, symbol: str) -> Optional[KronosPrediction]:
         """获取缓存的预测结果"""
         try:
-            # 查找最新的缓存结果
-            for cache_key, (cached_result, cache_time) in self.prediction_cache.items():
-                if symbol in cache_key:
-                    # 检查缓存是否过期
-                    if (datetime.now() - cache_time).seconds < self.cache_ttl:
-                        self.logger.debug(f"🔍 获取缓存的Kronos预测: {symbol}")
-                        return cached_result
+            cached_result = self.forecast_cache.get_latest(symbol)
+            if cached_result is not None:
+                self.logger.debug(f"🔍 获取缓存的Kronos预测: {symbol}")
+                return cached_result
             
             self.logger.debug(f"🔍 未找到有效缓存: {symbol}")
             return None
@@ -953,9 +1114,12 @@ class KronosPredictionService:
             self.logger.error(f"❌ 重新初始化Kronos失败: {e}")
             return False
     
-    def clear_cache(self):
-        """清空预测缓存"""
-        self.prediction_cache.clear()
+    def clear_cache(self, symbol: Optional[str] = None):
+        """清空预测缓存，指定交易对时只清除该交易对"""
+        self.forecast_cache.clear(symbol)
+        if symbol:
+            self.logger.info(f"🔄 Kronos预测缓存已清除: {symbol}")
+            return
         self.logger.info("🔄 Kronos预测缓存已清空")
         
         # 同时清空回退服务缓存
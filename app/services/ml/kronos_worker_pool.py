@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""
+Kronos推理工作进程池
+Kronos Inference Worker Pool - 在独立进程中运行Kronos推理
+
+每个工作进程固定torch线程数并只加载一次模型；请求通过管道传递numpy窗口，
+支持单请求超时和在途请求上限（背压），推理计算不再与Web进程争抢GIL
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import DEFAULT_SAMPLE_CONVERGENCE_TOL, get_settings
+from app.core.logging import get_logger
+from app.utils.exceptions import PredictionError
+
+logger = get_logger(__name__)
+
+# 全局工作进程池实例
+_kronos_worker_pool = None
+
+# 传给工作进程的特征列（缺失的volume/amount由预测器自行补齐）
+FEATURE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'amount')
+
+
+def encode_window(df: pd.DataFrame, x_timestamp, y_timestamp) -> Dict[str, Any]:
+    """将预测窗口编码为可跨进程传输的numpy结构"""
+    columns = [col for col in FEATURE_COLUMNS if col in df.columns]
+    return {
+        'values': df[columns].to_numpy(dtype=np.float64),
+        'columns': columns,
+        'x_timestamp': pd.DatetimeIndex(x_timestamp).asi8,
+        'y_timestamp': pd.DatetimeIndex(y_timestamp).asi8,
+    }
+
+
+def decode_window(window: Dict[str, Any]) -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
+    """还原预测窗口 (历史数据, 历史时间戳, 未来时间戳)"""
+    df = pd.DataFrame(window['values'], columns=window['columns'])
+    x_timestamp = pd.Series(pd.to_datetime(window['x_timestamp']))
+    y_timestamp = pd.Series(pd.to_datetime(window['y_timestamp']))
+    return df, x_timestamp, y_timestamp
+
+
+def _predict_windows(predictor, payload: Dict[str, Any]) -> List[Optional[Tuple[np.ndarray, List[str]]]]:
+    """在工作进程中执行预测，返回每个窗口的 (预测值, 列名)"""
+    windows = [decode_window(window) for window in payload['windows']]
+    params = payload['params']
+
+    if len(windows) == 1:
+        df, x_timestamp, y_timestamp = windows[0]
+        pred_dfs = [predictor.predict(df=df, x_timestamp=x_timestamp, y_timestamp=y_timestamp, verbose=False, **params)]
+    else:
+        pred_dfs = predictor.predict_batch(
+            df_list=[window[0] for window in windows],
+            x_timestamp_list=[window[1] for window in windows],
+            y_timestamp_list=[window[2] for window in windows],
+            verbose=False,
+            **params
+        )
+
+    return [
+        None if pred_df is None else (pred_df.to_numpy(dtype=np.float64), list(pred_df.columns))
+        for pred_df in pred_dfs
+    ]
+
+
+def _worker_main(conn, options: Dict[str, Any]) -> None:
+    """工作进程入口：固定线程数，加载模型后循环处理请求"""
+    import torch
+
+    torch.set_num_threads(options['torch_threads'])
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    try:
+        from app.services.ml.kronos_model_registry import load_kronos_predictor
+
+        predictor = load_kronos_predictor(
+            device=options['device'],
+            max_context=options['max_context'],
+            use_kv_cache=options['use_kv_cache'],
+            precision=options['precision'],
+            attention_backend=options['attention_backend'],
+            runtime=options['runtime'],
+            export_dir=options['export_dir'],
+            intra_op_threads=options['torch_threads'],
+            sample_memory_mb=options['sample_memory_mb'],
+            quantiles=options['quantiles'],
+            convergence_tol=options['convergence_tol']
+        )['predictor']
+    except Exception as e:
+        conn.send(('startup_error', None, f"{type(e).__name__}: {e}"))
+        return
+
+    conn.send(('ready', None, os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        request_id, payload = message
+        try:
+            conn.send(('result', request_id, _predict_windows(predictor, payload)))
+        except Exception as e:
+            conn.send(('error', request_id, f"{type(e).__name__}: {e}"))
+
+
+class _WorkerHandle:
+    """父进程侧的工作进程句柄"""
+
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.pid: Optional[int] = None
+        self.ready = threading.Event()
+        self.startup_error: Optional[str] = None
+        self.inflight: set = set()
+        self.send_lock = threading.Lock()
+        self.started_at = datetime.now()
+
+    @property
+    def available(self) -> bool:
+        return self.ready.is_set() and self.startup_error is None and self.process.is_alive()
+
+
+class KronosWorkerPool:
+    """
+    Kronos推理工作进程池
+    Out-of-process Kronos inference with pinned torch threads, per-request timeouts and backpressure
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.logger = get_logger(__name__)
+        self.kronos_config = getattr(self.settings, 'kronos_config', {}) or {}
+
+        self.num_workers = max(0, int(self.kronos_config.get('inference_workers', 0)))
+        self.torch_threads = max(1, int(self.kronos_config.get('worker_torch_threads', 1)))
+        self.max_pending = max(1, int(self.kronos_config.get('worker_max_pending', 8)))
+        self.start_timeout = float(self.kronos_config.get('worker_start_timeout', 300))
+
+        self.worker_options = {
+            'device': self.kronos_config.get('device', 'cpu'),
+            'max_context': self.kronos_config.get('max_context', 200),
+            'use_kv_cache': self.kronos_config.get('use_kv_cache', True),
+            'precision': self.kronos_config.get('inference_precision', 'fp32'),
+            'attention_backend': self.kronos_config.get('attention_backend', 'sdpa'),
+            'runtime': self.kronos_config.get('runtime_backend', 'eager'),
+            'export_dir': self.kronos_config.get('export_dir', 'models/kronos_export'),
+            'torch_threads': self.torch_threads,
+            'sample_memory_mb': self.kronos_config.get('sample_memory_mb', 256),
+            'quantiles': tuple(self.kronos_config.get('forecast_quantiles', (0.1, 0.5, 0.9))),
+            'convergence_tol': self.kronos_config.get('sample_convergence_tol', DEFAULT_SAMPLE_CONVERGENCE_TOL),
+        }
+
+        # spawn避免fork继承Web进程的事件循环、线程和torch状态
+        self._mp_context = multiprocessing.get_context('spawn')
+        self._workers: List[_WorkerHandle] = []
+        self._futures: Dict[int, Tuple[asyncio.Future, asyncio.AbstractEventLoop]] = {}
+        # 调用方已超时/取消、但工作进程仍在执行的请求：结果返回时才释放在途名额
+        self._abandoned: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._started = False
+        self._closing = False
+
+        # 统计
+        self.submitted_requests = 0
+        self.completed_requests = 0
+        self.failed_requests = 0
+        self.timed_out_requests = 0
+        self.rejected_requests = 0
+        self.worker_restarts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.num_workers > 0
+
+    @property
+    def started(self) -> bool:
+        return self._started and any(worker.available for worker in self._workers)
+
+    def _spawn_worker(self, index: int) -> _WorkerHandle:
+        """启动一个工作进程及其结果读取线程"""
+        parent_conn, child_conn = self._mp_context.Pipe()
+        process = self._mp_context.Process(
+            target=_worker_main,
+            args=(child_conn, self.worker_options),
+            name=f'kronos-worker-{index}',
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        worker = _WorkerHandle(index, process, parent_conn)
+        threading.Thread(
+            target=self._reader_loop,
+            args=(worker,),
+            name=f'kronos-worker-reader-{index}',
+            daemon=True
+        ).start()
+        return worker
+
+    def _start_workers(self) -> int:
+        """启动全部工作进程并等待模型加载完成（同步）"""
+        self._workers = [self._spawn_worker(index) for index in range(self.num_workers)]
+        for worker in self._workers:
+            worker.ready.wait(timeout=self.start_timeout)
+            if worker.startup_error:
+                self.logger.error(f"❌ Kronos工作进程{worker.index}启动失败: {worker.startup_error}")
+        return sum(1 for worker in self._workers if worker.available)
+
+    async def start(self) -> bool:
+        """
+        启动工作进程池
+        Start the worker processes; returns False when no worker became ready
+        """
+        if self._started:
+            return self.started
+        if not self.enabled:
+            return False
+
+        self.logger.info(
+            f"🚀 启动Kronos推理工作进程: {self.num_workers} 个, 每进程 {self.torch_threads} 线程"
+        )
+        loop = asyncio.get_running_loop()
+        ready_count = await loop.run_in_executor(None, self._start_workers)
+        self._started = True
+
+        if ready_count == 0:
+            self.logger.error("❌ 没有可用的Kronos推理工作进程")
+            return False
+
+        self.logger.info(f"✅ Kronos推理工作进程就绪: {ready_count}/{self.num_workers}")
+        return True
+
+    def _reader_loop(self, worker: _WorkerHandle) -> None:
+        """读取工作进程返回的消息并完成对应的请求"""
+        while True:
+            try:
+                kind, request_id, data = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if kind == 'ready':
+                worker.pid = data
+                worker.ready.set()
+            elif kind == 'startup_error':
+                worker.startup_error = data
+                worker.ready.set()
+                break
+            else:
+                self._resolve(worker, request_id, kind == 'result', data)
+
+        if not worker.ready.is_set():
+            # 加载模型前退出视为启动失败，不自动重启
+            worker.startup_error = f"进程退出 (exitcode={worker.process.exitcode})"
+            worker.ready.set()
+        self._on_worker_exit(worker)
+
+    def _resolve(self, worker: _WorkerHandle, request_id: int, ok: bool, data: Any) -> None:
+        with self._lock:
+            worker.inflight.discard(request_id)
+            pending = self._futures.pop(request_id, None)
+            abandoned_loop = self._abandoned.pop(request_id, None)
+        if abandoned_loop is not None:
+            # 请求已超时，丢弃结果；工作进程此时才真正空出，释放在途名额
+            abandoned_loop.call_soon_threadsafe(self._pending.release)
+            return
+        if pending is None:
+            return
+
+        future, loop = pending
+        loop.call_soon_threadsafe(self._set_future_result, future, ok, data)
+
+    @staticmethod
+    def _set_future_result(future: asyncio.Future, ok: bool, data: Any) -> None:
+        if future.done():
+            return
+        if ok:
+            future.set_result(data)
+        else:
+            future.set_exception(PredictionError(f"Kronos工作进程推理失败: {data}", model_type='kronos'))
+
+    def _on_worker_exit(self, worker: _WorkerHandle) -> None:
+        """工作进程退出：在途请求立即失败，非关闭状态下自动重启"""
+        with self._lock:
+            lost_requests = list(worker.inflight)
+            worker.inflight.clear()
+        for request_id in lost_requests:
+            self._resolve(worker, request_id, False, f"工作进程{worker.index}已退出")
+
+        if self._closing or worker.startup_error or worker not in self._workers:
+            return
+
+        self.logger.warning(f"⚠️ Kronos工作进程{worker.index}意外退出，正在重启")
+        self.worker_restarts += 1
+        replacement = self._spawn_worker(worker.index)
+        self._workers[worker.index] = replacement
+
+    def _abandon(self, request_id: int, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        放弃等待一个请求
+        If a worker is still running it, the backpressure slot stays held until the worker returns or exits;
+        otherwise (never sent, or the result already arrived) the slot is released now
+        """
+        with self._lock:
+            running = self._futures.pop(request_id, None) is not None and any(
+                request_id in worker.inflight for worker in self._workers
+            )
+            if running:
+                self._abandoned[request_id] = loop
+        if not running:
+            self._pending.release()
+
+    async def _pick_worker(self, deadline: Optional[float]) -> _WorkerHandle:
+        """选择在途请求最少的可用工作进程；全部在重启中时等待其就绪"""
+        available = [worker for worker in self._workers if worker.available]
+        starting = [worker for worker in self._workers if not worker.ready.is_set()]
+        if not available and starting:
+            loop = asyncio.get_running_loop()
+            wait = max(deadline - loop.time(), 0) if deadline else self.start_timeout
+            await loop.run_in_executor(None, starting[0].ready.wait, wait)
+            available = [worker for worker in self._workers if worker.available]
+
+        if not available:
+            raise PredictionError("没有可用的Kronos推理工作进程", model_type='kronos')
+        return min(available, key=lambda worker: len(worker.inflight))
+
+    async def predict(
+        self,
+        df_list: List[pd.DataFrame],
+        x_timestamp_list: List[Any],
+        y_timestamp_list: List[Any],
+        pred_len: int,
+        temperature: float,
+        top_p: float,
+        sample_count: int,
+        timeout: Optional[float] = None
+    ) -> List[Optional[pd.DataFrame]]:
+        """
+        在工作进程中预测一个或多个窗口
+        Forecast one or more windows on a worker; the timeout covers queueing and inference
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(self.max_pending)
+
+        # 背压：在途请求达到上限时排队等待，等待时间计入超时
+        try:
+            await asyncio.wait_for(self._pending.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.rejected_requests += 1
+            raise
+
+        request_id = next(self._request_ids)
+        worker = None
+        try:
+            payload = {
+                'windows': [
+                    encode_window(df, x_ts, y_ts)
+                    for df, x_ts, y_ts in zip(df_list, x_timestamp_list, y_timestamp_list)
+                ],
+                'params': {'pred_len': pred_len, 'T': temperature, 'top_p': top_p, 'sample_count': sample_count},
+            }
+
+            worker = await self._pick_worker(deadline)
+            future = loop.create_future()
+            with self._lock:
+                self._futures[request_id] = (future, loop)
+                worker.inflight.add(request_id)
+            with worker.send_lock:
+                worker.conn.send((request_id, payload))
+            self.submitted_requests += 1
+
+            remaining = max(deadline - loop.time(), 0) if deadline else None
+            results = await asyncio.wait_for(future, timeout=remaining)
+            self.completed_requests += 1
+
+        except asyncio.TimeoutError:
+            self.timed_out_requests += 1
+            self._abandon(request_id, loop)
+            raise
+        except asyncio.CancelledError:
+            self._abandon(request_id, loop)
+            raise
+        except Exception:
+            self.failed_requests += 1
+            with self._lock:
+                self._futures.pop(request_id, None)
+                if worker is not None:
+                    worker.inflight.discard(request_id)
+            self._pending.release()
+            raise
+        else:
+            self._pending.release()
+
+        return [
+            None if result is None else pd.DataFrame(result[0], columns=result[1], index=pd.DatetimeIndex(y_ts))
+            for result, y_ts in zip(results, y_timestamp_list)
+        ]
+
+    async def shutdown(self, timeout: float = 10.0) -> None:
+        """关闭全部工作进程"""
+        if not self._workers:
+            return
+
+        self._closing = True
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except Exception:
+                pass
+
+        loop = asyncio.get_running_loop()
+        for worker in self._workers:
+            await loop.run_in_executor(None, worker.process.join, timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+        self._workers = []
+        self._started = False
+        self.logger.info("✅ Kronos推理工作进程已关闭")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取工作进程池状态"""
+        return {
+            'enabled': self.enabled,
+            'num_workers': self.num_workers,
+            'torch_threads': self.torch_threads,
+            'max_pending': self.max_pending,
+            'pending_requests': len(self._futures),
+            'abandoned_requests': len(self._abandoned),
+            'submitted_requests': self.submitted_requests,
+            'completed_requests': self.completed_requests,
+            'failed_requests': self.failed_requests,
+            'timed_out_requests': self.timed_out_requests,
+            'rejected_requests': self.rejected_requests,
+            'worker_restarts': self.worker_restarts,
+            'workers': [
+                {
+                    'index': worker.index,
+                    'pid': worker.pid,
+                    'alive': worker.process.is_alive(),
+                    'ready': worker.available,
+                    'inflight': len(worker.inflight),
+                    'started_at': worker.started_at.isoformat(),
+                    'startup_error': worker.startup_error
+                }
+                for worker in self._workers
+            ]
+        }
+
+
+def get_kronos_worker_pool() -> KronosWorkerPool:
+    """
+    获取Kronos推理工作进程池实例
+    Get the Kronos inference worker pool
+    """
+    global _kronos_worker_pool
+
+    if _kronos_worker_pool is None:
+        _kronos_worker_pool = KronosWorkerPool()
+
+    return _kronos_worker_pool
+
+
+async def shutdown_kronos_worker_pool() -> None:
+    """关闭Kronos推理工作进程池（如已启动）"""
+    if _kronos_worker_pool is not None:
+        await _kronos_worker_pool.shutdown()
@@ -21,10 +21,12 @@ import joblib
 
 from app.core.logging import get_logger, trading_logger
 from app.core.config import get_settings
-from app.services.binance_service import BinanceService
+from app.services.exchanges.binance.binance_service import BinanceService
 from app.services.exchanges.okx.okx_service import OKXService
 from app.services.analysis.trend_analysis_service import TrendAnalysisService
+from app.services.analysis.market_snapshot import MarketSnapshot
 from app.utils.exceptions import MLModelError, DataNotFoundError
+from app.utils.indicator_kernels import breakout_trend, parameter_grid
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -114,13 +116,15 @@ class MLEnhancedService:
             raise MLModelError(f"Model initialization failed: {e}")
     
     async def predict_signal(self, symbol: str, 
-                           historical_data: Optional[pd.DataFrame] = None) -> MLPrediction:
+                           historical_data: Optional[pd.DataFrame] = None,
+                           snapshot: Optional[MarketSnapshot] = None) -> MLPrediction:
         """
         使用ML模型预测交易信号
         
         Args:
             symbol: 交易对
             historical_data: 历史数据，如果为None则自动获取
+            snapshot: 综合分析传入的市场快照，包含足够的1H K线时不再单独请求
             
         Returns:
             ML预测结果
@@ -128,7 +132,7 @@ class MLEnhancedService:
         try:
             # 获取或使用历史数据
             if historical_data is None:
-                historical_data = await self._get_historical_data(symbol)
+                historical_data = await self._get_historical_data(symbol, snapshot=snapshot)
             
             # 特征工程
             features = await self.feature_engineer.extract_features(historical_data)
@@ -356,16 +360,27 @@ class MLEnhancedService:
             logger.error(f"Model training failed for {symbol}: {e}")
             raise MLModelError(f"Model training failed: {e}")
     
-    async def _get_historical_data(self, symbol: str, days: int = 30) -> pd.DataFrame:
+    def historical_limit(self, days: int = 30) -> int:
+        """历史数据需要的1H K线根数"""
+        # 币安由分页回填引擎拉取完整窗口；OKX单次请求仍受接口上限约束
+        limit = 24 * days
+        if self.exchange == 'okx':
+            limit = min(limit, 1000)
+        return limit
+    
+    async def _get_historical_data(self, symbol: str, days: int = 30,
+                                   snapshot: Optional[MarketSnapshot] = None) -> pd.DataFrame:
         """获取历史数据"""
         try:
-            # 计算limit，币安API最大限制为1000
-            limit = min(24 * days, 1000)
+            limit = self.historical_limit(days)
             
             # 获取K线数据
-            klines = await self.exchange_service.get_kline_data(
-                symbol, '1H', limit=limit
-            )
+            if snapshot is not None and snapshot.has('1H', limit):
+                klines = snapshot.klines('1H', limit)
+            else:
+                klines = await self.exchange_service.get_kline_data(
+                    symbol, '1H', limit=limit
+                )
             
             if not klines:
                 raise DataNotFoundError(f"No historical data for {symbol}")
@@ -762,55 +777,65 @@ class AdaptiveOptimizer:
         periods = [7, 10, 14, 21]
         multipliers = [2.0, 2.5, 3.0, 3.5, 4.0]
         
-        for period in periods:
-            for multiplier in multipliers:
-                try:
-                    # 计算SuperTrend
-                    score = self._evaluate_supertrend_performance(data, period, multiplier)
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_params = {'period': period, 'multiplier': multiplier}
-                        
-                except Exception as e:
-                    continue
+        # 整个参数网格在一次内核调用中评估（period外层、multiplier内层，与原逐组顺序一致）
+        scores = self._evaluate_supertrend_grid(data, periods, multipliers)
+        for (period, multiplier), score in zip(
+            ((period, multiplier) for period in periods for multiplier in multipliers), scores
+        ):
+            if score > best_score:
+                best_score = score
+                best_params = {'period': period, 'multiplier': multiplier}
         
         best_params['performance_score'] = best_score
         return best_params
     
     def _evaluate_supertrend_performance(self, data: pd.DataFrame, period: int, multiplier: float) -> float:
         """评估SuperTrend性能"""
+        return self._evaluate_supertrend_grid(data, [period], [multiplier])[0]
+    
+    def _evaluate_supertrend_grid(self, data: pd.DataFrame, periods: List[int],
+                                  multipliers: List[float]) -> List[float]:
+        """
+        评估一组 (period, multiplier) 的SuperTrend性能
+        Each pair is one row of the breakout-trend kernel; scores are returned in period-major order
+        """
+        size = len(periods) * len(multipliers)
         try:
             # 简化的SuperTrend计算
-            hl2 = (data['high_price'] + data['low_price']) / 2
-            atr = self._calculate_atr(data, period)
-            
-            upper_band = hl2 + (multiplier * atr)
-            lower_band = hl2 - (multiplier * atr)
-            
-            # 简化的趋势判断
-            trend = pd.Series(index=data.index, dtype=float)
-            for i in range(1, len(data)):
-                if data['close_price'].iloc[i] > upper_band.iloc[i-1]:
-                    trend.iloc[i] = 1  # 上涨
-                elif data['close_price'].iloc[i] < lower_band.iloc[i-1]:
-                    trend.iloc[i] = -1  # 下跌
-                else:
-                    trend.iloc[i] = trend.iloc[i-1] if i > 0 else 0
+            hl2 = ((data['high_price'] + data['low_price']) / 2).to_numpy(dtype=float)
+            close = data['close_price']
+            period_grid, multiplier_grid = parameter_grid(periods, multipliers)
+            atr_by_period = {
+                period: self._calculate_atr(data, period).to_numpy(dtype=float) for period in periods
+            }
+            atr = np.vstack([atr_by_period[int(period)] for period in period_grid])
             
-            # 计算收益率
-            returns = data['close_price'].pct_change()
-            strategy_returns = trend.shift(1) * returns
+            upper_band = hl2 + (multiplier_grid[:, None] * atr)
+            lower_band = hl2 - (multiplier_grid[:, None] * atr)
             
-            # 计算夏普比率作为性能指标
-            if strategy_returns.std() > 0:
-                sharpe_ratio = strategy_returns.mean() / strategy_returns.std() * np.sqrt(24)  # 小时数据
-                return max(0, sharpe_ratio)
-            else:
-                return 0
-                
+            # 简化的趋势判断：突破上一根上轨为1，跌破上一根下轨为-1，否则沿用
+            trends = breakout_trend(close.to_numpy(dtype=float), upper_band, lower_band)
+            
+            # 计算收益率
+            returns = close.pct_change()
         except Exception:
-            return 0
+            return [0] * size
+        
+        scores = []
+        for trend_values in trends:
+            try:
+                trend = pd.Series(trend_values, index=data.index)
+                strategy_returns = trend.shift(1) * returns
+                
+                # 计算夏普比率作为性能指标
+                if strategy_returns.std() > 0:
+                    sharpe_ratio = strategy_returns.mean() / strategy_returns.std() * np.sqrt(24)  # 小时数据
+                    scores.append(max(0, sharpe_ratio))
+                else:
+                    scores.append(0)
+            except Exception:
+                scores.append(0)
+        return scores
     
     def _calculate_atr(self, data: pd.DataFrame, period: int) -> pd.Series:
         """计算ATR"""
@@ -8,6 +8,7 @@ Negative Funding Rate Monitor Service - Hourly monitoring for interest earning o
 import asyncio
 import sys
 import os
+import time
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 import json
@@ -18,6 +19,7 @@ import numpy as np
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from app.services.exchanges.base.funding_rate_snapshot import FundingRateSnapshot
 from app.services.exchanges.factory import get_default_exchange
 from app.services.notification.core_notification_service import get_core_notification_service
 from app.core.logging import get_logger
@@ -110,8 +112,16 @@ class NegativeFundingMonitorService:
         self.funding_rate_history = {}  # {symbol: [(timestamp, rate), ...]}
         self.max_history_hours = 24  # 保留24小时历史数据
         
-        # 费率间隔缓存
-        self.funding_intervals_cache = {}  # 缓存费率间隔信息
+        # 资金费率快照表（WebSocket快照不可用时由REST全量刷新）
+        self.funding_snapshot = FundingRateSnapshot()
+        self.snapshot_max_age = 120  # 快照超过该秒数未更新视为过期
+        self._all_funding_subscribed = False
+        self._funding_subscribe_lock = asyncio.Lock()
+        
+        # 费率间隔缓存 {symbol: (间隔小时, 获取时间)}，过期后懒加载刷新
+        self.funding_intervals_cache: Dict[str, Tuple[int, float]] = {}
+        self.funding_interval_ttl = 6 * 3600
+        self._interval_semaphore = asyncio.Semaphore(5)
     
     async def _ensure_exchange_service(self):
         """确保交易所服务已初始化"""
@@ -163,122 +173,60 @@ class NegativeFundingMonitorService:
         if self.notification_service is None:
             self.notification_service = await get_core_notification_service()
     
-    async def get_all_funding_rates_optimized(self) -> List[Dict[str, Any]]:
-        """优化版：智能选择WebSocket或HTTP获取费率数据"""
-        try:
-            logger.debug("📡 正在获取所有SWAP交易对费率数据...")
-            
-            # 确保交易所服务已初始化
-            await self._ensure_exchange_service()
-            
-            # 1. 优先尝试从WebSocket实时数据获取主要交易对费率
-            realtime_funding_rates = []
-            if hasattr(self.exchange_service, 'realtime_manager') and self.exchange_service.realtime_manager:
-                try:
-                    # 获取WebSocket中已订阅的交易对费率
-                    for symbol in getattr(self.exchange_service, 'major_symbols', []):
+    async def _get_funding_snapshot(self) -> Tuple[FundingRateSnapshot, str]:
+        """
+        获取可用的资金费率快照表
+        Prefer the realtime manager's table fed by !markPrice@arr; refresh the local table over REST when it is stale
+        """
+        await self._ensure_exchange_service()
+        
+        realtime_manager = getattr(self.exchange_service, 'realtime_manager', None)
+        realtime_snapshot = getattr(realtime_manager, 'funding_snapshot', None)
+        if realtime_snapshot is not None:
+            # 确保已订阅全市场标记价格推送，订阅成功后才标记，失败则下次调用重试
+            if not self._all_funding_subscribed and hasattr(realtime_manager, 'subscribe_all_funding_rates'):
+                async with self._funding_subscribe_lock:
+                    if not self._all_funding_subscribed:
                         try:
-                            funding_data = self.exchange_service.realtime_manager.get_funding_rate(symbol)
-                            if funding_data:
-                                realtime_funding_rates.append({
-                                    'symbol': symbol,
-                                    'funding_rate': funding_data.funding_rate,
-                                    'next_funding_time': funding_data.next_funding_time,
-                                    'source': 'websocket'
-                                })
+                            self._all_funding_subscribed = bool(await realtime_manager.subscribe_all_funding_rates())
                         except Exception as e:
-                            logger.debug(f"获取{symbol}WebSocket费率失败: {e}")
-                            continue
-                    
-                    if realtime_funding_rates:
-                        logger.debug(f"🔌 WebSocket获取到 {len(realtime_funding_rates)} 个主要交易对费率")
-                except Exception as e:
-                    logger.warning(f"⚠️ WebSocket获取费率失败: {e}")
+                            logger.warning(f"⚠️ 订阅全市场资金费率失败: {e}")
             
-            # 2. 使用HTTP API获取完整的费率数据（包含所有交易对）
-            try:
-                # 获取所有USDT永续合约列表
-                instruments = await self.exchange_service.get_all_instruments('SWAP')
-                
-                if not instruments:
-                    logger.warning("未获取到SWAP交易对列表")
-                    return realtime_funding_rates  # 返回WebSocket数据
-                
-                # 过滤出活跃的USDT永续合约
-                usdt_symbols = [
-                    inst['instId'] for inst in instruments 
-                    if inst.get('state') == 'live' and 'USDT-SWAP' in inst['instId']
-                ]
-                
-                if not usdt_symbols:
-                    logger.warning("未获取到USDT永续合约列表")
-                    return realtime_funding_rates
-                
-                logger.debug(f"📋 发现 {len(usdt_symbols)} 个USDT永续合约")
-                
-                # 批量获取费率数据
-                http_funding_rates = await self.exchange_service.get_funding_rate()
-                
-                # 检查HTTP返回数据有效性
-                if not http_funding_rates:
-                    logger.warning("⚠️ HTTP API未返回费率数据")
-                    http_funding_rates = []
-                elif not isinstance(http_funding_rates, list):
-                    logger.warning(f"⚠️ HTTP API返回数据格式错误: {type(http_funding_rates)}")
-                    http_funding_rates = []
-                
-                # 3. 合并WebSocket和HTTP数据，WebSocket数据优先
-                merged_rates = {}
-                
-                # 先添加HTTP数据
-                for rate in http_funding_rates:
-                    if rate and 'symbol' in rate:  # 确保数据有效
-                        rate['source'] = 'rest_api'
-                        merged_rates[rate['symbol']] = rate
-                
-                # WebSocket数据覆盖HTTP数据（更实时）
-                for rate in realtime_funding_rates:
-                    if rate and 'symbol' in rate:  # 确保数据有效
-                        merged_rates[rate['symbol']] = rate
-                
-                final_rates = list(merged_rates.values())
-                
-                ws_count = len(realtime_funding_rates)
-                http_count = len(http_funding_rates)
-                logger.info(f"✅ 费率数据获取完成: WebSocket({ws_count}) + HTTP({http_count}) = {len(final_rates)} 个")
-                
-                # 添加调试信息 - 检查数据格式
-                if final_rates:
-                    sample_rate = final_rates[0]
-                    logger.debug(f"🔍 样本费率数据结构: {list(sample_rate.keys()) if isinstance(sample_rate, dict) else type(sample_rate)}")
-                    
-                    # 验证必需字段
-                    required_fields = ['symbol', 'funding_rate']
-                    missing_fields = []
-                    if isinstance(sample_rate, dict):
-                        for field in required_fields:
-                            if field not in sample_rate:
-                                missing_fields.append(field)
-                    
-                    if missing_fields:
-                        logger.warning(f"⚠️ 费率数据缺少必需字段: {missing_fields}")
-                        logger.debug(f"🔍 实际字段: {list(sample_rate.keys())}")
-                else:
-                    logger.warning("⚠️ 最终费率数据为空")
-                
-                return final_rates
-                
-            except Exception as e:
-                logger.error(f"HTTP获取费率失败: {e}")
-                # 如果HTTP失败，返回WebSocket数据
-                if realtime_funding_rates:
-                    logger.info(f"⚠️ 回退到WebSocket数据: {len(realtime_funding_rates)} 个")
-                    return realtime_funding_rates
-                return []
-
+            if len(realtime_snapshot) and realtime_snapshot.age() <= self.snapshot_max_age:
+                logger.debug(f"🔌 使用WebSocket资金费率快照: {len(realtime_snapshot)} 个交易对")
+                return realtime_snapshot, 'websocket'
+        
+        if self.funding_snapshot.age() > self.snapshot_max_age:
+            await self._refresh_funding_snapshot_from_rest()
+        return self.funding_snapshot, 'rest_api'
+    
+    async def _refresh_funding_snapshot_from_rest(self) -> None:
+        """通过REST全量刷新本地快照表（WebSocket快照不可用时）"""
+        try:
+            http_funding_rates = await self.exchange_service.get_funding_rate()
+        except Exception as e:
+            logger.error(f"HTTP获取费率失败: {e}")
+            return
+        
+        if not isinstance(http_funding_rates, list) or not http_funding_rates:
+            logger.warning(f"⚠️ HTTP API未返回有效费率数据: {type(http_funding_rates)}")
+            return
+        
+        count = self.funding_snapshot.update_many(rate for rate in http_funding_rates if rate)
+        logger.info(f"✅ HTTP刷新资金费率快照: {count} 个交易对")
+    
+    async def get_all_funding_rates_optimized(self) -> List[Dict[str, Any]]:
+        """获取所有永续合约的最新费率（来自资金费率快照表）"""
+        try:
+            snapshot, source = await self._get_funding_snapshot()
+            rates = snapshot.select(max_age=self.snapshot_max_age)
+            for rate in rates:
+                rate['source'] = source
+            logger.debug(f"✅ 费率数据获取完成: {len(rates)} 个 ({source})")
+            return rates
         except Exception as e:
             logger.error(f"批量获取费率失败: {e}")
-            return []  
+            return []
     
     async def get_symbol_basic_info(self, symbol: str) -> Dict[str, Any]:
         """获取币种基础信息（价格和交易量）- 智能选择WebSocket或HTTP"""
@@ -583,9 +531,10 @@ class NegativeFundingMonitorService:
     
     async def get_funding_interval(self, symbol: str) -> int:
         """获取币种的费率间隔（小时）"""
-        # 检查缓存
-        if symbol in self.funding_intervals_cache:
-            return self.funding_intervals_cache[symbol]
+        # 检查缓存（过期后重新查询）
+        cached = self.funding_intervals_cache.get(symbol)
+        if cached and time.time() - cached[1] <= self.funding_interval_ttl:
+            return cached[0]
         
         try:
             # 确保交易所服务已初始化
@@ -616,7 +565,7 @@ class NegativeFundingMonitorService:
                 else:
                     interval = 8  # 默认值
                 
-                self.funding_intervals_cache[symbol] = interval
+                self.funding_intervals_cache[symbol] = (interval, time.time())
                 return interval
             else:
                 # 如果无法获取历史，使用默认值
@@ -627,15 +576,40 @@ class NegativeFundingMonitorService:
                 elif 'BTC' in symbol or 'ETH' in symbol:
                     default_interval = 8  # 主流币8小时
                 
-                self.funding_intervals_cache[symbol] = default_interval
+                self.funding_intervals_cache[symbol] = (default_interval, time.time())
                 return default_interval
                     
         except Exception as e:
             logger.warning(f"获取{symbol}费率间隔失败: {e}")
-            # 默认8小时
-            self.funding_intervals_cache[symbol] = 8
+            # 默认8小时（缓存后过期再重试）
+            self.funding_intervals_cache[symbol] = (8, time.time())
             return 8
 
+    async def _resolve_funding_intervals(self, funding_rates: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        批量确定候选币种的费率间隔
+        Snapshot-inferred intervals first, then the TTL cache; the rest are fetched concurrently
+        """
+        intervals = {}
+        missing = []
+        for rate_data in funding_rates:
+            symbol = rate_data['symbol']
+            interval = rate_data.get('funding_interval_hours')
+            if interval:
+                intervals[symbol] = int(interval)
+                self.funding_intervals_cache[symbol] = (int(interval), time.time())
+            else:
+                missing.append(symbol)
+        
+        async def fetch(symbol: str) -> int:
+            async with self._interval_semaphore:
+                return await self.get_funding_interval(symbol)
+        
+        if missing:
+            results = await asyncio.gather(*(fetch(symbol) for symbol in missing))
+            intervals.update(zip(missing, results))
+        return intervals
+    
     async def analyze_negative_funding_opportunities(self, funding_rates: List[Dict[str, Any]], 
                                                    basic_info: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
         """分析负费率机会 - 优化版本，更精准的机会识别"""
@@ -644,6 +618,11 @@ class NegativeFundingMonitorService:
         # 获取负费率阈值配置
         negative_threshold = settings.strategy_config['funding_rate']['negative_threshold']
         
+        # 负费率候选的费率间隔（快照推断/缓存命中的无需请求，其余并发懒加载）
+        funding_intervals = await self._resolve_funding_intervals(
+            [rate_data for rate_data in funding_rates if rate_data['funding_rate'] < 0]
+        )
+        
         for rate_data in funding_rates:
             symbol = rate_data['symbol']
             funding_rate = rate_data['funding_rate']
@@ -669,7 +648,7 @@ class NegativeFundingMonitorService:
             info = basic_info.get(symbol, {})
             
             # 获取实际的费率间隔
-            funding_interval_hours = await self.get_funding_interval(symbol)
+            funding_interval_hours = funding_intervals.get(symbol) or await self.get_funding_interval(symbol)
             funding_times_per_day = 24 // funding_interval_hours
             
             # 计算收益（使用实际的费率间隔）
@@ -1056,18 +1035,22 @@ class NegativeFundingMonitorService:
             logger.info("🔍 开始负费率监控周期...")
             start_time = datetime.now()
             
-            # 1. 直接获取所有USDT永续合约的费率数据（一次性请求，避免频繁调用）
-            all_funding_rates = await self.get_all_funding_rates_optimized()
+            # 1. 获取资金费率快照表（WebSocket推送增量维护，过期时REST全量刷新）
+            snapshot, snapshot_source = await self._get_funding_snapshot()
+            max_age = self.snapshot_max_age
+            total_symbols = snapshot.count(max_age=max_age)
             
-            if not all_funding_rates:
+            if not total_symbols:
                 return {'success': False, 'error': '未获取到费率数据'}
             
             # 2. 筛选出负费率币种进行详细分析 - 严格按照-0.05%阈值筛选
             primary_threshold = -0.0005  # -0.05% 主要阈值（严格执行）
             secondary_threshold = -0.0001  # -0.01% 次要阈值（用于统计）
             
-            # 只分析负费率低于-0.05%的币种，不再降低标准
-            primary_negative_rates = [r for r in all_funding_rates if r['funding_rate'] <= primary_threshold]
+            # 只分析负费率低于-0.05%的币种，不再降低标准（在快照表上向量化筛选）
+            primary_negative_rates = snapshot.select(max_rate=primary_threshold, max_age=max_age)
+            for rate in primary_negative_rates:
+                rate['source'] = snapshot_source
             negative_funding_rates = primary_negative_rates
             used_threshold = primary_threshold
             
@@ -1077,7 +1060,7 @@ class NegativeFundingMonitorService:
             else:
                 logger.info(f"📊 发现 {len(primary_negative_rates)} 个符合-0.05%阈值的负费率币种")
             
-            total_negative_count = len([r for r in all_funding_rates if r['funding_rate'] < 0])
+            total_negative_count = snapshot.count(0.0, max_age=max_age, inclusive=False)
             logger.info(f"📊 发现 {total_negative_count} 个负费率币种，其中 {len(negative_funding_rates)} 个低于{used_threshold*100:.2f}%，开始详细分析...")
             
             funding_rates = negative_funding_rates  # 直接使用负费率数据
@@ -1152,7 +1135,7 @@ class NegativeFundingMonitorService:
             
             result = {
                 'success': True,
-                'total_symbols_checked': len(all_funding_rates),
+                'total_symbols_checked': total_symbols,
                 'funding_rates_obtained': len(funding_rates),
                 'negative_funding_count': len(opportunities),
                 'opportunities': opportunities,
@@ -1164,7 +1147,8 @@ class NegativeFundingMonitorService:
                 'total_negative_count': total_negative_count,
                 'debug_info': {
                     'primary_threshold_count': len(primary_negative_rates),
-                    'secondary_threshold_count': len([r for r in all_funding_rates if r['funding_rate'] <= secondary_threshold]),
+                    'secondary_threshold_count': snapshot.count(secondary_threshold, max_age=max_age),
+                    'funding_snapshot_source': snapshot_source,
                     'websocket_enabled': self.exchange_service.is_websocket_enabled if self.exchange_service else False,
                     'subscribed_symbols_count': len(self.subscribed_symbols)
                 }
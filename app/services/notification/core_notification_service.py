@@ -17,6 +17,7 @@ from app.core.config import get_settings
 from app.core.logging import get_logger
 from app.utils.exceptions import TradingToolError
 from app.utils.feishu_table_card import FeishuTableCardBuilder
+from app.utils.http_manager import http_manager
 
 logger = get_logger(__name__)
 
@@ -91,8 +92,8 @@ class CoreNotificationService:
         self.wechat_webhook_url = getattr(self.settings, 'wechat_webhook_url', None)
         self.enable_notifications = getattr(self.settings, 'enable_notifications', True)
         
-        # HTTP 会话
-        self.session: Optional[aiohttp.ClientSession] = None
+        # HTTP 请求复用全局连接池（webhook主机的keep-alive连接）
+        self.request_timeout = aiohttp.ClientTimeout(total=30)
     
     async def initialize(self) -> None:
         """初始化服务"""
@@ -100,9 +101,8 @@ class CoreNotificationService:
             return
         
         try:
-            # 创建 HTTP 会话
-            timeout = aiohttp.ClientTimeout(total=30)
-            self.session = aiohttp.ClientSession(timeout=timeout)
+            # 预热共享HTTP连接池
+            await http_manager.get_client_session()
             
             self.initialized = True
             self.logger.info("✅ 核心通知服务初始化完成")
@@ -113,8 +113,7 @@ class CoreNotificationService:
     
     async def cleanup(self) -> None:
         """清理资源"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        # 共享连接池由http_manager统一关闭
         self.initialized = False
         self.logger.info("🧹 核心通知服务资源已清理")
     
@@ -238,10 +237,12 @@ class CoreNotificationService:
     async def _try_send_feishu_message(self, payload: Dict[str, Any]) -> bool:
         """尝试发送飞书消息的具体实现"""
         try:
-            async with self.session.post(
+            session = await http_manager.get_client_session()
+            async with session.post(
                 self.feishu_webhook_url,
                 json=payload,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=self.request_timeout
             ) as response:
                 if response.status == 200:
                     result = await response.json()
@@ -272,10 +273,12 @@ class CoreNotificationService:
                 }
             }
             
-            async with self.session.post(
+            session = await http_manager.get_client_session()
+            async with session.post(
                 self.wechat_webhook_url,
                 json=payload,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=self.request_timeout
             ) as response:
                 if response.status == 200:
                     result = await response.json()
@@ -789,7 +792,7 @@ class CoreNotificationService:
                 "feishu": bool(self.feishu_webhook_url),
                 "wechat": bool(self.wechat_webhook_url)
             },
-            "session_active": self.session is not None and not self.session.closed if self.session else False
+            "session_active": http_manager.session is not None and not http_manager.session.closed
         }
 
 # 全局服务实例
@@ -58,6 +58,7 @@ from app.services.analysis.enhanced_volume_price_analysis_service import (
     get_enhanced_volume_price_analysis_service,
     EnhancedVolumePriceAnalysisService
 )
+from app.services.analysis.market_snapshot import MarketSnapshot, build_market_snapshot
 from app.services.core.dynamic_weight_service import (
     get_dynamic_weight_service
 )
@@ -874,94 +875,127 @@ class CoreTradingService:
             self.logger.error(f"❌ ML 分析 {symbol} 失败: {e}")
             return None
 
+    async def _build_market_snapshot(self, symbol: str) -> Optional[MarketSnapshot]:
+        """一次性拉取子分析器共用的多周期K线、ticker、资金费率和持仓量"""
+        if not self.exchange_service:
+            return None
+        
+        # 技术/量价分析使用1h×200，增强Kronos使用1H×50，ML使用1H历史窗口（同一周期只请求最大根数）
+        timeframes = {'1h': 200}
+        if self.ml_service and hasattr(self.ml_service, 'historical_limit'):
+            timeframes['1H'] = self.ml_service.historical_limit()
+        
+        try:
+            return await build_market_snapshot(self.exchange_service, symbol, timeframes)
+        except Exception as e:
+            self.logger.warning(f"⚠️ 构建 {symbol} 市场快照失败，子分析器将各自获取数据: {e}")
+            return None
+
     async def _analyze_integrated(self, symbol: str, trading_mode: Optional[TradingMode] = None) -> Optional[TradingSignal]:
         """增强版综合分析 - 融合多种分析方法和详细技术指标"""
         results = {}
         confidence_scores = {}
         detailed_analysis = {}
         
-        # 1. 增强版 Kronos AI 分析 (结合量价分析)
-        if self.enhanced_kronos_service:
-            kronos_result = await self._safe_analyze_enhanced_kronos(symbol, trading_mode)
-            if kronos_result:
-                results['kronos'] = kronos_result
-                # EnhancedKronosDecision 是数据类，使用属性访问而不是 get 方法
-                confidence_scores['kronos'] = getattr(kronos_result, 'enhanced_confidence', 0.5)
-                detailed_analysis['kronos'] = kronos_result
-        elif self.kronos_service:
-            # 回退到原始 Kronos 服务
-            kronos_result = await self._safe_analyze_kronos(symbol, trading_mode)
-            if kronos_result:
-                results['kronos'] = kronos_result
-                confidence_scores['kronos'] = kronos_result.kronos_confidence
-                detailed_analysis['kronos'] = kronos_result
+        # 0. 市场快照：K线等数据只拉取一次，各子分析器共用
+        snapshot = await self._build_market_snapshot(symbol)
         
-        # 2. 增强版技术分析 (包含更多指标)
-        if self.enhanced_technical_service:
-            enhanced_tech_result = await self._safe_analyze_enhanced_technical(symbol)
-            if enhanced_tech_result:
-                results['technical'] = enhanced_tech_result
-                confidence_scores['technical'] = enhanced_tech_result.confidence
-                detailed_analysis['technical'] = enhanced_tech_result
-        elif self.trend_service:
-            # 回退到原始技术分析服务
-            tech_result = await self._safe_analyze_technical(symbol)
-            if tech_result:
-                results['technical'] = tech_result
-                if hasattr(tech_result, 'final_confidence'):
-                    confidence_scores['technical'] = tech_result.final_confidence
-                elif isinstance(tech_result, dict):
-                    confidence_scores['technical'] = tech_result.get('confidence', 0.5)
-                else:
-                    confidence_scores['technical'] = 0.5
-                detailed_analysis['technical'] = tech_result
+        async def analyze_kronos():
+            # 1. 增强版 Kronos AI 分析 (结合量价分析)
+            if self.enhanced_kronos_service:
+                kronos_result = await self._safe_analyze_enhanced_kronos(symbol, trading_mode, snapshot)
+                if kronos_result:
+                    # EnhancedKronosDecision 是数据类，使用属性访问而不是 get 方法
+                    return kronos_result, getattr(kronos_result, 'enhanced_confidence', 0.5)
+            elif self.kronos_service:
+                # 回退到原始 Kronos 服务
+                kronos_result = await self._safe_analyze_kronos(symbol, trading_mode)
+                if kronos_result:
+                    return kronos_result, kronos_result.kronos_confidence
+            return None
         
-        # 3. 量价关系分析
-        if hasattr(self, 'enhanced_volume_price_service') and self.enhanced_volume_price_service:
-            volume_result = await self._safe_analyze_volume_price(symbol)
-            if volume_result:
-                results['volume_price'] = volume_result
-                confidence_scores['volume_price'] = getattr(volume_result, 'confidence', 0.5)
-                detailed_analysis['volume_price'] = volume_result
+        async def analyze_technical():
+            # 2. 增强版技术分析 (包含更多指标)
+            if self.enhanced_technical_service:
+                enhanced_tech_result = await self._safe_analyze_enhanced_technical(symbol, snapshot)
+                if enhanced_tech_result:
+                    return enhanced_tech_result, enhanced_tech_result.confidence
+            elif self.trend_service:
+                # 回退到原始技术分析服务
+                tech_result = await self._safe_analyze_technical(symbol)
+                if tech_result:
+                    if hasattr(tech_result, 'final_confidence'):
+                        return tech_result, tech_result.final_confidence
+                    elif isinstance(tech_result, dict):
+                        return tech_result, tech_result.get('confidence', 0.5)
+                    return tech_result, 0.5
+            return None
         
-        # 4. ML 分析
-        if self.ml_service:
-            ml_result = await self._safe_analyze_ml(symbol)
-            if ml_result:
-                results['ml'] = ml_result
-                confidence_scores['ml'] = getattr(ml_result, 'confidence', 0.5)
-                detailed_analysis['ml'] = ml_result
+        async def analyze_volume_price():
+            # 3. 量价关系分析
+            if hasattr(self, 'enhanced_volume_price_service') and self.enhanced_volume_price_service:
+                volume_result = await self._safe_analyze_volume_price(symbol, snapshot)
+                if volume_result:
+                    return volume_result, getattr(volume_result, 'confidence', 0.5)
+            return None
+        
+        async def analyze_ml():
+            # 4. ML 分析
+            if self.ml_service:
+                ml_result = await self._safe_analyze_ml(symbol, snapshot)
+                if ml_result:
+                    return ml_result, getattr(ml_result, 'confidence', 0.5)
+            return None
+        
+        # 各子分析相互独立，基于同一快照并发执行
+        analyses = {
+            'kronos': analyze_kronos(),
+            'technical': analyze_technical(),
+            'volume_price': analyze_volume_price(),
+            'ml': analyze_ml()
+        }
+        outcomes = await asyncio.gather(*analyses.values(), return_exceptions=True)
+        for name, outcome in zip(analyses, outcomes):
+            if isinstance(outcome, Exception):
+                self.logger.warning(f"⚠️ {symbol} {name} 分析异常: {outcome}")
+                continue
+            if outcome:
+                results[name], confidence_scores[name] = outcome
+                detailed_analysis[name] = outcome[0]
         
         # 5. 决策融合 (增强版)
         if not results:
             self.logger.warning(f"⚠️ {symbol} 没有可用的分析结果")
             return None
         
-        return await self._fuse_enhanced_decisions(symbol, results, confidence_scores, detailed_analysis)
+        return await self._fuse_enhanced_decisions(symbol, results, confidence_scores, detailed_analysis, snapshot)
 
-    async def _safe_analyze_enhanced_kronos(self, symbol: str, trading_mode: Optional[TradingMode] = None):
+    async def _safe_analyze_enhanced_kronos(self, symbol: str, trading_mode: Optional[TradingMode] = None,
+                                            snapshot: Optional[MarketSnapshot] = None):
         """安全的增强版 Kronos 分析"""
         try:
             if self.enhanced_kronos_service:
-                return await self.enhanced_kronos_service.analyze_with_volume_confirmation(symbol, trading_mode)
+                return await self.enhanced_kronos_service.analyze_with_volume_confirmation(
+                    symbol, trading_mode, snapshot=snapshot
+                )
         except Exception as e:
             self.logger.warning(f"⚠️ 增强版 Kronos 分析 {symbol} 失败: {e}")
         return None
 
-    async def _safe_analyze_enhanced_technical(self, symbol: str):
+    async def _safe_analyze_enhanced_technical(self, symbol: str, snapshot: Optional[MarketSnapshot] = None):
         """安全的增强版技术分析"""
         try:
             if self.enhanced_technical_service:
-                return await self.enhanced_technical_service.analyze_symbol(symbol)
+                return await self.enhanced_technical_service.analyze_symbol(symbol, snapshot=snapshot)
         except Exception as e:
             self.logger.warning(f"⚠️ 增强版技术分析 {symbol} 失败: {e}")
         return None
 
-    async def _safe_analyze_volume_price(self, symbol: str):
+    async def _safe_analyze_volume_price(self, symbol: str, snapshot: Optional[MarketSnapshot] = None):
         """安全的量价关系分析"""
         try:
             if self.volume_price_service:
-                return await self.volume_price_service.analyze_volume_price_relationship(symbol)
+                return await self.volume_price_service.analyze_volume_price_relationship(symbol, snapshot=snapshot)
         except Exception as e:
             self.logger.warning(f"⚠️ 量价关系分析 {symbol} 失败: {e}")
         return None
@@ -984,20 +1018,21 @@ class CoreTradingService:
             self.logger.warning(f"⚠️ 技术分析 {symbol} 失败: {e}")
         return None
 
-    async def _safe_analyze_ml(self, symbol: str):
+    async def _safe_analyze_ml(self, symbol: str, snapshot: Optional[MarketSnapshot] = None):
         """安全的 ML 分析"""
         try:
             if self.ml_service:
-                return await self.ml_service.predict_signal(symbol)
+                return await self.ml_service.predict_signal(symbol, snapshot=snapshot)
         except Exception as e:
             self.logger.warning(f"⚠️ ML 分析 {symbol} 失败: {e}")
         return None
 
-    async def _fuse_enhanced_decisions(self, symbol: str, results: Dict[str, Any], confidence_scores: Dict[str, float], detailed_analysis: Dict[str, Any]) -> TradingSignal:
+    async def _fuse_enhanced_decisions(self, symbol: str, results: Dict[str, Any], confidence_scores: Dict[str, float], detailed_analysis: Dict[str, Any],
+                                       snapshot: Optional[MarketSnapshot] = None) -> TradingSignal:
         """增强版决策融合 - 生成详细的技术分析和操作建议"""
         try:
-            # 获取当前价格
-            current_price = await self._get_current_price(symbol)
+            # 获取当前价格（快照中已有则不再请求）
+            current_price = snapshot.current_price if snapshot and snapshot.current_price else await self._get_current_price(symbol)
             
             # 获取动态权重 (增强版权重包含量价分析) - 以技术分析为准
             if self.dynamic_weight_service:
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 
 from app.core.config import get_settings
 from app.utils.exceptions import ServiceUnavailableError, InternalServerError
+from app.utils.json_codec import read_json
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +44,8 @@ class HTTPConnectionManager:
             "last_request_time": None,
             "session_created_time": None
         }
+        # 按主机的请求/连接复用统计（由aiohttp trace回调采集）
+        self._host_stats: Dict[str, Dict[str, Any]] = {}
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
@@ -117,7 +120,8 @@ class HTTPConnectionManager:
                 },
                 cookie_jar=aiohttp.CookieJar(),
                 raise_for_status=False,
-                trust_env=True
+                trust_env=True,
+                trace_configs=[self._build_trace_config()]
             )
             
             self._connection_stats["session_created_time"] = datetime.now()
@@ -128,6 +132,71 @@ class HTTPConnectionManager:
             self.session = None
             raise ServiceUnavailableError(f"无法创建HTTP连接: {e}")
     
+    def _host_entry(self, host: Optional[str]) -> Dict[str, Any]:
+        host = host or "unknown"
+        entry = self._host_stats.get(host)
+        if entry is None:
+            entry = self._host_stats[host] = {
+                "requests": 0,
+                "errors": 0,
+                "new_connections": 0,
+                "reused_connections": 0,
+                "dns_cache_hits": 0,
+                "dns_cache_misses": 0,
+                "total_latency": 0.0,
+                "last_latency": None
+            }
+        return entry
+    
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """按主机统计请求延迟、新建/复用连接和DNS缓存命中"""
+        trace_config = aiohttp.TraceConfig()
+        
+        async def on_request_start(session, ctx, params):
+            ctx.host = params.url.host
+            ctx.started = asyncio.get_running_loop().time()
+            self._host_entry(ctx.host)["requests"] += 1
+        
+        async def on_request_end(session, ctx, params):
+            latency = asyncio.get_running_loop().time() - ctx.started
+            entry = self._host_entry(ctx.host)
+            entry["total_latency"] += latency
+            entry["last_latency"] = latency
+        
+        async def on_request_exception(session, ctx, params):
+            self._host_entry(getattr(ctx, 'host', None))["errors"] += 1
+        
+        async def on_connection_create_end(session, ctx, params):
+            self._host_entry(getattr(ctx, 'host', None))["new_connections"] += 1
+        
+        async def on_connection_reuseconn(session, ctx, params):
+            self._host_entry(getattr(ctx, 'host', None))["reused_connections"] += 1
+        
+        async def on_dns_cache_hit(session, ctx, params):
+            self._host_entry(params.host)["dns_cache_hits"] += 1
+        
+        async def on_dns_cache_miss(session, ctx, params):
+            self._host_entry(params.host)["dns_cache_misses"] += 1
+        
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+    
+    async def get_client_session(self) -> aiohttp.ClientSession:
+        """
+        获取共享的ClientSession（不要关闭它）
+        For clients that hold a session reference; keep-alive connections are pooled per host
+        """
+        await self._ensure_session()
+        if self.session is None:
+            raise ServiceUnavailableError("HTTP session不可用")
+        return self.session
+    
     @asynccontextmanager
     async def get_session(self) -> AsyncContextManager[aiohttp.ClientSession]:
         """获取session的上下文管理器"""
@@ -173,7 +242,7 @@ class HTTPConnectionManager:
                         
                         # 成功响应
                         try:
-                            return await response.json()
+                            return await read_json(response)
                         except Exception:
                             text = await response.text()
                             return {"raw_data": text}
@@ -244,6 +313,36 @@ class HTTPConnectionManager:
             logger.error(f"健康检查失败: {e}")
             return False
     
+    def get_host_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取按主机的连接池统计（空闲/占用连接、复用率、平均延迟、DNS缓存命中）"""
+        idle: Dict[str, int] = {}
+        in_use: Dict[str, int] = {}
+        if self.session and not self.session.closed:
+            connector = self.session.connector
+            try:
+                for key, conns in getattr(connector, '_conns', {}).items():
+                    idle[key.host] = idle.get(key.host, 0) + len(conns)
+                for key, conns in getattr(connector, '_acquired_per_host', {}).items():
+                    in_use[key.host] = in_use.get(key.host, 0) + len(conns)
+            except Exception as e:
+                logger.debug(f"获取连接器主机统计时出错: {e}")
+        
+        hosts = {}
+        for host in set(self._host_stats) | set(idle) | set(in_use):
+            entry = dict(self._host_entry(host))
+            connections = entry["new_connections"] + entry["reused_connections"]
+            completed = entry["requests"] - entry["errors"]
+            entry.update({
+                "idle_connections": idle.get(host, 0),
+                "in_use_connections": in_use.get(host, 0),
+                "reuse_ratio": round(entry["reused_connections"] / connections, 4) if connections else 0.0,
+                "avg_latency_ms": round(entry["total_latency"] / completed * 1000, 2) if completed > 0 else None,
+                "last_latency_ms": round(entry["last_latency"] * 1000, 2) if entry["last_latency"] is not None else None
+            })
+            del entry["total_latency"], entry["last_latency"]
+            hosts[host] = entry
+        return hosts
+    
     def get_stats(self) -> Dict[str, Any]:
         """获取连接统计信息"""
         stats = self._connection_stats.copy()
@@ -285,7 +384,8 @@ class HTTPConnectionManager:
         stats.update({
             "session_active": session_active,
             "last_health_check": self._last_health_check,
-            "health_check_interval": self._health_check_interval
+            "health_check_interval": self._health_check_interval,
+            "hosts": self.get_host_stats()
         })
         
         return stats
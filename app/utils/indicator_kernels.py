@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+递推指标计算内核
+Recursive indicator kernels - Numba JIT when installed, NumPy time-loop fallback otherwise
+
+ATR（RMA平滑）、SuperTrend最终上下轨与趋势方向、突破趋势都是逐根依赖上一根结果的递推，
+无法直接向量化。这里的内核统一在 [行, K线] 二维数组上运算：一行可以是一个交易对，
+也可以是同一交易对的一组 (period, multiplier) 参数，一次调用算完整个参数网格或品种池。
+安装了numba时逐行跑JIT编译的标量循环；否则行少时直接在Python列表上跑同一份标量循环，
+行多时沿时间轴循环、在行方向上用numpy向量化。各后端与 indicators.py / tradingview_indicators.py 原有逐元素循环逐位一致；
+每行从自己第一个非NaN值开始起算，左侧补NaN的面板行（见 indicator_panel）同样适用
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # pragma: no cover - 可选依赖
+    numba = None
+
+KERNEL_BACKEND = 'numba' if numba is not None else 'numpy'
+
+# numpy后端：行数达到该值时沿时间轴向量化，否则逐行跑标量循环（行少时逐行更快）
+VECTORIZE_MIN_ROWS = 64
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+# ========== 单行标量内核（numba编译，或在numpy后端中直接跑Python列表） ==========
+
+def _rma_row(values, period, output):
+    seeded = False
+    state = np.nan
+    for t in range(len(values)):
+        value = values[t]
+        if not seeded:
+            if value != value:
+                continue
+            state = value
+            seeded = True
+        else:
+            state = (state * (period - 1) + value) / period
+        output[t] = state
+
+
+def _bands_row(upper_basic, lower_basic, close, upper_final, lower_final):
+    upper = np.nan
+    lower = np.nan
+    for t in range(len(close)):
+        # 上轨：基础上轨收紧或上一根收盘价突破上一根最终上轨时重置
+        if upper != upper or upper_basic[t] < upper or close[t - 1] > upper:
+            upper = upper_basic[t]
+        # 下轨：基础下轨抬高或上一根收盘价跌破上一根最终下轨时重置
+        if lower != lower or lower_basic[t] > lower or close[t - 1] < lower:
+            lower = lower_basic[t]
+        upper_final[t] = upper
+        lower_final[t] = lower
+
+
+def _direction_row(close, upper_final, lower_final, inclusive, supertrend, trend_up):
+    started = False
+    up = False
+    for t in range(len(close)):
+        upper = upper_final[t]
+        lower = lower_final[t]
+        if not started:
+            if upper != upper or lower != lower:
+                continue
+            up = close[t] <= lower
+            started = True
+        elif up:
+            up = not (close[t] <= lower)
+        elif inclusive:
+            up = close[t] >= upper
+        else:
+            up = close[t] > upper
+        supertrend[t] = lower if up else upper
+        trend_up[t] = up
+
+
+def _breakout_row(close, upper, lower, trend):
+    state = np.nan
+    for t in range(1, len(close)):
+        if close[t] > upper[t - 1]:
+            state = 1.0
+        elif close[t] < lower[t - 1]:
+            state = -1.0
+        trend[t] = state
+
+
+_ROW_KERNELS = {
+    'rma': _rma_row,
+    'bands': _bands_row,
+    'direction': _direction_row,
+    'breakout': _breakout_row,
+}
+
+_NUMBA_KERNELS = {}
+
+if numba is not None:
+    _jit = numba.njit(cache=True, nogil=True)
+    _rma_row_jit = _jit(_rma_row)
+    _bands_row_jit = _jit(_bands_row)
+    _direction_row_jit = _jit(_direction_row)
+    _breakout_row_jit = _jit(_breakout_row)
+
+    @_jit
+    def _rma_rows_jit(values, periods, output):
+        for r in range(values.shape[0]):
+            _rma_row_jit(values[r], periods[r], output[r])
+
+    @_jit
+    def _bands_rows_jit(upper_basic, lower_basic, close, upper_final, lower_final):
+        for r in range(close.shape[0]):
+            _bands_row_jit(upper_basic[r], lower_basic[r], close[r], upper_final[r], lower_final[r])
+
+    @_jit
+    def _direction_rows_jit(close, upper_final, lower_final, inclusive, supertrend, trend_up):
+        for r in range(close.shape[0]):
+            _direction_row_jit(close[r], upper_final[r], lower_final[r], inclusive[r], supertrend[r], trend_up[r])
+
+    @_jit
+    def _breakout_rows_jit(close, upper, lower, trend):
+        for r in range(close.shape[0]):
+            _breakout_row_jit(close[r], upper[r], lower[r], trend[r])
+
+    _NUMBA_KERNELS = {
+        'rma': _rma_rows_jit,
+        'bands': _bands_rows_jit,
+        'direction': _direction_rows_jit,
+        'breakout': _breakout_rows_jit,
+    }
+
+
+# ========== NumPy 行向量化内核（沿时间轴循环，行方向向量化） ==========
+
+def _rma_numpy(values, periods, output):
+    state = np.full(values.shape[0], np.nan)
+    seeded = np.zeros(values.shape[0], dtype=bool)
+    for t in range(values.shape[1]):
+        value = values[:, t]
+        start = ~seeded & ~np.isnan(value)
+        stepped = (state * (periods - 1) + value) / periods
+        state = np.where(seeded, stepped, np.where(start, value, state))
+        seeded |= start
+        output[:, t] = np.where(seeded, state, np.nan)
+
+
+def _bands_numpy(upper_basic, lower_basic, close, upper_final, lower_final):
+    upper = np.full(close.shape[0], np.nan)
+    lower = np.full(close.shape[0], np.nan)
+    for t in range(close.shape[1]):
+        previous_close = close[:, t - 1] if t else np.full(close.shape[0], np.nan)
+        with np.errstate(invalid='ignore'):
+            take_upper = np.isnan(upper) | (upper_basic[:, t] < upper) | (previous_close > upper)
+            take_lower = np.isnan(lower) | (lower_basic[:, t] > lower) | (previous_close < lower)
+        upper = np.where(take_upper, upper_basic[:, t], upper)
+        lower = np.where(take_lower, lower_basic[:, t], lower)
+        upper_final[:, t] = upper
+        lower_final[:, t] = lower
+
+
+def _direction_numpy(close, upper_final, lower_final, inclusive, supertrend, trend_up):
+    started = np.zeros(close.shape[0], dtype=bool)
+    up = np.zeros(close.shape[0], dtype=bool)
+    for t in range(close.shape[1]):
+        current = close[:, t]
+        upper = upper_final[:, t]
+        lower = lower_final[:, t]
+        start = ~started & ~np.isnan(upper) & ~np.isnan(lower)
+        breakout = np.where(inclusive, current >= upper, current > upper)
+        up = np.where(start, current <= lower, np.where(up, ~(current <= lower), breakout))
+        started |= start
+        up &= started
+        supertrend[:, t] = np.where(started, np.where(up, lower, upper), np.nan)
+        trend_up[:, t] = up
+
+
+def _breakout_numpy(close, upper, lower, trend):
+    for t in range(1, close.shape[1]):
+        current = close[:, t]
+        trend[:, t] = np.where(current > upper[:, t - 1], 1.0,
+                               np.where(current < lower[:, t - 1], -1.0, trend[:, t - 1]))
+
+
+_NUMPY_KERNELS = {
+    'rma': _rma_numpy,
+    'bands': _bands_numpy,
+    'direction': _direction_numpy,
+    'breakout': _breakout_numpy,
+}
+
+
+def _execute(name: str, arrays: Sequence[np.ndarray], params: Sequence[np.ndarray] = (),
+             outputs: str = 'f', backend: Optional[str] = None) -> List[np.ndarray]:
+    """
+    在 [rows, bars] 输入上运行一个递推内核
+    params are per-row 1-D arrays; outputs lists the dtype of each result ('f' float NaN-filled, 'b' bool)
+    """
+    rows, bars = arrays[0].shape
+    results = [np.full((rows, bars), np.nan) if kind == 'f' else np.zeros((rows, bars), dtype=bool)
+               for kind in outputs]
+    backend = backend or KERNEL_BACKEND
+    if backend == 'numba':
+        if not _NUMBA_KERNELS:
+            raise ValueError("numba未安装，无法使用numba后端")
+        _NUMBA_KERNELS[name](*arrays, *params, *results)
+    elif rows >= VECTORIZE_MIN_ROWS:
+        _NUMPY_KERNELS[name](*arrays, *params, *results)
+    else:
+        # 行少时逐行跑标量循环，Python float运算比逐根的numpy小数组运算快得多
+        row_kernel = _ROW_KERNELS[name]
+        for r in range(rows):
+            row_outputs = [[np.nan] * bars if kind == 'f' else [False] * bars for kind in outputs]
+            row_kernel(*(a[r].tolist() for a in arrays), *(p[r].item() for p in params), *row_outputs)
+            for result, values in zip(results, row_outputs):
+                result[r] = values
+    return results
+
+
+# ========== 公共接口 ==========
+
+def _rows(*arrays: ArrayLike) -> Tuple[Tuple[np.ndarray, ...], bool]:
+    """
+    把一维/二维输入广播成同形状的连续二维float数组
+    Returns (arrays, was_1d) - 1-D inputs become a single row and are squeezed back by the caller
+    """
+    converted = [np.asarray(a, dtype=np.float64) for a in arrays]
+    was_1d = all(a.ndim <= 1 for a in converted)
+    converted = [np.atleast_2d(a) for a in converted]
+    shape = np.broadcast_shapes(*(a.shape for a in converted))
+    return tuple(np.ascontiguousarray(np.broadcast_to(a, shape)) for a in converted), was_1d
+
+
+def _per_row(value: ArrayLike, rows: int) -> np.ndarray:
+    """标量参数或每行一个参数 -> [rows]"""
+    values = np.asarray(value, dtype=np.float64).ravel()
+    if len(values) not in (1, rows):
+        raise ValueError(f"参数个数({len(values)})与行数({rows})不匹配")
+    return np.ascontiguousarray(np.broadcast_to(values, (rows,)))
+
+
+def parameter_grid(periods: Sequence[int], multipliers: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """(period, multiplier) 全组合，按 period 外层、multiplier 内层展开为两个等长数组"""
+    period_grid, multiplier_grid = np.meshgrid(
+        np.asarray(periods, dtype=np.float64), np.asarray(multipliers, dtype=np.float64), indexing='ij'
+    )
+    return period_grid.ravel(), multiplier_grid.ravel()
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """真实波幅（沿最后一个轴）；每行第一根有效K线取 high-low"""
+    high, low, close = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (high, low, close))
+    previous_close = np.hstack([np.full((close.shape[0], 1), np.nan), close[:, :-1]])
+    span = high - low
+    with np.errstate(invalid='ignore'):
+        gap = np.maximum(np.abs(high - previous_close), np.abs(low - previous_close))
+        tr = np.maximum(span, gap)
+    return np.where(np.isnan(previous_close), span, tr)
+
+
+def rma(values: ArrayLike, period: ArrayLike, backend: Optional[str] = None) -> np.ndarray:
+    """
+    Wilder RMA：首值为每行第一个非NaN值，之后 (prev*(period-1)+x)/period
+    Row-wise identical to the loop in SuperTrendIndicator.calculate_atr
+
+    Args:
+        values: [bars] 或 [rows, bars]
+        period: 标量，或每行一个周期（values为一维时按周期个数展开成多行）
+    """
+    periods = np.atleast_1d(np.asarray(period, dtype=np.float64))
+    (values,), was_1d = _rows(values)
+    if values.shape[0] == 1 and len(periods) > 1:
+        values = np.ascontiguousarray(np.broadcast_to(values, (len(periods), values.shape[1])))
+    (output,) = _execute('rma', (values,), (_per_row(periods, values.shape[0]),), 'f', backend)
+    return output[0] if was_1d and output.shape[0] == 1 else output
+
+
+def supertrend_bands(upper_basic: ArrayLike, lower_basic: ArrayLike, close: ArrayLike,
+                     backend: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """最终上下轨：基础轨收紧或价格穿越上一根最终轨时取基础轨，否则沿用上一根"""
+    arrays, was_1d = _rows(upper_basic, lower_basic, close)
+    upper_final, lower_final = _execute('bands', arrays, (), 'ff', backend)
+    if was_1d:
+        return upper_final[0], lower_final[0]
+    return upper_final, lower_final
+
+
+def supertrend_direction(close: ArrayLike, upper_final: ArrayLike, lower_final: ArrayLike,
+                         inclusive: bool = True, backend: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    SuperTrend值与趋势方向（True为上涨）
+    inclusive=True: 下跌趋势中收盘价 >= 上轨即翻多（indicators.py）；False: 需 > 上轨（TradingView风格）
+    """
+    arrays, was_1d = _rows(close, upper_final, lower_final)
+    flags = np.full(arrays[0].shape[0], bool(inclusive))
+    supertrend_values, trend_up = _execute('direction', arrays, (flags,), 'fb', backend)
+    if was_1d:
+        return supertrend_values[0], trend_up[0]
+    return supertrend_values, trend_up
+
+
+def breakout_trend(close: ArrayLike, upper: ArrayLike, lower: ArrayLike,
+                   backend: Optional[str] = None) -> np.ndarray:
+    """
+    突破趋势：收盘价突破上一根上轨为1、跌破上一根下轨为-1，否则沿用上一根（首根为NaN）
+    Row-wise identical to AdaptiveOptimizer's former .iloc loop
+    """
+    arrays, was_1d = _rows(close, upper, lower)
+    (trend,) = _execute('breakout', arrays, (), 'f', backend)
+    return trend[0] if was_1d else trend
+
+
+def supertrend(high: ArrayLike, low: ArrayLike, close: ArrayLike, period: ArrayLike = 10,
+               multiplier: ArrayLike = 3.0, inclusive: bool = True,
+               backend: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """
+    一次调用计算多行SuperTrend
+    K线可以是一维（同一序列 × 多组参数）或 [symbols, bars]（多个交易对 × 同一组或每行一组参数）
+
+    Returns:
+        {'atr', 'upper', 'lower', 'supertrend', 'trend_up'}，每个值为 [rows, bars]（一维输入且单组参数时为一维）
+    """
+    periods = np.atleast_1d(np.asarray(period, dtype=np.float64))
+    multipliers = np.atleast_1d(np.asarray(multiplier, dtype=np.float64))
+    (high, low, close), was_1d = _rows(high, low, close)
+
+    rows = max(high.shape[0], len(periods), len(multipliers))
+    if high.shape[0] not in (1, rows):
+        raise ValueError(f"参数组数({rows})与K线行数({high.shape[0]})不匹配")
+
+    def expand(values: np.ndarray) -> np.ndarray:
+        return np.ascontiguousarray(np.broadcast_to(values, (rows, values.shape[1])))
+
+    # TR只依赖K线，按K线行计算一次后广播到参数行
+    (atr,) = _execute('rma', (expand(true_range(high, low, close)),), (_per_row(periods, rows),), 'f', backend)
+    hl2 = (high + low) / 2
+    band_width = _per_row(multipliers, rows)[:, None] * atr
+    close = expand(close)
+    upper_final, lower_final = _execute('bands', (hl2 + band_width, hl2 - band_width, close), (), 'ff', backend)
+    values, trend_up = _execute(
+        'direction', (close, upper_final, lower_final), (np.full(rows, bool(inclusive)),), 'fb', backend
+    )
+
+    result = {'atr': atr, 'upper': upper_final, 'lower': lower_final, 'supertrend': values, 'trend_up': trend_up}
+    if was_1d and rows == 1:
+        return {name: array[0] for name, array in result.items()}
+    return result
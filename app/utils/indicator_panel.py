@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+横截面指标面板
+Cross-sectional indicator panel - [symbols, bars] matrices with vectorized indicators
+
+把N个交易对的K线对齐成二维numpy数组（每行一个交易对，最新一根K线统一在最后一列，
+历史较短的交易对左侧补NaN），波动率、ATR、成交量比、RSI、趋势特征对整个品种池
+各做一次向量化计算，扫描不再为每个交易对单独跑一条指标流水线。
+递推类指标（ATR/RSI/EMA）沿时间轴循环、在品种轴上向量化，每行从自己的第一根有效K线
+开始起算，逐行结果与 indicators.py 的单序列实现一致
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.core.logging import get_logger
+from app.utils.indicator_kernels import rma, true_range
+
+logger = get_logger(__name__)
+
+PANEL_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _kline_row(kline: Any, volume_field: str) -> Optional[tuple]:
+    """单根K线 -> (timestamp, open, high, low, close, volume)，兼容字典和列表格式"""
+    try:
+        if isinstance(kline, Mapping):
+            timestamp = kline.get('timestamp', kline.get('ts', 0))
+            if hasattr(timestamp, 'timestamp'):
+                timestamp = timestamp.timestamp() * 1000
+            volume = kline.get(volume_field, kline.get('volume', 0))
+            return (
+                int(float(timestamp or 0)),
+                float(kline.get('open', np.nan) or 0), float(kline.get('high', np.nan) or 0),
+                float(kline.get('low', np.nan) or 0), float(kline.get('close', np.nan) or 0),
+                float(volume or 0)
+            )
+        if isinstance(kline, (list, tuple)) and len(kline) > 4:
+            volume = kline[5] if len(kline) > 5 else 0
+            return (int(float(kline[0])), float(kline[1]), float(kline[2]),
+                    float(kline[3]), float(kline[4]), float(volume))
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _dict_kline_columns(klines: List[Any], volume_field: str) -> Optional[np.ndarray]:
+    """
+    字典K线的快速路径：逐列整体转换 -> [6, bars]
+    Returns None when a row is not a dict or a field is missing/unparsable, so callers fall back to _kline_row
+    """
+    if not klines or not all(isinstance(k, Mapping) for k in klines):
+        return None
+    try:
+        timestamps = [k.get('timestamp', k.get('ts', 0)) for k in klines]
+        if any(hasattr(ts, 'timestamp') for ts in timestamps):
+            return None
+        volume_key = volume_field if volume_field in klines[-1] else 'volume'
+        return np.array([
+            timestamps,
+            [k['open'] for k in klines], [k['high'] for k in klines],
+            [k['low'] for k in klines], [k['close'] for k in klines],
+            [k[volume_key] for k in klines]
+        ], dtype=np.float64)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass
+class IndicatorPanel:
+    """
+    交易对 × K线 矩阵
+    Rows are right-aligned: column -1 is every symbol's latest bar, shorter histories are NaN-padded on the left
+    """
+    symbols: List[str]
+    columns: Dict[str, np.ndarray]
+    lengths: np.ndarray
+    last_timestamps: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+
+    def __post_init__(self):
+        self._index = {symbol: row for row, symbol in enumerate(self.symbols)}
+
+    @property
+    def shape(self):
+        return (len(self.symbols), self.bars)
+
+    @property
+    def bars(self) -> int:
+        return next(iter(self.columns.values())).shape[1] if self.columns else 0
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def row(self, symbol: str) -> int:
+        return self._index[symbol]
+
+    @classmethod
+    def from_columns(cls, series: Mapping[str, Mapping[str, Sequence[float]]],
+                     bars: Optional[int] = None) -> 'IndicatorPanel':
+        """
+        由 {交易对: {列名: 数值序列}} 构建（序列按时间升序，只保留最近bars根）
+        Columns missing for a symbol stay NaN
+        """
+        symbols = list(series)
+        lengths = np.array([
+            max((len(values) for values in series[symbol].values()), default=0) for symbol in symbols
+        ], dtype=np.int64)
+        if bars is not None:
+            lengths = np.minimum(lengths, bars)
+        width = int(lengths.max()) if len(lengths) else 0
+
+        column_names = sorted({name for columns in series.values() for name in columns})
+        columns = {name: np.full((len(symbols), width), np.nan) for name in column_names}
+        for row, symbol in enumerate(symbols):
+            length = int(lengths[row])
+            if not length:
+                continue
+            for name, values in series[symbol].items():
+                tail = np.asarray(values[-length:], dtype=np.float64)
+                columns[name][row, width - len(tail):] = tail
+        return cls(symbols, columns, lengths)
+
+    @classmethod
+    def from_klines(cls, klines_by_symbol: Mapping[str, Sequence[Any]], bars: Optional[int] = None,
+                    volume_field: str = 'volume') -> 'IndicatorPanel':
+        """
+        由 {交易对: K线列表} 构建，K线可以是 get_kline_data 格式的字典或 [ts, o, h, l, c, v] 列表
+
+        Args:
+            bars: 每个交易对保留的最近K线根数
+            volume_field: 成交量字段（如 'volume_currency' 表示计价币成交额）
+        """
+        series = {}
+        last_timestamps = []
+        for symbol, klines in klines_by_symbol.items():
+            klines = list(klines or ())
+            if bars is not None:
+                klines = klines[-bars:]
+            values = _dict_kline_columns(klines, volume_field)
+            if values is None:
+                rows = [row for row in (_kline_row(k, volume_field) for k in klines) if row is not None]
+                values = np.array(rows, dtype=np.float64).reshape(-1, 6).T
+            series[symbol] = {name: values[i + 1] for i, name in enumerate(PANEL_COLUMNS)}
+            last_timestamps.append(int(values[0, -1]) if values.shape[1] else 0)
+        panel = cls.from_columns(series, bars)
+        panel.last_timestamps = np.array(last_timestamps, dtype=np.int64)
+        return panel
+
+    def tail(self, column: str, n: int) -> np.ndarray:
+        """最近n根K线 [symbols, n]（历史不足的部分为NaN）"""
+        values = self.columns[column]
+        if n > values.shape[1]:
+            pad = np.full((values.shape[0], n - values.shape[1]), np.nan)
+            return np.hstack([pad, values])
+        return values[:, values.shape[1] - n:]
+
+    def head(self, column: str, start: int, stop: int) -> np.ndarray:
+        """
+        每个交易对自己第 start..stop-1 根K线（从各自最早一根算起）[symbols, stop-start]
+        Positions past a symbol's history are NaN
+        """
+        values = self.columns[column]
+        width = values.shape[1]
+        offsets = np.arange(start, stop)
+        positions = (width - self.lengths)[:, None] + offsets[None, :]
+        valid = offsets[None, :] < self.lengths[:, None]
+        gathered = np.take_along_axis(values, np.clip(positions, 0, max(width - 1, 0)), axis=1) \
+            if width else np.full(positions.shape, np.nan)
+        return np.where(valid, gathered, np.nan)
+
+
+# ========== 向量化指标（沿 axis=1 计算，NaN 表示缺失） ==========
+
+def pct_returns(close: np.ndarray, positive_only: bool = True) -> np.ndarray:
+    """逐根收益率 [symbols, bars-1]；前一根价格缺失（或非正）时为NaN"""
+    previous = close[:, :-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = (close[:, 1:] - previous) / previous
+    invalid = np.isnan(previous) | (previous <= 0 if positive_only else previous == 0)
+    return np.where(invalid, np.nan, returns)
+
+
+def nan_std(values: np.ndarray, ddof: int = 1, min_count: int = 2, fill: float = 0.0) -> np.ndarray:
+    """逐行忽略NaN的标准差，有效值少于min_count的行返回fill"""
+    count = np.sum(~np.isnan(values), axis=1)
+    result = np.full(values.shape[0], fill, dtype=np.float64)
+    rows = count >= max(min_count, ddof + 1)
+    if rows.any():
+        result[rows] = np.nanstd(values[rows], axis=1, ddof=ddof)
+    return result
+
+
+def nan_mean(values: np.ndarray, fill: float = np.nan) -> np.ndarray:
+    """逐行忽略NaN的均值，全为NaN的行返回fill"""
+    count = np.sum(~np.isnan(values), axis=1)
+    total = np.nansum(values, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, total / np.maximum(count, 1), fill)
+
+
+def volatility(close: np.ndarray, ddof: int = 1) -> np.ndarray:
+    """收益率标准差（小数），对传入的整段窗口计算"""
+    return nan_std(pct_returns(close), ddof=ddof, min_count=max(2, ddof + 1))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    ATR（RMA平滑），首值为第一根有效K线的TR
+    Row-wise identical to SuperTrendIndicator.calculate_atr; the recursion runs in indicator_kernels
+    """
+    return rma(true_range(high, low, close), period)
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    EMA，首值为各行前period个有效值的SMA
+    Row-wise identical to MovingAverageIndicator.calculate_ema
+    """
+    multiplier = 2 / (period + 1)
+    rows = values.shape[0]
+    output = np.full(values.shape, np.nan)
+    count = np.zeros(rows, dtype=np.int64)
+    seed = np.zeros(rows)
+    state = np.full(rows, np.nan)
+    for t in range(values.shape[1]):
+        current = values[:, t]
+        valid = ~np.isnan(current)
+        count += valid
+        seeding = valid & (count <= period)
+        seed = np.where(seeding, seed + np.where(seeding, current, 0.0), seed)
+        seeded = valid & (count == period)
+        stepping = valid & (count > period)
+        state = np.where(seeded, seed / period, state)
+        state = np.where(stepping, (current * multiplier) + (state * (1 - multiplier)), state)
+        output[:, t] = np.where(valid & (count >= period), state, np.nan)
+    return output
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    RSI：前period个涨跌幅简单平均，之后Wilder平滑；值对齐到产生它的K线
+    Row-wise identical to RSIIndicator.calculate (whose list is shifted; see streaming_indicators)
+    """
+    rows, width = close.shape
+    output = np.full(close.shape, np.nan)
+    if width < 2:
+        return output
+    changes = close[:, 1:] - close[:, :-1]
+    count = np.zeros(rows, dtype=np.int64)
+    sum_gain = np.zeros(rows)
+    sum_loss = np.zeros(rows)
+    avg_gain = np.full(rows, np.nan)
+    avg_loss = np.full(rows, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for t in range(width - 1):
+            change = changes[:, t]
+            valid = ~np.isnan(change)
+            gain = np.where(change > 0, change, 0.0)
+            loss = np.where(change < 0, -change, 0.0)
+            count += valid
+            seeding = valid & (count <= period)
+            sum_gain = np.where(seeding, sum_gain + gain, sum_gain)
+            sum_loss = np.where(seeding, sum_loss + loss, sum_loss)
+            seeded = valid & (count == period)
+            stepping = valid & (count > period)
+            avg_gain = np.where(seeded, sum_gain / period, avg_gain)
+            avg_loss = np.where(seeded, sum_loss / period, avg_loss)
+            avg_gain = np.where(stepping, (avg_gain * (period - 1) + gain) / period, avg_gain)
+            avg_loss = np.where(stepping, (avg_loss * (period - 1) + loss) / period, avg_loss)
+            value = np.where(avg_loss != 0, 100 - (100 / (1 + avg_gain / avg_loss)), 100.0)
+            output[:, t + 1] = np.where(valid & (count >= period), value, np.nan)
+    return output
+
+
+def volume_ratio(volume: np.ndarray, window: int = 20) -> np.ndarray:
+    """最新一根成交量 / 之前window根的平均成交量（只计正值）"""
+    history = volume[:, -window - 1:-1] if volume.shape[1] > 1 else volume[:, :0]
+    history = np.where(history > 0, history, np.nan)
+    average = nan_mean(history)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(average > 0, volume[:, -1] / average, np.nan)
+
+
+def linear_slope(values: np.ndarray) -> np.ndarray:
+    """逐行最小二乘斜率（x为列序号，忽略NaN），有效点少于2的行为NaN"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    x = np.broadcast_to(np.arange(values.shape[1], dtype=np.float64), values.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_mean = np.where(valid, x, 0).sum(axis=1) / count
+        y_mean = np.where(valid, values, 0).sum(axis=1) / count
+        dx = np.where(valid, x - x_mean[:, None], 0)
+        dy = np.where(valid, values - y_mean[:, None], 0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    return np.where(count >= 2, slope, np.nan)
+
+
+def compact_valid(values: np.ndarray) -> np.ndarray:
+    """逐行把非NaN值按原顺序靠右紧排，缺失值移到左侧（等价于逐个交易对先过滤无效价格再计算）"""
+    order = np.argsort(~np.isnan(values), axis=1, kind='stable')
+    return np.take_along_axis(values, order, axis=1)
+
+
+def first_valid(values: np.ndarray) -> np.ndarray:
+    """每行第一个非NaN值"""
+    valid = ~np.isnan(values)
+    index = np.argmax(valid, axis=1)
+    picked = values[np.arange(values.shape[0]), index]
+    return np.where(valid.any(axis=1), picked, np.nan)
+
+
+def compute_features(panel: IndicatorPanel, volatility_window: int = 24, atr_period: int = 14,
+                     rsi_period: int = 14, volume_window: int = 20, trend_window: int = 20,
+                     ema_fast: int = 12, ema_slow: int = 26) -> Dict[str, np.ndarray]:
+    """
+    整个品种池的常用扫描特征（每个键一个 [symbols] 数组）
+
+    - close / change: 最新收盘价、trend_window根K线涨跌幅
+    - volatility: 最近volatility_window根K线收益率标准差（小数）
+    - atr / atr_ratio: 最新ATR及其占收盘价比例
+    - volume_ratio: 最新成交量 / 之前volume_window根均量
+    - rsi: 最新RSI
+    - ema_spread: 快慢EMA偏离（fast/slow - 1）
+    - trend_slope: 最近trend_window根收盘价回归斜率 / 均价（每根K线的相对斜率）
+    """
+    close = panel['close']
+    last_close = close[:, -1] if panel.bars else np.full(len(panel), np.nan)
+    features = {'close': last_close}
+
+    window = panel.tail('close', trend_window)
+    start = first_valid(window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features['change'] = np.where(start > 0, (last_close - start) / start, np.nan)
+        features['trend_slope'] = linear_slope(window) / nan_mean(window)
+
+    features['volatility'] = volatility(panel.tail('close', volatility_window + 1))
+
+    if 'high' in panel.columns and 'low' in panel.columns:
+        atr_values = atr(panel['high'], panel['low'], close, atr_period)[:, -1]
+        features['atr'] = atr_values
+        with np.errstate(divide='ignore', invalid='ignore'):
+            features['atr_ratio'] = np.where(last_close > 0, atr_values / last_close, np.nan)
+
+    if 'volume' in panel.columns:
+        features['volume_ratio'] = volume_ratio(panel['volume'], volume_window)
+
+    features['rsi'] = rsi(close, rsi_period)[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features['ema_spread'] = ema(close, ema_fast)[:, -1] / ema(close, ema_slow)[:, -1] - 1
+    return features
+
+
+def feature_records(panel: IndicatorPanel, features: Mapping[str, np.ndarray]) -> Dict[str, Dict[str, Optional[float]]]:
+    """特征数组 -> {交易对: {特征: 数值}}（NaN转为None）"""
+    records = {}
+    for row, symbol in enumerate(panel.symbols):
+        record = {}
+        for name, values in features.items():
+            value = float(values[row])
+            record[name] = None if np.isnan(value) else value
+        records[symbol] = record
+    return records
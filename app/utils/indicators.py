@@ -10,6 +10,8 @@ from decimal import Decimal
 
 from app.core.logging import get_logger
 from app.utils.exceptions import IndicatorCalculationError
+from app.utils.indicator_kernels import rma, supertrend_bands, supertrend_direction
+from app.utils.market_structure import cluster_levels_by_gap, find_swing_points
 
 logger = get_logger(__name__)
 
@@ -34,14 +36,8 @@ class SuperTrendIndicator:
         
         true_range = np.maximum(tr1, np.maximum(tr2, tr3))
         
-        # 计算ATR (使用RMA - Wilder's smoothing)
-        atr = np.zeros_like(true_range)
-        atr[0] = true_range[0]
-        
-        for i in range(1, len(true_range)):
-            atr[i] = (atr[i-1] * (self.period - 1) + true_range[i]) / self.period
-        
-        return atr
+        # 计算ATR (使用RMA - Wilder's smoothing，递推在编译内核中完成)
+        return rma(true_range, self.period)
 
     def calculate(self, high: List[float], low: List[float], close: List[float]) -> Tuple[List[float], List[bool]]:
         """
@@ -78,61 +74,10 @@ class SuperTrendIndicator:
             lower_basic = hl2 - (self.multiplier * atr)
             
             # 计算最终上下轨
-            upper_final = np.zeros_like(upper_basic)
-            lower_final = np.zeros_like(lower_basic)
-            
-            # 初始化
-            upper_final[0] = upper_basic[0]
-            lower_final[0] = lower_basic[0]
-            
-            for i in range(1, len(close_arr)):
-                # 上轨计算
-                if upper_basic[i] < upper_final[i-1] or close_arr[i-1] > upper_final[i-1]:
-                    upper_final[i] = upper_basic[i]
-                else:
-                    upper_final[i] = upper_final[i-1]
-                
-                # 下轨计算  
-                if lower_basic[i] > lower_final[i-1] or close_arr[i-1] < lower_final[i-1]:
-                    lower_final[i] = lower_basic[i]
-                else:
-                    lower_final[i] = lower_final[i-1]
-            
-            # 计算SuperTrend和趋势方向
-            supertrend = np.zeros_like(close_arr)
-            trend_up = np.zeros(len(close_arr), dtype=bool)
+            upper_final, lower_final = supertrend_bands(upper_basic, lower_basic, close_arr)
             
-            # 初始化第一个值
-            if close_arr[0] <= lower_final[0]:
-                supertrend[0] = lower_final[0]
-                trend_up[0] = True
-            else:
-                supertrend[0] = upper_final[0]
-                trend_up[0] = False
-            
-            # 计算后续值
-            for i in range(1, len(close_arr)):
-                # SuperTrend趋势判断逻辑
-                if trend_up[i-1]:
-                    # 之前是上涨趋势
-                    if close_arr[i] <= lower_final[i]:
-                        # 价格跌破下轨，转为下跌趋势
-                        supertrend[i] = upper_final[i]
-                        trend_up[i] = False
-                    else:
-                        # 继续上涨趋势
-                        supertrend[i] = lower_final[i]
-                        trend_up[i] = True
-                else:
-                    # 之前是下跌趋势
-                    if close_arr[i] >= upper_final[i]:
-                        # 价格突破上轨，转为上涨趋势
-                        supertrend[i] = lower_final[i]
-                        trend_up[i] = True
-                    else:
-                        # 继续下跌趋势
-                        supertrend[i] = upper_final[i]
-                        trend_up[i] = False
+            # 计算SuperTrend和趋势方向（下跌趋势中收盘价 >= 上轨即翻多）
+            supertrend, trend_up = supertrend_direction(close_arr, upper_final, lower_final, inclusive=True)
             
             # 转换为列表
             supertrend_values = supertrend.tolist()
@@ -413,59 +358,13 @@ def calculate_support_resistance(
         # 提取价格数据
         highs = [float(k.get('high', k.get('high_price', 0))) for k in klines]
         lows = [float(k.get('low', k.get('low_price', 0))) for k in klines]
-        [float(k.get('close', k.get('close_price', 0))) for k in klines]
-        
-        # 寻找局部高点和低点
-        local_highs = []
-        local_lows = []
         
-        for i in range(lookback_period // 2, len(highs) - lookback_period // 2):
-            # 检查是否为局部高点
-            is_local_high = True
-            for j in range(i - lookback_period // 2, i + lookback_period // 2 + 1):
-                if j != i and highs[j] >= highs[i]:
-                    is_local_high = False
-                    break
-            
-            if is_local_high:
-                local_highs.append(highs[i])
-            
-            # 检查是否为局部低点
-            is_local_low = True
-            for j in range(i - lookback_period // 2, i + lookback_period // 2 + 1):
-                if j != i and lows[j] <= lows[i]:
-                    is_local_low = False
-                    break
-            
-            if is_local_low:
-                local_lows.append(lows[i])
-        
-        # 聚类相近的价格水平
-        def cluster_levels(levels: List[float], tolerance: float = 0.01) -> List[float]:
-            if not levels:
-                return []
-            
-            sorted_levels = sorted(levels)
-            clusters = []
-            current_cluster = [sorted_levels[0]]
-            
-            for level in sorted_levels[1:]:
-                if abs(level - current_cluster[-1]) / current_cluster[-1] <= tolerance:
-                    current_cluster.append(level)
-                else:
-                    if len(current_cluster) >= min_touches:
-                        clusters.append(sum(current_cluster) / len(current_cluster))
-                    current_cluster = [level]
-            
-            # 处理最后一个聚类
-            if len(current_cluster) >= min_touches:
-                clusters.append(sum(current_cluster) / len(current_cluster))
-            
-            return clusters
+        # 寻找局部高点和低点（严格高于/低于左右各 lookback_period//2 根K线）
+        swings = find_swing_points(highs, lows, window=lookback_period // 2)
         
-        # 获取支撑阻力位
-        resistance_levels = cluster_levels(local_highs)
-        support_levels = cluster_levels(local_lows)
+        # 聚类相近的价格水平（相邻价位相对差 <= 1% 归为同一簇）
+        resistance_levels = cluster_levels_by_gap(swings.high_prices, 0.01, min_touches)[0].tolist()
+        support_levels = cluster_levels_by_gap(swings.low_prices, 0.01, min_touches)[0].tolist()
         
         return {
             'support_levels': support_levels,
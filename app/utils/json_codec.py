@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+JSON编解码层
+JSON codec - orjson/msgspec when installed, stdlib json otherwise
+
+WebSocket帧与REST响应体统一走这里解码：通用解码优先orjson，其次msgspec，最后标准库；
+币安 kline/ticker/markPrice 推送可以直接解码为紧凑的类型化结构（msgspec Struct，
+未安装msgspec时退化为同名dataclass），字符串价格在解码时即转换为float
+"""
+
+import json
+from dataclasses import MISSING, dataclass, fields, is_dataclass
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - 可选依赖
+    msgspec = None
+
+RawJSON = Union[str, bytes, bytearray, memoryview]
+
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+elif msgspec is not None:
+    JSON_BACKEND = 'msgspec'
+else:
+    JSON_BACKEND = 'json'
+
+# orjson与标准库的解码错误是ValueError的子类；msgspec.DecodeError（含类型校验的ValidationError）
+# 继承自Exception而非ValueError。安装了msgspec时decode_typed总会用到它，因此一并捕获
+if msgspec is not None:
+    JSONDecodeError = (ValueError, msgspec.DecodeError)
+else:
+    JSONDecodeError = ValueError
+
+
+def _stdlib_loads(data: RawJSON) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+if orjson is not None:
+    def loads(data: RawJSON) -> Any:
+        """解码JSON（str或bytes）"""
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        """编码为JSON字符串"""
+        return orjson.dumps(obj).decode()
+elif msgspec is not None:
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+
+    def loads(data: RawJSON) -> Any:
+        """解码JSON（str或bytes）"""
+        return _msgspec_decoder.decode(data)
+
+    def dumps(obj: Any) -> str:
+        """编码为JSON字符串"""
+        return _msgspec_encoder.encode(obj).decode()
+else:
+    loads = _stdlib_loads
+
+    def dumps(obj: Any) -> str:
+        """编码为JSON字符串"""
+        return json.dumps(obj, separators=(',', ':'))
+
+
+async def read_json(response) -> Any:
+    """
+    读取aiohttp响应体并解码
+    Decodes the raw body bytes directly instead of response.json()'s text round trip; empty body -> None
+    """
+    body = await response.read()
+    if not body or not body.strip():
+        return None
+    return loads(body)
+
+
+# ==================== 币安推送的类型化结构 ====================
+
+
+@dataclass
+class BinanceKlineBar:
+    """K线推送中的 k 对象"""
+    open_time: int
+    close_time: int
+    symbol: str
+    interval: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    closed: bool
+    quote_volume: float = 0.0
+    trades: int = 0
+
+
+@dataclass
+class BinanceKlineEvent:
+    """<symbol>@kline_<interval> 推送"""
+    event_time: int
+    symbol: str
+    kline: BinanceKlineBar
+
+
+@dataclass
+class BinanceTickerEvent:
+    """<symbol>@ticker 推送"""
+    event_time: int
+    symbol: str
+    last_price: float
+    open_price: float
+    high_price: float
+    low_price: float
+    volume: float
+    quote_volume: float = 0.0
+    price_change: float = 0.0
+    price_change_percent: float = 0.0
+
+
+@dataclass
+class BinanceMarkPriceEvent:
+    """<symbol>@markPrice 推送（!markPrice@arr 为其数组）"""
+    event_time: int
+    symbol: str
+    mark_price: float
+    funding_rate: float
+    next_funding_time: int
+    index_price: float = 0.0
+
+
+# 字段名 -> 币安推送中的键
+_RENAMES: Dict[type, Dict[str, str]] = {
+    BinanceKlineBar: {
+        'open_time': 't', 'close_time': 'T', 'symbol': 's', 'interval': 'i',
+        'open': 'o', 'high': 'h', 'low': 'l', 'close': 'c', 'volume': 'v',
+        'closed': 'x', 'quote_volume': 'q', 'trades': 'n',
+    },
+    BinanceKlineEvent: {'event_time': 'E', 'symbol': 's', 'kline': 'k'},
+    BinanceTickerEvent: {
+        'event_time': 'E', 'symbol': 's', 'last_price': 'c', 'open_price': 'o',
+        'high_price': 'h', 'low_price': 'l', 'volume': 'v', 'quote_volume': 'q',
+        'price_change': 'p', 'price_change_percent': 'P',
+    },
+    BinanceMarkPriceEvent: {
+        'event_time': 'E', 'symbol': 's', 'mark_price': 'p', 'funding_rate': 'r',
+        'next_funding_time': 'T', 'index_price': 'i',
+    },
+}
+
+# msgspec可用时由上面的dataclass定义生成对应的Struct（同一份字段定义）
+_STRUCTS: Dict[type, Any] = {}
+
+
+def _struct_for(event_type: type):
+    struct = _STRUCTS.get(event_type)
+    if struct is None:
+        struct_fields = []
+        for field in fields(event_type):
+            field_type = _struct_for(field.type) if is_dataclass(field.type) else field.type
+            if field.default is MISSING:
+                struct_fields.append((field.name, field_type))
+            else:
+                struct_fields.append((field.name, field_type, field.default))
+        struct = msgspec.defstruct(
+            event_type.__name__, struct_fields, rename=_RENAMES[event_type], gc=False
+        )
+        _STRUCTS[event_type] = struct
+    return struct
+
+
+def _from_mapping(event_type: type, payload: Dict[str, Any]):
+    """标准库回退：按键名映射从dict构建dataclass"""
+    rename = _RENAMES[event_type]
+    values = {}
+    for field in fields(event_type):
+        key = rename.get(field.name, field.name)
+        if key not in payload:
+            continue
+        value = payload[key]
+        values[field.name] = _from_mapping(field.type, value) if is_dataclass(field.type) else field.type(value)
+    return event_type(**values)
+
+
+_TYPED_DECODERS: Dict[Tuple[type, bool, bool], Any] = {}
+
+
+def decode_typed(data: RawJSON, event_type: Type, combined: bool = False, many: bool = False):
+    """
+    把币安推送直接解码为类型化结构
+    Decode a Binance push payload into compact typed records
+
+    Args:
+        data: 原始JSON（str或bytes）
+        event_type: BinanceKlineEvent / BinanceTickerEvent / BinanceMarkPriceEvent
+        combined: 是否为组合流包装 {"stream": ..., "data": ...}，此时返回 (stream, 结构)
+        many: data是否为数组（如 !markPrice@arr）
+
+    Returns:
+        结构、结构列表，或combined时的 (stream, 结构/列表)
+    """
+    if msgspec is not None:
+        key = (event_type, combined, many)
+        decoder = _TYPED_DECODERS.get(key)
+        if decoder is None:
+            payload_type = _struct_for(event_type)
+            if many:
+                payload_type = List[payload_type]
+            if combined:
+                payload_type = msgspec.defstruct(
+                    f"Combined{event_type.__name__}", [('stream', str), ('data', payload_type)], gc=False
+                )
+            decoder = msgspec.json.Decoder(payload_type, strict=False)
+            _TYPED_DECODERS[key] = decoder
+        result = decoder.decode(data)
+        return (result.stream, result.data) if combined else result
+
+    message = loads(data)
+    payload = message['data'] if combined else message
+    if many:
+        result = [_from_mapping(event_type, item) for item in payload]
+    else:
+        result = _from_mapping(event_type, payload)
+    return (message['stream'], result) if combined else result
+
+
+def get_codec_info() -> Dict[str, Optional[str]]:
+    """当前编解码后端信息"""
+    return {
+        'backend': JSON_BACKEND,
+        'orjson': getattr(orjson, '__version__', None),
+        'msgspec': getattr(msgspec, '__version__', None),
+        'typed_decoding': 'msgspec' if msgspec is not None else 'dataclass',
+    }
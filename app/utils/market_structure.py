@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+市场结构检测
+Market structure detection - vectorized swing points and support/resistance clustering
+
+摆动点：第i根K线的最高价严格高于左右各window根K线的最高价即为摆动高点（低点同理），
+左右两侧的极值由滚动最大/最小值一次算出，整体O(n)，不再为每根K线内层循环window次。
+支撑阻力：对排序后的价格数组做区间聚类，用searchsorted / 相邻差分确定每个簇的边界，
+簇均值由前缀和得到；结果以numpy数组返回，由调用方决定是否转为列表
+"""
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class SwingPoints:
+    """摆动点（下标按时间升序，价格与下标一一对应）"""
+    high_indices: np.ndarray
+    high_prices: np.ndarray
+    low_indices: np.ndarray
+    low_prices: np.ndarray
+
+
+def _rolling_extreme(values: np.ndarray, window: int, kind: str) -> np.ndarray:
+    """每个位置结尾的window根K线的最大/最小值（pandas滚动窗口，O(n)）"""
+    rolling = pd.Series(values).rolling(window, min_periods=1)
+    return (rolling.max() if kind == 'high' else rolling.min()).to_numpy()
+
+
+def swing_mask(values: np.ndarray, window: int, kind: str = 'high') -> np.ndarray:
+    """
+    摆动点布尔掩码
+    Bar i (window <= i < n-window) is a swing high when values[i] is strictly above every other value
+    in [i-window, i+window]; swing lows are strictly below. Bars too close to either edge are never swings.
+
+    Args:
+        values: 最高价（kind='high'）或最低价（kind='low'）序列
+        window: 左右各比较的K线数
+        kind: 'high' 或 'low'
+    """
+    values = np.asarray(values, dtype=np.float64)
+    size = len(values)
+    if window == 0:
+        # 没有邻域可比，每根K线都是摆动点
+        return np.ones(size, dtype=bool)
+    mask = np.zeros(size, dtype=bool)
+    if window < 0 or size < 2 * window + 1:
+        return mask
+
+    # extreme[k] 为 values[k-window+1..k] 的极值：左侧邻域取 extreme[i-1]，右侧邻域取 extreme[i+window]
+    extreme = _rolling_extreme(values, window, kind)
+    centers = np.arange(window, size - window)
+    left = extreme[centers - 1]
+    right = extreme[centers + window]
+    current = values[centers]
+    with np.errstate(invalid='ignore'):
+        if kind == 'high':
+            mask[centers] = (current > left) & (current > right)
+        else:
+            mask[centers] = (current < left) & (current < right)
+    return mask
+
+
+def find_swing_points(high: np.ndarray, low: np.ndarray, window: int = 5) -> SwingPoints:
+    """摆动高低点的下标和价格"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    high_indices = np.flatnonzero(swing_mask(high, window, 'high'))
+    low_indices = np.flatnonzero(swing_mask(low, window, 'low'))
+    return SwingPoints(high_indices, high[high_indices], low_indices, low[low_indices])
+
+
+def _cluster_means(sorted_prices: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """由前缀和计算 sorted_prices[starts[k]:stops[k]] 的均值"""
+    prefix = np.concatenate([[0.0], np.cumsum(sorted_prices)])
+    return (prefix[stops] - prefix[starts]) / (stops - starts)
+
+
+def cluster_levels_by_gap(levels: np.ndarray, tolerance: float = 0.01,
+                          min_touches: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    相邻价差聚类：排序后相邻两个价位的相对差 <= tolerance 即归入同一簇（链式）
+    Same grouping as the former calculate_support_resistance.cluster_levels in indicators.py
+
+    Returns:
+        (簇均值, 簇内价位数)，只保留价位数 >= min_touches 的簇，按价格升序
+    """
+    levels = np.sort(np.asarray(levels, dtype=np.float64))
+    if not len(levels):
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        joined = np.abs(np.diff(levels)) / levels[:-1] <= tolerance
+    starts = np.concatenate([[0], np.flatnonzero(~joined) + 1])
+    stops = np.concatenate([starts[1:], [len(levels)]])
+    counts = stops - starts
+    keep = counts >= min_touches
+    return _cluster_means(levels, starts[keep], stops[keep]), counts[keep]
+
+
+def cluster_levels_by_window(prices: np.ndarray, tolerance: float,
+                             min_touches: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    锚点区间聚类：从最低的未归簇价格开始，把 [锚点-tolerance, 锚点+tolerance] 内的价格归为一簇，
+    下一个锚点是第一个高于 锚点+tolerance 的价格（区间下沿可以与上一簇重叠）
+    Same grouping as the former MarketStructureIndicator.calculate_support_resistance loop;
+    only the anchors are iterated, each boundary is a binary search
+
+    Returns:
+        (簇均值, 簇内价格数)，只保留价格数 >= min_touches 的簇，按锚点升序
+    """
+    prices = np.sort(np.asarray(prices, dtype=np.float64))
+    if not len(prices):
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+
+    starts, stops = [], []
+    anchor_index = 0
+    while anchor_index < len(prices):
+        anchor = prices[anchor_index]
+        starts.append(np.searchsorted(prices, anchor - tolerance, side='left'))
+        stop = int(np.searchsorted(prices, anchor + tolerance, side='right'))
+        stops.append(stop)
+        anchor_index = stop
+
+    starts = np.asarray(starts, dtype=np.int64)
+    stops = np.asarray(stops, dtype=np.int64)
+    counts = stops - starts
+    keep = counts >= min_touches
+    return _cluster_means(prices, starts[keep], stops[keep]), counts[keep]
+
+
+def split_support_resistance(levels: np.ndarray, current_price: float) -> Tuple[np.ndarray, np.ndarray]:
+    """按当前价格拆分：低于当前价为支撑（由近到远），其余为阻力（由近到远）"""
+    levels = np.asarray(levels, dtype=np.float64)
+    below = levels < current_price
+    return np.sort(levels[below])[::-1], np.sort(levels[~below])
@@ -1,16 +1,15 @@
 # -*- coding: utf-8 -*-
 """
 OKX API频率限制管理器
-基于OKX官方文档的API限制规则进行精确控制
+基于OKX官方文档的API限制规则进行精确控制（基于通用令牌桶限制器，超限时排队而不是拒绝）
 """
 
-import asyncio
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
 from app.core.logging import get_logger
+from app.utils.rate_limiter import BucketSpec, ExchangeRateLimiter, RequestPriority
 
 logger = get_logger(__name__)
 
@@ -32,9 +31,18 @@ class RateLimitRule:
     cooldown_seconds: float  # 冷却时间
 
 
-class OKXRateLimiter:
+# 各API类型的默认优先级
+_API_PRIORITY = {
+    APIType.TRADING: RequestPriority.CRITICAL,
+    APIType.PRIVATE: RequestPriority.HIGH,
+    APIType.MARKET_DATA: RequestPriority.NORMAL,
+    APIType.PUBLIC: RequestPriority.NORMAL,
+}
+
+
+class OKXRateLimiter(ExchangeRateLimiter):
     """OKX API频率限制管理器"""
-    
+
     # OKX官方API限制规则 (基于2024年最新文档)
     RATE_LIMITS = {
         APIType.PUBLIC: RateLimitRule(
@@ -62,19 +70,20 @@ class OKXRateLimiter:
             cooldown_seconds=0.2   # 200ms
         )
     }
-    
+
+    # 每个API类型一个桶：按每分钟限制匀速补充，突发容量为burst_limit
+    BUCKETS = {
+        api_type.value: BucketSpec(
+            limit=min(rule.requests_per_minute, rule.requests_per_second * 60),
+            interval=60.0,
+            safety=1 - rule.burst_limit / min(rule.requests_per_minute, rule.requests_per_second * 60)
+        )
+        for api_type, rule in RATE_LIMITS.items()
+    }
+
     def __init__(self):
-        self.request_history: Dict[APIType, list] = {
-            api_type: [] for api_type in APIType
-        }
-        self.last_request_time: Dict[str, datetime] = {}
-        self.burst_count: Dict[APIType, int] = {
-            api_type: 0 for api_type in APIType
-        }
-        self.is_cooling_down: Dict[APIType, bool] = {
-            api_type: False for api_type in APIType
-        }
-    
+        super().__init__('okx')
+
     def _classify_endpoint(self, endpoint: str) -> APIType:
         """根据端点分类API类型"""
         if '/account/' in endpoint or '/trade/' in endpoint:
@@ -85,131 +94,19 @@ class OKXRateLimiter:
             return APIType.MARKET_DATA
         else:
             return APIType.PUBLIC
-    
-    async def acquire_permit(self, endpoint: str) -> bool:
-        """获取API调用许可"""
+
+    def classify(self, endpoint: str, method: str = 'GET') -> Tuple[List[str], RequestPriority]:
         api_type = self._classify_endpoint(endpoint)
-        rule = self.RATE_LIMITS[api_type]
-        current_time = datetime.now()
-        
-        # 检查是否在冷却期
-        if self.is_cooling_down[api_type]:
-            logger.warning(f"API {api_type.value} 正在冷却中，拒绝请求: {endpoint}")
-            return False
-        
-        # 清理过期的请求记录
-        self._cleanup_old_requests(api_type, current_time)
-        
-        # 检查每秒限制
-        recent_requests = [
-            req_time for req_time in self.request_history[api_type]
-            if (current_time - req_time).total_seconds() <= 1.0
-        ]
-        
-        if len(recent_requests) >= rule.requests_per_second:
-            logger.warning(f"API {api_type.value} 每秒限制已达上限: {len(recent_requests)}/{rule.requests_per_second}")
-            await self._enter_cooldown(api_type, rule.cooldown_seconds)
-            return False
-        
-        # 检查每分钟限制
-        minute_requests = [
-            req_time for req_time in self.request_history[api_type]
-            if (current_time - req_time).total_seconds() <= 60.0
-        ]
-        
-        if len(minute_requests) >= rule.requests_per_minute:
-            logger.warning(f"API {api_type.value} 每分钟限制已达上限: {len(minute_requests)}/{rule.requests_per_minute}")
-            await self._enter_cooldown(api_type, rule.cooldown_seconds * 10)  # 更长冷却时间
-            return False
-        
-        # 检查突发请求限制
-        if self.burst_count[api_type] >= rule.burst_limit:
-            logger.debug(f"API {api_type.value} 突发请求限制，等待冷却")
-            await asyncio.sleep(rule.cooldown_seconds)
-            self.burst_count[api_type] = 0
-        
-        # 检查最小请求间隔
-        endpoint_key = f"{api_type.value}:{endpoint}"
-        if endpoint_key in self.last_request_time:
-            time_diff = (current_time - self.last_request_time[endpoint_key]).total_seconds()
-            if time_diff < rule.cooldown_seconds:
-                wait_time = rule.cooldown_seconds - time_diff
-                logger.debug(f"等待最小间隔: {wait_time:.3f}秒")
-                await asyncio.sleep(wait_time)
-        
-        # 记录请求
-        self.request_history[api_type].append(current_time)
-        self.last_request_time[endpoint_key] = datetime.now()
-        self.burst_count[api_type] += 1
-        
+        return [api_type.value], _API_PRIORITY[api_type]
+
+    async def acquire_permit(self, endpoint: str, priority: Optional[RequestPriority] = None) -> bool:
+        """获取API调用许可（令牌不足时排队等待，始终返回True）"""
+        await self.acquire(endpoint, priority=priority)
         return True
-    
-    def _cleanup_old_requests(self, api_type: APIType, current_time: datetime):
-        """清理过期的请求记录"""
-        cutoff_time = current_time - timedelta(minutes=2)  # 保留2分钟内的记录
-        self.request_history[api_type] = [
-            req_time for req_time in self.request_history[api_type]
-            if req_time > cutoff_time
-        ]
-    
-    async def _enter_cooldown(self, api_type: APIType, duration: float):
-        """进入冷却期"""
-        self.is_cooling_down[api_type] = True
-        logger.warning(f"API {api_type.value} 进入冷却期: {duration}秒")
-        
-        await asyncio.sleep(duration)
-        
-        self.is_cooling_down[api_type] = False
-        self.burst_count[api_type] = 0
-        logger.info(f"API {api_type.value} 冷却期结束")
-    
+
     def get_rate_limit_status(self) -> Dict[str, Dict[str, any]]:
         """获取频率限制状态"""
-        current_time = datetime.now()
-        status = {}
-        
-        for api_type in APIType:
-            rule = self.RATE_LIMITS[api_type]
-            
-            # 统计最近1秒和1分钟的请求数
-            recent_1s = len([
-                req_time for req_time in self.request_history[api_type]
-                if (current_time - req_time).total_seconds() <= 1.0
-            ])
-            
-            recent_1m = len([
-                req_time for req_time in self.request_history[api_type]
-                if (current_time - req_time).total_seconds() <= 60.0
-            ])
-            
-            status[api_type.value] = {
-                'requests_last_second': recent_1s,
-                'requests_last_minute': recent_1m,
-                'limit_per_second': rule.requests_per_second,
-                'limit_per_minute': rule.requests_per_minute,
-                'burst_count': self.burst_count[api_type],
-                'burst_limit': rule.burst_limit,
-                'is_cooling_down': self.is_cooling_down[api_type],
-                'utilization_1s': f"{recent_1s/rule.requests_per_second*100:.1f}%",
-                'utilization_1m': f"{recent_1m/rule.requests_per_minute*100:.1f}%"
-            }
-        
-        return status
-    
-    def reset_limits(self, api_type: Optional[APIType] = None):
-        """重置频率限制计数器"""
-        if api_type:
-            self.request_history[api_type].clear()
-            self.burst_count[api_type] = 0
-            self.is_cooling_down[api_type] = False
-            logger.info(f"已重置 {api_type.value} API限制计数器")
-        else:
-            for at in APIType:
-                self.request_history[at].clear()
-                self.burst_count[at] = 0
-                self.is_cooling_down[at] = False
-            self.last_request_time.clear()
-            logger.info("已重置所有API限制计数器")
+        return self.get_status()['buckets']
 
 
 # 全局频率限制管理器实例
@@ -220,4 +117,4 @@ def get_okx_rate_limiter() -> OKXRateLimiter:
     global _rate_limiter
     if _rate_limiter is None:
         _rate_limiter = OKXRateLimiter()
-    return _rate_limiter
\ No newline at end of file
+    return _rate_limiter
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+交易所通用速率限制器
+Priority-aware, weight-based async rate limiter shared by exchange clients
+
+每个权重类别（如币安期货REQUEST_WEIGHT、下单数、OKX各类接口）一个令牌桶：
+O(1) 获取许可，令牌不足时排队等待而不是拒绝；队列按优先级分道、道内先进先出，
+下单/持仓等关键请求可以插到批量扫描之前。各交易所的限制器在此基础上定义桶和端点分类，
+并可根据响应头（如 X-MBX-USED-WEIGHT-1M）和 Retry-After 校准
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """请求优先级（数值越小越优先）"""
+    CRITICAL = 0  # 下单/撤单
+    HIGH = 1      # 持仓、账户
+    NORMAL = 2    # 常规行情
+    BULK = 3      # 批量扫描、历史回填
+
+
+# 当前任务的默认请求优先级（未显式指定时使用），子任务创建时自动继承
+_current_priority: contextvars.ContextVar[Optional[RequestPriority]] = contextvars.ContextVar(
+    'request_priority', default=None
+)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority):
+    """
+    在上下文内把请求默认优先级设为priority
+    e.g. wrap a scheduled market scan in ``with request_priority(RequestPriority.BULK):``
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@dataclass
+class BucketSpec:
+    """
+    权重类别的限制：interval 秒内最多 limit 权重
+    Refill runs at safety*limit/interval; the burst capacity is the remaining (1-safety)*limit,
+    so a full burst plus a window of steady refill never exceeds limit in a fixed server window
+    """
+    limit: float
+    interval: float
+    safety: float = 0.9
+
+    @property
+    def rate(self) -> float:
+        return self.limit * self.safety / self.interval
+
+    @property
+    def capacity(self) -> float:
+        return max(1.0, self.limit * (1 - self.safety))
+
+
+class WeightBucket:
+    """
+    单个权重类别的令牌桶
+    O(1) fast path when nobody is queued; otherwise strict priority lanes, FIFO within a lane
+    """
+
+    def __init__(self, name: str, spec: BucketSpec):
+        self.name = name
+        self.spec = spec
+        self.rate = spec.rate
+        self.capacity = spec.capacity
+
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+        self._lanes: List[Deque[Tuple[float, asyncio.Future]]] = [deque() for _ in RequestPriority]
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        # 统计
+        self.granted = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.server_used: Optional[int] = None
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _try_take(self, weight: float, now: float) -> float:
+        """尝试扣减令牌，成功返回0，否则返回需要等待的秒数"""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._refill(now)
+        if self.tokens >= weight:
+            self.tokens -= weight
+            return 0.0
+        return (weight - self.tokens) / self.rate
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(lane) for lane in self._lanes)
+
+    async def acquire(self, weight: float = 1, priority: RequestPriority = RequestPriority.NORMAL) -> float:
+        """获取weight个令牌，返回等待秒数"""
+        weight = min(float(weight), self.capacity)
+        started = time.monotonic()
+        self.granted += 1
+
+        # 无人排队时直接扣减，有人排队时必须排队，避免插队
+        if not self.waiting and self._try_take(weight, started) == 0.0:
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append((weight, future))
+        self.queued += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        await future
+        waited = time.monotonic() - started
+        self.total_wait += waited
+        return waited
+
+    def _head(self) -> Optional[Deque[Tuple[float, asyncio.Future]]]:
+        """最高优先级的非空队列（丢弃已取消的等待者）"""
+        for lane in self._lanes:
+            while lane and lane[0][1].done():
+                lane.popleft()
+            if lane:
+                return lane
+        return None
+
+    async def _dispatch(self) -> None:
+        """按优先级依次放行等待者；睡眠期间到达的更高优先级请求会在下一轮被优先放行"""
+        while True:
+            lane = self._head()
+            if lane is None:
+                return
+            weight, future = lane[0]
+            wait = self._try_take(weight, time.monotonic())
+            if wait == 0.0:
+                lane.popleft()
+                future.set_result(None)
+                continue
+            await asyncio.sleep(wait)
+
+    def observe_usage(self, used: int) -> None:
+        """
+        根据服务端统计的已用权重校准
+        Server windows are aligned to the clock, so once the window's headroom is spent we wait for it to roll over
+        """
+        self.server_used = used
+        now = time.monotonic()
+        headroom = self.spec.limit * self.spec.safety - used
+        if headroom <= 0:
+            wall = time.time()
+            window_end = (wall // self.spec.interval + 1) * self.spec.interval
+            self.block(window_end - wall)
+            logger.warning(f"🚦 {self.name} 服务端已用权重 {used}/{self.spec.limit:.0f}，暂停至窗口结束")
+        else:
+            self._refill(now)
+            self.tokens = min(self.tokens, headroom)
+
+    def block(self, seconds: float) -> None:
+        """在seconds秒内暂停放行（如服务端返回Retry-After）"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+    def get_status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            'limit': self.spec.limit,
+            'interval': self.spec.interval,
+            'rate_per_second': round(self.rate, 3),
+            'capacity': round(self.capacity, 2),
+            'tokens': round(self.tokens, 2),
+            'blocked_for': round(max(0.0, self._blocked_until - now), 3),
+            'waiting': {priority.name.lower(): len(self._lanes[priority]) for priority in RequestPriority},
+            'granted': self.granted,
+            'queued': self.queued,
+            'avg_wait': round(self.total_wait / self.queued, 4) if self.queued else 0.0,
+            'server_used': self.server_used
+        }
+
+
+class ExchangeRateLimiter:
+    """
+    交易所速率限制器基类
+    Subclasses declare BUCKETS and map an endpoint to (bucket names, default priority)
+    """
+
+    BUCKETS: Dict[str, BucketSpec] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+        self.buckets: Dict[str, WeightBucket] = {
+            bucket_name: WeightBucket(f"{name}:{bucket_name}", spec)
+            for bucket_name, spec in self.BUCKETS.items()
+        }
+
+    def classify(self, endpoint: str, method: str = 'GET') -> Tuple[List[str], RequestPriority]:
+        """端点 -> (需要扣减的桶, 默认优先级)"""
+        raise NotImplementedError
+
+    async def acquire(
+        self,
+        endpoint: str,
+        weight: float = 1,
+        priority: Optional[RequestPriority] = None,
+        method: str = 'GET'
+    ) -> float:
+        """
+        排队获取请求许可，返回等待秒数
+        Priority falls back to the request_priority() context, then to the endpoint's default
+        """
+        bucket_names, default_priority = self.classify(endpoint, method)
+        if priority is None:
+            priority = _current_priority.get() or default_priority
+
+        waited = 0.0
+        for bucket_name in bucket_names:
+            waited += await self.buckets[bucket_name].acquire(weight, priority)
+        if waited > 1.0:
+            logger.debug(f"🚦 {self.name} {endpoint} 排队 {waited:.2f}秒 (优先级 {priority.name})")
+        return waited
+
+    def penalize(self, seconds: float) -> None:
+        """服务端要求退避（429/418 Retry-After）时暂停全部桶"""
+        logger.warning(f"🚦 {self.name} 服务器要求等待 {seconds} 秒")
+        for bucket in self.buckets.values():
+            bucket.block(seconds)
+
+    def update_from_headers(self, headers: Dict[str, str], endpoint: Optional[str] = None) -> None:
+        """根据响应头校准（默认只处理Retry-After）"""
+        retry_after = _header(headers, 'retry-after')
+        if retry_after is not None:
+            try:
+                self.penalize(float(retry_after))
+            except ValueError:
+                pass
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取限制器状态"""
+        return {
+            'exchange': self.name,
+            'buckets': {name: bucket.get_status() for name, bucket in self.buckets.items()}
+        }
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    """大小写无关地读取响应头（dict(response.headers) 会丢失大小写无关性）"""
+    value = headers.get(name)
+    if value is None:
+        for key, item in headers.items():
+            if key.lower() == name:
+                return item
+    return value
@@ -0,0 +1,773 @@
+# -*- coding: utf-8 -*-
+"""
+增量（流式）技术指标引擎
+Streaming indicator engine - per-(symbol, timeframe) state updated once per closed candle
+
+每个指标保存递推所需的最小状态（上一根EMA/Wilder均值、定长窗口、SuperTrend上下轨等），
+每根收盘K线只做一步递推，不再每次扫描都从头重算整段序列。运算顺序与 indicators.py
+中的批量实现逐步一致，在同一段K线历史上结果逐位相同；状态可导出为纯dict并恢复，
+用于重启后续算或预览未收盘K线。
+
+SMA/布林带对定长窗口重新求和（O(period)，与历史长度无关）：滑动累加和会在末位
+与批量的 sum(window) 产生舍入差异
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.logging import get_logger
+from app.utils.exceptions import IndicatorCalculationError
+
+logger = get_logger(__name__)
+
+
+class StreamingIndicator(ABC):
+    """
+    流式指标基类
+    Subclasses list constructor arguments in PARAMS and recursive state attributes in STATE
+    """
+
+    PARAMS: Tuple[str, ...] = ()
+    STATE: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def update(self, high: float, low: float, close: float) -> None:
+        """输入一根收盘K线"""
+
+    @property
+    @abstractmethod
+    def value(self) -> Any:
+        """最近一根收盘K线上的指标值（未就绪时为None）"""
+
+    def values(self, name: str) -> Dict[str, Any]:
+        """以name为前缀展开的输出"""
+        return {name: self.value}
+
+    def params(self) -> Dict[str, Any]:
+        return {param: getattr(self, param) for param in self.PARAMS}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出状态（窗口转为list，可直接JSON序列化）"""
+        state = {}
+        for attr in self.STATE:
+            item = getattr(self, attr)
+            state[attr] = list(item) if isinstance(item, (deque, list)) else item
+        return {'type': type(self).__name__, 'params': self.params(), 'state': state}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        for attr in self.STATE:
+            current = getattr(self, attr)
+            item = state[attr]
+            if isinstance(current, deque):
+                item = deque((tuple(v) if isinstance(v, list) else v for v in item), maxlen=current.maxlen)
+            elif isinstance(current, list):
+                item = list(item)
+            setattr(self, attr, item)
+
+
+class StreamingSMA(StreamingIndicator):
+    """简单移动平均（与 MovingAverageIndicator.calculate_sma 一致）"""
+
+    PARAMS = ('period',)
+    STATE = ('window',)
+
+    def __init__(self, period: int = 20):
+        if period <= 0:
+            raise ValueError("📊 移动平均周期必须大于0 / Period must be greater than 0")
+        self.period = period
+        self.window: deque = deque(maxlen=period)
+        self._value: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> None:
+        self.push(close)
+
+    def push(self, price: float) -> Optional[float]:
+        self.window.append(price)
+        self._value = sum(self.window) / len(self.window) if len(self.window) == self.period else None
+        return self._value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        super().restore(state)
+        self._value = sum(self.window) / len(self.window) if len(self.window) == self.period else None
+
+
+class StreamingEMA(StreamingIndicator):
+    """指数移动平均，首值为前period个价格的SMA（与 MovingAverageIndicator/MACDIndicator 一致）"""
+
+    PARAMS = ('period',)
+    STATE = ('seed', 'ema')
+
+    def __init__(self, period: int = 20):
+        if period <= 0:
+            raise ValueError("📊 移动平均周期必须大于0 / Period must be greater than 0")
+        self.period = period
+        self.multiplier = 2 / (period + 1)
+        self.seed: List[float] = []
+        self.ema: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> None:
+        self.push(close)
+
+    def push(self, price: float) -> Optional[float]:
+        if self.ema is not None:
+            self.ema = (price * self.multiplier) + (self.ema * (1 - self.multiplier))
+        else:
+            self.seed.append(price)
+            if len(self.seed) == self.period:
+                self.ema = sum(self.seed) / self.period
+                self.seed = []
+        return self.ema
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.ema
+
+
+class StreamingRSI(StreamingIndicator):
+    """RSI：前period个涨跌幅简单平均，之后Wilder平滑（与 RSIIndicator 一致）"""
+
+    PARAMS = ('period',)
+    STATE = ('prev_close', 'gains', 'losses', 'avg_gain', 'avg_loss', 'rsi')
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.gains: List[float] = []
+        self.losses: List[float] = []
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self.rsi: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> None:
+        prev_close, self.prev_close = self.prev_close, close
+        if prev_close is None:
+            return
+
+        change = close - prev_close
+        gain = max(change, 0)
+        loss = abs(min(change, 0))
+
+        if self.avg_gain is None:
+            self.gains.append(gain)
+            self.losses.append(loss)
+            if len(self.gains) < self.period:
+                return
+            self.avg_gain = sum(self.gains) / self.period
+            self.avg_loss = sum(self.losses) / self.period
+            self.gains, self.losses = [], []
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        if self.avg_loss != 0:
+            rs = self.avg_gain / self.avg_loss
+            self.rsi = 100 - (100 / (1 + rs))
+        else:
+            self.rsi = 100
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.rsi
+
+
+class StreamingATR(StreamingIndicator):
+    """ATR：首根TR为 high-low，之后RMA平滑（与 SuperTrendIndicator.calculate_atr 一致）"""
+
+    PARAMS = ('period',)
+    STATE = ('prev_close', 'atr')
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.atr: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> None:
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, max(abs(high - self.prev_close), abs(low - self.prev_close)))
+        if self.atr is None:
+            self.atr = true_range
+        else:
+            self.atr = (self.atr * (self.period - 1) + true_range) / self.period
+        self.prev_close = close
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.atr
+
+
+class StreamingSuperTrend(StreamingIndicator):
+    """
+    SuperTrend（与 SuperTrendIndicator.calculate 一致）
+    Values stay None until `period` bars have been seen, where the batch version starts accepting input
+    """
+
+    PARAMS = ('period', 'multiplier')
+    STATE = ('bars', 'prev_close', 'upper_final', 'lower_final', 'supertrend', 'trend_up')
+
+    def __init__(self, period: int = 10, multiplier: float = 3.0):
+        self.period = period
+        self.multiplier = multiplier
+        self._atr = StreamingATR(period)
+        self.bars = 0
+        self.prev_close: Optional[float] = None
+        self.upper_final: Optional[float] = None
+        self.lower_final: Optional[float] = None
+        self.supertrend: Optional[float] = None
+        self.trend_up: Optional[bool] = None
+
+    def update(self, high: float, low: float, close: float) -> None:
+        self._atr.update(high, low, close)
+        atr = self._atr.atr
+
+        hl2 = (high + low) / 2
+        upper_basic = hl2 + (self.multiplier * atr)
+        lower_basic = hl2 - (self.multiplier * atr)
+
+        if self.bars == 0:
+            self.upper_final = upper_basic
+            self.lower_final = lower_basic
+            self.trend_up = close <= self.lower_final
+        else:
+            if upper_basic < self.upper_final or self.prev_close > self.upper_final:
+                self.upper_final = upper_basic
+            if lower_basic > self.lower_final or self.prev_close < self.lower_final:
+                self.lower_final = lower_basic
+            if self.trend_up:
+                self.trend_up = not close <= self.lower_final
+            else:
+                self.trend_up = close >= self.upper_final
+
+        self.supertrend = self.lower_final if self.trend_up else self.upper_final
+        self.prev_close = close
+        self.bars += 1
+
+    @property
+    def ready(self) -> bool:
+        return self.bars >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.supertrend if self.ready else None
+
+    def values(self, name: str) -> Dict[str, Any]:
+        return {name: self.value, f'{name}_up': self.trend_up if self.ready else None}
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        snapshot['state']['atr'] = self._atr.snapshot()['state']
+        return snapshot
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        super().restore(state)
+        self._atr.restore(state['atr'])
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD：快慢EMA之差，信号线为MACD值的EMA（与 MACDIndicator 一致）"""
+
+    PARAMS = ('fast_period', 'slow_period', 'signal_period')
+    STATE = ('macd', 'signal')
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self.signal_period = signal_period
+        self._fast = StreamingEMA(fast_period)
+        self._slow = StreamingEMA(slow_period)
+        self._signal = StreamingEMA(signal_period)
+        self.macd: Optional[float] = None
+        self.signal: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> None:
+        fast = self._fast.push(close)
+        slow = self._slow.push(close)
+        if fast is not None and slow is not None:
+            self.macd = fast - slow
+            self.signal = self._signal.push(self.macd)
+
+    @property
+    def histogram(self) -> Optional[float]:
+        if self.macd is None or self.signal is None:
+            return None
+        return self.macd - self.signal
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.macd
+
+    def values(self, name: str) -> Dict[str, Any]:
+        return {name: self.macd, f'{name}_signal': self.signal, f'{name}_hist': self.histogram}
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        for part in ('fast', 'slow', 'signal'):
+            snapshot['state'][f'{part}_ema'] = getattr(self, f'_{part}').snapshot()['state']
+        return snapshot
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        super().restore(state)
+        for part in ('fast', 'slow', 'signal'):
+            getattr(self, f'_{part}').restore(state[f'{part}_ema'])
+
+
+class StreamingBollingerBands(StreamingIndicator):
+    """布林带：SMA ± std_dev × 总体标准差（与 BollingerBandsIndicator 一致）"""
+
+    PARAMS = ('period', 'std_dev')
+    STATE = ('window',)
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        if period <= 0:
+            raise ValueError("📊 布林带周期必须大于0 / Period must be greater than 0")
+        self.period = period
+        self.std_dev = std_dev
+        self.window: deque = deque(maxlen=period)
+        self._bands: Dict[str, Optional[float]] = {'upper': None, 'middle': None, 'lower': None}
+
+    def update(self, high: float, low: float, close: float) -> None:
+        self.window.append(close)
+        self._recompute()
+
+    def _recompute(self) -> None:
+        window = self.window
+        if len(window) < self.period:
+            self._bands = {'upper': None, 'middle': None, 'lower': None}
+            return
+        middle = sum(window) / len(window)
+        mean = sum(window) / len(window)
+        variance = sum((x - mean) ** 2 for x in window) / len(window)
+        std = variance ** 0.5
+        self._bands = {
+            'upper': middle + (self.std_dev * std),
+            'middle': middle,
+            'lower': middle - (self.std_dev * std)
+        }
+
+    @property
+    def value(self) -> Dict[str, Optional[float]]:
+        return dict(self._bands)
+
+    def values(self, name: str) -> Dict[str, Any]:
+        return {f'{name}_{band}': value for band, value in self._bands.items()}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        super().restore(state)
+        self._recompute()
+
+
+class StreamingStochastic(StreamingIndicator):
+    """
+    随机指标 %K/%D（与 StochasticIndicator 一致）
+    Window high/low come from monotonic deques, so each bar costs amortized O(1)
+    """
+
+    PARAMS = ('k_period', 'd_period', 'smooth_k')
+    STATE = ('bars', 'highs', 'lows', 'raw_k', 'k_window', 'k', 'd')
+
+    def __init__(self, k_period: int = 14, d_period: int = 3, smooth_k: int = 3):
+        if k_period <= 0 or d_period <= 0 or smooth_k <= 0:
+            raise ValueError("📊 所有周期参数必须大于0 / All period parameters must be greater than 0")
+        self.k_period = k_period
+        self.d_period = d_period
+        self.smooth_k = smooth_k
+        self.bars = 0
+        # (序号, 价格) 单调队列：队首为窗口最高/最低
+        self.highs: deque = deque()
+        self.lows: deque = deque()
+        self.raw_k: deque = deque(maxlen=smooth_k)
+        self.k_window: deque = deque(maxlen=d_period)
+        self.k: Optional[float] = None
+        self.d: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> None:
+        index = self.bars
+        self.bars += 1
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((index, high))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((index, low))
+        oldest = index - self.k_period + 1
+        while self.highs[0][0] < oldest:
+            self.highs.popleft()
+        while self.lows[0][0] < oldest:
+            self.lows.popleft()
+
+        if self.bars < self.k_period:
+            return
+
+        period_high = self.highs[0][1]
+        period_low = self.lows[0][1]
+        if period_high != period_low:
+            raw = ((close - period_low) / (period_high - period_low)) * 100
+        else:
+            raw = 50
+
+        if self.smooth_k > 1:
+            self.raw_k.append(raw)
+            if len(self.raw_k) < self.smooth_k:
+                return
+            self.k = sum(self.raw_k) / len(self.raw_k)
+        else:
+            self.k = raw
+
+        self.k_window.append(self.k)
+        if len(self.k_window) == self.d_period:
+            self.d = sum(self.k_window) / len(self.k_window)
+
+    @property
+    def value(self) -> Dict[str, Optional[float]]:
+        return {'k': self.k, 'd': self.d}
+
+    def values(self, name: str) -> Dict[str, Any]:
+        return {f'{name}_k': self.k, f'{name}_d': self.d}
+
+
+STREAMING_INDICATORS = {
+    cls.__name__: cls for cls in (
+        StreamingSMA, StreamingEMA, StreamingRSI, StreamingATR, StreamingSuperTrend,
+        StreamingMACD, StreamingBollingerBands, StreamingStochastic
+    )
+}
+
+# 默认指标组：输出名与 EnhancedTechnicalAnalysisService 的指标键保持一致
+DEFAULT_INDICATOR_SET: Tuple[Tuple[str, str, Dict[str, Any]], ...] = (
+    ('sma_20', 'StreamingSMA', {'period': 20}),
+    ('sma_50', 'StreamingSMA', {'period': 50}),
+    ('ema_12', 'StreamingEMA', {'period': 12}),
+    ('ema_26', 'StreamingEMA', {'period': 26}),
+    ('macd', 'StreamingMACD', {'fast_period': 12, 'slow_period': 26, 'signal_period': 9}),
+    ('rsi', 'StreamingRSI', {'period': 14}),
+    ('atr', 'StreamingATR', {'period': 14}),
+    ('supertrend', 'StreamingSuperTrend', {'period': 10, 'multiplier': 3.0}),
+    ('bb', 'StreamingBollingerBands', {'period': 20, 'std_dev': 2.0}),
+    ('stoch', 'StreamingStochastic', {'k_period': 14, 'd_period': 3, 'smooth_k': 3}),
+)
+
+
+def _build_indicator(type_name: str, params: Dict[str, Any]) -> StreamingIndicator:
+    indicator_class = STREAMING_INDICATORS.get(type_name)
+    if indicator_class is None:
+        raise IndicatorCalculationError(f"Unknown streaming indicator: {type_name}")
+    return indicator_class(**params)
+
+
+class IndicatorState:
+    """
+    单个 (交易对, 周期) 的指标状态
+    Candles must arrive in open-time order; repeats of the last committed open time are ignored
+    """
+
+    def __init__(self, indicator_set: Sequence[Tuple[str, str, Dict[str, Any]]] = DEFAULT_INDICATOR_SET):
+        self.indicators: Dict[str, StreamingIndicator] = {
+            name: _build_indicator(type_name, params) for name, type_name, params in indicator_set
+        }
+        self.timestamp: Optional[int] = None
+        self.close: Optional[float] = None
+        self.bars = 0
+
+    def update(self, timestamp: int, high: float, low: float, close: float) -> bool:
+        """提交一根收盘K线，返回是否被接收"""
+        if self.timestamp is not None and timestamp <= self.timestamp:
+            return False
+        for indicator in self.indicators.values():
+            indicator.update(high, low, close)
+        self.timestamp = timestamp
+        self.close = close
+        self.bars += 1
+        return True
+
+    def values(self) -> Dict[str, Any]:
+        output = {'timestamp': self.timestamp, 'close': self.close, 'bars': self.bars}
+        for name, indicator in self.indicators.items():
+            output.update(indicator.values(name))
+        return output
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'timestamp': self.timestamp,
+            'close': self.close,
+            'bars': self.bars,
+            'indicators': {name: indicator.snapshot() for name, indicator in self.indicators.items()}
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> 'IndicatorState':
+        indicators = snapshot['indicators']
+        state = cls(tuple((name, item['type'], item['params']) for name, item in indicators.items()))
+        for name, item in indicators.items():
+            state.indicators[name].restore(item['state'])
+        state.timestamp = snapshot['timestamp']
+        state.close = snapshot['close']
+        state.bars = snapshot['bars']
+        return state
+
+    def copy(self) -> 'IndicatorState':
+        return IndicatorState.from_snapshot(self.snapshot())
+
+
+class IndicatorEngine:
+    """
+    增量指标引擎
+    Holds one IndicatorState per (symbol, timeframe), fed from the realtime kline ring buffers
+    """
+
+    def __init__(self, indicator_set: Sequence[Tuple[str, str, Dict[str, Any]]] = DEFAULT_INDICATOR_SET,
+                 warmup_limit: Optional[int] = None):
+        """
+        Args:
+            indicator_set: (输出名, 指标类型, 参数) 列表
+            warmup_limit: 首次预热最多回放的历史K线根数，None表示缓冲区内全部
+        """
+        self.indicator_set = tuple(indicator_set)
+        self.warmup_limit = warmup_limit
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+        # 正在线程池中预热的 (交易对, 周期)，预热完成前跳过其增量同步
+        self._warming: set = set()
+
+        # 统计
+        self.updates = 0
+        self.warmups = 0
+        self.resets = 0
+        self.warmup_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._states
+
+    def state(self, symbol: str, timeframe: str) -> Optional[IndicatorState]:
+        return self._states.get((symbol, timeframe))
+
+    def warm_up(self, symbol: str, timeframe: str, arrays: Dict[str, np.ndarray]) -> IndicatorState:
+        """用收盘K线列数组（timestamp/high/low/close）重建状态"""
+        state, elapsed = self._build_state(arrays)
+        self._install(symbol, timeframe, state, elapsed)
+        return state
+
+    def _build_state(self, arrays: Dict[str, Any]) -> Tuple[IndicatorState, float]:
+        """从头回放构建新状态（不触碰引擎，可在线程池中执行）"""
+        started = time.perf_counter()
+        state = IndicatorState(self.indicator_set)
+        self._replay(state, arrays, 0)
+        return state, time.perf_counter() - started
+
+    def _install(self, symbol: str, timeframe: str, state: IndicatorState, elapsed: float) -> None:
+        self._states[(symbol, timeframe)] = state
+        self.warmups += 1
+        self.warmup_seconds += elapsed
+
+    def warm_up_klines(self, symbol: str, timeframe: str, klines: Iterable[Dict[str, Any]]) -> IndicatorState:
+        """用 get_kline_data 格式的K线列表重建状态（最后一根应为已收盘K线）"""
+        rows = list(klines)
+        arrays = {
+            'timestamp': [_kline_timestamp(k) for k in rows],
+            'high': [float(k['high']) for k in rows],
+            'low': [float(k['low']) for k in rows],
+            'close': [float(k['close']) for k in rows],
+        }
+        return self.warm_up(symbol, timeframe, arrays)
+
+    def update(self, symbol: str, timeframe: str, timestamp: int,
+               high: float, low: float, close: float) -> bool:
+        """提交一根收盘K线；未预热的 (交易对, 周期) 从这根K线开始累积"""
+        key = (symbol, timeframe)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = IndicatorState(self.indicator_set)
+        accepted = state.update(timestamp, high, low, close)
+        if accepted:
+            self.updates += 1
+        return accepted
+
+    def _warmup_arrays(self, symbol: str, timeframe: str,
+                       arrays: Dict[str, np.ndarray]) -> Optional[Dict[str, np.ndarray]]:
+        """
+        需要从头预热时返回用于回放的列数组，增量追平即可时返回None
+        Unknown keys replay the last warmup_limit bars; a state whose last committed bar has been
+        evicted from the buffer has a hole in its history and replays the whole buffer
+        """
+        state = self._states.get((symbol, timeframe))
+        if state is None or state.timestamp is None:
+            if self.warmup_limit:
+                return {column: values[-self.warmup_limit:] for column, values in arrays.items()}
+            return arrays
+        if state.timestamp < int(arrays['timestamp'][0]):
+            logger.debug(f"🔁 {symbol} {timeframe} 指标状态与缓冲区断档，重新预热")
+            self.resets += 1
+            return arrays
+        return None
+
+    def sync(self, symbol: str, timeframe: str, arrays: Dict[str, np.ndarray]) -> int:
+        """
+        按缓冲区的收盘K线追平状态，返回新提交的根数
+        Warm-ups and rebuilds run inline here; realtime managers use schedule_sync instead
+        """
+        timestamps = arrays['timestamp']
+        if not len(timestamps):
+            return 0
+
+        state = self._states.get((symbol, timeframe))
+        if state is not None and state.timestamp is not None and int(timestamps[-1]) <= state.timestamp:
+            return 0
+        warmup = self._warmup_arrays(symbol, timeframe, arrays)
+        if warmup is not None:
+            return self.warm_up(symbol, timeframe, warmup).bars
+
+        start = int(np.searchsorted(timestamps, state.timestamp, side='right'))
+        applied = self._replay(state, arrays, start)
+        self.updates += applied
+        return applied
+
+    def schedule_sync(self, symbol: str, timeframe: str, arrays: Dict[str, np.ndarray]) -> int:
+        """
+        WebSocket消息路径上的同步：增量追平在当前协程内完成（每根收盘K线一步递推），
+        需要从头预热/重建时把列数组拷贝一份交给线程池回放，完成后再装入状态，
+        期间该 (交易对, 周期) 的推送只写缓冲区，预热装入后的下一次同步会补齐这段K线
+
+        Must be called from the event loop thread. Returns the number of bars committed inline
+        """
+        key = (symbol, timeframe)
+        timestamps = arrays['timestamp']
+        if key in self._warming or not len(timestamps):
+            return 0
+
+        state = self._states.get(key)
+        if state is not None and state.timestamp is not None and int(timestamps[-1]) <= state.timestamp:
+            return 0
+        warmup = self._warmup_arrays(symbol, timeframe, arrays)
+        if warmup is None:
+            return self.sync(symbol, timeframe, arrays)
+
+        # 缓冲区视图会被后续推送原地覆盖，交给线程前先拷贝
+        snapshot = {column: np.array(values) for column, values in warmup.items()}
+        self._warming.add(key)
+        future = asyncio.get_running_loop().run_in_executor(None, self._build_state, snapshot)
+        future.add_done_callback(lambda done: self._on_warm_up_done(symbol, timeframe, done))
+        return 0
+
+    def _on_warm_up_done(self, symbol: str, timeframe: str, future: 'asyncio.Future') -> None:
+        """线程池预热完成回调（在事件循环线程中执行）"""
+        key = (symbol, timeframe)
+        if key not in self._warming:
+            # 预热期间已被 remove/clear，丢弃结果
+            return
+        self._warming.discard(key)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"❌ {symbol} {timeframe} 指标预热失败: {error}")
+            return
+        state, elapsed = future.result()
+        self._install(symbol, timeframe, state, elapsed)
+        logger.debug(f"🔥 {symbol} {timeframe} 指标预热完成: {state.bars} 根K线, {elapsed * 1000:.1f}ms")
+
+    @staticmethod
+    def _replay(state: IndicatorState, arrays: Dict[str, Any], start: int) -> int:
+        timestamps = arrays['timestamp']
+        highs, lows, closes = arrays['high'], arrays['low'], arrays['close']
+        applied = 0
+        for i in range(start, len(timestamps)):
+            if state.update(int(timestamps[i]), float(highs[i]), float(lows[i]), float(closes[i])):
+                applied += 1
+        return applied
+
+    def latest(self, symbol: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """最近一根收盘K线上的指标值"""
+        state = self._states.get((symbol, timeframe))
+        return state.values() if state is not None and state.bars else None
+
+    def preview(self, symbol: str, timeframe: str, timestamp: int,
+                high: float, low: float, close: float) -> Optional[Dict[str, Any]]:
+        """把未收盘K线当作收盘计算一次指标值，不改变已提交状态"""
+        state = self._states.get((symbol, timeframe))
+        if state is None:
+            return None
+        scratch = state.copy()
+        if not scratch.update(timestamp, high, low, close):
+            return None
+        return scratch.values()
+
+    def current(self, symbol: str, timeframe: str, arrays: Dict[str, np.ndarray],
+                last_confirmed: bool) -> Optional[Dict[str, Any]]:
+        """
+        缓冲区最后一根K线上的指标值：已收盘取已提交状态，未收盘则在状态副本上预览
+        Returns None unless the committed state sits exactly on the buffer's last closed bar
+        (not warmed up yet, still warming, or behind) so callers can fall back to a batch calculation
+
+        Args:
+            arrays: 缓冲区最近的K线（至少包含最后一根收盘K线及其后的未收盘K线）
+            last_confirmed: 缓冲区最后一根是否已收盘
+        """
+        state = self._states.get((symbol, timeframe))
+        timestamps = arrays['timestamp']
+        if state is None or not state.bars or (symbol, timeframe) in self._warming:
+            return None
+
+        closed_count = len(timestamps) if last_confirmed else len(timestamps) - 1
+        if closed_count <= 0 or int(timestamps[closed_count - 1]) != state.timestamp:
+            return None
+        if last_confirmed:
+            return state.values()
+        return self.preview(symbol, timeframe, int(timestamps[-1]), float(arrays['high'][-1]),
+                            float(arrays['low'][-1]), float(arrays['close'][-1]))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出全部状态（可JSON序列化）"""
+        return {
+            f"{symbol}|{timeframe}": state.snapshot()
+            for (symbol, timeframe), state in self._states.items()
+        }
+
+    def restore(self, snapshot: Dict[str, Any]) -> int:
+        """从 snapshot() 的结果恢复，返回恢复的 (交易对, 周期) 数量"""
+        restored = 0
+        for key, item in snapshot.items():
+            symbol, _, timeframe = key.rpartition('|')
+            try:
+                self._states[(symbol, timeframe)] = IndicatorState.from_snapshot(item)
+                restored += 1
+            except (KeyError, TypeError, ValueError, IndicatorCalculationError) as e:
+                logger.warning(f"⚠️ 恢复指标状态失败 {key}: {e}")
+        return restored
+
+    def remove(self, symbol: str, timeframe: Optional[str] = None) -> None:
+        for key in [key for key in self._states if key[0] == symbol and timeframe in (None, key[1])]:
+            del self._states[key]
+        self._warming = {key for key in self._warming if not (key[0] == symbol and timeframe in (None, key[1]))}
+
+    def clear(self) -> None:
+        self._states.clear()
+        self._warming.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'states': len(self._states),
+            'updates': self.updates,
+            'warmups': self.warmups,
+            'resets': self.resets,
+            'warming': len(self._warming),
+            'avg_warmup_ms': round(self.warmup_seconds / self.warmups * 1000, 3) if self.warmups else 0.0
+        }
+
+
+def _kline_timestamp(kline: Dict[str, Any]) -> int:
+    """K线开盘时间（毫秒），兼容datetime/字符串时间戳"""
+    value = kline.get('timestamp', kline.get('ts', 0))
+    if hasattr(value, 'timestamp'):
+        return int(value.timestamp() * 1000)
+    return int(float(value))
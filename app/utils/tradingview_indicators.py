@@ -10,6 +10,8 @@ from typing import List, Dict, Any
 
 from app.core.logging import get_logger
 from app.utils.exceptions import IndicatorCalculationError
+from app.utils.indicator_kernels import supertrend_bands, supertrend_direction
+from app.utils.market_structure import cluster_levels_by_window, split_support_resistance, swing_mask
 
 logger = get_logger(__name__)
 
@@ -108,48 +110,18 @@ class EnhancedSuperTrend:
             lower_basic = hl2 - (self.factor * atr)
             
             # 计算最终上下轨
-            upper_final = pd.Series(index=df.index, dtype=float)
-            lower_final = pd.Series(index=df.index, dtype=float)
-            
-            for i in range(len(df)):
-                if i == 0:
-                    upper_final.iloc[i] = upper_basic.iloc[i]
-                    lower_final.iloc[i] = lower_basic.iloc[i]
-                else:
-                    # 上轨计算
-                    if (upper_basic.iloc[i] < upper_final.iloc[i-1] or 
-                        close.iloc[i-1] > upper_final.iloc[i-1]):
-                        upper_final.iloc[i] = upper_basic.iloc[i]
-                    else:
-                        upper_final.iloc[i] = upper_final.iloc[i-1]
-                    
-                    # 下轨计算
-                    if (lower_basic.iloc[i] > lower_final.iloc[i-1] or 
-                        close.iloc[i-1] < lower_final.iloc[i-1]):
-                        lower_final.iloc[i] = lower_basic.iloc[i]
-                    else:
-                        lower_final.iloc[i] = lower_final.iloc[i-1]
-            
-            # 计算SuperTrend
-            supertrend = pd.Series(index=df.index, dtype=float)
-            direction = pd.Series(index=df.index, dtype=bool)
+            upper_values, lower_values = supertrend_bands(
+                upper_basic.to_numpy(dtype=float), lower_basic.to_numpy(dtype=float), close.to_numpy(dtype=float)
+            )
             
-            for i in range(len(df)):
-                if i == 0:
-                    if close.iloc[i] <= lower_final.iloc[i]:
-                        supertrend.iloc[i] = lower_final.iloc[i]
-                        direction.iloc[i] = True
-                    else:
-                        supertrend.iloc[i] = upper_final.iloc[i]
-                        direction.iloc[i] = False
-                else:
-                    if ((direction.iloc[i-1] and close.iloc[i] > lower_final.iloc[i]) or
-                        (not direction.iloc[i-1] and close.iloc[i] > upper_final.iloc[i])):
-                        supertrend.iloc[i] = lower_final.iloc[i]
-                        direction.iloc[i] = True
-                    else:
-                        supertrend.iloc[i] = upper_final.iloc[i]
-                        direction.iloc[i] = False
+            # 计算SuperTrend（下跌趋势中收盘价需严格突破上轨才翻多）
+            supertrend_values, direction_values = supertrend_direction(
+                close.to_numpy(dtype=float), upper_values, lower_values, inclusive=False
+            )
+            upper_final = pd.Series(upper_values, index=df.index)
+            lower_final = pd.Series(lower_values, index=df.index)
+            supertrend = pd.Series(supertrend_values, index=df.index)
+            direction = pd.Series(direction_values, index=df.index)
             
             # 添加到结果DataFrame
             result_df['atr'] = atr
@@ -356,41 +328,9 @@ class MarketStructureIndicator:
         try:
             result_df = df.copy()
             
-            # 寻找摆动高点
-            swing_highs = []
-            swing_lows = []
-            
-            for i in range(window, len(df) - window):
-                # 检查是否为摆动高点
-                is_swing_high = True
-                current_high = df['high'].iloc[i]
-                
-                for j in range(i - window, i + window + 1):
-                    if j != i and df['high'].iloc[j] >= current_high:
-                        is_swing_high = False
-                        break
-                
-                if is_swing_high:
-                    swing_highs.append(i)
-                
-                # 检查是否为摆动低点
-                is_swing_low = True
-                current_low = df['low'].iloc[i]
-                
-                for j in range(i - window, i + window + 1):
-                    if j != i and df['low'].iloc[j] <= current_low:
-                        is_swing_low = False
-                        break
-                
-                if is_swing_low:
-                    swing_lows.append(i)
-            
-            # 标记摆动点
-            result_df['swing_high'] = False
-            result_df['swing_low'] = False
-            
-            result_df.loc[swing_highs, 'swing_high'] = True
-            result_df.loc[swing_lows, 'swing_low'] = True
+            # 摆动高低点：严格高于/低于左右各window根K线（滚动极值比较，O(n)）
+            result_df['swing_high'] = swing_mask(df['high'].to_numpy(dtype=float), window, 'high')
+            result_df['swing_low'] = swing_mask(df['low'].to_numpy(dtype=float), window, 'low')
             
             return result_df
             
@@ -411,50 +351,31 @@ class MarketStructureIndicator:
             支撑阻力位字典
         """
         try:
-            # 获取摆动点
-            swing_df = MarketStructureIndicator.find_swing_points(df)
-            
-            # 提取摆动高点和低点的价格
-            swing_high_prices = swing_df.loc[swing_df['swing_high'], 'high'].tolist()
-            swing_low_prices = swing_df.loc[swing_df['swing_low'], 'low'].tolist()
+            # 获取摆动点（已由 find_swing_points 标记时直接复用）
+            if 'swing_high' in df.columns and 'swing_low' in df.columns:
+                swing_df = df
+            else:
+                swing_df = MarketStructureIndicator.find_swing_points(df)
             
-            # 合并所有关键价格
-            all_prices = swing_high_prices + swing_low_prices
+            # 提取摆动高点和低点的价格，合并所有关键价格
+            all_prices = np.concatenate([
+                swing_df['high'].to_numpy(dtype=float)[swing_df['swing_high'].to_numpy(dtype=bool)],
+                swing_df['low'].to_numpy(dtype=float)[swing_df['swing_low'].to_numpy(dtype=bool)]
+            ])
             
-            if not all_prices:
+            if not len(all_prices):
                 return {'support': [], 'resistance': []}
             
             # 价格聚类（寻找相近的价格水平）
-            price_tolerance = (max(all_prices) - min(all_prices)) * 0.01  # 1%容差
-            
-            support_levels = []
-            resistance_levels = []
+            price_tolerance = (all_prices.max() - all_prices.min()) * 0.01  # 1%容差
+            levels, _ = cluster_levels_by_window(all_prices, price_tolerance, min_touches)
             
-            # 简化的聚类算法
-            processed_prices = set()
-            
-            for price in sorted(all_prices):
-                if price in processed_prices:
-                    continue
-                
-                # 找到相近的价格
-                cluster = [p for p in all_prices if abs(p - price) <= price_tolerance]
-                
-                if len(cluster) >= min_touches:
-                    avg_price = sum(cluster) / len(cluster)
-                    
-                    # 判断是支撑还是阻力
-                    current_price = df['close'].iloc[-1]
-                    if avg_price < current_price:
-                        support_levels.append(avg_price)
-                    else:
-                        resistance_levels.append(avg_price)
-                
-                processed_prices.update(cluster)
+            # 判断是支撑还是阻力
+            support_levels, resistance_levels = split_support_resistance(levels, df['close'].iloc[-1])
             
             return {
-                'support': sorted(support_levels, reverse=True)[:5],  # 最近的5个支撑位
-                'resistance': sorted(resistance_levels)[:5]  # 最近的5个阻力位
+                'support': support_levels[:5].tolist(),  # 最近的5个支撑位
+                'resistance': resistance_levels[:5].tolist()  # 最近的5个阻力位
             }
             
         except Exception as e:
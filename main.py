@@ -1152,8 +1152,9 @@ async def lifespan(app: FastAPI):
         try:
             # 清理 Kronos 服务
             if hasattr(app.state, 'kronos_service') and app.state.kronos_service:
-                # Kronos 服务通常不需要特殊清理
-                pass
+                # 关闭独立推理工作进程（未启用时为空操作）
+                from app.services.ml.kronos_worker_pool import shutdown_kronos_worker_pool
+                await shutdown_kronos_worker_pool()
             
             # 清理 ML 服务
             if hasattr(app.state, 'ml_service') and app.state.ml_service:
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+递推指标内核一致性校验脚本
+Indicator Kernel Parity - 对比 app/utils/indicator_kernels.py 与改写前的逐元素循环
+
+用法:
+    python scripts/indicator_kernel_parity.py
+    python scripts/indicator_kernel_parity.py --bars 3000 --runs 20 --seed 7
+
+下面的 reference_* 函数是改写前 SuperTrendIndicator.calculate_atr/calculate、
+EnhancedSuperTrend.calculate 与 AdaptiveOptimizer._evaluate_supertrend_performance
+的原始循环（逐字保留）。对每个可用后端（numba / numpy逐行 / numpy行向量化），要求：
+- 三处调用方的输出与原始循环逐位相等（==，不设容差）
+- 二维接口一次算出的参数网格 / 多交易对结果与逐行调用原始循环逐位相等
+最后给出原始循环与内核在整个参数网格上的耗时对比
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from app.utils import indicator_kernels  # noqa: E402
+from app.utils.indicator_kernels import parameter_grid, supertrend  # noqa: E402
+from app.utils.indicators import SuperTrendIndicator  # noqa: E402
+from app.utils.tradingview_indicators import EnhancedSuperTrend, TradingViewIndicators  # noqa: E402
+
+PERIODS = [7, 10, 14, 21]
+MULTIPLIERS = [2.0, 2.5, 3.0, 3.5, 4.0]
+
+
+# ========== 改写前的原始实现 ==========
+
+def reference_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    tr1 = high - low
+    tr2 = np.abs(high - np.roll(close, 1))
+    tr3 = np.abs(low - np.roll(close, 1))
+    tr2[0] = high[0] - low[0]
+    tr3[0] = high[0] - low[0]
+    true_range = np.maximum(tr1, np.maximum(tr2, tr3))
+    atr = np.zeros_like(true_range)
+    atr[0] = true_range[0]
+    for i in range(1, len(true_range)):
+        atr[i] = (atr[i-1] * (period - 1) + true_range[i]) / period
+    return atr
+
+
+def reference_supertrend(high: List[float], low: List[float], close: List[float],
+                         period: int, multiplier: float) -> Tuple[List[float], List[bool]]:
+    high_arr = np.array(high, dtype=float)
+    low_arr = np.array(low, dtype=float)
+    close_arr = np.array(close, dtype=float)
+    atr = reference_atr(high_arr, low_arr, close_arr, period)
+    hl2 = (high_arr + low_arr) / 2
+    upper_basic = hl2 + (multiplier * atr)
+    lower_basic = hl2 - (multiplier * atr)
+    upper_final = np.zeros_like(upper_basic)
+    lower_final = np.zeros_like(lower_basic)
+    upper_final[0] = upper_basic[0]
+    lower_final[0] = lower_basic[0]
+    for i in range(1, len(close_arr)):
+        if upper_basic[i] < upper_final[i-1] or close_arr[i-1] > upper_final[i-1]:
+            upper_final[i] = upper_basic[i]
+        else:
+            upper_final[i] = upper_final[i-1]
+        if lower_basic[i] > lower_final[i-1] or close_arr[i-1] < lower_final[i-1]:
+            lower_final[i] = lower_basic[i]
+        else:
+            lower_final[i] = lower_final[i-1]
+    supertrend_arr = np.zeros_like(close_arr)
+    trend_up = np.zeros(len(close_arr), dtype=bool)
+    if close_arr[0] <= lower_final[0]:
+        supertrend_arr[0] = lower_final[0]
+        trend_up[0] = True
+    else:
+        supertrend_arr[0] = upper_final[0]
+        trend_up[0] = False
+    for i in range(1, len(close_arr)):
+        if trend_up[i-1]:
+            if close_arr[i] <= lower_final[i]:
+                supertrend_arr[i] = upper_final[i]
+                trend_up[i] = False
+            else:
+                supertrend_arr[i] = lower_final[i]
+                trend_up[i] = True
+        else:
+            if close_arr[i] >= upper_final[i]:
+                supertrend_arr[i] = lower_final[i]
+                trend_up[i] = True
+            else:
+                supertrend_arr[i] = upper_final[i]
+                trend_up[i] = False
+    return supertrend_arr.tolist(), trend_up.tolist()
+
+
+def reference_enhanced_supertrend(df: pd.DataFrame, atr_period: int, factor: float) -> pd.DataFrame:
+    result_df = df.copy()
+    high = df['high']
+    low = df['low']
+    close = df['close']
+    tr1 = high - low
+    tr2 = abs(high - close.shift(1))
+    tr3 = abs(low - close.shift(1))
+    true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    atr = TradingViewIndicators.pine_rma(true_range, atr_period)
+    hl2 = (high + low) / 2
+    upper_basic = hl2 + (factor * atr)
+    lower_basic = hl2 - (factor * atr)
+    upper_final = pd.Series(index=df.index, dtype=float)
+    lower_final = pd.Series(index=df.index, dtype=float)
+    for i in range(len(df)):
+        if i == 0:
+            upper_final.iloc[i] = upper_basic.iloc[i]
+            lower_final.iloc[i] = lower_basic.iloc[i]
+        else:
+            if (upper_basic.iloc[i] < upper_final.iloc[i-1] or
+                    close.iloc[i-1] > upper_final.iloc[i-1]):
+                upper_final.iloc[i] = upper_basic.iloc[i]
+            else:
+                upper_final.iloc[i] = upper_final.iloc[i-1]
+            if (lower_basic.iloc[i] > lower_final.iloc[i-1] or
+                    close.iloc[i-1] < lower_final.iloc[i-1]):
+                lower_final.iloc[i] = lower_basic.iloc[i]
+            else:
+                lower_final.iloc[i] = lower_final.iloc[i-1]
+    supertrend_series = pd.Series(index=df.index, dtype=float)
+    direction = pd.Series(index=df.index, dtype=bool)
+    for i in range(len(df)):
+        if i == 0:
+            if close.iloc[i] <= lower_final.iloc[i]:
+                supertrend_series.iloc[i] = lower_final.iloc[i]
+                direction.iloc[i] = True
+            else:
+                supertrend_series.iloc[i] = upper_final.iloc[i]
+                direction.iloc[i] = False
+        else:
+            if ((direction.iloc[i-1] and close.iloc[i] > lower_final.iloc[i]) or
+                    (not direction.iloc[i-1] and close.iloc[i] > upper_final.iloc[i])):
+                supertrend_series.iloc[i] = lower_final.iloc[i]
+                direction.iloc[i] = True
+            else:
+                supertrend_series.iloc[i] = upper_final.iloc[i]
+                direction.iloc[i] = False
+    result_df['atr'] = atr
+    result_df['supertrend_upper'] = upper_final
+    result_df['supertrend_lower'] = lower_final
+    result_df['supertrend'] = supertrend_series
+    result_df['supertrend_direction'] = direction
+    result_df['trend_change'] = direction != direction.shift(1)
+    result_df['bullish_signal'] = direction & (direction != direction.shift(1))
+    result_df['bearish_signal'] = ~direction & (direction != direction.shift(1))
+    return result_df
+
+
+def reference_optimizer_atr(data: pd.DataFrame, period: int) -> pd.Series:
+    high_low = data['high_price'] - data['low_price']
+    high_close = np.abs(data['high_price'] - data['close_price'].shift())
+    low_close = np.abs(data['low_price'] - data['close_price'].shift())
+    true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    return true_range.rolling(window=period).mean()
+
+
+def reference_optimizer_score(data: pd.DataFrame, period: int, multiplier: float) -> float:
+    try:
+        hl2 = (data['high_price'] + data['low_price']) / 2
+        atr = reference_optimizer_atr(data, period)
+        upper_band = hl2 + (multiplier * atr)
+        lower_band = hl2 - (multiplier * atr)
+        trend = pd.Series(index=data.index, dtype=float)
+        for i in range(1, len(data)):
+            if data['close_price'].iloc[i] > upper_band.iloc[i-1]:
+                trend.iloc[i] = 1
+            elif data['close_price'].iloc[i] < lower_band.iloc[i-1]:
+                trend.iloc[i] = -1
+            else:
+                trend.iloc[i] = trend.iloc[i-1] if i > 0 else 0
+        returns = data['close_price'].pct_change()
+        strategy_returns = trend.shift(1) * returns
+        if strategy_returns.std() > 0:
+            return max(0, strategy_returns.mean() / strategy_returns.std() * np.sqrt(24))
+        return 0
+    except Exception:
+        return 0
+
+
+# ========== 校验 ==========
+
+def generate_candles(bars: int, seed: int) -> Tuple[List[float], List[float], List[float]]:
+    """随机游走K线（含少量平盘K线和跳空）"""
+    rng = random.Random(seed)
+    price = rng.uniform(0.01, 50000)
+    highs, lows, closes = [], [], []
+    for _ in range(bars):
+        if rng.random() < 0.02:
+            highs.append(price)
+            lows.append(price)
+            closes.append(price)
+            continue
+        open_ = price
+        price = max(price * (1 + rng.gauss(0, 0.01) + (rng.gauss(0, 0.05) if rng.random() < 0.01 else 0)), 1e-8)
+        highs.append(max(open_, price) * (1 + abs(rng.gauss(0, 0.003))))
+        lows.append(min(open_, price) * (1 - abs(rng.gauss(0, 0.003))))
+        closes.append(price)
+    return highs, lows, closes
+
+
+def _same(a, b) -> bool:
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    return a.shape == b.shape and bool(np.all((a == b) | (np.isnan(a) & np.isnan(b))))
+
+
+def check_run(bars: int, seed: int) -> List[str]:
+    highs, lows, closes = generate_candles(bars, seed)
+    high, low, close = (np.array(v) for v in (highs, lows, closes))
+    failures = []
+
+    # SuperTrendIndicator
+    for period, multiplier in [(10, 3.0), (14, 2.0), (7, 4.5)]:
+        indicator = SuperTrendIndicator(period, multiplier)
+        if not _same(indicator.calculate_atr(high, low, close), reference_atr(high, low, close, period)):
+            failures.append(f"seed={seed} calculate_atr period={period}")
+        if indicator.calculate(highs, lows, closes) != reference_supertrend(highs, lows, closes, period, multiplier):
+            failures.append(f"seed={seed} SuperTrendIndicator.calculate ({period}, {multiplier})")
+
+    # EnhancedSuperTrend
+    df = pd.DataFrame({'high': highs, 'low': lows, 'close': closes})
+    try:
+        pd.testing.assert_frame_equal(EnhancedSuperTrend(10, 3.0).calculate(df),
+                                      reference_enhanced_supertrend(df, 10, 3.0), check_exact=True)
+    except AssertionError as e:
+        failures.append(f"seed={seed} EnhancedSuperTrend: {str(e).splitlines()[0]}")
+
+    # 参数网格：一次调用 vs 逐组原始循环
+    period_grid, multiplier_grid = parameter_grid(PERIODS, MULTIPLIERS)
+    grid = supertrend(high, low, close, period_grid, multiplier_grid)
+    for row, (period, multiplier) in enumerate(zip(period_grid, multiplier_grid)):
+        values, trend_up = reference_supertrend(highs, lows, closes, int(period), float(multiplier))
+        if not (_same(grid['supertrend'][row], values) and grid['trend_up'][row].tolist() == trend_up):
+            failures.append(f"seed={seed} supertrend grid row ({period}, {multiplier})")
+
+    # 多交易对（不等长，左侧补NaN）：一次调用 vs 逐个原始循环
+    lengths = [bars, bars // 2, bars // 3]
+    matrix = [np.full((len(lengths), bars), np.nan) for _ in range(3)]
+    for row, length in enumerate(lengths):
+        for column, values in zip(matrix, (high, low, close)):
+            column[row, bars - length:] = values[-length:]
+    panel = supertrend(*matrix, 10, 3.0)
+    for row, length in enumerate(lengths):
+        values, trend_up = reference_supertrend(highs[-length:], lows[-length:], closes[-length:], 10, 3.0)
+        if not (_same(panel['supertrend'][row, bars - length:], values)
+                and panel['trend_up'][row, bars - length:].tolist() == trend_up
+                and np.isnan(panel['supertrend'][row, :bars - length]).all()):
+            failures.append(f"seed={seed} supertrend panel row length={length}")
+    return failures
+
+
+def check_optimizer(bars: int, seed: int) -> List[str]:
+    """AdaptiveOptimizer 依赖 sklearn 等ML依赖，未安装时跳过"""
+    try:
+        from app.services.ml.ml_enhanced_service import AdaptiveOptimizer
+    except Exception as e:
+        print(f"⚠️ 跳过 AdaptiveOptimizer 校验: {e}")
+        return []
+
+    highs, lows, closes = generate_candles(bars, seed)
+    data = pd.DataFrame({'high_price': highs, 'low_price': lows, 'close_price': closes})
+    scores = AdaptiveOptimizer()._evaluate_supertrend_grid(data, PERIODS, MULTIPLIERS)
+    expected = [reference_optimizer_score(data, p, m) for p in PERIODS for m in MULTIPLIERS]
+    if scores != expected:
+        return [f"seed={seed} AdaptiveOptimizer scores: kernel={scores} reference={expected}"]
+    return []
+
+
+def _timed(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def benchmark(bars: int, seed: int, label: str) -> None:
+    highs, lows, closes = generate_candles(bars, seed)
+    high, low, close = (np.array(v) for v in (highs, lows, closes))
+    period_grid, multiplier_grid = parameter_grid(PERIODS, MULTIPLIERS)
+    # 预热（numba首次调用需要编译）
+    supertrend(high, low, close, period_grid, multiplier_grid)
+
+    loop_ms = _timed(lambda: [reference_supertrend(highs, lows, closes, int(p), float(m))
+                              for p, m in zip(period_grid, multiplier_grid)])
+    kernel_ms = _timed(lambda: supertrend(high, low, close, period_grid, multiplier_grid))
+    print(f"SuperTrend {len(period_grid)} 组参数 × {bars} 根: 原始循环 {loop_ms:.1f} ms, "
+          f"{label} 内核 {kernel_ms:.2f} ms ({loop_ms / kernel_ms:.0f}x)")
+
+    df = pd.DataFrame({'high': highs, 'low': lows, 'close': closes})
+    loop_ms = _timed(lambda: reference_enhanced_supertrend(df, 10, 3.0))
+    kernel_ms = _timed(lambda: EnhancedSuperTrend(10, 3.0).calculate(df))
+    print(f"EnhancedSuperTrend {bars} 根: 原始循环 {loop_ms:.1f} ms, {label} 内核 {kernel_ms:.2f} ms "
+          f"({loop_ms / kernel_ms:.0f}x)")
+
+
+def _configurations() -> List[Tuple[str, str, int]]:
+    """(名称, 后端, VECTORIZE_MIN_ROWS)：numpy后端的逐行标量路径和行向量化路径分别校验"""
+    configurations = [
+        ('numpy', 'numpy', indicator_kernels.VECTORIZE_MIN_ROWS),
+        ('numpy-vectorized', 'numpy', 1),
+    ]
+    if indicator_kernels.numba is not None:
+        configurations.append(('numba', 'numba', indicator_kernels.VECTORIZE_MIN_ROWS))
+    return configurations
+
+
+def _use(backend: str, min_rows: int) -> None:
+    indicator_kernels.KERNEL_BACKEND = backend
+    indicator_kernels.VECTORIZE_MIN_ROWS = min_rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='递推指标内核一致性校验')
+    parser.add_argument('--bars', type=int, default=1000)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    defaults = (indicator_kernels.KERNEL_BACKEND, indicator_kernels.VECTORIZE_MIN_ROWS)
+    configurations = _configurations()
+    failures = []
+    for name, backend, min_rows in configurations:
+        _use(backend, min_rows)
+        for run in range(args.runs):
+            failures.extend(f"[{name}] {line}" for line in check_run(args.bars, args.seed + run))
+        failures.extend(f"[{name}] {line}" for line in check_optimizer(min(args.bars, 500), args.seed))
+    _use(*defaults)
+
+    if failures:
+        print(f"❌ 发现 {len(failures)} 处不一致:")
+        for line in failures[:20]:
+            print(f"  {line}")
+        return 1
+
+    print(f"✅ {'/'.join(name for name, _, _ in configurations)}: "
+          f"{args.runs} 组 × {args.bars} 根K线与原始循环逐位一致")
+    for name, backend, min_rows in configurations:
+        _use(backend, min_rows)
+        benchmark(args.bars, args.seed, name)
+    _use(*defaults)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
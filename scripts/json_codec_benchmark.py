@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+JSON编解码基准脚本
+JSON Codec Benchmark - 对比标准库json、当前编解码后端与类型化解码的推送解码吞吐
+
+用法:
+    python scripts/json_codec_benchmark.py
+    python scripts/json_codec_benchmark.py --capture captures/binance_stream.jsonl --repeat 5
+    python scripts/json_codec_benchmark.py --symbols 300 --frames 20000
+
+--capture 为逐行记录的组合流原始帧（{"stream": ..., "data": ...}，每行一帧）；
+未提供时按币安期货推送格式生成 kline/ticker/markPrice/!markPrice@arr 帧
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from app.utils import json_codec  # noqa: E402
+from app.utils.json_codec import (  # noqa: E402
+    BinanceKlineEvent, BinanceMarkPriceEvent, BinanceTickerEvent, decode_typed
+)
+
+
+def _price(rng: random.Random, base: float) -> str:
+    return f"{base * (1 + rng.uniform(-0.01, 0.01)):.4f}"
+
+
+def generate_frames(symbols: int, frames: int, seed: int) -> List[bytes]:
+    """按币安期货推送格式生成组合流帧"""
+    rng = random.Random(seed)
+    names = [f"COIN{i}USDT" for i in range(symbols)]
+    bases = {name: rng.uniform(0.01, 50000) for name in names}
+    now = 1_700_000_000_000
+
+    def mark_price(name: str, event_time: int) -> Dict:
+        return {
+            'e': 'markPriceUpdate', 'E': event_time, 's': name, 'p': _price(rng, bases[name]),
+            'i': _price(rng, bases[name]), 'P': _price(rng, bases[name]),
+            'r': f"{rng.uniform(-0.001, 0.001):.8f}", 'T': now + 8 * 3_600_000
+        }
+
+    output = []
+    for index in range(frames):
+        name = rng.choice(names)
+        event_time = now + index * 10
+        kind = rng.random()
+        if kind < 0.5:
+            base = bases[name]
+            stream = f"{name.lower()}@kline_1m"
+            data = {
+                'e': 'kline', 'E': event_time, 's': name,
+                'k': {
+                    't': event_time // 60_000 * 60_000, 'T': event_time // 60_000 * 60_000 + 59_999,
+                    's': name, 'i': '1m', 'f': index, 'L': index + 10,
+                    'o': _price(rng, base), 'c': _price(rng, base), 'h': _price(rng, base), 'l': _price(rng, base),
+                    'v': f"{rng.uniform(0, 1e4):.3f}", 'n': rng.randint(1, 500), 'x': rng.random() < 0.02,
+                    'q': f"{rng.uniform(0, 1e7):.2f}", 'V': f"{rng.uniform(0, 1e4):.3f}",
+                    'Q': f"{rng.uniform(0, 1e7):.2f}", 'B': '0'
+                }
+            }
+        elif kind < 0.8:
+            base = bases[name]
+            stream = f"{name.lower()}@ticker"
+            data = {
+                'e': '24hrTicker', 'E': event_time, 's': name, 'p': f"{rng.uniform(-100, 100):.4f}",
+                'P': f"{rng.uniform(-10, 10):.3f}", 'w': _price(rng, base), 'c': _price(rng, base),
+                'Q': f"{rng.uniform(0, 10):.3f}", 'o': _price(rng, base), 'h': _price(rng, base),
+                'l': _price(rng, base), 'v': f"{rng.uniform(0, 1e6):.3f}", 'q': f"{rng.uniform(0, 1e9):.2f}",
+                'O': event_time - 86_400_000, 'C': event_time, 'F': index, 'L': index + 1000, 'n': 1000
+            }
+        elif kind < 0.98:
+            stream = f"{name.lower()}@markPrice"
+            data = mark_price(name, event_time)
+        else:
+            stream = '!markPrice@arr'
+            data = [mark_price(other, event_time) for other in names]
+        output.append(json.dumps({'stream': stream, 'data': data}, separators=(',', ':')).encode())
+    return output
+
+
+def load_capture(path: str) -> List[bytes]:
+    with open(path, 'rb') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def event_type_for(stream: str):
+    """按流名称确定类型化结构，返回 (结构, 是否数组)；不支持的流返回None"""
+    if stream == '!markPrice@arr':
+        return BinanceMarkPriceEvent, True
+    suffix = stream.split('@', 1)[-1]
+    if suffix.startswith('kline_'):
+        return BinanceKlineEvent, False
+    if suffix == 'ticker':
+        return BinanceTickerEvent, False
+    if suffix.startswith('markPrice'):
+        return BinanceMarkPriceEvent, False
+    return None
+
+
+def timed(func, frames: List[bytes], repeat: int) -> float:
+    """返回最好一轮的每秒解码帧数"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for frame in frames:
+            func(frame)
+        best = min(best, time.perf_counter() - started)
+    return len(frames) / best if best > 0 else float('inf')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='JSON编解码基准')
+    parser.add_argument('--capture', default=None, help='逐行记录的组合流原始帧文件')
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--frames', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    frames = load_capture(args.capture) if args.capture else generate_frames(args.symbols, args.frames, args.seed)
+    total_mb = sum(len(frame) for frame in frames) / 1024 / 1024
+    print(f"编解码后端: {json_codec.get_codec_info()}")
+    print(f"帧数: {len(frames)}, 总大小: {total_mb:.2f} MB")
+
+    baseline = timed(json.loads, frames, args.repeat)
+    print(f"{'json.loads (标准库)':<28} {baseline:>12,.0f} 帧/s  1.00x")
+    if json_codec.JSON_BACKEND != 'json':
+        codec_rate = timed(json_codec.loads, frames, args.repeat)
+        print(f"{'json_codec.loads (' + json_codec.JSON_BACKEND + ')':<28} {codec_rate:>12,.0f} 帧/s  "
+              f"{codec_rate / baseline:.2f}x")
+
+    # 类型化解码：按流类型分组，与“标准库解码 + 手工转float”的常见处理方式对比
+    groups = defaultdict(list)
+    for frame in frames:
+        stream = json.loads(frame)['stream']
+        event_type = event_type_for(stream)
+        if event_type:
+            groups[event_type].append(frame)
+
+    for (event_type, many), group in groups.items():
+        def typed(frame, event_type=event_type, many=many):
+            return decode_typed(frame, event_type, combined=True, many=many)
+
+        def stdlib(frame, event_type=event_type, many=many):
+            message = json.loads(frame)
+            payload = message['data']
+            if many:
+                return [json_codec._from_mapping(event_type, item) for item in payload]
+            return json_codec._from_mapping(event_type, payload)
+
+        stdlib_rate = timed(stdlib, group, args.repeat)
+        typed_rate = timed(typed, group, args.repeat)
+        label = f"{event_type.__name__}{'[]' if many else ''}"
+        print(f"{label:<28} 标准库+转换 {stdlib_rate:>10,.0f} 帧/s, 类型化解码 {typed_rate:>10,.0f} 帧/s  "
+              f"{typed_rate / stdlib_rate:.2f}x  ({len(group)} 帧)")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Kronos推理基准脚本
+Kronos Inference Benchmark - 对比不同推理配置的延迟、内存与精度
+
+用法:
+    python scripts/kronos_benchmark.py precision --precision int8 bf16
+    python scripts/kronos_benchmark.py attention --batch-sizes 1 8 32 --seq-len 512
+    python scripts/kronos_benchmark.py runtime --runtime torchscript onnx --threads 4
+    python scripts/kronos_benchmark.py sampling --vocab-sizes 256 1024 --batch-sizes 1 32
+"""
+
+import argparse
+import copy
+import gc
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import psutil
+import torch
+import torch.nn.functional as F
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+sys.path.append(str(PROJECT_ROOT / 'Kronos-master'))
+
+from model.kronos import Kronos, KronosTokenizer, KronosPredictor, sample_from_logits, top_k_top_p_filtering  # noqa: E402
+from model.module import attention  # noqa: E402
+from model.export import export_kronos  # noqa: E402
+from app.services.ml.kronos_model_registry import TOKENIZER_PARAMS, MODEL_PARAMS  # noqa: E402
+
+# 存储的样本窗口（5分钟K线）
+SAMPLE_DATA_PATH = PROJECT_ROOT / 'Kronos-master' / 'examples' / 'data' / 'XSHG_5min_600977.csv'
+FEATURE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+
+
+def load_sample_window(lookback: int, pred_len: int):
+    """加载样本窗口，返回 (历史数据, 历史时间戳, 未来时间戳)"""
+    df = pd.read_csv(SAMPLE_DATA_PATH)
+    df['timestamps'] = pd.to_datetime(df['timestamps'])
+
+    x_df = df.loc[:lookback - 1, FEATURE_COLUMNS]
+    x_timestamp = df.loc[:lookback - 1, 'timestamps']
+    y_timestamp = df.loc[lookback:lookback + pred_len - 1, 'timestamps']
+    return x_df, x_timestamp, y_timestamp
+
+
+def build_models(seed: int):
+    """按服务中的结构参数构建tokenizer和模型（固定随机种子保证可复现）"""
+    torch.manual_seed(seed)
+    tokenizer = KronosTokenizer(**TOKENIZER_PARAMS).eval()
+    model = Kronos(**MODEL_PARAMS).eval()
+    return tokenizer, model
+
+
+def module_size_mb(module) -> float:
+    """按state_dict统计模块权重大小（兼容量化后的打包权重）"""
+    total = 0
+    for value in module.state_dict().values():
+        tensors = value if isinstance(value, (tuple, list)) else (value,)
+        for tensor in tensors:
+            if hasattr(tensor, 'element_size'):
+                total += tensor.numel() * tensor.element_size()
+    return total / 1024 / 1024
+
+
+def timed_predict(predictor, x_df, x_timestamp, y_timestamp, pred_len, seed, runs):
+    """以固定种子多次预测，返回 (最后一次预测结果, 平均每步延迟毫秒)"""
+    elapsed = []
+    pred_df = None
+    for _ in range(runs):
+        torch.manual_seed(seed)
+        start = time.perf_counter()
+        pred_df = predictor.predict(
+            df=x_df, x_timestamp=x_timestamp, y_timestamp=y_timestamp,
+            pred_len=pred_len, T=1.0, top_p=0.9, sample_count=1, verbose=False
+        )
+        elapsed.append(time.perf_counter() - start)
+    return pred_df, float(np.mean(elapsed)) / pred_len * 1000
+
+
+def precision_logits(predictor, x_df, x_timestamp, y_timestamp):
+    """
+    在固定输入上计算各位置的s1/s2 logits（确定性，不采样）
+    Tokenizes the window with the predictor's tokenizer and teacher-forces both heads on the resulting tokens
+    """
+    x, x_stamp, _, _, _ = predictor._prepare_inputs(x_df, x_timestamp, y_timestamp)
+    x = torch.from_numpy(x[np.newaxis]).to(predictor.device)
+    x_stamp = torch.from_numpy(x_stamp[np.newaxis]).to(predictor.device)
+    with torch.no_grad(), torch.autocast(device_type=torch.device(predictor.device).type, dtype=torch.bfloat16,
+                                         enabled=predictor.precision == 'bf16'):
+        s1_ids, s2_ids = predictor.tokenizer.encode(torch.clip(x, -predictor.clip, predictor.clip), half=True)
+        s1_logits, context = predictor.model.decode_s1(s1_ids, s2_ids, x_stamp)
+        s2_logits = predictor.model.decode_s2(context, s1_ids)
+    return s1_logits.float(), s2_logits.float()
+
+
+def logits_drift(base, other):
+    """返回 (平均KL(fp32 || 对比精度), top-1一致率)；随机初始化的模型分布平坦，top-1容易因近似并列而翻转，以KL为准"""
+    base_log, other_log = F.log_softmax(base, dim=-1), F.log_softmax(other, dim=-1)
+    kl = (base_log.exp() * (base_log - other_log)).sum(dim=-1).mean().item()
+    agreement = (base.argmax(dim=-1) == other.argmax(dim=-1)).float().mean().item()
+    return kl, agreement
+
+
+def _precision_rss_worker(precision, args, queue):
+    """子进程：只加载一份指定精度的模型并完成一次预测，返回进程RSS（MB）"""
+    x_df, x_timestamp, y_timestamp = load_sample_window(args.lookback, args.pred_len)
+    tokenizer, model = build_models(args.seed)
+    predictor = KronosPredictor(model, tokenizer, device='cpu', max_context=args.max_context, precision=precision)
+    del model
+    gc.collect()
+    timed_predict(predictor, x_df, x_timestamp, y_timestamp, args.pred_len, args.seed, 1)
+    queue.put(psutil.Process().memory_info().rss / 1024 / 1024)
+
+
+def measure_rss(precision, args) -> float:
+    """在独立进程中测量指定精度推理后的常驻内存，避免同一进程内多份模型互相干扰"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_precision_rss_worker, args=(precision, args, queue))
+    process.start()
+    rss_mb = queue.get()
+    process.join()
+    return rss_mb
+
+
+def run_precision_check(args) -> int:
+    """
+    对比量化/bf16与fp32，返回进程退出码
+    精度按固定输入上的logits比较（平均KL散度与top-1一致率），不受采样随机性影响；
+    延迟取带采样的完整预测，内存为独立进程推理后的RSS
+    """
+    x_df, x_timestamp, y_timestamp = load_sample_window(args.lookback, args.pred_len)
+    tokenizer, model = build_models(args.seed)
+
+    baseline = KronosPredictor(copy.deepcopy(model), tokenizer, device='cpu',
+                               max_context=args.max_context, precision='fp32')
+    _, base_latency = timed_predict(baseline, x_df, x_timestamp, y_timestamp,
+                                    args.pred_len, args.seed, args.runs)
+    base_logits = precision_logits(baseline, x_df, x_timestamp, y_timestamp)
+    base_rss = measure_rss('fp32', args)
+    print(f"fp32: {base_latency:.2f} ms/step, 模型权重 {module_size_mb(baseline.model):.2f} MB, 进程RSS {base_rss:.0f} MB")
+
+    failed = False
+    for precision in args.precision:
+        predictor = KronosPredictor(copy.deepcopy(model), tokenizer, device='cpu',
+                                    max_context=args.max_context, precision=precision)
+        _, latency = timed_predict(predictor, x_df, x_timestamp, y_timestamp,
+                                   args.pred_len, args.seed, args.runs)
+        logits = precision_logits(predictor, x_df, x_timestamp, y_timestamp)
+        s1_kl, s1_agreement = logits_drift(base_logits[0], logits[0])
+        s2_kl, s2_agreement = logits_drift(base_logits[1], logits[1])
+        rss = measure_rss(precision, args)
+
+        passed = max(s1_kl, s2_kl) <= args.max_kl
+        failed = failed or not passed
+
+        print(
+            f"{precision}: {latency:.2f} ms/step (x{base_latency / latency:.2f}), "
+            f"模型权重 {module_size_mb(predictor.model):.2f} MB, 进程RSS {rss:.0f} MB ({rss - base_rss:+.0f} MB), "
+            f"top-1一致率 s1 {s1_agreement:.2%} / s2 {s2_agreement:.2%}, "
+            f"平均KL s1 {s1_kl:.2e} / s2 {s2_kl:.2e} "
+            f"-> {'通过' if passed else '未通过'} (阈值 {args.max_kl:.0e})"
+        )
+
+    return 1 if failed else 0
+
+
+def time_attention(q, k, v, backend, runs) -> float:
+    """测量单次因果注意力前向的平均耗时（毫秒）"""
+    with torch.no_grad():
+        attention(q, k, v, is_causal=True, backend=backend)  # 预热
+        if q.is_cuda:
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        for _ in range(runs):
+            attention(q, k, v, is_causal=True, backend=backend)
+        if q.is_cuda:
+            torch.cuda.synchronize()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def run_attention_benchmark(args) -> int:
+    """在 [batch, heads, seq_len, head_dim] 形状上对比融合SDPA与参考实现"""
+    device = torch.device(args.device)
+    torch.manual_seed(args.seed)
+
+    print(f"设备: {device}, heads={args.heads}, seq_len={args.seq_len}, head_dim={args.head_dim}")
+    for batch_size in args.batch_sizes:
+        shape = (batch_size, args.heads, args.seq_len, args.head_dim)
+        q, k, v = (torch.randn(shape, device=device) for _ in range(3))
+
+        custom_ms = time_attention(q, k, v, 'custom', args.runs)
+        sdpa_ms = time_attention(q, k, v, 'sdpa', args.runs)
+        with torch.no_grad():
+            max_diff = (attention(q, k, v, is_causal=True, backend='custom')
+                        - attention(q, k, v, is_causal=True, backend='sdpa')).abs().max().item()
+
+        print(
+            f"batch={batch_size:>3}: custom {custom_ms:8.2f} ms, sdpa {sdpa_ms:8.2f} ms "
+            f"(x{custom_ms / sdpa_ms:.2f}), 最大绝对差 {max_diff:.2e}"
+        )
+    return 0
+
+
+def run_runtime_benchmark(args) -> int:
+    """对比eager与导出运行时（TorchScript/ONNX Runtime）的延迟与一致性"""
+    x_df, x_timestamp, y_timestamp = load_sample_window(args.lookback, args.pred_len)
+    tokenizer, model = build_models(args.seed)
+
+    # 导出图不支持KV缓存，eager基线同样走完整窗口路径以便逐值对比
+    baseline = KronosPredictor(copy.deepcopy(model), copy.deepcopy(tokenizer), device='cpu',
+                               max_context=args.max_context, use_kv_cache=False,
+                               intra_op_threads=args.threads)
+    base_df, base_latency = timed_predict(baseline, x_df, x_timestamp, y_timestamp,
+                                          args.pred_len, args.seed, args.runs)
+    print(f"eager: {base_latency:.2f} ms/step")
+
+    with tempfile.TemporaryDirectory() as export_root:
+        for runtime in args.runtime:
+            artifact_dir = f"{export_root}/{runtime}"
+            start = time.perf_counter()
+            export_kronos(copy.deepcopy(tokenizer), copy.deepcopy(model), artifact_dir,
+                          runtime=runtime, max_context=args.max_context)
+            export_seconds = time.perf_counter() - start
+
+            predictor = KronosPredictor(None, None, device='cpu', max_context=args.max_context,
+                                        runtime=runtime, artifact_dir=artifact_dir,
+                                        intra_op_threads=args.threads)
+            timed_predict(predictor, x_df, x_timestamp, y_timestamp, args.pred_len, args.seed, 1)  # 预热
+            pred_df, latency = timed_predict(predictor, x_df, x_timestamp, y_timestamp,
+                                             args.pred_len, args.seed, args.runs)
+            max_diff = float(np.max(np.abs(pred_df['close'].values - base_df['close'].values)))
+            print(
+                f"{runtime}: {latency:.2f} ms/step (x{base_latency / latency:.2f}), "
+                f"导出耗时 {export_seconds:.1f}s, 收盘价最大绝对差 {max_diff:.2e}"
+            )
+    return 0
+
+
+def reference_sample(logits, temperature, top_k, top_p, generator):
+    """优化前的采样路径：整表排序 + scatter掩码 + 全词表multinomial"""
+    logits = top_k_top_p_filtering(logits / temperature, top_k=top_k, top_p=top_p)
+    return torch.multinomial(torch.softmax(logits, dim=-1), num_samples=1, generator=generator)
+
+
+def time_sampler(sampler, logits, args, runs) -> float:
+    """测量单次采样的平均耗时（微秒）"""
+    generator = torch.Generator().manual_seed(args.seed)
+    sampler(logits.clone(), args.temperature, args.top_k, args.top_p, generator)  # 预热
+    start = time.perf_counter()
+    for _ in range(runs):
+        sampler(logits.clone(), args.temperature, args.top_k, args.top_p, generator)
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def run_sampling_benchmark(args) -> int:
+    """对比整表排序与部分top-k的nucleus采样每步耗时，并校验采样结果落在参考nucleus内且可复现"""
+    def optimized_sample(logits, temperature, top_k, top_p, generator):
+        return sample_from_logits(logits, temperature=temperature, top_k=top_k, top_p=top_p, generator=generator)
+
+    torch.manual_seed(args.seed)
+    print(f"top_k={args.top_k}, top_p={args.top_p}, temperature={args.temperature}, logit_scale={args.logit_scale}")
+    failed = False
+    for vocab_size in args.vocab_sizes:
+        for batch_size in args.batch_sizes:
+            logits = torch.randn(batch_size, vocab_size) * args.logit_scale
+
+            reference_us = time_sampler(reference_sample, logits, args, args.runs)
+            optimized_us = time_sampler(optimized_sample, logits, args, args.runs)
+
+            # 采样结果必须落在参考实现保留的token集合内，且同一种子结果一致
+            kept = top_k_top_p_filtering(logits / args.temperature, top_k=args.top_k, top_p=args.top_p) > -float('inf')
+            draws = optimized_sample(logits, args.temperature, args.top_k, args.top_p, torch.Generator().manual_seed(args.seed))
+            repeat = optimized_sample(logits, args.temperature, args.top_k, args.top_p, torch.Generator().manual_seed(args.seed))
+            in_nucleus = bool(kept.gather(-1, draws).all())
+            reproducible = torch.equal(draws, repeat)
+            failed = failed or not (in_nucleus and reproducible)
+
+            print(
+                f"vocab={vocab_size:>5} batch={batch_size:>3}: 参考 {reference_us:8.1f} us, 优化 {optimized_us:8.1f} us "
+                f"(x{reference_us / optimized_us:.2f}), nucleus内 {'是' if in_nucleus else '否'}, "
+                f"可复现 {'是' if reproducible else '否'}"
+            )
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Kronos推理基准')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    precision_parser = subparsers.add_parser('precision', help='对比int8/bf16与fp32的延迟、进程RSS与logits精度')
+    precision_parser.add_argument('--precision', nargs='+', default=['int8', 'bf16'], choices=['int8', 'bf16'])
+    precision_parser.add_argument('--lookback', type=int, default=400)
+    precision_parser.add_argument('--pred-len', type=int, default=12)
+    precision_parser.add_argument('--max-context', type=int, default=512)
+    precision_parser.add_argument('--runs', type=int, default=3)
+    precision_parser.add_argument('--seed', type=int, default=42)
+    precision_parser.add_argument('--max-kl', type=float, default=0.01, help='s1/s2 logits相对fp32的平均KL散度阈值')
+    precision_parser.set_defaults(func=run_precision_check)
+
+    attention_parser = subparsers.add_parser('attention', help='对比融合SDPA与参考注意力实现')
+    attention_parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 32])
+    attention_parser.add_argument('--heads', type=int, default=MODEL_PARAMS['n_heads'])
+    attention_parser.add_argument('--seq-len', type=int, default=512)
+    attention_parser.add_argument('--head-dim', type=int, default=MODEL_PARAMS['d_model'] // MODEL_PARAMS['n_heads'])
+    attention_parser.add_argument('--device', default='cuda' if torch.cuda.is_available() else 'cpu')
+    attention_parser.add_argument('--runs', type=int, default=10)
+    attention_parser.add_argument('--seed', type=int, default=42)
+    attention_parser.set_defaults(func=run_attention_benchmark)
+
+    runtime_parser = subparsers.add_parser('runtime', help='对比eager与TorchScript/ONNX Runtime推理')
+    runtime_parser.add_argument('--runtime', nargs='+', default=['torchscript', 'onnx'], choices=['torchscript', 'onnx'])
+    runtime_parser.add_argument('--threads', type=int, default=None, help='intra-op线程数')
+    runtime_parser.add_argument('--lookback', type=int, default=400)
+    runtime_parser.add_argument('--pred-len', type=int, default=12)
+    runtime_parser.add_argument('--max-context', type=int, default=512)
+    runtime_parser.add_argument('--runs', type=int, default=3)
+    runtime_parser.add_argument('--seed', type=int, default=42)
+    runtime_parser.set_defaults(func=run_runtime_benchmark)
+
+    sampling_parser = subparsers.add_parser('sampling', help='对比整表排序与部分top-k的nucleus采样')
+    sampling_parser.add_argument('--vocab-sizes', nargs='+', type=int, default=[2 ** MODEL_PARAMS['s1_bits'], 1024])
+    sampling_parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 32])
+    sampling_parser.add_argument('--top-k', type=int, default=0)
+    sampling_parser.add_argument('--top-p', type=float, default=0.9)
+    sampling_parser.add_argument('--temperature', type=float, default=1.0)
+    sampling_parser.add_argument('--logit-scale', type=float, default=4.0, help='随机logits的缩放，越大分布越尖锐')
+    sampling_parser.add_argument('--runs', type=int, default=2000)
+    sampling_parser.add_argument('--seed', type=int, default=42)
+    sampling_parser.set_defaults(func=run_sampling_benchmark)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
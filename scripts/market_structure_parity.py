@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+市场结构检测一致性校验脚本
+Market Structure Parity - 对比 app/utils/market_structure.py 与改写前的逐根循环
+
+用法:
+    python scripts/market_structure_parity.py
+    python scripts/market_structure_parity.py --bars 20000 --runs 20 --seed 7
+
+下面的 reference_* 函数是改写前 MarketStructureIndicator.find_swing_points /
+calculate_support_resistance 与 indicators.calculate_support_resistance 的原始循环（逐字保留）。
+要求摆动点逐根一致、聚类的簇划分一致；簇均值由前缀和计算，与原来的逐个求和只在
+末位舍入上可能不同，按1e-9相对误差比较。最后给出长回看（默认约一个月的15m K线）下的耗时对比
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from app.utils.indicators import calculate_support_resistance  # noqa: E402
+from app.utils.tradingview_indicators import MarketStructureIndicator  # noqa: E402
+
+
+# ========== 改写前的原始实现 ==========
+
+def reference_find_swing_points(df: pd.DataFrame, window: int = 5) -> pd.DataFrame:
+    result_df = df.copy()
+    swing_highs = []
+    swing_lows = []
+    for i in range(window, len(df) - window):
+        is_swing_high = True
+        current_high = df['high'].iloc[i]
+        for j in range(i - window, i + window + 1):
+            if j != i and df['high'].iloc[j] >= current_high:
+                is_swing_high = False
+                break
+        if is_swing_high:
+            swing_highs.append(i)
+        is_swing_low = True
+        current_low = df['low'].iloc[i]
+        for j in range(i - window, i + window + 1):
+            if j != i and df['low'].iloc[j] <= current_low:
+                is_swing_low = False
+                break
+        if is_swing_low:
+            swing_lows.append(i)
+    result_df['swing_high'] = False
+    result_df['swing_low'] = False
+    result_df.loc[swing_highs, 'swing_high'] = True
+    result_df.loc[swing_lows, 'swing_low'] = True
+    return result_df
+
+
+def reference_market_support_resistance(df: pd.DataFrame, min_touches: int = 2) -> Dict[str, List[float]]:
+    swing_df = reference_find_swing_points(df)
+    swing_high_prices = swing_df.loc[swing_df['swing_high'], 'high'].tolist()
+    swing_low_prices = swing_df.loc[swing_df['swing_low'], 'low'].tolist()
+    all_prices = swing_high_prices + swing_low_prices
+    if not all_prices:
+        return {'support': [], 'resistance': []}
+    price_tolerance = (max(all_prices) - min(all_prices)) * 0.01
+    support_levels = []
+    resistance_levels = []
+    processed_prices = set()
+    for price in sorted(all_prices):
+        if price in processed_prices:
+            continue
+        cluster = [p for p in all_prices if abs(p - price) <= price_tolerance]
+        if len(cluster) >= min_touches:
+            avg_price = sum(cluster) / len(cluster)
+            current_price = df['close'].iloc[-1]
+            if avg_price < current_price:
+                support_levels.append(avg_price)
+            else:
+                resistance_levels.append(avg_price)
+        processed_prices.update(cluster)
+    return {
+        'support': sorted(support_levels, reverse=True)[:5],
+        'resistance': sorted(resistance_levels)[:5]
+    }
+
+
+def reference_support_resistance(klines: List[Dict[str, Any]], lookback_period: int = 20,
+                                 min_touches: int = 2) -> Dict[str, List[float]]:
+    if len(klines) < lookback_period:
+        return {'support_levels': [], 'resistance_levels': []}
+    highs = [float(k.get('high', k.get('high_price', 0))) for k in klines]
+    lows = [float(k.get('low', k.get('low_price', 0))) for k in klines]
+    local_highs = []
+    local_lows = []
+    for i in range(lookback_period // 2, len(highs) - lookback_period // 2):
+        is_local_high = True
+        for j in range(i - lookback_period // 2, i + lookback_period // 2 + 1):
+            if j != i and highs[j] >= highs[i]:
+                is_local_high = False
+                break
+        if is_local_high:
+            local_highs.append(highs[i])
+        is_local_low = True
+        for j in range(i - lookback_period // 2, i + lookback_period // 2 + 1):
+            if j != i and lows[j] <= lows[i]:
+                is_local_low = False
+                break
+        if is_local_low:
+            local_lows.append(lows[i])
+
+    def cluster_levels(levels: List[float], tolerance: float = 0.01) -> List[float]:
+        if not levels:
+            return []
+        sorted_levels = sorted(levels)
+        clusters = []
+        current_cluster = [sorted_levels[0]]
+        for level in sorted_levels[1:]:
+            if abs(level - current_cluster[-1]) / current_cluster[-1] <= tolerance:
+                current_cluster.append(level)
+            else:
+                if len(current_cluster) >= min_touches:
+                    clusters.append(sum(current_cluster) / len(current_cluster))
+                current_cluster = [level]
+        if len(current_cluster) >= min_touches:
+            clusters.append(sum(current_cluster) / len(current_cluster))
+        return clusters
+
+    return {
+        'support_levels': cluster_levels(local_lows),
+        'resistance_levels': cluster_levels(local_highs)
+    }
+
+
+# ========== 校验 ==========
+
+def generate_candles(bars: int, seed: int) -> pd.DataFrame:
+    """随机游走K线，价格按0.1取整以制造相等的高低点（覆盖严格比较分支）"""
+    rng = random.Random(seed)
+    price = rng.uniform(50, 5000)
+    rows = []
+    for _ in range(bars):
+        open_ = price
+        price = max(price * (1 + rng.gauss(0, 0.004)), 1.0)
+        high = round(max(open_, price) * (1 + abs(rng.gauss(0, 0.001))), 1)
+        low = round(min(open_, price) * (1 - abs(rng.gauss(0, 0.001))), 1)
+        rows.append({'open': open_, 'high': high, 'low': low, 'close': price})
+    return pd.DataFrame(rows)
+
+
+def _close(a: List[float], b: List[float]) -> bool:
+    return len(a) == len(b) and np.allclose(a, b, rtol=1e-9, atol=0)
+
+
+def check_run(bars: int, seed: int) -> List[str]:
+    df = generate_candles(bars, seed)
+    failures = []
+
+    for window in (0, 1, 5, 12):
+        got = MarketStructureIndicator.find_swing_points(df, window=window)
+        expected = reference_find_swing_points(df, window=window)
+        for column in ('swing_high', 'swing_low'):
+            if not got[column].equals(expected[column]):
+                failures.append(f"seed={seed} find_swing_points window={window} {column}")
+
+    for min_touches in (1, 2, 3):
+        got = MarketStructureIndicator.calculate_support_resistance(df, min_touches=min_touches)
+        expected = reference_market_support_resistance(df, min_touches=min_touches)
+        for key in ('support', 'resistance'):
+            if not _close(got[key], expected[key]):
+                failures.append(f"seed={seed} MarketStructure S/R min_touches={min_touches} {key}: "
+                                f"{got[key]} vs {expected[key]}")
+
+    klines = df.to_dict('records')
+    for lookback, min_touches in ((20, 2), (10, 1), (50, 3)):
+        got = calculate_support_resistance(klines, lookback, min_touches)
+        expected = reference_support_resistance(klines, lookback, min_touches)
+        for key in ('support_levels', 'resistance_levels'):
+            if not _close(got[key], expected[key]):
+                failures.append(f"seed={seed} calculate_support_resistance ({lookback}, {min_touches}) {key}")
+    return failures
+
+
+def _timed(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def benchmark(bars: int, seed: int) -> None:
+    df = generate_candles(bars, seed)
+    klines = df.to_dict('records')
+
+    loop_ms = _timed(lambda: reference_market_support_resistance(df))
+    vector_ms = _timed(lambda: MarketStructureIndicator.calculate_support_resistance(df))
+    print(f"MarketStructure 摆动点+支撑阻力 {bars} 根: 原始循环 {loop_ms:.1f} ms, "
+          f"向量化 {vector_ms:.2f} ms ({loop_ms / vector_ms:.0f}x)")
+
+    loop_ms = _timed(lambda: reference_support_resistance(klines, 40))
+    vector_ms = _timed(lambda: calculate_support_resistance(klines, 40))
+    print(f"calculate_support_resistance(lookback=40) {bars} 根: 原始循环 {loop_ms:.1f} ms, "
+          f"向量化 {vector_ms:.2f} ms ({loop_ms / vector_ms:.0f}x)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='市场结构检测一致性校验')
+    parser.add_argument('--bars', type=int, default=1000)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--benchmark-bars', type=int, default=2880, help='基准测试K线数（默认30天15m）')
+    args = parser.parse_args()
+
+    failures = []
+    for run in range(args.runs):
+        failures.extend(check_run(args.bars, args.seed + run))
+
+    if failures:
+        print(f"❌ 发现 {len(failures)} 处不一致:")
+        for line in failures[:20]:
+            print(f"  {line}")
+        return 1
+
+    print(f"✅ {args.runs} 组 × {args.bars} 根K线的摆动点与支撑阻力位与原始循环一致")
+    benchmark(args.benchmark_bars, args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+增量指标一致性校验脚本
+Streaming Indicator Parity - 逐根对比增量指标引擎与 app/utils/indicators.py 批量实现
+
+用法:
+    python scripts/streaming_indicator_parity.py
+    python scripts/streaming_indicator_parity.py --bars 2000 --runs 20 --seed 7
+
+在随机游走K线上逐根推进 IndicatorState，要求每一根K线上的值与批量实现在完整序列上
+的对应位置逐位相等（==，不设容差）；中途把状态经JSON导出/恢复后继续推进，验证快照无损，
+最后给出整段批量重算与单根增量更新的耗时对比
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from app.utils.indicators import (  # noqa: E402
+    BollingerBandsIndicator, MACDIndicator, MovingAverageIndicator, RSIIndicator,
+    StochasticIndicator, SuperTrendIndicator
+)
+from app.utils.streaming_indicators import IndicatorState  # noqa: E402
+
+
+def generate_candles(bars: int, seed: int) -> Tuple[List[float], List[float], List[float]]:
+    """随机游走K线（含少量平盘K线，覆盖 high == low 分支）"""
+    rng = random.Random(seed)
+    price = rng.uniform(0.01, 50000)
+    highs, lows, closes = [], [], []
+    for _ in range(bars):
+        if rng.random() < 0.02:
+            highs.append(price)
+            lows.append(price)
+            closes.append(price)
+            continue
+        open_ = price
+        price = max(price * (1 + rng.gauss(0, 0.01)), 1e-8)
+        highs.append(max(open_, price) * (1 + abs(rng.gauss(0, 0.003))))
+        lows.append(min(open_, price) * (1 - abs(rng.gauss(0, 0.003))))
+        closes.append(price)
+    return highs, lows, closes
+
+
+def _aligned_rsi(closes: List[float], period: int) -> List[Any]:
+    """
+    RSIIndicator 把第一个RSI值放在下标1、末尾补None（整体前移了period-1位），
+    这里按K线位置对齐后再比较数值
+    """
+    values = [v for v in RSIIndicator(period).calculate(closes) if v is not None]
+    return [None] * (len(closes) - len(values)) + values
+
+
+def batch_series(highs: List[float], lows: List[float], closes: List[float]) -> Dict[str, List[Any]]:
+    """批量实现在完整序列上的结果，键与 IndicatorState.values() 一致"""
+    macd = MACDIndicator(12, 26, 9).calculate(closes)
+    bands = BollingerBandsIndicator(20, 2.0).calculate(closes)
+    stoch = StochasticIndicator(14, 3, 3).calculate(highs, lows, closes)
+    supertrend, trend_up = SuperTrendIndicator(10, 3.0).calculate(highs, lows, closes)
+    atr = SuperTrendIndicator(14).calculate_atr(np.array(highs), np.array(lows), np.array(closes)).tolist()
+    return {
+        'sma_20': MovingAverageIndicator(20, 'sma').calculate(closes),
+        'sma_50': MovingAverageIndicator(50, 'sma').calculate(closes),
+        'ema_12': MovingAverageIndicator(12, 'ema').calculate(closes),
+        'ema_26': MovingAverageIndicator(26, 'ema').calculate(closes),
+        'macd': macd['macd'],
+        'macd_signal': macd['signal'],
+        'macd_hist': macd['histogram'],
+        'rsi': _aligned_rsi(closes, 14),
+        'atr': atr,
+        'supertrend': supertrend,
+        'supertrend_up': trend_up,
+        'bb_upper': bands['upper'],
+        'bb_middle': bands['middle'],
+        'bb_lower': bands['lower'],
+        'stoch_k': stoch['%K'],
+        'stoch_d': stoch['%D'],
+    }
+
+
+def check_run(bars: int, seed: int) -> List[str]:
+    highs, lows, closes = generate_candles(bars, seed)
+    expected = batch_series(highs, lows, closes)
+    restore_at = bars // 2
+
+    mismatches = []
+    state = IndicatorState()
+    for i in range(bars):
+        if i == restore_at:
+            state = IndicatorState.from_snapshot(json.loads(json.dumps(state.snapshot())))
+        state.update(i, highs[i], lows[i], closes[i])
+        values = state.values()
+        for name, series in expected.items():
+            # SuperTrend批量实现要求至少period根K线，此前无可比值
+            if name.startswith('supertrend') and i < 9:
+                continue
+            if values[name] != series[i]:
+                mismatches.append(f"seed={seed} bar={i} {name}: streaming={values[name]!r} batch={series[i]!r}")
+    return mismatches
+
+
+def benchmark(bars: int, seed: int) -> None:
+    highs, lows, closes = generate_candles(bars, seed)
+    started = time.perf_counter()
+    batch_series(highs, lows, closes)
+    batch_ms = (time.perf_counter() - started) * 1000
+
+    state = IndicatorState()
+    for i in range(bars - 1):
+        state.update(i, highs[i], lows[i], closes[i])
+    started = time.perf_counter()
+    state.update(bars - 1, highs[-1], lows[-1], closes[-1])
+    step_ms = (time.perf_counter() - started) * 1000
+
+    print(f"批量重算 {bars} 根: {batch_ms:.2f} ms, 增量更新 1 根: {step_ms:.4f} ms "
+          f"({batch_ms / step_ms:.0f}x)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='增量指标一致性校验')
+    parser.add_argument('--bars', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    failures = []
+    for run in range(args.runs):
+        failures.extend(check_run(args.bars, args.seed + run))
+
+    if failures:
+        print(f"❌ 发现 {len(failures)} 处不一致:")
+        for line in failures[:20]:
+            print(f"  {line}")
+        return 1
+
+    print(f"✅ {args.runs} 组 × {args.bars} 根K线逐根一致（含JSON快照恢复）")
+    benchmark(args.bars, args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())